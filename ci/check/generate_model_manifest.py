@@ -0,0 +1,191 @@
+"""Generates flowvision/models/_manifest.py
+
+The manifest lets ``flowvision.models`` populate the ``ModelCreator`` registry and
+resolve the names it exports without importing every architecture module. It is
+built by parsing the model sources, so it can be regenerated without a working
+OneFlow install:
+
+    python ci/check/generate_model_manifest.py --source_dir .
+
+With --check, the script fails instead of writing when the manifest is stale.
+"""
+
+import argparse
+import ast
+import os
+import sys
+
+MODELS_DIR = os.path.join("flowvision", "models")
+MANIFEST = os.path.join(MODELS_DIR, "_manifest.py")
+
+# modules star-imported by flowvision/models/__init__.py before lazy loading, the
+# later ones win when several of them export the same name
+EXPORT_MODULES = [
+    "alexnet",
+    "densenet",
+    "vgg",
+    "mnasnet",
+    "resnet",
+    "inception_v3",
+    "googlenet",
+    "shufflenet_v2",
+    "mobilenet_v2",
+    "mobilenet_v3",
+    "squeezenet",
+    "conv_mixer",
+    "swin_transformer",
+    "crossformer",
+    "pvt",
+    "cswin",
+    "res_mlp",
+    "regionvit",
+    "mlp_mixer",
+    "rexnet",
+    "rexnet_lite",
+    "ghostnet",
+    "res2net",
+    "efficientnet",
+    "vision_transformer",
+    "convnext",
+]
+SUBPACKAGES = ["neural_style_transfer", "detection", "segmentation"]
+# names that moved out of the model modules, still exported through the module
+# importing them, unless a model module defines them again
+MOVED_EXPORTS = {"DropPath": "swin_transformer", "drop_path": "swin_transformer"}
+
+HEADER = '''"""
+Model manifest of flowvision.models, generated by ci/check/generate_model_manifest.py.
+Do not edit by hand.
+"""
+'''
+
+
+def _is_register_model(decorator):
+    return (
+        isinstance(decorator, ast.Attribute)
+        and decorator.attr == "register_model"
+        and isinstance(decorator.value, ast.Name)
+        and decorator.value.id == "ModelCreator"
+    )
+
+
+def _pretrained_names(tree):
+    for node in tree.body:
+        if (
+            isinstance(node, ast.Assign)
+            and any(
+                isinstance(t, ast.Name) and t.id == "model_urls" for t in node.targets
+            )
+            and isinstance(node.value, ast.Dict)
+        ):
+            names = set()
+            for key, value in zip(node.value.keys, node.value.values):
+                if not isinstance(key, ast.Constant):
+                    continue
+                if isinstance(value, ast.Constant) and not value.value:
+                    continue
+                names.add(key.value)
+            return names
+    return set()
+
+
+def _exported_names(tree):
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(t, ast.Name) and t.id == "__all__" for t in node.targets
+        ):
+            try:
+                return list(ast.literal_eval(node.value))
+            except ValueError:
+                break
+    names = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+            names.append(node.name)
+        elif isinstance(node, ast.Assign):
+            names.extend(t.id for t in node.targets if isinstance(t, ast.Name))
+    return [name for name in names if not name.startswith("_")]
+
+
+def _parse(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return ast.parse(f.read(), filename=path)
+
+
+def build_manifest(source_dir):
+    models_dir = os.path.join(source_dir, MODELS_DIR)
+    models = {}
+    for dirpath, dirnames, filenames in os.walk(models_dir):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("__"))
+        for filename in sorted(filenames):
+            if not filename.endswith(".py") or filename.startswith("_"):
+                continue
+            path = os.path.join(dirpath, filename)
+            rel = os.path.relpath(path, models_dir)[: -len(".py")]
+            module = rel.replace(os.sep, ".")
+            tree = _parse(path)
+            pretrained = _pretrained_names(tree)
+            for node in tree.body:
+                if isinstance(node, ast.FunctionDef) and any(
+                    _is_register_model(d) for d in node.decorator_list
+                ):
+                    models[node.name] = (module, node.name in pretrained)
+
+    exports = dict(MOVED_EXPORTS)
+    for module in EXPORT_MODULES:
+        tree = _parse(os.path.join(models_dir, module + ".py"))
+        for name in _exported_names(tree):
+            exports[name] = module
+    for module in SUBPACKAGES:
+        exports[module] = module
+    return models, exports
+
+
+def render(models, exports):
+    lines = [
+        HEADER,
+        "# model name -> (module relative to flowvision.models, has pretrained weights)",
+    ]
+    lines.append("MODEL_MANIFEST = {")
+    for name in sorted(models):
+        module, pretrained = models[name]
+        lines.append('    "{}": ("{}", {}),'.format(name, module, pretrained))
+    lines.append("}")
+    lines.append("")
+    lines.append("# public name of flowvision.models -> module defining it")
+    lines.append("LAZY_EXPORTS = {")
+    for name in sorted(exports):
+        lines.append('    "{}": "{}",'.format(name, exports[name]))
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generates the model manifest.")
+    parser.add_argument(
+        "--source_dir", default=".", help="Root directory of the source code"
+    )
+    parser.add_argument(
+        "--check",
+        default=False,
+        action="store_true",
+        help="If specified, fail when the manifest is out of date instead of writing it",
+    )
+    arguments = parser.parse_args()
+
+    content = render(*build_manifest(arguments.source_dir))
+    path = os.path.join(arguments.source_dir, MANIFEST)
+    if arguments.check:
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() != content:
+                print(
+                    "{} is out of date, run ci/check/generate_model_manifest.py".format(
+                        MANIFEST
+                    )
+                )
+                sys.exit(1)
+        print("{} is up to date".format(MANIFEST))
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        print("{} written".format(MANIFEST))
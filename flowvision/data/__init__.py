@@ -2,6 +2,9 @@ from .auto_augment import (
     AutoAugment,
     RandAugment,
     AugMixAugment,
+    BatchAutoAugment,
+    BatchRandAugment,
+    BatchAugMixAugment,
     rand_augment_transform,
     augment_and_mix_transform,
     auto_augment_transform,
@@ -12,11 +15,14 @@ from .mixup import (
     rand_bbox,
     rand_bbox_minmax,
     cutmix_bbox_and_lam,
+    cutmix_bbox_and_lam_batch,
     Mixup,
 )
 from .transforms_factory import (
+    create_auto_augment,
     create_transform,
     transforms_imagenet_eval,
     transforms_imagenet_train,
 )
+from .loader import fast_collate, PrefetchLoader
 from .constants import *
@@ -7,6 +7,9 @@ Papers:
     Learning Data Augmentation Strategies for Object Detection - https://arxiv.org/abs/1906.11172
     RandAugment: Practical automated data augmentation... - https://arxiv.org/abs/1909.13719
     AugMix: A Simple Data Processing Method to Improve Robustness and Uncertainty - https://arxiv.org/abs/1912.02781
+
+Every transform also comes in a batched version (``batched=True`` in the factories), which
+runs after collation on uint8 [N, C, H, W] batches, on the device they are on.
 """
 
 import random
@@ -15,6 +18,9 @@ import re
 from PIL import Image, ImageOps, ImageEnhance, ImageChops
 import PIL
 import numpy as np
+import oneflow as flow
+
+import flowvision.transforms.functional_tensor as F_t
 
 
 _PIL_VER = tuple([int(x) for x in PIL.__version__.split(".")[:2]])
@@ -162,6 +168,95 @@ def sharpness(img, factor, **__):
     return ImageEnhance.Sharpness(img).enhance(factor)
 
 
+# Batched ops, on uint8 [N, C, H, W] batches with one value of every argument per sample.
+# The affine ops resample bilinearly, or with the nearest pixel when Image.NEAREST is set
+# as interpolation, grid_sample has no bicubic mode.
+
+
+def _affine_batch(img, coeffs, fill=_FILL, interpolation="bilinear", **__):
+    matrix = flow.stack(coeffs, dim=1).view(-1, 2, 3)
+    return F_t.affine_batch(img, matrix, interpolation=interpolation, fill=fill)
+
+
+def shear_x_batch(img, factor, **kwargs):
+    one, zero = flow.ones_like(factor), flow.zeros_like(factor)
+    return _affine_batch(img, (one, factor, zero, zero, one, zero), **kwargs)
+
+
+def shear_y_batch(img, factor, **kwargs):
+    one, zero = flow.ones_like(factor), flow.zeros_like(factor)
+    return _affine_batch(img, (one, zero, zero, factor, one, zero), **kwargs)
+
+
+def translate_x_rel_batch(img, pct, **kwargs):
+    return translate_x_abs_batch(img, pct * img.shape[-1], **kwargs)
+
+
+def translate_y_rel_batch(img, pct, **kwargs):
+    return translate_y_abs_batch(img, pct * img.shape[-2], **kwargs)
+
+
+def translate_x_abs_batch(img, pixels, **kwargs):
+    one, zero = flow.ones_like(pixels), flow.zeros_like(pixels)
+    return _affine_batch(img, (one, zero, pixels, zero, one, zero), **kwargs)
+
+
+def translate_y_abs_batch(img, pixels, **kwargs):
+    one, zero = flow.ones_like(pixels), flow.zeros_like(pixels)
+    return _affine_batch(img, (one, zero, zero, zero, one, pixels), **kwargs)
+
+
+def rotate_batch(img, degrees, **kwargs):
+    # rotation around the image center, as the matrix of rotate() above
+    height, width = img.shape[-2:]
+    center_x, center_y = width / 2.0, height / 2.0
+    angle = degrees * (-math.pi / 180.0)
+    cos, sin = flow.cos(angle), flow.sin(angle)
+    offset_x = center_x - cos * center_x - sin * center_y
+    offset_y = center_y + sin * center_x - cos * center_y
+    return _affine_batch(img, (cos, sin, offset_x, -sin, cos, offset_y), **kwargs)
+
+
+def auto_contrast_batch(img, **__):
+    return F_t.autocontrast_batch(img)
+
+
+def invert_batch(img, **__):
+    return F_t.invert_batch(img)
+
+
+def equalize_batch(img, **__):
+    return F_t.equalize_batch(img)
+
+
+def solarize_batch(img, thresh, **__):
+    return F_t.solarize_batch(img, thresh)
+
+
+def solarize_add_batch(img, add, thresh=128, **__):
+    return F_t.solarize_add_batch(img, add, thresh)
+
+
+def posterize_batch(img, bits_to_keep, **__):
+    return F_t.posterize_batch(img, bits_to_keep)
+
+
+def contrast_batch(img, factor, **__):
+    return F_t.adjust_contrast_batch(img, factor)
+
+
+def color_batch(img, factor, **__):
+    return F_t.adjust_saturation_batch(img, factor)
+
+
+def brightness_batch(img, factor, **__):
+    return F_t.adjust_brightness_batch(img, factor)
+
+
+def sharpness_batch(img, factor, **__):
+    return F_t.adjust_sharpness_batch(img, factor)
+
+
 def _randomly_negate(v):
     """With 50% prob, negate the value"""
     return -v if random.random() > 0.5 else v
@@ -304,6 +399,34 @@ NAME_TO_OP = {
 }
 
 
+NAME_TO_BATCH_OP = {
+    "AutoContrast": auto_contrast_batch,
+    "Equalize": equalize_batch,
+    "Invert": invert_batch,
+    "Rotate": rotate_batch,
+    "Posterize": posterize_batch,
+    "PosterizeIncreasing": posterize_batch,
+    "PosterizeOriginal": posterize_batch,
+    "Solarize": solarize_batch,
+    "SolarizeIncreasing": solarize_batch,
+    "SolarizeAdd": solarize_add_batch,
+    "Color": color_batch,
+    "ColorIncreasing": color_batch,
+    "Contrast": contrast_batch,
+    "ContrastIncreasing": contrast_batch,
+    "Brightness": brightness_batch,
+    "BrightnessIncreasing": brightness_batch,
+    "Sharpness": sharpness_batch,
+    "SharpnessIncreasing": sharpness_batch,
+    "ShearX": shear_x_batch,
+    "ShearY": shear_y_batch,
+    "TranslateX": translate_x_abs_batch,
+    "TranslateY": translate_y_abs_batch,
+    "TranslateXRel": translate_x_rel_batch,
+    "TranslateYRel": translate_y_rel_batch,
+}
+
+
 class AugmentOp:
     def __init__(self, name, prob=0.5, magnitude=10, hparams=None):
         """
@@ -312,6 +435,7 @@ class AugmentOp:
         hparams = hparams or _HPARAMS_DEFAULT
         self.name = name
         self.aug_fn = NAME_TO_OP[name]
+        self.batch_fn = NAME_TO_BATCH_OP[name]
         self.level_fn = LEVEL_TO_ARG[name]
         self.prob = prob
         self.magnitude = magnitude
@@ -322,6 +446,12 @@ class AugmentOp:
             if "interpolation" in hparams
             else _RANDOM_INTERPOLATION,
         )
+        self.batch_kwargs = dict(
+            fill=self.kwargs["fillcolor"],
+            interpolation="nearest"
+            if self.kwargs["resample"] == Image.NEAREST
+            else "bilinear",
+        )
 
         # If magnitude_std is > 0, we introduce some randomness
         # in the usually fixed policy and sample magnitude from a normal distribution
@@ -331,9 +461,12 @@ class AugmentOp:
         self.magnitude_std = self.hparams.get("magnitude_std", 0)
         self.magnitude_max = self.hparams.get("magnitude_max", None)
 
-    def __call__(self, img):
+    def sample_level_args(self):
+        """
+        draw whether the op is applied and its arguments, returns None when it is skipped
+        """
         if self.prob < 1.0 and random.random() > self.prob:
-            return img
+            return None
         magnitude = self.magnitude
         if self.magnitude_std > 0:
             # magnitude randomization enabled
@@ -350,8 +483,24 @@ class AugmentOp:
             if self.level_fn is not None
             else tuple()
         )
+        return level_args
+
+    def __call__(self, img):
+        level_args = self.sample_level_args()
+        if level_args is None:
+            return img
         return self.aug_fn(img, *level_args, **self.kwargs)
 
+    def apply_batch(self, img, level_args):
+        """
+        apply the op to every sample of the uint8 [N, C, H, W] batch img, with the arguments level_args[i] for sample i
+        """
+        args = [
+            flow.tensor(arg, dtype=flow.float32, device=img.device)
+            for arg in zip(*level_args)
+        ]
+        return self.batch_fn(img, *args, **self.batch_kwargs)
+
     def __repr__(self):
         fs = self.__class__.__name__ + f"(name={self.name}, p={self.prob}"
         fs += f", m={self.magnitude}, mstd={self.magnitude_std}"
@@ -361,6 +510,43 @@ class AugmentOp:
         return fs
 
 
+def _apply_ops_batch(img, sample_ops):
+    """
+    apply the ops sample_ops[i] in order to sample i of the uint8 [N, C, H, W] batch img
+    the samples going through the same op at a given step are gathered and transformed together
+    """
+    num_steps = max([len(ops) for ops in sample_ops] + [0])
+    for step in range(num_steps):
+        groups = {}
+        skipped = []
+        for i, ops in enumerate(sample_ops):
+            level_args = ops[step].sample_level_args() if step < len(ops) else None
+            if level_args is None:
+                skipped.append(i)
+                continue
+            index, args = groups.setdefault(ops[step], ([], []))
+            index.append(i)
+            args.append(level_args)
+        if not groups:
+            continue
+        if len(groups) == 1 and not skipped:
+            ((op, (_, args)),) = groups.items()
+            img = op.apply_batch(img, args)
+            continue
+        chunks, order = [], []
+        for op, (index, args) in groups.items():
+            samples = flow.tensor(index, dtype=flow.int64, device=img.device)
+            chunks.append(op.apply_batch(flow.index_select(img, 0, samples), args))
+            order += index
+        if skipped:
+            samples = flow.tensor(skipped, dtype=flow.int64, device=img.device)
+            chunks.append(flow.index_select(img, 0, samples))
+            order += skipped
+        inverse = flow.tensor(np.argsort(order), dtype=flow.int64, device=img.device)
+        img = flow.index_select(flow.cat(chunks, dim=0), 0, inverse)
+    return img
+
+
 def auto_augment_policy_v0(hparams):
     # ImageNet v0 policy from TPU EfficientNet impl, cannot find a paper reference.
     policy = [
@@ -531,7 +717,17 @@ class AutoAugment:
         return fs
 
 
-def auto_augment_transform(config_str, hparams):
+class BatchAutoAugment(AutoAugment):
+    """
+    AutoAugment of uint8 [N, C, H, W] batches, with one sub-policy drawn per sample
+    """
+
+    def __call__(self, img):
+        sub_policies = [random.choice(self.policy) for _ in range(img.shape[0])]
+        return _apply_ops_batch(img, sub_policies)
+
+
+def auto_augment_transform(config_str, hparams, batched=False):
     """
     Create a AutoAugment transform
     :param config_str: String defining configuration of auto augmentation. Consists of multiple sections separated by
@@ -540,6 +736,7 @@ def auto_augment_transform(config_str, hparams):
         'mstd' -  float std deviation of magnitude noise applied
     Ex 'original-mstd0.5' results in AutoAugment with original policy, magnitude_std 0.5
     :param hparams: Other hparams (kwargs) for the AutoAugmentation scheme
+    :param batched: Transform uint8 [N, C, H, W] batches after collation instead of PIL images
     :return: A PyTorch compatible Transform
     """
     config = config_str.split("-")
@@ -556,6 +753,8 @@ def auto_augment_transform(config_str, hparams):
         else:
             assert False, "Unknown AutoAugment config section"
     aa_policy = auto_augment_policy(policy_name, hparams=hparams)
+    if batched:
+        return BatchAutoAugment(aa_policy)
     return AutoAugment(aa_policy)
 
 
@@ -663,7 +862,25 @@ class RandAugment:
         return fs
 
 
-def rand_augment_transform(config_str, hparams):
+class BatchRandAugment(RandAugment):
+    """
+    RandAugment of uint8 [N, C, H, W] batches, with the ops drawn per sample
+    """
+
+    def __call__(self, img):
+        sample_ops = [
+            np.random.choice(
+                self.ops,
+                self.num_layers,
+                replace=self.choice_weights is None,
+                p=self.choice_weights,
+            )
+            for _ in range(img.shape[0])
+        ]
+        return _apply_ops_batch(img, sample_ops)
+
+
+def rand_augment_transform(config_str, hparams, batched=False):
     """
     Create a RandAugment transform
 
@@ -681,6 +898,8 @@ def rand_augment_transform(config_str, hparams):
 
     :param hparams: Other hparams (kwargs) for the RandAugmentation scheme
 
+    :param batched: Transform uint8 [N, C, H, W] batches after collation instead of PIL images
+
     :return: A PyTorch compatible Transform
     """
     magnitude = _LEVEL_DENOM  # default to _LEVEL_DENOM for magnitude (currently 10)
@@ -720,6 +939,8 @@ def rand_augment_transform(config_str, hparams):
         magnitude=magnitude, hparams=hparams, transforms=transforms
     )
     choice_weights = None if weight_idx is None else _select_rand_weights(weight_idx)
+    if batched:
+        return BatchRandAugment(ra_ops, num_layers, choice_weights=choice_weights)
     return RandAugment(ra_ops, num_layers, choice_weights=choice_weights)
 
 
@@ -826,7 +1047,55 @@ class AugMixAugment:
         return fs
 
 
-def augment_and_mix_transform(config_str, hparams):
+class BatchAugMixAugment(AugMixAugment):
+    """
+    AugMix of uint8 [N, C, H, W] batches, with the mixing weights and the op chains drawn per sample
+    """
+
+    def _sample_chains(self, batch_size):
+        chains = []
+        for _ in range(batch_size):
+            depth = self.depth if self.depth > 0 else np.random.randint(1, 4)
+            chains.append(np.random.choice(self.ops, depth, replace=True))
+        return chains
+
+    def _apply_blended(self, img, mixing_weights, m):
+        ws = np.stack(
+            [self._calc_blended_weights(w, mi) for w, mi in zip(mixing_weights, m)]
+        )
+        ws = flow.tensor(ws, device=img.device)
+        img_orig = img
+        for i in range(self.width):
+            img_aug = _apply_ops_batch(img_orig, self._sample_chains(img.shape[0]))
+            # Image.blend(img, img_aug, w)
+            img = F_t._blend_batch(img_aug, img, ws[:, i])
+        return img
+
+    def _apply_basic(self, img, mixing_weights, m):
+        mixing_weights = flow.tensor(mixing_weights, device=img.device)
+        mixed = flow.zeros(img.shape, dtype=flow.float32, device=img.device)
+        for i in range(self.width):
+            img_aug = _apply_ops_batch(img, self._sample_chains(img.shape[0]))
+            mw = mixing_weights[:, i].view(-1, 1, 1, 1)
+            mixed += mw * img_aug.to(flow.float32)
+        mixed = mixed.clamp(0, 255.0).to(flow.uint8)
+        # Image.blend(img, mixed, m)
+        return F_t._blend_batch(mixed, img, flow.tensor(m, device=img.device))
+
+    def __call__(self, img):
+        batch_size = img.shape[0]
+        mixing_weights = np.float32(
+            np.random.dirichlet([self.alpha] * self.width, size=batch_size)
+        )
+        m = np.float32(np.random.beta(self.alpha, self.alpha, size=batch_size))
+        if self.blended:
+            mixed = self._apply_blended(img, mixing_weights, m)
+        else:
+            mixed = self._apply_basic(img, mixing_weights, m)
+        return mixed
+
+
+def augment_and_mix_transform(config_str, hparams, batched=False):
     """ Create AugMix PyTorch transform
 
     :param config_str: String defining configuration of random augmentation. Consists of multiple sections separated by
@@ -841,6 +1110,8 @@ def augment_and_mix_transform(config_str, hparams):
 
     :param hparams: Other hparams (kwargs) for the Augmentation transforms
 
+    :param batched: Transform uint8 [N, C, H, W] batches after collation instead of PIL images
+
     :return: A PyTorch compatible Transform
     """
     magnitude = 3
@@ -875,4 +1146,5 @@ def augment_and_mix_transform(config_str, hparams):
         "magnitude_std", float("inf")
     )  # default to uniform sampling (if not set via mstd arg)
     ops = augmix_ops(magnitude=magnitude, hparams=hparams)
-    return AugMixAugment(ops, alpha=alpha, width=width, depth=depth, blended=blended)
+    augmix_cls = BatchAugMixAugment if batched else AugMixAugment
+    return augmix_cls(ops, alpha=alpha, width=width, depth=depth, blended=blended)
@@ -0,0 +1,151 @@
+"""Prefetch loader and fast collate
+modified from https://github.com/rwightman/pytorch-image-models/blob/master/timm/data/loader.py
+
+Used together with the ``use_prefetcher=True`` transforms of the transforms factory:
+the workers ship uint8 CHW arrays, ``fast_collate`` stacks them into one uint8 batch
+and ``PrefetchLoader`` does the device copy, batched augmentation, float conversion,
+normalization and random erasing of the next batch while the current one is being consumed.
+"""
+
+import numpy as np
+import oneflow as flow
+
+from flowvision.data.constants import IMAGENET_DEFAULT_MEAN, IMAGENET_DEFAULT_STD
+from flowvision.data.random_erasing import RandomErasing
+from flowvision.transforms import BatchNormalize
+
+
+def _pin_memory(tensor):
+    # page-locked host memory lets the device copy run asynchronously
+    pin_memory = getattr(tensor, "pin_memory", None)
+    if pin_memory is None:
+        return tensor
+    try:
+        return pin_memory()
+    except RuntimeError:
+        # e.g. no CUDA device available
+        return tensor
+
+
+def fast_collate(batch):
+    """A fast collation function optimized for uint8 images (np array or flow tensor)
+    and int64 targets (labels).
+
+    The images of the batch are copied into a single uint8 buffer, which is 4x
+    smaller than the float32 batch built by the default collate function.
+    Samples holding a tuple of images (e.g. the splits of AugMix) are flattened
+    along the batch dimension, split by split.
+    """
+    assert isinstance(batch[0], tuple)
+    batch_size = len(batch)
+    if isinstance(batch[0][0], tuple):
+        # each sample has several views, flattened as [split 0 | split 1 | ...]
+        inner_tuple_size = len(batch[0][0])
+        flattened_batch_size = batch_size * inner_tuple_size
+        targets = np.empty(flattened_batch_size, dtype=np.int64)
+        images = np.empty(
+            (flattened_batch_size,) + batch[0][0][0].shape, dtype=np.uint8
+        )
+        for i in range(batch_size):
+            assert len(batch[i][0]) == inner_tuple_size
+            for j in range(inner_tuple_size):
+                targets[i + j * batch_size] = batch[i][1]
+                images[i + j * batch_size] = batch[i][0][j]
+        return flow.from_numpy(images), flow.from_numpy(targets)
+    elif isinstance(batch[0][0], np.ndarray):
+        targets = np.array([b[1] for b in batch], dtype=np.int64)
+        images = np.empty((batch_size,) + batch[0][0].shape, dtype=np.uint8)
+        for i in range(batch_size):
+            images[i] = batch[i][0]
+        return flow.from_numpy(images), flow.from_numpy(targets)
+    elif isinstance(batch[0][0], flow.Tensor):
+        targets = flow.tensor([b[1] for b in batch], dtype=flow.int64)
+        images = flow.stack([b[0] for b in batch]).to(flow.uint8)
+        return images, targets
+    else:
+        raise TypeError("Unsupported sample type {}".format(type(batch[0][0])))
+
+
+class PrefetchLoader:
+    """Wraps a DataLoader whose batches come from :func:`fast_collate` and moves
+    them to ``device``.
+
+    While the current batch is being consumed, the next one is copied to the device
+    from pinned memory, augmented, converted to float, normalized and randomly erased. The
+    device work is only enqueued by the wrapper, so it overlaps with the training step.
+
+    Args:
+        loader (DataLoader): loader yielding uint8 image batches and int64 targets
+        mean (sequence): per channel mean, in the [0, 1] range
+        std (sequence): per channel standard deviation, in the [0, 1] range
+        device (str): device the batches are moved to. Default: ``"cuda"``
+        re_prob (float): random erasing probability, disabled when 0. Default: ``0.0``
+        re_mode (str): random erasing mode. Default: ``"const"``
+        re_count (int): maximum number of random erasing blocks. Default: ``1``
+        re_num_splits (int): number of augmentation splits, the first one is not erased.
+            Default: ``0``
+        augment (callable, optional): transform of the uint8 batches on the device, run
+            before the normalization, e.g. ``rand_augment_transform(config_str, hparams,
+            batched=True)``. Default: ``None``
+    """
+
+    def __init__(
+        self,
+        loader,
+        mean=IMAGENET_DEFAULT_MEAN,
+        std=IMAGENET_DEFAULT_STD,
+        device="cuda",
+        re_prob=0.0,
+        re_mode="const",
+        re_count=1,
+        re_num_splits=0,
+        augment=None,
+    ):
+        self.loader = loader
+        self.device = device
+        self.augment = augment
+        self.normalize = BatchNormalize(mean, std)
+        if re_prob > 0.0:
+            self.random_erasing = RandomErasing(
+                probability=re_prob,
+                mode=re_mode,
+                max_count=re_count,
+                num_splits=re_num_splits,
+                device=device,
+                batched=True,
+            )
+        else:
+            self.random_erasing = None
+
+    def _to_device(self, batch):
+        images, targets = batch
+        images = _pin_memory(images).to(self.device)
+        targets = _pin_memory(targets).to(self.device)
+        if self.augment is not None:
+            images = self.augment(images)
+        images = self.normalize(images)
+        if self.random_erasing is not None:
+            images = self.random_erasing(images)
+        return images, targets
+
+    def __iter__(self):
+        batch = None
+        for next_batch in self.loader:
+            # enqueue the next batch before handing out the current one
+            next_batch = self._to_device(next_batch)
+            if batch is not None:
+                yield batch
+            batch = next_batch
+        if batch is not None:
+            yield batch
+
+    def __len__(self):
+        return len(self.loader)
+
+    @property
+    def sampler(self):
+        return self.loader.sampler
+
+    @property
+    def dataset(self):
+        return self.loader.dataset
@@ -98,6 +98,126 @@ def cutmix_bbox_and_lam(
     return (yl, yu, xl, xu), lam
 
 
+def cutmix_bbox_and_lam_batch(img_shape, lam, ratio_minmax=None, correct_lam=True):
+    """ Generate one bbox per lambda value and apply lambda correction.
+    Draws from the numpy RNG in the same order as calling :func:`cutmix_bbox_and_lam`
+    once per element, so a fixed seed gives the same boxes as the per-element loop.
+    Args:
+        img_shape (tuple): Image shape as tuple
+        lam (np.ndarray): Cutmix lambda value per bbox
+        ratio_minmax (tuple or list): Min and max bbox ratios, overrides lam if not None
+        correct_lam (bool): Apply lambda correction when bbox clipped by image borders
+    """
+    lam = np.asarray(lam, dtype=np.float64)
+    count = len(lam)
+    img_h, img_w = img_shape[-2:]
+    if ratio_minmax is not None:
+        # the box position bounds depend on the box size drawn just before,
+        # draws stay sequential to keep the RNG stream of the per-element loop
+        boxes = np.array(
+            [rand_bbox_minmax(img_shape, ratio_minmax) for _ in range(count)],
+            dtype=np.int64,
+        ).reshape(count, 4)
+        yl, yu, xl, xu = boxes.T
+    else:
+        ratio = np.sqrt(1 - lam)
+        cut_h = (img_h * ratio).astype(np.int64)
+        cut_w = (img_w * ratio).astype(np.int64)
+        # interleave (cy, cx) bounds so one randint call consumes the stream
+        # exactly like the per-element calls of rand_bbox
+        low = np.zeros(2 * count, dtype=np.int64)
+        high = np.tile(np.array([img_h, img_w], dtype=np.int64), count)
+        center = np.random.randint(low, high).reshape(count, 2)
+        cy, cx = center[:, 0], center[:, 1]
+        yl = np.clip(cy - cut_h // 2, 0, img_h)
+        yu = np.clip(cy + cut_h // 2, 0, img_h)
+        xl = np.clip(cx - cut_w // 2, 0, img_w)
+        xu = np.clip(cx + cut_w // 2, 0, img_w)
+    if correct_lam or ratio_minmax is not None:
+        bbox_area = (yu - yl) * (xu - xl)
+        lam = 1.0 - bbox_area / float(img_h * img_w)
+    return (yl, yu, xl, xu), lam
+
+
+def _bbox_mask(img_shape, boxes, device):
+    """Rasterize per-sample boxes into a [N, 1, H, W] bool mask."""
+    yl, yu, xl, xu = [
+        flow.tensor(b.astype(np.int64), device=device).view(-1, 1, 1) for b in boxes
+    ]
+    img_h, img_w = img_shape[-2:]
+    ys = flow.arange(img_h, device=device).view(1, -1, 1)
+    xs = flow.arange(img_w, device=device).view(1, 1, -1)
+    mask = (ys >= yl) & (ys < yu) & (xs >= xl) & (xs < xu)
+    return mask.unsqueeze(1)
+
+
+def _blend_with_flipped(x, lam, cut_boxes, cut_mask):
+    """Mix every sample with its mirror ``x.flip(0)`` in one pass.
+    ``lam`` holds the blending weight per sample (1 keeps the sample), samples
+    selected by ``cut_mask`` get the region covered by ``cut_boxes`` pasted instead.
+    """
+    x_flipped = x.flip(0)
+    weight = np.where(cut_mask, 1.0, lam).astype(np.float32)
+    weight = flow.tensor(weight, device=x.device, dtype=x.dtype).view(-1, 1, 1, 1)
+    mixed = x * weight + x_flipped * (1 - weight)
+    if cut_mask.any():
+        boxes = [np.zeros(len(x), dtype=np.int64) for _ in range(4)]
+        for b, cut_b in zip(boxes, cut_boxes):
+            b[cut_mask] = cut_b
+        mixed = flow.where(_bbox_mask(x.shape, boxes, x.device), x_flipped, mixed)
+    x.copy_(mixed)
+
+
+def mix_elem_batched(x, lam_batch, use_cutmix, ratio_minmax=None, correct_lam=True):
+    """ Apply per-element mixup/cutmix between ``x[i]`` and ``x[N - 1 - i]`` in place.
+    Args:
+        x (Tensor): Batch of images of shape [N, C, H, W]
+        lam_batch (np.ndarray): Lambda per element
+        use_cutmix (np.ndarray): Bool per element selecting cutmix over mixup
+        ratio_minmax (tuple or list): Cutmix min/max image ratio
+        correct_lam (bool): Apply lambda correction when cutmix bbox clipped by image borders
+    Returns:
+        np.ndarray: The lambda per element after cutmix correction
+    """
+    lam_batch = lam_batch.copy()
+    cut_mask = (lam_batch != 1) & use_cutmix
+    boxes, lam_cut = cutmix_bbox_and_lam_batch(
+        x.shape, lam_batch[cut_mask], ratio_minmax, correct_lam
+    )
+    lam_batch[cut_mask] = lam_cut
+    _blend_with_flipped(x, lam_batch, boxes, cut_mask)
+    return lam_batch
+
+
+def mix_pair_batched(x, lam_batch, use_cutmix, ratio_minmax=None, correct_lam=True):
+    """ Apply mixup/cutmix to the pairs ``(x[i], x[N - 1 - i])`` in place, both elements
+    of a pair share one lambda and one bbox.
+    Args:
+        x (Tensor): Batch of images of shape [N, C, H, W]
+        lam_batch (np.ndarray): Lambda per pair, of length N // 2
+        use_cutmix (np.ndarray): Bool per pair selecting cutmix over mixup
+        ratio_minmax (tuple or list): Cutmix min/max image ratio
+        correct_lam (bool): Apply lambda correction when cutmix bbox clipped by image borders
+    Returns:
+        np.ndarray: The lambda per element (length N) after cutmix correction
+    """
+    lam_batch = lam_batch.copy()
+    cut_mask = (lam_batch != 1) & use_cutmix
+    boxes, lam_cut = cutmix_bbox_and_lam_batch(
+        x.shape, lam_batch[cut_mask], ratio_minmax, correct_lam
+    )
+    lam_batch[cut_mask] = lam_cut
+    lam_full = np.concatenate((lam_batch, lam_batch[::-1]))
+    cut_full = np.concatenate((cut_mask, cut_mask[::-1]))
+    boxes_full = []
+    for b in boxes:
+        b_pair = np.zeros(len(lam_batch), dtype=np.int64)
+        b_pair[cut_mask] = b
+        boxes_full.append(np.concatenate((b_pair, b_pair[::-1]))[cut_full])
+    _blend_with_flipped(x, lam_full, boxes_full, cut_full)
+    return lam_full
+
+
 class Mixup:
     """ Mixup/Cutmix that applies different params to each element or whole batch
     Args:
@@ -202,49 +322,25 @@ class Mixup:
     def _mix_elem(self, x):
         batch_size = len(x)
         lam_batch, use_cutmix = self._params_per_elem(batch_size)
-        x_orig = x.clone()
-        for i in range(batch_size):
-            j = batch_size - i - 1
-            lam = lam_batch[i]
-            if lam != 1:
-                if use_cutmix[i]:
-                    (yl, yh, xl, xh), lam = cutmix_bbox_and_lam(
-                        x[i].shape,
-                        lam,
-                        ratio_minmax=self.cutmix_minmax,
-                        correct_lam=self.correct_lam,
-                    )
-                    x[i][:, yl:yh, xl:xh] = x_orig[j][:, yl:yh, xl:xh]
-                    lam_batch[i] = lam
-                else:
-                    lam = flow.tensor(lam, device=x.device, dtype=x.dtype)
-                    x[i] = x[i] * lam + x_orig[i] * (1 - lam)
+        lam_batch = mix_elem_batched(
+            x,
+            lam_batch,
+            use_cutmix,
+            ratio_minmax=self.cutmix_minmax,
+            correct_lam=self.correct_lam,
+        )
         return flow.tensor(lam_batch, device=x.device, dtype=x.dtype).unsqueeze(1)
 
     def _mix_pair(self, x):
         batch_size = len(x)
         lam_batch, use_cutmix = self._params_per_elem(batch_size // 2)
-        x_orig = x.clone()
-        for i in range(batch_size // 2):
-            j = batch_size - i - 1
-            lam = lam_batch[i]
-            if lam != 1:
-                if use_cutmix[i]:
-                    (yl, yh, xl, xh), lam = cutmix_bbox_and_lam(
-                        x[i].shape,
-                        lam,
-                        ratio_minmax=self.cutmix_minmax,
-                        correct_lam=self.correct_lam,
-                    )
-                    x[i][:, yl:yh, xl:xh] = x_orig[j][:, yl:yh, xl:xh]
-                    x[j][:, yl:yh, xl:xh] = x_orig[i][:, yl:yh, xl:xh]
-                    lam_batch[i] = lam
-                else:
-                    # TODO: support tensor * numpy
-                    lam = flow.tensor(lam, device=x.device, dtype=x.dtype)
-                    x[i] = x[i] * lam + x_orig[j] * (1 - lam)
-                    x[j] = x[j] * lam + x_orig[i] * (1 - lam)
-        lam_batch = np.concatenate((lam_batch, lam_batch[::-1]))
+        lam_batch = mix_pair_batched(
+            x,
+            lam_batch,
+            use_cutmix,
+            ratio_minmax=self.cutmix_minmax,
+            correct_lam=self.correct_lam,
+        )
         return flow.tensor(lam_batch, device=x.device, dtype=x.dtype).unsqueeze(1)
 
     def _mix_batch(self, x):
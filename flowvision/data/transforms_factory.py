@@ -21,6 +21,37 @@ from flowvision.transforms.functional import str_to_interp_mode, str_to_pil_inte
 from flowvision.data.random_erasing import RandomErasing
 
 
+def create_auto_augment(
+    auto_augment,
+    img_size=224,
+    interpolation="random",
+    mean=IMAGENET_DEFAULT_MEAN,
+    batched=False,
+):
+    """
+    Creates the AutoAugment, RandAugment or AugMix transform described by the config string
+    auto_augment, on PIL images or, with batched=True, on uint8 batches after collation
+    """
+    assert isinstance(auto_augment, str)
+    if isinstance(img_size, (tuple, list)):
+        img_size_min = min(img_size)
+    else:
+        img_size_min = img_size
+    aa_params = dict(
+        translate_const=int(img_size_min * 0.45),
+        img_mean=tuple([min(255, round(255 * x)) for x in mean]),
+    )
+    if interpolation and interpolation != "random":
+        aa_params["interpolation"] = str_to_pil_interp(interpolation)
+    if auto_augment.startswith("rand"):
+        return rand_augment_transform(auto_augment, aa_params, batched=batched)
+    elif auto_augment.startswith("augmix"):
+        aa_params["translate_pct"] = 0.3
+        return augment_and_mix_transform(auto_augment, aa_params, batched=batched)
+    else:
+        return auto_augment_transform(auto_augment, aa_params, batched=batched)
+
+
 def transforms_noaug_train(
     img_size=224,
     interpolation="bilinear",
@@ -88,24 +119,9 @@ def transforms_imagenet_train(
 
     secondary_tfl = []
     if auto_augment:
-        assert isinstance(auto_augment, str)
-        if isinstance(img_size, (tuple, list)):
-            img_size_min = min(img_size)
-        else:
-            img_size_min = img_size
-        aa_params = dict(
-            translate_const=int(img_size_min * 0.45),
-            img_mean=tuple([min(255, round(255 * x)) for x in mean]),
-        )
-        if interpolation and interpolation != "random":
-            aa_params["interpolation"] = str_to_pil_interp(interpolation)
-        if auto_augment.startswith("rand"):
-            secondary_tfl += [rand_augment_transform(auto_augment, aa_params)]
-        elif auto_augment.startswith("augmix"):
-            aa_params["translate_pct"] = 0.3
-            secondary_tfl += [augment_and_mix_transform(auto_augment, aa_params)]
-        else:
-            secondary_tfl += [auto_augment_transform(auto_augment, aa_params)]
+        secondary_tfl += [
+            create_auto_augment(auto_augment, img_size, interpolation, mean)
+        ]
     elif color_jitter is not None:
         # color jitter is enabled when not using AA
         if isinstance(color_jitter, (list, tuple)):
@@ -5,6 +5,7 @@ from .cifar import CIFAR10, CIFAR100
 from .cityscapes import Cityscapes
 from .coco import CocoCaptions, CocoDetection
 from .imagenet import ImageNet
+from .image_size import ImageSizeIndex, get_image_sizes, probe_image_size
 from .voc import VOCDetection, VOCSegmentation
 from .folder import DatasetFolder, ImageFolder
 from .fakedata import FakeData
@@ -12,8 +13,10 @@ from .flickr import Flickr8k, Flickr30k
 from .inaturalist import INaturalist
 from .kitti import Kitti
 from .lfw import LFWPairs, LFWPeople
+from .lmdb_dataset import LMDBImageDataset, image_folder_to_lmdb
 from .lsun import LSUN, LSUNClass
 from .omniglot import Omniglot
+from .packed import PackedImageDataset, PackedShardWriter, pack_image_folder
 from .phototour import PhotoTour
 from .places365 import Places365
 from .sbd import SBDataset
@@ -37,6 +40,9 @@ __all__ = [
     "CocoCaptions",
     "CocoDetection",
     "ImageNet",
+    "ImageSizeIndex",
+    "get_image_sizes",
+    "probe_image_size",
     "VOCDetection",
     "VOCSegmentation",
     "DatasetFolder",
@@ -48,9 +54,14 @@ __all__ = [
     "Kitti",
     "LFWPairs",
     "LFWPeople",
+    "LMDBImageDataset",
+    "image_folder_to_lmdb",
     "LSUN",
     "LSUNClass",
     "Omniglot",
+    "PackedImageDataset",
+    "PackedShardWriter",
+    "pack_image_folder",
     "PhotoTour",
     "Places365",
     "SBDataset",
@@ -225,6 +225,9 @@ class Cityscapes(VisionDataset):
     def __len__(self) -> int:
         return len(self.images)
 
+    def get_image_path(self, index: int) -> str:
+        return self.images[index]
+
     def extra_repr(self) -> str:
         lines = ["Split: {split}", "Mode: {mode}", "Type: {target_type}"]
         return "\n".join(lines).format(**self.__dict__)
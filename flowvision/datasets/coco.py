@@ -56,6 +56,10 @@ class CocoDetection(VisionDataset):
     def __len__(self) -> int:
         return len(self.ids)
 
+    def get_image_path(self, index: int) -> str:
+        path = self.coco.loadImgs(self.ids[index])[0]["file_name"]
+        return os.path.join(self.root, path)
+
 
 class CocoCaptions(CocoDetection):
     r"""`MS Coco Captions <https://cocodataset.org/#captions-2015>`_ Dataset.
@@ -1,8 +1,12 @@
 """
 """
+import hashlib
 import os
 import os.path
+import time
 
+import numpy as np
+import oneflow as flow
 from PIL import Image
 from typing import Any, Callable, cast, Dict, List, Optional, Tuple
 
@@ -107,6 +111,96 @@ def make_dataset(
     return instances
 
 
+INDEX_CACHE_VERSION = 1
+
+
+def _index_cache_key(directory: str, extensions: Tuple[str, ...]) -> str:
+    """Builds the key that identifies a scan of ``directory``.
+
+    The key covers the root path, the modification time of the root and of every
+    class folder, and the extension set. Adding or removing a file directly in a
+    class folder updates that folder's mtime, so the check costs one ``stat`` per
+    class instead of one per sample. Changes limited to nested sub-folders are not
+    detected; delete the cache file in that case.
+    """
+    directory = os.path.abspath(directory)
+    entries = sorted(
+        (entry.name, entry.stat().st_mtime_ns)
+        for entry in os.scandir(directory)
+        if entry.is_dir()
+    )
+    parts = [
+        "v{}".format(INDEX_CACHE_VERSION),
+        directory,
+        str(os.stat(directory).st_mtime_ns),
+        ",".join(sorted(ext.lower() for ext in extensions)),
+    ]
+    parts += ["{}:{}".format(name, mtime) for name, mtime in entries]
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def index_cache_file(
+    cache_dir: str, directory: str, extensions: Tuple[str, ...]
+) -> str:
+    """Returns the index cache file of ``directory`` in ``cache_dir``, its name changes
+    whenever the key computed by :func:`_index_cache_key` changes."""
+    return os.path.join(
+        os.path.expanduser(cache_dir),
+        "folder_index_{}.npz".format(_index_cache_key(directory, extensions)),
+    )
+
+
+def save_index_cache(
+    path: str, directory: str, classes: List[str], samples: List[Tuple[str, int]]
+) -> None:
+    """Stores ``classes`` and ``samples`` in a compact ``.npz`` file.
+
+    Sample paths are saved relative to ``directory`` as one utf-8 blob plus an
+    offset array, targets as an ``int64`` array. The file is written to a
+    temporary name first and renamed, so readers never see a partial index.
+    """
+    directory = os.path.expanduser(directory)
+    encoded = [os.path.relpath(p, directory).encode("utf-8") for p, _ in samples]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    targets = np.array([t for _, t in samples], dtype=np.int64)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp_path, "wb") as f:
+        np.savez(
+            f,
+            classes=np.array(classes, dtype=str),
+            paths=blob,
+            offsets=offsets,
+            targets=targets,
+        )
+    os.replace(tmp_path, path)
+
+
+def load_index_cache(
+    path: str, directory: str
+) -> Tuple[List[str], Dict[str, int], List[Tuple[str, int]]]:
+    """Loads an index written by :func:`save_index_cache`.
+
+    Returns:
+        (Tuple[List[str], Dict[str, int], List[Tuple[str, int]]]): classes, class_to_idx and samples.
+    """
+    directory = os.path.expanduser(directory)
+    with np.load(path, allow_pickle=False) as data:
+        classes = data["classes"].tolist()
+        blob = data["paths"].tobytes()
+        offsets = data["offsets"].tolist()
+        targets = data["targets"].tolist()
+    samples = [
+        (os.path.join(directory, blob[offsets[i] : offsets[i + 1]].decode("utf-8")), t)
+        for i, t in enumerate(targets)
+    ]
+    class_to_idx = {cls_name: i for i, cls_name in enumerate(classes)}
+    return classes, class_to_idx, samples
+
+
 class DatasetFolder(VisionDataset):
     r"""A generic data loader.
     This default directory structure can be customized by overriding the
@@ -125,6 +219,14 @@ class DatasetFolder(VisionDataset):
         is_valid_file (callable, optional): A function that takes path of a file
             and check if the file is a valid file (used to check of corrupt files)
             both extensions and is_valid_file should not be passed.
+        index_cache_dir (string, optional): Directory where the result of the folder
+            scan is cached. When set, the scan is loaded from the cache instead of
+            walking ``root``; the cache is rebuilt when ``root``, its class folders
+            or ``extensions`` change. In distributed runs rank 0 builds the cache
+            while the other ranks wait for it, so the directory must be shared by
+            all ranks. Only used together with ``extensions``.
+        index_cache_timeout (float): Seconds non-zero ranks wait for rank 0 to
+            write the cache before scanning ``root`` themselves. Default: 1800
 
      Attributes:
         classes (list): List of the class names sorted alphabetically.
@@ -141,12 +243,21 @@ class DatasetFolder(VisionDataset):
         transform: Optional[Callable] = None,
         target_transform: Optional[Callable] = None,
         is_valid_file: Optional[Callable[[str], bool]] = None,
+        index_cache_dir: Optional[str] = None,
+        index_cache_timeout: float = 1800.0,
     ) -> None:
         super(DatasetFolder, self).__init__(
             root, transform=transform, target_transform=target_transform
         )
-        classes, class_to_idx = self.find_classes(self.root)
-        samples = self.make_dataset(self.root, class_to_idx, extensions, is_valid_file)
+        if index_cache_dir is not None and extensions is not None:
+            classes, class_to_idx, samples = self._load_or_build_index(
+                index_cache_dir, extensions, index_cache_timeout
+            )
+        else:
+            classes, class_to_idx = self.find_classes(self.root)
+            samples = self.make_dataset(
+                self.root, class_to_idx, extensions, is_valid_file
+            )
 
         self.loader = loader
         self.extensions = extensions
@@ -156,6 +267,32 @@ class DatasetFolder(VisionDataset):
         self.samples = samples
         self.targets = [s[1] for s in samples]
 
+    def _scan(
+        self, extensions: Tuple[str, ...]
+    ) -> Tuple[List[str], Dict[str, int], List[Tuple[str, int]]]:
+        classes, class_to_idx = self.find_classes(self.root)
+        samples = self.make_dataset(self.root, class_to_idx, extensions, None)
+        return classes, class_to_idx, samples
+
+    def _load_or_build_index(
+        self, cache_dir: str, extensions: Tuple[str, ...], timeout: float
+    ) -> Tuple[List[str], Dict[str, int], List[Tuple[str, int]]]:
+        cache_file = index_cache_file(cache_dir, self.root, extensions)
+        if os.path.isfile(cache_file):
+            return load_index_cache(cache_file, self.root)
+
+        if flow.env.get_rank() == 0:
+            classes, class_to_idx, samples = self._scan(extensions)
+            save_index_cache(cache_file, self.root, classes, samples)
+            return classes, class_to_idx, samples
+
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if os.path.isfile(cache_file):
+                return load_index_cache(cache_file, self.root)
+            time.sleep(1.0)
+        return self._scan(extensions)
+
     @staticmethod
     def make_dataset(
         directory: str,
@@ -243,6 +380,9 @@ class DatasetFolder(VisionDataset):
     def __len__(self) -> int:
         return len(self.samples)
 
+    def get_image_path(self, index: int) -> str:
+        return self.samples[index][0]
+
 
 IMG_EXTENSIONS = (
     ".jpg",
@@ -308,6 +448,8 @@ class ImageFolder(DatasetFolder):
         loader (callable, optional): A function to load an image given its path.
         is_valid_file (callable, optional): A function that takes path of an Image file
             and check if the file is a valid file (used to check of corrupt files)
+        index_cache_dir (string, optional): Directory where the folder scan is cached,
+            see :class:`DatasetFolder`. Ignored when ``is_valid_file`` is passed.
      Attributes:
         classes (list): List of the class names sorted alphabetically.
         class_to_idx (dict): Dict with items (class_name, class_index).
@@ -321,6 +463,7 @@ class ImageFolder(DatasetFolder):
         target_transform: Optional[Callable] = None,
         loader: Callable[[str], Any] = default_loader,
         is_valid_file: Optional[Callable[[str], bool]] = None,
+        index_cache_dir: Optional[str] = None,
     ):
         super(ImageFolder, self).__init__(
             root,
@@ -329,5 +472,6 @@ class ImageFolder(DatasetFolder):
             transform=transform,
             target_transform=target_transform,
             is_valid_file=is_valid_file,
+            index_cache_dir=index_cache_dir,
         )
         self.imgs = self.samples
@@ -0,0 +1,258 @@
+"""
+Image sizes read from the file headers, without decoding the images.
+
+:func:`probe_image_size` parses the header of JPEG, PNG and WebP files, which takes
+a few hundred bytes per file, and falls back to PIL (which also only reads the
+header) for the other formats. :class:`ImageSizeIndex` keeps the sizes of the
+images under a dataset root in a sidecar ``.npz`` file, so they are only probed
+once.
+"""
+import hashlib
+import os
+import struct
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+INDEX_VERSION = 1
+INDEX_FILE_NAME = ".flowvision_image_sizes.npz"
+
+_HEAD_SIZE = 512
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# start of frame markers, DHT (0xC4), JPG (0xC8) and DAC (0xCC) share the range
+_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def _jpeg_size(f, head: bytes) -> Optional[Tuple[int, int]]:
+    # walks the marker segments up to the frame header, ``buf`` holds the bytes of
+    # the file starting at offset ``base``
+    buf, base, pos = head, 0, 2
+    while True:
+        if pos + 9 > base + len(buf):
+            f.seek(pos)
+            buf, base = f.read(_HEAD_SIZE), pos
+            if len(buf) < 9:
+                return None
+        i = pos - base
+        if buf[i] != 0xFF:
+            return None
+        marker = buf[i + 1]
+        if marker == 0xFF:
+            # fill byte
+            pos += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # markers without a segment
+            pos += 2
+            continue
+        if marker in (0xD9, 0xDA):
+            return None
+        if marker in _SOF_MARKERS:
+            height, width = struct.unpack(">HH", buf[i + 5 : i + 9])
+            return width, height
+        pos += 2 + struct.unpack(">H", buf[i + 2 : i + 4])[0]
+
+
+def _png_size(head: bytes) -> Optional[Tuple[int, int]]:
+    if len(head) < 24 or head[12:16] != b"IHDR":
+        return None
+    return struct.unpack(">II", head[16:24])
+
+
+def _webp_size(head: bytes) -> Optional[Tuple[int, int]]:
+    if len(head) < 30:
+        return None
+    chunk = head[12:16]
+    if chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and head[20] == 0x2F:
+        bits = struct.unpack("<I", head[21:25])[0]
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        width = int.from_bytes(head[24:27], "little") + 1
+        height = int.from_bytes(head[27:30], "little") + 1
+        return width, height
+    return None
+
+
+def probe_image_size(path: str) -> Tuple[int, int]:
+    """Returns the ``(width, height)`` of an image file.
+
+    The size is the one of the decoded image before any EXIF rotation, as returned
+    by ``PIL.Image.open(path).size``.
+    """
+    with open(path, "rb", buffering=0) as f:
+        head = f.read(_HEAD_SIZE)
+        size = None
+        if head[:2] == b"\xff\xd8":
+            size = _jpeg_size(f, head)
+        elif head[:8] == _PNG_SIGNATURE:
+            size = _png_size(head)
+        elif head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            size = _webp_size(head)
+    if size is None or 0 in size:
+        # other formats, or a header this parser does not handle
+        with Image.open(path) as img:
+            size = img.size
+    return int(size[0]), int(size[1])
+
+
+def _default_index_files(
+    root: str, file_name: str = INDEX_FILE_NAME, cache_subdir: str = "image_sizes"
+) -> List[str]:
+    # the sidecar next to the images, or the cache directory when root is read-only
+    cache_dir = os.path.expanduser(
+        os.getenv("FLOWVISION_CACHE", "~/.oneflow/flowvision_cache")
+    )
+    key = hashlib.sha1(root.encode("utf-8")).hexdigest()
+    return [
+        os.path.join(root, file_name),
+        os.path.join(cache_dir, cache_subdir, "{}.npz".format(key)),
+    ]
+
+
+class ImageSizeIndex(object):
+    """Persistent index of the sizes of the images under ``root``.
+
+    Sizes are stored per path relative to ``root`` along with the file size and
+    modification time, an image modified since it was indexed is probed again.
+
+    Args:
+        root (string): Root directory of the dataset.
+        index_file (string, optional): Path of the index. By default
+            ``<root>/.flowvision_image_sizes.npz``, or a file in ``$FLOWVISION_CACHE``
+            when ``root`` is not writable.
+        num_workers (int): Number of threads probing the images. Default: 16
+        validate (bool): If True, ``stat`` the indexed images to detect the modified
+            ones. Default: True
+    """
+
+    def __init__(
+        self,
+        root: str,
+        index_file: Optional[str] = None,
+        num_workers: int = 16,
+        validate: bool = True,
+    ) -> None:
+        self.root = os.path.abspath(os.path.expanduser(root))
+        self.index_files = (
+            [index_file] if index_file is not None else _default_index_files(self.root)
+        )
+        self.num_workers = num_workers
+        self.validate = validate
+        # relative path -> (width, height, file size, mtime in ns)
+        self._entries: Dict[str, Tuple[int, int, int, int]] = {}
+        self._dirty = False
+        for path in self.index_files:
+            if os.path.isfile(path):
+                self._load(path)
+                break
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _load(self, path: str) -> None:
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data["version"]) != INDEX_VERSION:
+                    return
+                blob = data["paths"].tobytes()
+                offsets = data["offsets"].tolist()
+                entries = data["entries"].tolist()
+        except (OSError, ValueError, KeyError):
+            # unreadable or partial index, rebuilt on save
+            return
+        self._entries = {
+            blob[offsets[i] : offsets[i + 1]].decode("utf-8"): tuple(entry)
+            for i, entry in enumerate(entries)
+        }
+
+    def save(self) -> Optional[str]:
+        """Writes the index if it changed, returns the path written to"""
+        if not self._dirty:
+            return None
+        names = list(self._entries)
+        encoded = [name.encode("utf-8") for name in names]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        entries = np.array(
+            [self._entries[name] for name in names], dtype=np.int64
+        ).reshape(-1, 4)
+        for path in self.index_files:
+            tmp_path = "{}.{}.tmp".format(path, os.getpid())
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                with open(tmp_path, "wb") as f:
+                    np.savez(
+                        f,
+                        version=np.array(INDEX_VERSION),
+                        paths=blob,
+                        offsets=offsets,
+                        entries=entries,
+                    )
+                os.replace(tmp_path, path)
+            except OSError:
+                continue
+            self._dirty = False
+            return path
+        warnings.warn(
+            "could not write the image size index to {}".format(self.index_files)
+        )
+        return None
+
+    def _lookup(self, paths: Sequence[str]) -> List[Tuple[int, int]]:
+        sizes = []
+        for path in paths:
+            name = os.path.relpath(path, self.root)
+            entry = self._entries.get(name)
+            if entry is not None and not self.validate:
+                sizes.append(entry[:2])
+                continue
+            st = os.stat(path)
+            stat = (st.st_size, st.st_mtime_ns)
+            if entry is None or entry[2:] != stat:
+                entry = probe_image_size(path) + stat
+                self._entries[name] = entry
+                self._dirty = True
+            sizes.append(entry[:2])
+        return sizes
+
+    def sizes(self, paths: Sequence[str]) -> np.ndarray:
+        """Returns the ``[N, 2]`` array of the ``(width, height)`` of the images at
+        ``paths``, absolute or relative to ``root``, probing the ones missing from the
+        index on a thread pool."""
+        paths = [os.path.join(self.root, path) for path in paths]
+        # a few chunks per thread balance the load without a future per image
+        num_chunks = max(min(len(paths), 4 * self.num_workers), 1)
+        bounds = np.linspace(0, len(paths), num_chunks + 1).astype(np.int64)
+        chunks = [paths[bounds[i] : bounds[i + 1]] for i in range(num_chunks)]
+        with ThreadPoolExecutor(self.num_workers) as pool:
+            results = list(pool.map(self._lookup, chunks))
+        return np.array(
+            [size for chunk in results for size in chunk], dtype=np.int64
+        ).reshape(-1, 2)
+
+
+def get_image_sizes(
+    dataset,
+    indices: Optional[Sequence[int]] = None,
+    index_file: Optional[str] = None,
+    num_workers: int = 16,
+) -> np.ndarray:
+    """Returns the ``[N, 2]`` array of the ``(width, height)`` of the images of a
+    dataset implementing :meth:`~flowvision.datasets.VisionDataset.get_image_path`,
+    from the :class:`ImageSizeIndex` of its root, which is updated as needed.
+    """
+    if indices is None:
+        indices = range(len(dataset))
+    # the datasets return paths starting with their root, which may be relative
+    paths = [os.path.abspath(dataset.get_image_path(i)) for i in indices]
+    index = ImageSizeIndex(dataset.root, index_file=index_file, num_workers=num_workers)
+    sizes = index.sizes(paths)
+    index.save()
+    return sizes
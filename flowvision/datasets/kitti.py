@@ -130,6 +130,9 @@ class Kitti(VisionDataset):
     def __len__(self) -> int:
         return len(self.images)
 
+    def get_image_path(self, index: int) -> str:
+        return self.images[index]
+
     @property
     def _raw_folder(self) -> str:
         return os.path.join(self.root, self.__class__.__name__, "raw")
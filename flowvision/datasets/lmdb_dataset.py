@@ -0,0 +1,334 @@
+"""
+LMDB backend for image classification datasets.
+
+The encoded images are the values of an LMDB database, the order of the samples
+and their classes are kept next to it in a key index:
+
+.. code-block:: shell
+
+    root/
+    ├── data.mdb
+    ├── lock.mdb
+    └── flowvision_keys.npz   # keys, and the first sample of every class
+
+The index is a utf-8 blob of the keys plus an offset array, samples are grouped by
+class so the class of a sample is found by bisecting the class boundaries. Each
+``DataLoader`` worker opens the environment itself on its first read, and images
+are decoded straight from the memory-mapped pages.
+"""
+
+import bisect
+import os
+import os.path
+import warnings
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .folder import IMG_EXTENSIONS, find_classes, make_dataset
+from .image_size import _default_index_files
+from .packed import bytes_loader
+from .vision import VisionDataset
+
+LMDB_INDEX_VERSION = 1
+LMDB_INDEX_FILE_NAME = "flowvision_keys.npz"
+
+
+# environments opened for reading, per process and path: lmdb allows a single one
+# per path in a process, and they must not be used across a fork
+_environments: Dict[Tuple[int, str], Any] = {}
+
+
+def _open_env(root: str) -> Any:
+    import lmdb
+
+    key = (os.getpid(), os.path.abspath(root))
+    env = _environments.get(key)
+    if env is None:
+        env = lmdb.open(
+            root,
+            subdir=os.path.isdir(root),
+            readonly=True,
+            lock=False,
+            readahead=False,
+            meminit=False,
+        )
+        _environments[key] = env
+    return env
+
+
+def save_lmdb_index(
+    path: str,
+    keys: Sequence[bytes],
+    classes: Optional[List[str]] = None,
+    class_starts: Optional[Sequence[int]] = None,
+) -> None:
+    """Stores the keys of an LMDB dataset and the index of the first sample of each
+    class in a ``.npz`` file, written to a temporary name first and renamed."""
+    offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+    np.cumsum([len(k) for k in keys], out=offsets[1:])
+    blob = np.frombuffer(b"".join(keys), dtype=np.uint8)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp_path, "wb") as f:
+        np.savez(
+            f,
+            version=np.array(LMDB_INDEX_VERSION),
+            keys=blob,
+            offsets=offsets,
+            classes=np.array(classes or [], dtype=str),
+            class_starts=np.array(class_starts or [], dtype=np.int64),
+        )
+    os.replace(tmp_path, path)
+
+
+def write_lmdb_dataset(
+    samples: Sequence[Tuple[bytes, Callable[[], bytes], int]],
+    root: str,
+    classes: Optional[List[str]] = None,
+    map_size: int = 1 << 40,
+    commit_every: int = 1000,
+) -> int:
+    """Writes ``(key, read_fn, target)`` triples into an LMDB database at ``root``,
+    where ``read_fn()`` returns the encoded bytes of one sample, along with its key
+    index. Samples are stored grouped by target. Returns the number of samples written.
+
+    ``map_size`` is the maximum size of the database, only the written pages take
+    disk space. Without ``classes``, the classes are named after their index.
+    """
+    import lmdb
+
+    samples = sorted(samples, key=lambda sample: sample[2])
+    targets = [target for _, _, target in samples]
+    num_classes = len(classes) if classes else (targets[-1] + 1 if targets else 0)
+    class_starts = [bisect.bisect_left(targets, c) for c in range(num_classes)]
+    if not classes:
+        classes = [str(c) for c in range(num_classes)]
+
+    os.makedirs(root, exist_ok=True)
+    env = lmdb.open(root, map_size=map_size)
+    try:
+        txn = env.begin(write=True)
+        for i, (key, read_fn, _) in enumerate(samples):
+            if not txn.put(key, read_fn(), overwrite=False):
+                raise ValueError("duplicate key {!r}".format(key))
+            if (i + 1) % commit_every == 0:
+                txn.commit()
+                txn = env.begin(write=True)
+        txn.commit()
+        env.sync()
+    finally:
+        env.close()
+
+    save_lmdb_index(
+        os.path.join(root, LMDB_INDEX_FILE_NAME),
+        [key for key, _, _ in samples],
+        classes,
+        class_starts,
+    )
+    return len(samples)
+
+
+def _file_reader(path: str) -> Callable[[], bytes]:
+    def read() -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    return read
+
+
+def image_folder_to_lmdb(
+    directory: str,
+    root: str,
+    map_size: int = 1 << 40,
+    extensions: Tuple[str, ...] = IMG_EXTENSIONS,
+) -> int:
+    """Converts an :class:`~flowvision.datasets.ImageFolder` style tree into an LMDB
+    database read by :class:`LMDBImageDataset`. The keys are the paths of the
+    images relative to ``directory``.
+
+    Args:
+        directory (string): Root of the image folder tree.
+        root (string): Output directory of the database.
+        map_size (int): Maximum size of the database in bytes. Default: 1 TiB
+        extensions (tuple[string]): Allowed file extensions.
+
+    Returns:
+        int: The number of samples written.
+    """
+    classes, class_to_idx = find_classes(directory)
+    samples = make_dataset(directory, class_to_idx, extensions=extensions)
+    return write_lmdb_dataset(
+        [
+            (
+                os.path.relpath(path, directory).encode("utf-8"),
+                _file_reader(path),
+                target,
+            )
+            for path, target in samples
+        ],
+        root,
+        classes,
+        map_size,
+    )
+
+
+class LMDBImageDataset(VisionDataset):
+    """Image dataset stored in an LMDB database, e.g. written by
+    :func:`image_folder_to_lmdb`.
+
+    The environment is opened lazily by every process reading from it, so the
+    dataset can be handed to a multi-worker ``DataLoader``. A database without a
+    key index, such as the LSUN ones, is indexed on first use in the key order of
+    the database, and its samples have no target. The index is saved next to the
+    database, or in ``$FLOWVISION_CACHE`` when the database directory is read-only.
+
+    You will need to install the ``lmdb`` package to use this dataset: run
+    ``pip install lmdb``
+
+    Args:
+        root (string): Path of the LMDB database.
+        transform (callable, optional): A function/transform that takes in a PIL image
+            and returns a transformed version. E.g, ``transforms.RandomCrop``
+        target_transform (callable, optional): A function/transform that takes in the
+            target and transforms it.
+        loader (callable, optional): A function to decode a sample from the
+            bytes-like object read from the database, which is only valid until the
+            call returns. Default: :func:`~flowvision.datasets.packed.bytes_loader`
+        index_file (string, optional): Path of the key index.
+
+     Attributes:
+        classes (list): List of the class names.
+        class_to_idx (dict): Dict with items (class_name, class_index).
+    """
+
+    def __init__(
+        self,
+        root: str,
+        transform: Optional[Callable] = None,
+        target_transform: Optional[Callable] = None,
+        loader: Callable[[Any], Any] = bytes_loader,
+        index_file: Optional[str] = None,
+    ) -> None:
+        super(LMDBImageDataset, self).__init__(
+            root, transform=transform, target_transform=target_transform
+        )
+        self.loader = loader
+        self.index_files = (
+            [index_file]
+            if index_file is not None
+            else _default_index_files(
+                os.path.abspath(self.root), LMDB_INDEX_FILE_NAME, "lmdb_keys"
+            )
+        )
+        # the read transaction of the process that started it
+        self._txn = None
+        self._pid = None
+
+        for path in self.index_files:
+            if os.path.isfile(path) and self._load_index(path):
+                break
+        else:
+            self._build_index()
+
+        self.class_to_idx: Dict[str, int] = {
+            cls_name: i for i, cls_name in enumerate(self.classes)
+        }
+
+    def _load_index(self, path: str) -> bool:
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != LMDB_INDEX_VERSION:
+                return False
+            self._keys = data["keys"]
+            self._offsets = data["offsets"]
+            self.classes = data["classes"].tolist()
+            self._class_starts = data["class_starts"].tolist()
+        return True
+
+    def _build_index(self) -> None:
+        with _open_env(self.root).begin(write=False) as txn:
+            keys = list(txn.cursor().iternext(keys=True, values=False))
+        for path in self.index_files:
+            try:
+                save_lmdb_index(path, keys)
+            except OSError:
+                continue
+            self._load_index(path)
+            return
+        warnings.warn(
+            "could not write the LMDB key index to {}".format(self.index_files)
+        )
+        offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+        np.cumsum([len(k) for k in keys], out=offsets[1:])
+        self._keys = np.frombuffer(b"".join(keys), dtype=np.uint8)
+        self._offsets = offsets
+        self.classes = []
+        self._class_starts = []
+
+    def get_key(self, index: int) -> bytes:
+        """Returns the key of a sample in the database."""
+        start, end = self._offsets[index : index + 2].tolist()
+        return self._keys[start:end].tobytes()
+
+    def get_target(self, index: int) -> Optional[int]:
+        """Returns the class index of a sample, ``None`` without classes."""
+        if not self._class_starts:
+            return None
+        return bisect.bisect_right(self._class_starts, index) - 1
+
+    @property
+    def targets(self) -> np.ndarray:
+        """The class index of every sample, empty without classes."""
+        if not self._class_starts:
+            return np.zeros(0, dtype=np.int64)
+        starts = self._class_starts + [len(self)]
+        return np.repeat(np.arange(len(self._class_starts)), np.diff(starts))
+
+    def _begin(self) -> Any:
+        # every worker opens the environment itself and keeps a read transaction, so
+        # that the buffers it returns point into the mapped pages
+        if self._txn is None or self._pid != os.getpid():
+            self._txn = _open_env(self.root).begin(write=False, buffers=True)
+            self._pid = os.getpid()
+        return self._txn
+
+    def __getitem__(self, index: int) -> Tuple[Any, Any]:
+        """
+        Args:
+            index (int): Index
+        Returns:
+            tuple: (sample, target) where target is class_index of the target class.
+        """
+        if index < 0:
+            index += len(self)
+        key = self.get_key(index)
+        data = self._begin().get(key)
+        if data is None:
+            raise KeyError("{!r} not found in {}".format(key, self.root))
+        sample = self.loader(data)
+        target = self.get_target(index)
+        if self.transform is not None:
+            sample = self.transform(sample)
+        if self.target_transform is not None:
+            target = self.target_transform(target)
+
+        return sample, target
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def close(self) -> None:
+        """Ends the read transaction of this process, started again on the next read."""
+        if self._txn is not None and self._pid == os.getpid():
+            self._txn.abort()
+        self._txn = self._pid = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # transactions cannot be pickled, every worker starts its own
+        state = self.__dict__.copy()
+        state["_txn"] = state["_pid"] = None
+        return state
+
+    def extra_repr(self) -> str:
+        return "Classes: {}".format(len(self.classes))
@@ -0,0 +1,346 @@
+"""
+Packed shard format for image classification datasets.
+
+A packed dataset is made of three kinds of files living in one directory:
+
+.. code-block:: shell
+
+    out_dir/
+    ├── train.json            # metadata: classes and shard file names
+    ├── train.idx.npy         # index: (shard, offset, length, target) per sample
+    ├── train-00000.bin       # encoded image bytes stored back to back
+    ├── train-00001.bin
+    └── ...
+
+Shards are opened with :mod:`mmap`, so reading a sample is a single slice of a
+mapped buffer instead of an ``open`` / ``stat`` on a small file.
+"""
+
+import io
+import json
+import mmap
+import os
+import os.path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from .folder import IMG_EXTENSIONS, find_classes, make_dataset
+from .vision import VisionDataset
+
+PACKED_INDEX_DTYPE = np.dtype(
+    [("shard", "<i4"), ("offset", "<i8"), ("length", "<i8"), ("target", "<i8")]
+)
+PACKED_FORMAT_VERSION = 1
+
+
+def _meta_path(root: str, prefix: str) -> str:
+    return os.path.join(root, prefix + ".json")
+
+
+def _index_path(root: str, prefix: str) -> str:
+    return os.path.join(root, prefix + ".idx.npy")
+
+
+def _shard_name(prefix: str, shard_id: int) -> str:
+    return "{}-{:05d}.bin".format(prefix, shard_id)
+
+
+class BufferReader(io.RawIOBase):
+    """Read-only, seekable file over a bytes-like object.
+
+    Unlike ``io.BytesIO``, which copies a ``memoryview`` it is given, the buffer is
+    only read from, so a view into a mapped shard or an LMDB page is decoded in
+    place.
+    """
+
+    def __init__(self, data: Any) -> None:
+        super(BufferReader, self).__init__()
+        self._view = memoryview(data).cast("B")
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        size = max(min(len(b), len(self._view) - self._pos), 0)
+        b[:size] = self._view[self._pos : self._pos + size]
+        self._pos += size
+        return size
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        if offset < 0:
+            raise ValueError("negative seek position {}".format(offset))
+        self._pos = offset
+        return offset
+
+    def tell(self) -> int:
+        return self._pos
+
+
+def bytes_loader(data: Any) -> Image.Image:
+    """Decodes an encoded image held in a bytes-like object into an RGB PIL image."""
+    with BufferReader(data) as f:
+        img = Image.open(f)
+        return img.convert("RGB")
+
+
+class PackedShardWriter(object):
+    """Writes encoded samples into packed shards with an offset index.
+
+    Args:
+        root (string): Output directory, created if it does not exist.
+        prefix (string): Name shared by the metadata, index and shard files. Default: ``"train"``
+        shard_size (int): Approximate maximum size of one shard in bytes. Default: 1 GiB
+        classes (list, optional): Class names stored in the metadata.
+
+    Example:
+
+    .. code-block:: python
+
+        with PackedShardWriter("/data/imagenet-packed", "train", classes=classes) as writer:
+            for path, target in samples:
+                with open(path, "rb") as f:
+                    writer.write(f.read(), target)
+    """
+
+    def __init__(
+        self,
+        root: str,
+        prefix: str = "train",
+        shard_size: int = 1 << 30,
+        classes: Optional[List[str]] = None,
+    ) -> None:
+        if shard_size <= 0:
+            raise ValueError("shard_size should be positive, got {}".format(shard_size))
+        self.root = os.path.expanduser(root)
+        self.prefix = prefix
+        self.shard_size = shard_size
+        self.classes = list(classes) if classes is not None else None
+        os.makedirs(self.root, exist_ok=True)
+
+        self._shards: List[str] = []
+        self._records: List[Tuple[int, int, int, int]] = []
+        self._file = None
+        self._offset = 0
+        self._closed = False
+
+    def _open_next_shard(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        name = _shard_name(self.prefix, len(self._shards))
+        self._shards.append(name)
+        self._file = open(os.path.join(self.root, name), "wb")
+        self._offset = 0
+
+    def write(self, data: bytes, target: int) -> int:
+        """Appends one encoded sample and returns its index in the dataset."""
+        if self._closed:
+            raise RuntimeError("Cannot write to a closed PackedShardWriter")
+        if self._file is None or (
+            self._offset > 0 and self._offset + len(data) > self.shard_size
+        ):
+            self._open_next_shard()
+        self._file.write(data)
+        self._records.append(
+            (len(self._shards) - 1, self._offset, len(data), int(target))
+        )
+        self._offset += len(data)
+        return len(self._records) - 1
+
+    def close(self) -> None:
+        """Flushes the last shard and writes the index and metadata files."""
+        if self._closed:
+            return
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        index = np.array(self._records, dtype=PACKED_INDEX_DTYPE)
+        np.save(_index_path(self.root, self.prefix), index)
+        meta = {
+            "version": PACKED_FORMAT_VERSION,
+            "num_samples": len(self._records),
+            "shards": self._shards,
+            "classes": self.classes,
+        }
+        with open(_meta_path(self.root, self.prefix), "w") as f:
+            json.dump(meta, f)
+        self._closed = True
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __enter__(self) -> "PackedShardWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def write_packed_dataset(
+    samples: Iterable[Tuple[Callable[[], bytes], int]],
+    root: str,
+    prefix: str = "train",
+    shard_size: int = 1 << 30,
+    classes: Optional[List[str]] = None,
+) -> int:
+    """Packs ``(read_fn, target)`` pairs into shards, where ``read_fn()`` returns the
+    encoded bytes of one sample. Returns the number of samples written.
+    """
+    with PackedShardWriter(root, prefix, shard_size, classes) as writer:
+        for read_fn, target in samples:
+            writer.write(read_fn(), target)
+        return len(writer)
+
+
+def _file_reader(path: str) -> Callable[[], bytes]:
+    def read() -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    return read
+
+
+def pack_image_folder(
+    directory: str,
+    root: str,
+    prefix: str = "train",
+    shard_size: int = 1 << 30,
+    extensions: Tuple[str, ...] = IMG_EXTENSIONS,
+) -> int:
+    """Converts an :class:`~flowvision.datasets.ImageFolder` style tree into packed shards.
+
+    Args:
+        directory (string): Root of the image folder tree.
+        root (string): Output directory of the packed dataset.
+        prefix (string): Name of the packed split. Default: ``"train"``
+        shard_size (int): Approximate maximum size of one shard in bytes. Default: 1 GiB
+        extensions (tuple[string]): Allowed file extensions.
+
+    Returns:
+        int: The number of samples written.
+    """
+    classes, class_to_idx = find_classes(directory)
+    samples = make_dataset(directory, class_to_idx, extensions=extensions)
+    return write_packed_dataset(
+        ((_file_reader(path), target) for path, target in samples),
+        root,
+        prefix,
+        shard_size,
+        classes,
+    )
+
+
+class PackedImageDataset(VisionDataset):
+    """Image dataset backed by packed shards written with :class:`PackedShardWriter`.
+
+    Shards are memory-mapped lazily in each process, so the dataset can be handed
+    to a multi-worker ``DataLoader`` and every worker maps the shards itself.
+
+    Args:
+        root (string): Directory containing the packed dataset.
+        prefix (string): Name of the packed split. Default: ``"train"``
+        transform (callable, optional): A function/transform that takes in a PIL image
+            and returns a transformed version. E.g, ``transforms.RandomCrop``
+        target_transform (callable, optional): A function/transform that takes in the
+            target and transforms it.
+        loader (callable, optional): A function to decode a sample from the
+            bytes-like object sliced out of a shard. Default: :func:`bytes_loader`
+
+     Attributes:
+        classes (list): List of the class names, if stored by the writer.
+        class_to_idx (dict): Dict with items (class_name, class_index).
+        targets (numpy.ndarray): The class_index value for each sample.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        prefix: str = "train",
+        transform: Optional[Callable] = None,
+        target_transform: Optional[Callable] = None,
+        loader: Callable[[Any], Any] = bytes_loader,
+    ) -> None:
+        super(PackedImageDataset, self).__init__(
+            root, transform=transform, target_transform=target_transform
+        )
+        self.prefix = prefix
+        self.loader = loader
+
+        meta_file = _meta_path(self.root, prefix)
+        if not os.path.isfile(meta_file):
+            raise FileNotFoundError(
+                "Packed dataset metadata not found: {}".format(meta_file)
+            )
+        with open(meta_file, "r") as f:
+            meta = json.load(f)
+        if meta.get("version") != PACKED_FORMAT_VERSION:
+            raise RuntimeError(
+                "Unsupported packed dataset version {}".format(meta.get("version"))
+            )
+
+        self.shards = meta["shards"]
+        self.classes = meta.get("classes") or []
+        self.class_to_idx: Dict[str, int] = {
+            cls_name: i for i, cls_name in enumerate(self.classes)
+        }
+        self.index = np.load(_index_path(self.root, prefix), mmap_mode="r")
+        if len(self.index) != meta["num_samples"]:
+            raise RuntimeError(
+                "Packed index holds {} samples but metadata expects {}".format(
+                    len(self.index), meta["num_samples"]
+                )
+            )
+        self.targets = self.index["target"]
+        self._maps: Optional[List[Optional[mmap.mmap]]] = None
+
+    def _get_map(self, shard_id: int) -> mmap.mmap:
+        if self._maps is None:
+            self._maps = [None] * len(self.shards)
+        buf = self._maps[shard_id]
+        if buf is None:
+            with open(os.path.join(self.root, self.shards[shard_id]), "rb") as f:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[shard_id] = buf
+        return buf
+
+    def get_bytes(self, index: int) -> memoryview:
+        """Returns the encoded bytes of a sample as a view into the mapped shard."""
+        shard, offset, length, _ = self.index[index].tolist()
+        return memoryview(self._get_map(shard))[offset : offset + length]
+
+    def __getitem__(self, index: int) -> Tuple[Any, Any]:
+        """
+        Args:
+            index (int): Index
+        Returns:
+            tuple: (sample, target) where target is class_index of the target class.
+        """
+        sample = self.loader(self.get_bytes(index))
+        target = int(self.targets[index])
+        if self.transform is not None:
+            sample = self.transform(sample)
+        if self.target_transform is not None:
+            target = self.target_transform(target)
+
+        return sample, target
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # mmap objects cannot be pickled, every worker maps the shards again
+        state = self.__dict__.copy()
+        state["_maps"] = None
+        return state
+
+    def extra_repr(self) -> str:
+        return "Prefix: {}\nShards: {}".format(self.prefix, len(self.shards))
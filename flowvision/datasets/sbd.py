@@ -139,6 +139,9 @@ class SBDataset(VisionDataset):
     def __len__(self):
         return len(self.images)
 
+    def get_image_path(self, index):
+        return self.images[index]
+
     def extra_repr(self):
         lines = ["Image set: {image_set}", "Mode: {mode}"]
         return "\n".join(lines).format(**self.__dict__)
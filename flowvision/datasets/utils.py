@@ -16,6 +16,8 @@ import urllib.request
 import urllib.error
 import pathlib
 
+from flowvision.utils.download import download_file
+
 
 try:
     from tqdm.auto import (
@@ -79,17 +81,9 @@ string_classes = (str, bytes)
 USER_AGENT = "oneflow/vision"
 
 
-def _urlretrieve(url: str, filename: str, chunk_size: int = 1024) -> None:
-    with open(filename, "wb") as fh:
-        with urllib.request.urlopen(
-            urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
-        ) as response:
-            with tqdm(total=response.length) as pbar:
-                for chunk in iter(lambda: response.read(chunk_size), ""):
-                    if not chunk:
-                        break
-                    pbar.update(chunk_size)
-                    fh.write(chunk)
+def _urlretrieve(url: str, filename: str, md5: Optional[str] = None) -> None:
+    # the md5 is checked while downloading
+    download_file(url, filename, hash_prefix=md5, hash_type="md5")
 
 
 def gen_bar_updater() -> Callable[[int, int, int], None]:
@@ -196,7 +190,7 @@ def download_url(
         # download the file
         try:
             print("Downloading " + url + " to " + fpath)
-            _urlretrieve(url, fpath)
+            _urlretrieve(url, fpath, md5)
         except (urllib.error.URLError, IOError) as e:  # type: ignore[attr-defined]
             if url[:5] == "https":
                 url = url.replace("https:", "http:")
@@ -204,12 +198,12 @@ def download_url(
                     "Failed download. Trying https -> http instead."
                     " Downloading " + url + " to " + fpath
                 )
-                _urlretrieve(url, fpath)
+                _urlretrieve(url, fpath, md5)
             else:
                 raise e
 
-    # check integrity of downloaded file
-    if not check_integrity(fpath, md5):
+    # the integrity of the downloaded file is checked by _urlretrieve
+    if not check_integrity(fpath):
         raise RuntimeError("File not found or corrupted.")
 
 
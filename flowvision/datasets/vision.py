@@ -45,6 +45,12 @@ class VisionDataset(data.Dataset):
     def __len__(self) -> int:
         raise NotImplementedError
 
+    def get_image_path(self, index: int) -> str:
+        """Returns the path of the image of sample ``index``. Datasets implementing it
+        get their image sizes from :class:`~flowvision.datasets.ImageSizeIndex`
+        instead of loading the samples."""
+        raise NotImplementedError
+
     def __repr__(self) -> str:
         head = "Dataset " + self.__class__.__name__
         body = ["Number of datapoints: {}".format(self.__len__())]
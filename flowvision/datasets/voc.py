@@ -138,6 +138,9 @@ class _VOCBase(VisionDataset):
     def __len__(self) -> int:
         return len(self.images)
 
+    def get_image_path(self, index: int) -> str:
+        return self.images[index]
+
 
 class VOCSegmentation(_VOCBase):
     r""" `Pascal VOC <http://host.robots.ox.ac.uk/pascal/VOC/>`_ Segmentation Dataset.
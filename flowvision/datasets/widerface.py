@@ -119,6 +119,9 @@ class WIDERFace(VisionDataset):
     def __len__(self) -> int:
         return len(self.img_info)
 
+    def get_image_path(self, index: int) -> str:
+        return self.img_info[index]["img_path"]
+
     def extra_repr(self) -> str:
         lines = ["Split: {split}"]
         return "\n".join(lines).format(**self.__dict__)
@@ -30,9 +30,11 @@ from .blocks import (
 )
 from .regularization import (
     drop_path,
+    drop_block,
     dropblock,
     DropBlock,
     DropPath,
+    DropRateScheduler,
     LayerNorm2d,
     StochasticDepth,
 )
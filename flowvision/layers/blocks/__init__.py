@@ -1,4 +1,4 @@
-from .boxes import nms, batched_nms, box_iou
+from .boxes import nms, batched_nms, batched_nms_per_image, box_iou
 from .conv_bn_act import ConvBnAct, ConvAct, ConvBn
 from .mlp import Mlp, GluMlp, ConvMlp
 from .patch_embed import PatchEmbed
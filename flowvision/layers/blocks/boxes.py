@@ -1,6 +1,6 @@
 import oneflow as flow
 from oneflow import Tensor
-from typing import Tuple
+from typing import List, Tuple
 
 
 def nms(boxes: Tensor, scores: Tensor, iou_threshold: float) -> Tensor:
@@ -65,6 +65,92 @@ def _batched_nms_coordinate_trick(
     return keep
 
 
+def batched_nms_per_image(
+    boxes: Tensor,
+    scores: Tensor,
+    idxs: Tensor,
+    image_idxs: Tensor,
+    iou_threshold: float,
+) -> Tensor:
+    """
+    Performs non-maximum suppression over the boxes of several images at once.
+
+    NMS will not be applied between elements of different categories or between
+    elements of different images, so a single call replaces one
+    :func:`batched_nms` call per image.
+
+    Args:
+        boxes (Tensor[N, 4]): boxes of all the images. They
+            are expected to be in ``(x1, y1, x2, y2)`` format with ``0 <= x1 < x2`` and
+            ``0 <= y1 < y2``.
+        scores (Tensor[N]): scores for each one of the boxes
+        idxs (Tensor[N]): indices of the categories for each one of the boxes.
+        image_idxs (Tensor[N]): indices of the images for each one of the boxes.
+        iou_threshold (float): discards all overlapping boxes with IoU > iou_threshold
+
+    Returns:
+        Tensor: int64 tensor with the indices of the elements that have been kept by NMS, sorted
+        in decreasing order of scores
+    """
+    if boxes.numel() == 0:
+        return flow.empty((0,), dtype=flow.int64, device=boxes.device)
+    # same trick as _batched_nms_coordinate_trick, but categories are moved
+    # apart along x and images along y, so the offsets stay as small as with
+    # a single image and two boxes can only overlap if they share both
+    max_coordinate = boxes.max()
+    step = max_coordinate + flow.tensor(1).to(boxes)
+    x_offsets = idxs.to(boxes) * step
+    y_offsets = image_idxs.to(boxes) * step
+    offsets = flow.stack((x_offsets, y_offsets, x_offsets, y_offsets), dim=1)
+    keep = nms(boxes + offsets, scores, iou_threshold)
+    return keep
+
+
+def split_per_image(
+    keep: Tensor, image_idxs: Tensor, num_images: int, max_per_image: int
+) -> List[Tensor]:
+    """
+    Splits the output of :func:`batched_nms_per_image` into one index tensor per
+    image, keeping at most ``max_per_image`` elements for each of them.
+
+    Args:
+        keep (Tensor[K]): indices kept by NMS, sorted in decreasing order of scores
+        image_idxs (Tensor[N]): indices of the images for each one of the boxes.
+        num_images (int): number of images in the batch
+        max_per_image (int): maximum number of elements kept per image
+
+    Returns:
+        List[Tensor]: ``num_images`` int64 tensors with the indices kept for every
+        image, each sorted in decreasing order of scores
+    """
+    num_kept = keep.shape[0]
+    if num_kept == 0:
+        return [keep] * num_images
+    device = keep.device
+    positions = flow.arange(num_kept, device=device)
+    kept_images = image_idxs[keep]
+    # group by image while preserving the score order inside each group
+    order = flow.argsort(kept_images * num_kept + positions)
+    keep = keep[order]
+    kept_images = kept_images[order]
+
+    counts = (
+        (kept_images.view(-1, 1) == flow.arange(num_images, device=device).view(1, -1))
+        .to(flow.int64)
+        .sum(dim=0)
+    )
+    starts = flow.cumsum(counts, dim=0) - counts
+    rank = positions - starts[kept_images]
+    keep = keep[rank < max_per_image]
+
+    result = []
+    start = 0
+    for count in flow.clamp(counts, max=max_per_image).tolist():
+        result.append(keep[start : start + count])
+        start += count
+    return result
+
+
 def remove_small_boxes(boxes: Tensor, min_size: float) -> Tensor:
     """
     Remove boxes which contains at least one side smaller than min_size.
@@ -108,6 +194,32 @@ def clip_boxes_to_image(boxes: Tensor, size: Tuple[int, int]) -> Tensor:
     return clipped_boxes.reshape(boxes.shape)
 
 
+def clip_boxes_to_image_sizes(boxes: Tensor, image_sizes: Tensor) -> Tensor:
+    """
+    Clip boxes so that they lie inside their image, with one size per box or
+    per group of boxes.
+
+    Args:
+        boxes (Tensor[..., 4]): boxes in ``(x1, y1, x2, y2)`` format
+            with ``0 <= x1 < x2`` and ``0 <= y1 < y2``.
+        image_sizes (Tensor[..., 2]): ``(height, width)`` of the images, broadcastable
+            to ``boxes[..., :2]``
+
+    Returns:
+        Tensor[..., 4]: clipped boxes
+    """
+    dim = boxes.dim()
+    image_sizes = image_sizes.to(boxes.dtype)
+    heights = image_sizes[..., 0:1]
+    widths = image_sizes[..., 1:2]
+
+    boxes_x = flow.minimum(boxes[..., 0::2].clamp(min=0), widths)
+    boxes_y = flow.minimum(boxes[..., 1::2].clamp(min=0), heights)
+
+    clipped_boxes = flow.stack((boxes_x, boxes_y), dim=dim)
+    return clipped_boxes.reshape(boxes.shape)
+
+
 def _upcast(t: Tensor) -> Tensor:
     # Protects from numerical overflows in multiplications by upcasting to the equivalent higher type
     if t.is_floating_point():
@@ -165,3 +277,34 @@ def box_iou(boxes1: Tensor, boxes2: Tensor) -> Tensor:
     inter, union = _box_inter_union(boxes1, boxes2)
     iou = inter / union
     return iou
+
+
+def batched_box_iou(boxes1: Tensor, boxes2: Tensor) -> Tensor:
+    """
+    Return intersection-over-union (Jaccard index) between two sets of boxes for
+    every image of a batch.
+
+    Both sets of boxes are expected to be in ``(x1, y1, x2, y2)`` format with
+    ``0 <= x1 < x2`` and ``0 <= y1 < y2``.
+
+    Args:
+        boxes1 (Tensor[B, N, 4]): first set of boxes
+        boxes2 (Tensor[B, M, 4]): second set of boxes
+
+    Returns:
+        Tensor[B, N, M]: the NxM matrices containing the pairwise IoU values for every
+        element in boxes1 and boxes2 of the same image
+    """
+    boxes1 = _upcast(boxes1)
+    boxes2 = _upcast(boxes2)
+    area1 = (boxes1[..., 2] - boxes1[..., 0]) * (boxes1[..., 3] - boxes1[..., 1])
+    area2 = (boxes2[..., 2] - boxes2[..., 0]) * (boxes2[..., 3] - boxes2[..., 1])
+
+    lt = flow.maximum(boxes1[:, :, None, :2], boxes2[:, None, :, :2])  # [B,N,M,2]
+    rb = flow.minimum(boxes1[:, :, None, 2:], boxes2[:, None, :, 2:])  # [B,N,M,2]
+
+    wh = (rb - lt).clamp(min=0)  # [B,N,M,2]
+    inter = wh[..., 0] * wh[..., 1]  # [B,N,M]
+
+    union = area1[:, :, None] + area2[:, None, :] - inter
+    return inter / union
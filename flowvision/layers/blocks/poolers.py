@@ -2,6 +2,7 @@ from typing import Optional, List, Dict, Tuple, Union
 
 import oneflow as flow
 from oneflow import nn, Tensor
+from oneflow.nn.modules.utils import _pair
 from flowvision.layers.blocks.boxes import box_area
 
 from .roi_align import roi_align
@@ -43,20 +44,18 @@ class LevelMapper:
         self.lvl0 = canonical_level
         self.eps = eps
 
-    def __call__(self, boxlists: List[Tensor]) -> Tensor:
+    def __call__(self, boxlists: Union[Tensor, List[Tensor]]) -> Tensor:
         """
         Args:
-            boxlists (list[BoxList])
+            boxlists (list[BoxList] or Tensor[K, 4]): the boxes of each image, or the
+                boxes of all the images already concatenated
         """
+        boxes = boxlists if isinstance(boxlists, Tensor) else flow.cat(boxlists)
         # Compute level ids
-        s = flow.sqrt(flow.cat([box_area(boxlist) for boxlist in boxlists]))
+        s = flow.sqrt(box_area(boxes))
 
         # Eqn.(1) in FPN paper
-        target_lvls = flow.floor(
-            self.lvl0
-            + flow.log2(s / self.s0)
-            + flow.tensor(self.eps, dtype=s.dtype, device=s.device)
-        )
+        target_lvls = flow.floor(self.lvl0 + flow.log2(s / self.s0) + self.eps)
         target_lvls = flow.clamp(target_lvls, min=self.k_min, max=self.k_max)
         return (target_lvls.to(flow.int64) - self.k_min).to(flow.int64)
 
@@ -160,34 +159,80 @@ def _multiscale_roi_align(
             sampling_ratio=sampling_ratio,
         )
 
-    levels = mapper(boxes)
+    levels = mapper(rois[:, 1:])
+    return multilevel_roi_align(
+        x_filtered,
+        rois,
+        levels,
+        output_size,
+        spatial_scales=scales,
+        sampling_ratio=sampling_ratio,
+    )
 
-    num_rois = len(rois)
-    num_channels = x_filtered[0].shape[1]
 
-    dtype, device = x_filtered[0].dtype, x_filtered[0].device
-    result = flow.zeros(
-        (num_rois, num_channels,) + output_size, dtype=dtype, device=device,
-    )
+def multilevel_roi_align(
+    features: List[Tensor],
+    rois: Tensor,
+    levels: Tensor,
+    output_size: Union[int, List[int], Tuple[int]],
+    spatial_scales: List[float],
+    sampling_ratio: int = -1,
+    aligned: bool = False,
+) -> Tensor:
+    """
+    Performs RoIAlign over the levels of a feature pyramid, pooling each RoI from
+    the level given by ``levels``.
 
-    for level, (per_level_feature, scale) in enumerate(zip(x_filtered, scales)):
-        idx_in_level = flow.where(levels == level)[0]
-        rois_per_level = rois[idx_in_level]
+    The RoIs are sorted by level once, so that the RoIs of each level are a
+    contiguous slice pooled by a single :func:`roi_align` call, written in place in
+    the output. The output is then put back in the order of ``rois`` by a single
+    gather.
 
-        result_idx_in_level = roi_align(
-            per_level_feature,
-            rois_per_level,
+    Args:
+        features (List[Tensor[N, C, H_l, W_l]]): the feature maps of each level.
+        rois (Tensor[K, 5]): the RoIs in (batch index, x1, y1, x2, y2) format.
+        levels (Tensor[K]): index in ``features`` of the level of each RoI.
+        output_size (int or Tuple[int, int]): the size of the output, as (height, width).
+        spatial_scales (List[float]): the scale of each level, see :func:`roi_align`.
+        sampling_ratio (int): see :func:`roi_align`. Default: -1
+        aligned (bool): see :func:`roi_align`. Default: False
+
+    Returns:
+        Tensor[K, C, output_size[0], output_size[1]]: The pooled RoIs.
+    """
+    output_size = _pair(output_size)
+    num_rois = rois.shape[0]
+    num_channels = features[0].shape[1]
+    dtype, device = features[0].dtype, features[0].device
+    result = flow.empty(
+        (num_rois, num_channels) + tuple(output_size), dtype=dtype, device=device
+    )
+    if num_rois == 0:
+        return result
+
+    order = flow.argsort(levels)
+    sorted_rois = rois[order]
+    # the only host synchronization: the number of RoIs of each level
+    level_ids = flow.arange(len(features), dtype=levels.dtype, device=levels.device)
+    counts = (levels.unsqueeze(0) == level_ids.unsqueeze(1)).sum(dim=1).tolist()
+
+    start = 0
+    for feature, scale, count in zip(features, spatial_scales, counts):
+        if count == 0:
+            continue
+        end = start + count
+        result[start:end] = roi_align(
+            feature,
+            sorted_rois[start:end],
             output_size=output_size,
             spatial_scale=scale,
             sampling_ratio=sampling_ratio,
+            aligned=aligned,
         )
-        # TODO (shijie wang): Use cmobined indexing.
-        # result[idx_in_level] = result_idx_in_level.to(result.dtype)
-        result = flow.tensor_scatter_nd_update(
-            result, idx_in_level[:, None], result_idx_in_level
-        )
+        start = end
 
-    return result
+    # back to the order of the rois
+    return result[flow.argsort(order)]
 
 
 class MultiScaleRoIAlign(nn.Module):
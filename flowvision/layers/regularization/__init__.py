@@ -1,4 +1,5 @@
-from .dropblock import DropBlock
+from .dropblock import DropBlock, drop_block
 from .droppath import DropPath, drop_path
+from .drop_scheduler import DropRateScheduler
 from .norm import LayerNorm2d
 from .stochastic_depth import stochastic_depth, StochasticDepth
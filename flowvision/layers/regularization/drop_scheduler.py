@@ -0,0 +1,90 @@
+"""
+Per-update scheduling of the drop rates of the regularization layers of a model.
+"""
+import math
+from typing import Any, Dict
+
+import oneflow.nn as nn
+
+from .dropblock import DropBlock
+from .droppath import DropPath
+from .stochastic_depth import StochasticDepth
+
+# attribute holding the drop rate of each regularization layer
+_RATE_ATTRS = ((DropBlock, "p"), (DropPath, "drop_prob"), (StochasticDepth, "p"))
+
+
+class DropRateScheduler:
+    """Ramps the drop rate of the :class:`DropBlock`, :class:`DropPath` and
+    :class:`StochasticDepth` layers of a model from 0 up to the rate each layer was
+    built with, as recommended for DropBlock in `"DropBlock: A regularization method
+    for convolutional networks" <https://arxiv.org/abs/1810.12890>`_.
+
+    Like the learning rate schedulers of :mod:`flowvision.scheduler`, it is called at
+    the end of each optimizer update with the update count:
+
+    .. code-block:: python
+
+        drop_scheduler = DropRateScheduler(model, total_updates=10 * len(loader))
+        for epoch in range(epochs):
+            for step, (images, targets) in enumerate(loader):
+                ...
+                optimizer.step()
+                drop_scheduler.step_update(epoch * len(loader) + step + 1)
+
+    Args:
+        model (nn.Module): the model, with the final drop rates set
+        total_updates (int): number of updates of the ramp, the rates stay at their
+            final value afterwards
+        start_update (int): number of updates before the ramp starts, without any
+            dropping. Default: 0
+        mode (str): ``"linear"`` or ``"cosine"`` ramp. Default: ``"linear"``
+    """
+
+    def __init__(
+        self,
+        model: nn.Module,
+        total_updates: int,
+        start_update: int = 0,
+        mode: str = "linear",
+    ) -> None:
+        if mode not in ["linear", "cosine"]:
+            raise ValueError(
+                f"mode has to be either 'linear' or 'cosine', but got {mode}"
+            )
+        if total_updates <= 0:
+            raise ValueError(f"total_updates should be positive, got {total_updates}")
+        self.total_updates = total_updates
+        self.start_update = start_update
+        self.mode = mode
+        self.layers = []
+        for module in model.modules():
+            for cls, attr in _RATE_ATTRS:
+                if isinstance(module, cls):
+                    self.layers.append((module, attr))
+        self.base_values = [float(getattr(m, attr) or 0.0) for m, attr in self.layers]
+        self.step_update(0)
+
+    def factor(self, num_updates: int) -> float:
+        """Fraction of the final drop rates used after ``num_updates`` updates"""
+        t = (num_updates - self.start_update) / self.total_updates
+        t = min(max(t, 0.0), 1.0)
+        if self.mode == "cosine":
+            return 0.5 * (1 - math.cos(math.pi * t))
+        return t
+
+    def step_update(self, num_updates: int) -> None:
+        factor = self.factor(num_updates)
+        for (module, attr), value in zip(self.layers, self.base_values):
+            setattr(module, attr, value * factor)
+
+    def state_dict(self) -> Dict[str, Any]:
+        return {
+            "total_updates": self.total_updates,
+            "start_update": self.start_update,
+            "mode": self.mode,
+            "base_values": self.base_values,
+        }
+
+    def load_state_dict(self, state_dict: Dict[str, Any]) -> None:
+        self.__dict__.update(state_dict)
@@ -8,29 +8,83 @@ import oneflow.nn.functional as F
 from oneflow import Tensor
 
 
+def _drop_block_gamma(drop_prob: float, block_size: int, height: int, width: int):
+    # rate of the block seeds so that ``drop_prob`` of the features are dropped
+    return (
+        drop_prob
+        * height
+        * width
+        / (block_size ** 2 * (height - block_size + 1) * (width - block_size + 1))
+    )
+
+
+def drop_block(
+    x: Tensor,
+    drop_prob: float = 0.1,
+    block_size: int = 7,
+    training: bool = False,
+    inplace: bool = False,
+) -> Tensor:
+    """DropBlock from `"DropBlock: A regularization method for convolutional networks"
+    <https://arxiv.org/abs/1810.12890>`_, which drops contiguous ``block_size x block_size``
+    regions of each feature map and rescales the rest.
+
+    The seeds of the blocks are only sampled where a whole block fits, on a
+    ``(H - block_size + 1) x (W - block_size + 1)`` grid, and grown into blocks by a max
+    pooling. The mask is the only temporary of the size of ``x``, it is inverted and
+    scaled in place.
+
+    Args:
+        x (Tensor[N, C, H, W]): the input
+        drop_prob (float): fraction of the features to drop. Default: 0.1
+        block_size (int): size of the dropped blocks, clipped to the feature map. Default: 7
+        training (bool): apply DropBlock if is ``True``. Default: ``False``
+        inplace (bool): multiply ``x`` by the mask in place, which saves the output
+            allocation. Only valid when ``x`` is not needed by the backward of the
+            layer producing it, e.g. the output of a convolution. Default: ``False``
+    """
+    if not drop_prob or not training:
+        return x
+    height, width = x.shape[-2:]
+    block_size = min(block_size, height, width)
+    gamma = _drop_block_gamma(drop_prob, block_size, height, width)
+    seeds = flow.rand(
+        x.shape[0],
+        x.shape[1],
+        height - block_size + 1,
+        width - block_size + 1,
+        device=x.device,
+    )
+    seeds = (seeds < gamma).to(x.dtype)
+    # every seed covers the block below and right of it
+    pad = block_size - 1
+    mask = F.max_pool2d(
+        F.pad(seeds, (pad, pad, pad, pad)), kernel_size=block_size, stride=1
+    )
+    mask = mask.mul_(-1).add_(1)
+    mask = mask.mul_(mask.numel() / mask.sum().clamp(min=1.0))
+    return x.mul_(mask) if inplace else x * mask
+
+
 class DropBlock(nn.Module):
-    def __init__(self, block_size: int = 7, p: float = 0.5):
+    """
+    See :func:`drop_block`.
+    """
+
+    def __init__(self, block_size: int = 7, p: float = 0.5, inplace: bool = False):
         super(DropBlock, self).__init__()
         self.block_size = block_size
         self.p = p
+        self.inplace = inplace
 
     def cal_gamma(self, x: Tensor):
-        gamma = (
-            self.p
-            * x.shape[-1] ** 2
-            / (self.block_size ** 2 * (x.shape[-1] - self.block_size + 1) ** 2)
-        )
-        return gamma
+        block_size = min(self.block_size, *x.shape[-2:])
+        return _drop_block_gamma(self.p, block_size, *x.shape[-2:])
 
     def forward(self, x):
-        if self.training:
-            gamma = self.cal_gamma(x)
-            mask = flow.bernoulli(flow.ones_like(x) * gamma)
-            mask_block = 1 - F.max_pool2d(
-                mask,
-                kernel_size=(self.block_size, self.block_size),
-                stride=(1, 1),
-                padding=(self.block_size // 2, self.block_size // 2),
-            )
-            x = mask_block * x * (mask_block.numel() / mask_block.sum())
-        return x
+        return drop_block(x, self.p, self.block_size, self.training, self.inplace)
+
+    def extra_repr(self) -> str:
+        return "block_size={}, p={}, inplace={}".format(
+            self.block_size, self.p, self.inplace
+        )
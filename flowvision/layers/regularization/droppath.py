@@ -7,33 +7,46 @@ import oneflow.nn as nn
 import oneflow.nn.functional as F
 
 
-def drop_path(x, drop_prob: float = 0.5, training: bool = False):
+def _keep_mask(x, shape, keep_prob: float):
+    """Samples a mask of the given ``shape``, broadcastable to ``x``, that is
+    ``1 / keep_prob`` with probability ``keep_prob`` and 0 otherwise."""
+    mask = (flow.rand(*shape, device=x.device) < keep_prob).to(x.dtype)
+    if keep_prob > 0.0:
+        mask = mask.mul_(1.0 / keep_prob)
+    return mask
+
+
+def drop_path(x, drop_prob: float = 0.5, training: bool = False, inplace: bool = False):
     """Drop paths (Stochastic Depth) per sample (when applied in main path of residual blocks).
     This is the same as the DropConnect impl I created for EfficientNet, etc networks, however,
     the original name is misleading as 'Drop Connect' is a different form of dropout in a separate paper...
     See discussion: https://github.com/tensorflow/tpu/issues/494#issuecomment-532968956 ... I've opted for
     changing the layer and argument names to 'drop path' rather than mix DropConnect as a layer name and use
     'survival rate' as the argument.
+
+    The rescaling is folded into the per sample mask, so the output is the only
+    tensor of the size of ``x``, and none with ``inplace=True`` (only valid when
+    ``x`` is not needed by the backward of the layer producing it).
     """
-    if drop_prob == 0.0 or not training:
+    if not drop_prob or not training:
         return x
-    keep_prob = 1 - drop_prob
-    shape = (x.shape[0],) + (1,) * (
-        x.ndim - 1
-    )  # work with diff dim tensors, not just 2D ConvNets
-    random_tensor = flow.rand(*shape, dtype=x.dtype, device=x.device) + keep_prob
-    random_tensor = random_tensor.floor()  # binarize
-    output = x.div(keep_prob) * random_tensor
-    return output
+    # work with diff dim tensors, not just 2D ConvNets
+    shape = (x.shape[0],) + (1,) * (x.ndim - 1)
+    mask = _keep_mask(x, shape, 1 - drop_prob)
+    return x.mul_(mask) if inplace else x * mask
 
 
 class DropPath(nn.Module):
     """Drop paths (Stochastic Depth) per sample  (when applied in main path of residual blocks).
     """
 
-    def __init__(self, drop_prob=None):
+    def __init__(self, drop_prob=None, inplace: bool = False):
         super(DropPath, self).__init__()
         self.drop_prob = drop_prob
+        self.inplace = inplace
 
     def forward(self, x):
-        return drop_path(x, self.drop_prob, self.training)
+        return drop_path(x, self.drop_prob, self.training, self.inplace)
+
+    def extra_repr(self) -> str:
+        return "drop_prob={}".format(self.drop_prob)
@@ -5,6 +5,8 @@ import oneflow as flow
 import oneflow.nn as nn
 from oneflow import Tensor
 
+from .droppath import _keep_mask
+
 
 def stochastic_depth(
     input: Tensor, p: float, mode: str, training: bool = True
@@ -36,14 +38,7 @@ def stochastic_depth(
         size = [input.shape[0]] + [1] * (input.ndim - 1)
     else:  # zeros the entire input
         size = [1] * input.ndim
-    # noise = flow.empty(size, dtype=input.dtype, device=input.device)
-    # TODO: add tensor.bernoulli_() method
-    noise = flow.ones(size, dtype=input.dtype) * survival_rate
-    # TODO: for now bernoulli only has cpu implementation in oneflow
-    noise = flow.bernoulli(noise).to(input.device)
-    if survival_rate > 0.0:
-        noise.div(survival_rate)
-    return input * noise
+    return input * _keep_mask(input, size, survival_rate)
 
 
 class StochasticDepth(nn.Module):
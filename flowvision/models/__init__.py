@@ -1,34 +1,50 @@
-from .alexnet import *
-from .densenet import *
-from .vgg import *
-from .mnasnet import *
-from .resnet import *
-from .inception_v3 import *
-from .googlenet import *
-from .shufflenet_v2 import *
-from .mobilenet_v2 import *
-from .mobilenet_v3 import *
-from .squeezenet import *
-from .conv_mixer import *
-from .swin_transformer import *
-from .crossformer import *
-from .pvt import *
-from .cswin import *
-from .res_mlp import *
-from .regionvit import *
-from .mlp_mixer import *
-from .rexnet import *
-from .rexnet_lite import *
-from .ghostnet import *
-from .res2net import *
-from .efficientnet import *
-from .vision_transformer import *
-from .convnext import *
-
-from . import neural_style_transfer
-from . import detection
-from . import segmentation
+# The architecture modules are imported on first access: ``flowvision.models.resnet50``
+# or ``ModelCreator.create_model("resnet50")`` only load ``flowvision.models.resnet``.
+# The names they export are listed in ``_manifest.py``, generated by
+# ci/check/generate_model_manifest.py, which must be rerun when models are added.
+import importlib
+import sys
+import types
 
+from ._manifest import LAZY_EXPORTS
 from .utils import load_state_dict_from_url
 from .registry import ModelCreator
+from .graph import GraphModule, graph_compile_times, to_graph
+from .fuse import fold_conv_bn, fuse_for_inference
 from .helpers import *
+
+
+def _export(name, module):
+    # subpackages are exported as themselves, modules through the name they define
+    if hasattr(module, "__path__") and module.__name__ == __name__ + "." + name:
+        return module
+    return getattr(module, name)
+
+
+class _LazyModule(types.ModuleType):
+    def __setattr__(self, name, value):
+        # importing a submodule binds it on the package, which must not shadow
+        # the model of the same name it exports, e.g. ``alexnet``
+        if isinstance(value, types.ModuleType) and name in LAZY_EXPORTS:
+            value = _export(name, value)
+        super().__setattr__(name, value)
+
+
+def __getattr__(name):
+    if name not in LAZY_EXPORTS:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    module = importlib.import_module("." + LAZY_EXPORTS[name], __name__)
+    value = _export(name, module)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()).union(LAZY_EXPORTS))
+
+
+__all__ = sorted(
+    set(LAZY_EXPORTS).union(name for name in globals() if not name.startswith("_"))
+)
+
+sys.modules[__name__].__class__ = _LazyModule
@@ -0,0 +1,451 @@
+"""
+Model manifest of flowvision.models, generated by ci/check/generate_model_manifest.py.
+Do not edit by hand.
+"""
+
+# model name -> (module relative to flowvision.models, has pretrained weights)
+MODEL_MANIFEST = {
+    "alexnet": ("alexnet", True),
+    "convmixer_1024_20": ("conv_mixer", True),
+    "convmixer_1536_20": ("conv_mixer", True),
+    "convmixer_768_32_relu": ("conv_mixer", True),
+    "convnext_base_224": ("convnext", True),
+    "convnext_base_224_22k": ("convnext", True),
+    "convnext_base_224_22k_to_1k": ("convnext", True),
+    "convnext_base_384": ("convnext", True),
+    "convnext_base_384_22k_to_1k": ("convnext", True),
+    "convnext_iso_base_224": ("convnext", True),
+    "convnext_iso_large_224": ("convnext", True),
+    "convnext_iso_small_224": ("convnext", True),
+    "convnext_large_224": ("convnext", True),
+    "convnext_large_224_22k": ("convnext", True),
+    "convnext_large_224_22k_to_1k": ("convnext", True),
+    "convnext_large_384": ("convnext", True),
+    "convnext_large_384_22k_to_1k": ("convnext", True),
+    "convnext_small_224": ("convnext", True),
+    "convnext_tiny_224": ("convnext", True),
+    "convnext_xlarge_224_22k": ("convnext", True),
+    "convnext_xlarge_224_22k_to_1k": ("convnext", True),
+    "convnext_xlarge_384_22k_to_1k": ("convnext", True),
+    "crossformer_base_patch4_group7_224": ("crossformer", True),
+    "crossformer_large_patch4_group7_224": ("crossformer", True),
+    "crossformer_small_patch4_group7_224": ("crossformer", True),
+    "crossformer_tiny_patch4_group7_224": ("crossformer", True),
+    "cswin_base_224": ("cswin", True),
+    "cswin_base_384": ("cswin", True),
+    "cswin_large_224": ("cswin", True),
+    "cswin_large_384": ("cswin", True),
+    "cswin_small_224": ("cswin", True),
+    "cswin_tiny_224": ("cswin", True),
+    "deeplabv3_mobilenet_v3_large_coco": ("segmentation.deeplabv3", True),
+    "deeplabv3_resnet101_coco": ("segmentation.deeplabv3", True),
+    "deeplabv3_resnet50_coco": ("segmentation.deeplabv3", True),
+    "deit_base_distilled_patch16_224": ("vision_transformer", True),
+    "deit_base_distilled_patch16_384": ("vision_transformer", True),
+    "deit_base_patch16_224": ("vision_transformer", True),
+    "deit_base_patch16_384": ("vision_transformer", True),
+    "deit_small_distilled_patch16_224": ("vision_transformer", True),
+    "deit_small_patch16_224": ("vision_transformer", True),
+    "deit_tiny_distilled_patch16_224": ("vision_transformer", True),
+    "deit_tiny_patch16_224": ("vision_transformer", True),
+    "densenet121": ("densenet", True),
+    "densenet161": ("densenet", True),
+    "densenet169": ("densenet", True),
+    "densenet201": ("densenet", True),
+    "efficientnet_b0": ("efficientnet", True),
+    "efficientnet_b1": ("efficientnet", True),
+    "efficientnet_b2": ("efficientnet", True),
+    "efficientnet_b3": ("efficientnet", True),
+    "efficientnet_b4": ("efficientnet", True),
+    "efficientnet_b5": ("efficientnet", True),
+    "efficientnet_b6": ("efficientnet", True),
+    "efficientnet_b7": ("efficientnet", True),
+    "fasterrcnn_mobilenet_v3_large_320_fpn": ("detection.faster_rcnn", False),
+    "fasterrcnn_mobilenet_v3_large_fpn": ("detection.faster_rcnn", False),
+    "fasterrcnn_resnet50_fpn": ("detection.faster_rcnn", False),
+    "fcn_resnet101_coco": ("segmentation.fcn", True),
+    "fcn_resnet50_coco": ("segmentation.fcn", True),
+    "ghostnet": ("ghostnet", True),
+    "gmlp_b16_224": ("mlp_mixer", False),
+    "gmlp_s16_224": ("mlp_mixer", True),
+    "gmlp_ti16_224": ("mlp_mixer", False),
+    "googlenet": ("googlenet", True),
+    "inception_v3": ("inception_v3", True),
+    "lraspp_mobilenet_v3_large_coco": ("segmentation.lraspp", True),
+    "mlp_mixer_b16_224": ("mlp_mixer", True),
+    "mlp_mixer_b16_224_in21k": ("mlp_mixer", True),
+    "mlp_mixer_b16_224_miil": ("mlp_mixer", True),
+    "mlp_mixer_b16_224_miil_in21k": ("mlp_mixer", True),
+    "mlp_mixer_b32_224": ("mlp_mixer", False),
+    "mlp_mixer_l16_224": ("mlp_mixer", True),
+    "mlp_mixer_l16_224_in21k": ("mlp_mixer", True),
+    "mlp_mixer_l32_224": ("mlp_mixer", False),
+    "mlp_mixer_s16_224": ("mlp_mixer", False),
+    "mlp_mixer_s32_224": ("mlp_mixer", False),
+    "mnasnet0_5": ("mnasnet", True),
+    "mnasnet0_75": ("mnasnet", False),
+    "mnasnet1_0": ("mnasnet", True),
+    "mnasnet1_3": ("mnasnet", False),
+    "mobilenet_v2": ("mobilenet_v2", True),
+    "mobilenet_v3_large": ("mobilenet_v3", True),
+    "mobilenet_v3_small": ("mobilenet_v3", True),
+    "neural_style_transfer": ("neural_style_transfer.stylenet", False),
+    "pvt_large": ("pvt", True),
+    "pvt_medium": ("pvt", True),
+    "pvt_small": ("pvt", True),
+    "pvt_tiny": ("pvt", True),
+    "regionvit_base_224": ("regionvit", False),
+    "regionvit_base_w14_224": ("regionvit", False),
+    "regionvit_base_w14_peg_224": ("regionvit", False),
+    "regionvit_medium_224": ("regionvit", False),
+    "regionvit_small_224": ("regionvit", False),
+    "regionvit_small_w14_224": ("regionvit", False),
+    "regionvit_small_w14_peg_224": ("regionvit", False),
+    "regionvit_tiny_224": ("regionvit", False),
+    "res2net101_26w_4s": ("res2net", True),
+    "res2net50_14w_8s": ("res2net", True),
+    "res2net50_26w_4s": ("res2net", True),
+    "res2net50_26w_6s": ("res2net", True),
+    "res2net50_26w_8s": ("res2net", True),
+    "res2net50_48w_2s": ("res2net", True),
+    "resmlp_12_224": ("res_mlp", True),
+    "resmlp_12_224_dino": ("res_mlp", True),
+    "resmlp_12_distilled_224": ("res_mlp", True),
+    "resmlp_24_224": ("res_mlp", True),
+    "resmlp_24_224_dino": ("res_mlp", True),
+    "resmlp_24_distilled_224": ("res_mlp", True),
+    "resmlp_36_224": ("res_mlp", True),
+    "resmlp_36_distilled_224": ("res_mlp", True),
+    "resmlp_big_24_224": ("res_mlp", True),
+    "resmlp_big_24_224_in22k_to_1k": ("res_mlp", True),
+    "resmlp_big_24_distilled_224": ("res_mlp", True),
+    "resnet101": ("resnet", True),
+    "resnet152": ("resnet", True),
+    "resnet18": ("resnet", True),
+    "resnet34": ("resnet", True),
+    "resnet50": ("resnet", True),
+    "resnext101_32x8d": ("resnet", True),
+    "resnext50_32x4d": ("resnet", True),
+    "retinanet_resnet50_fpn": ("detection.retinanet", False),
+    "rexnet_lite_1_0": ("rexnet_lite", True),
+    "rexnet_lite_1_3": ("rexnet_lite", True),
+    "rexnet_lite_1_5": ("rexnet_lite", True),
+    "rexnet_lite_2_0": ("rexnet_lite", True),
+    "rexnetv1_1_0": ("rexnet", True),
+    "rexnetv1_1_3": ("rexnet", True),
+    "rexnetv1_1_5": ("rexnet", True),
+    "rexnetv1_2_0": ("rexnet", True),
+    "rexnetv1_3_0": ("rexnet", True),
+    "shufflenet_v2_x0_5": ("shufflenet_v2", True),
+    "shufflenet_v2_x1_0": ("shufflenet_v2", True),
+    "shufflenet_v2_x1_5": ("shufflenet_v2", False),
+    "shufflenet_v2_x2_0": ("shufflenet_v2", False),
+    "squeezenet1_0": ("squeezenet", True),
+    "squeezenet1_1": ("squeezenet", True),
+    "ssd300_vgg16": ("detection.ssd", False),
+    "ssdlite320_mobilenet_v3_large": ("detection.ssdlite", False),
+    "swin_base_patch4_window12_384": ("swin_transformer", True),
+    "swin_base_patch4_window12_384_in22k_to_1k": ("swin_transformer", True),
+    "swin_base_patch4_window7_224": ("swin_transformer", True),
+    "swin_base_patch4_window7_224_in22k_to_1k": ("swin_transformer", True),
+    "swin_large_patch4_window12_384_in22k_to_1k": ("swin_transformer", True),
+    "swin_large_patch4_window7_224_in22k_to_1k": ("swin_transformer", True),
+    "swin_small_patch4_window7_224": ("swin_transformer", True),
+    "swin_tiny_patch4_window7_224": ("swin_transformer", True),
+    "vgg11": ("vgg", True),
+    "vgg11_bn": ("vgg", True),
+    "vgg13": ("vgg", True),
+    "vgg13_bn": ("vgg", True),
+    "vgg16": ("vgg", True),
+    "vgg16_bn": ("vgg", True),
+    "vgg19": ("vgg", True),
+    "vgg19_bn": ("vgg", True),
+    "vit_base_patch16_224": ("vision_transformer", True),
+    "vit_base_patch16_224_in21k": ("vision_transformer", True),
+    "vit_base_patch16_224_miil": ("vision_transformer", True),
+    "vit_base_patch16_224_miil_in21k": ("vision_transformer", True),
+    "vit_base_patch16_224_sam": ("vision_transformer", True),
+    "vit_base_patch16_384": ("vision_transformer", True),
+    "vit_base_patch32_224": ("vision_transformer", True),
+    "vit_base_patch32_224_in21k": ("vision_transformer", True),
+    "vit_base_patch32_224_sam": ("vision_transformer", True),
+    "vit_base_patch32_384": ("vision_transformer", True),
+    "vit_base_patch8_224": ("vision_transformer", True),
+    "vit_base_patch8_224_in21k": ("vision_transformer", True),
+    "vit_giant_patch14_224": ("vision_transformer", False),
+    "vit_gigantic_patch14_224": ("vision_transformer", False),
+    "vit_huge_patch14_224": ("vision_transformer", False),
+    "vit_huge_patch14_224_in21k": ("vision_transformer", True),
+    "vit_large_patch16_224": ("vision_transformer", True),
+    "vit_large_patch16_224_in21k": ("vision_transformer", True),
+    "vit_large_patch16_384": ("vision_transformer", True),
+    "vit_large_patch32_224": ("vision_transformer", False),
+    "vit_large_patch32_224_in21k": ("vision_transformer", True),
+    "vit_large_patch32_384": ("vision_transformer", True),
+    "vit_small_patch16_224": ("vision_transformer", True),
+    "vit_small_patch16_224_in21k": ("vision_transformer", True),
+    "vit_small_patch16_384": ("vision_transformer", True),
+    "vit_small_patch32_224": ("vision_transformer", True),
+    "vit_small_patch32_224_in21k": ("vision_transformer", True),
+    "vit_small_patch32_384": ("vision_transformer", True),
+    "vit_tiny_patch16_224": ("vision_transformer", True),
+    "vit_tiny_patch16_224_in21k": ("vision_transformer", True),
+    "vit_tiny_patch16_384": ("vision_transformer", True),
+    "wide_resnet101_2": ("resnet", True),
+    "wide_resnet50_2": ("resnet", True),
+}
+
+# public name of flowvision.models -> module defining it
+LAZY_EXPORTS = {
+    "Affine": "res_mlp",
+    "AlexNet": "alexnet",
+    "Attention": "vision_transformer",
+    "AttentionWithRelPos": "regionvit",
+    "BasicLayer": "swin_transformer",
+    "Block": "convnext",
+    "Bottle2neck": "res2net",
+    "CSWinBlock": "cswin",
+    "CSWinTransformer": "cswin",
+    "ConvAttBlock": "regionvit",
+    "ConvBNAct": "rexnet",
+    "ConvBNSiLU": "rexnet",
+    "ConvMixer": "conv_mixer",
+    "ConvNeXt": "convnext",
+    "ConvNeXtIsotropic": "convnext",
+    "CrossFormer": "crossformer",
+    "CrossFormerBlock": "crossformer",
+    "DenseNet": "densenet",
+    "DropPath": "swin_transformer",
+    "DynamicPosBias": "crossformer",
+    "EfficientNet": "efficientnet",
+    "GatedMlp": "mlp_mixer",
+    "GoogLeNet": "googlenet",
+    "GoogLeNetOutputs": "googlenet",
+    "Inception3": "inception_v3",
+    "InceptionOutputs": "inception_v3",
+    "LayerNorm": "convnext",
+    "LePEAttention": "cswin",
+    "LinearBottleneck": "rexnet_lite",
+    "MNASNet": "mnasnet",
+    "Merge_Block": "cswin",
+    "MixerBlock": "mlp_mixer",
+    "Mlp": "mlp_mixer",
+    "MlpMixer": "mlp_mixer",
+    "MobileNetV2": "mobilenet_v2",
+    "MobileNetV3": "mobilenet_v3",
+    "PatchEmbed": "regionvit",
+    "PatchMerging": "crossformer",
+    "Projection": "regionvit",
+    "PyramidVisionTransformer": "pvt",
+    "R2LAttentionPlusFFN": "regionvit",
+    "ReXNetV1_lite": "rexnet_lite",
+    "Rearrange": "cswin",
+    "RegionViT": "regionvit",
+    "Res2Net": "res2net",
+    "ResMLP": "res_mlp",
+    "ResNet": "resnet",
+    "RexNetV1": "rexnet",
+    "SE": "rexnet",
+    "ShuffleNetV2": "shufflenet_v2",
+    "SpatialGatingBlock": "mlp_mixer",
+    "SpatialGatingUnit": "mlp_mixer",
+    "SqueezeNet": "squeezenet",
+    "Stage": "crossformer",
+    "SwinTransformer": "swin_transformer",
+    "SwinTransformerBlock": "swin_transformer",
+    "VGG": "vgg",
+    "VisionTransformer": "vision_transformer",
+    "WindowAttention": "swin_transformer",
+    "_GoogLeNetOutputs": "googlenet",
+    "_InceptionOutputs": "inception_v3",
+    "alexnet": "alexnet",
+    "convert_to_flatten_layout": "regionvit",
+    "convert_to_spatial_layout": "regionvit",
+    "convmixer_1024_20": "conv_mixer",
+    "convmixer_1536_20": "conv_mixer",
+    "convmixer_768_32_relu": "conv_mixer",
+    "convnext_base_224": "convnext",
+    "convnext_base_224_22k": "convnext",
+    "convnext_base_224_22k_to_1k": "convnext",
+    "convnext_base_384": "convnext",
+    "convnext_base_384_22k_to_1k": "convnext",
+    "convnext_iso_base_224": "convnext",
+    "convnext_iso_large_224": "convnext",
+    "convnext_iso_small_224": "convnext",
+    "convnext_large_224": "convnext",
+    "convnext_large_224_22k": "convnext",
+    "convnext_large_224_22k_to_1k": "convnext",
+    "convnext_large_384": "convnext",
+    "convnext_large_384_22k_to_1k": "convnext",
+    "convnext_small_224": "convnext",
+    "convnext_tiny_224": "convnext",
+    "convnext_xlarge_224_22k": "convnext",
+    "convnext_xlarge_224_22k_to_1k": "convnext",
+    "convnext_xlarge_384_22k_to_1k": "convnext",
+    "crossformer_base_patch4_group7_224": "crossformer",
+    "crossformer_large_patch4_group7_224": "crossformer",
+    "crossformer_small_patch4_group7_224": "crossformer",
+    "crossformer_tiny_patch4_group7_224": "crossformer",
+    "cswin_base_224": "cswin",
+    "cswin_base_384": "cswin",
+    "cswin_large_224": "cswin",
+    "cswin_large_384": "cswin",
+    "cswin_small_224": "cswin",
+    "cswin_tiny_224": "cswin",
+    "deit_base_distilled_patch16_224": "vision_transformer",
+    "deit_base_distilled_patch16_384": "vision_transformer",
+    "deit_base_patch16_224": "vision_transformer",
+    "deit_base_patch16_384": "vision_transformer",
+    "deit_small_distilled_patch16_224": "vision_transformer",
+    "deit_small_patch16_224": "vision_transformer",
+    "deit_tiny_distilled_patch16_224": "vision_transformer",
+    "deit_tiny_patch16_224": "vision_transformer",
+    "densenet121": "densenet",
+    "densenet161": "densenet",
+    "densenet169": "densenet",
+    "densenet201": "densenet",
+    "detection": "detection",
+    "drop_path": "swin_transformer",
+    "efficientnet_b0": "efficientnet",
+    "efficientnet_b1": "efficientnet",
+    "efficientnet_b2": "efficientnet",
+    "efficientnet_b3": "efficientnet",
+    "efficientnet_b4": "efficientnet",
+    "efficientnet_b5": "efficientnet",
+    "efficientnet_b6": "efficientnet",
+    "efficientnet_b7": "efficientnet",
+    "ghostnet": "ghostnet",
+    "gmlp_b16_224": "mlp_mixer",
+    "gmlp_s16_224": "mlp_mixer",
+    "gmlp_ti16_224": "mlp_mixer",
+    "googlenet": "googlenet",
+    "img2windows": "cswin",
+    "inception_v3": "inception_v3",
+    "layers_scale_mlp_blocks": "res_mlp",
+    "mlp_mixer_b16_224": "mlp_mixer",
+    "mlp_mixer_b16_224_in21k": "mlp_mixer",
+    "mlp_mixer_b16_224_miil": "mlp_mixer",
+    "mlp_mixer_b16_224_miil_in21k": "mlp_mixer",
+    "mlp_mixer_b32_224": "mlp_mixer",
+    "mlp_mixer_l16_224": "mlp_mixer",
+    "mlp_mixer_l16_224_in21k": "mlp_mixer",
+    "mlp_mixer_l32_224": "mlp_mixer",
+    "mlp_mixer_s16_224": "mlp_mixer",
+    "mlp_mixer_s32_224": "mlp_mixer",
+    "mnasnet0_5": "mnasnet",
+    "mnasnet0_75": "mnasnet",
+    "mnasnet1_0": "mnasnet",
+    "mnasnet1_3": "mnasnet",
+    "mobilenet_v2": "mobilenet_v2",
+    "mobilenet_v3_large": "mobilenet_v3",
+    "mobilenet_v3_small": "mobilenet_v3",
+    "model_urls": "convnext",
+    "neural_style_transfer": "neural_style_transfer",
+    "pair": "mlp_mixer",
+    "pvt_large": "pvt",
+    "pvt_medium": "pvt",
+    "pvt_small": "pvt",
+    "pvt_tiny": "pvt",
+    "regionvit_base_224": "regionvit",
+    "regionvit_base_w14_224": "regionvit",
+    "regionvit_base_w14_peg_224": "regionvit",
+    "regionvit_medium_224": "regionvit",
+    "regionvit_small_224": "regionvit",
+    "regionvit_small_w14_224": "regionvit",
+    "regionvit_small_w14_peg_224": "regionvit",
+    "regionvit_tiny_224": "regionvit",
+    "res2net101_26w_4s": "res2net",
+    "res2net50_14w_8s": "res2net",
+    "res2net50_26w_4s": "res2net",
+    "res2net50_26w_6s": "res2net",
+    "res2net50_26w_8s": "res2net",
+    "res2net50_48w_2s": "res2net",
+    "resize_pos_embed": "vision_transformer",
+    "resmlp_12_224": "res_mlp",
+    "resmlp_12_224_dino": "res_mlp",
+    "resmlp_12_distilled_224": "res_mlp",
+    "resmlp_24_224": "res_mlp",
+    "resmlp_24_224_dino": "res_mlp",
+    "resmlp_24_distilled_224": "res_mlp",
+    "resmlp_36_224": "res_mlp",
+    "resmlp_36_distilled_224": "res_mlp",
+    "resmlp_big_24_224": "res_mlp",
+    "resmlp_big_24_224_in22k_to_1k": "res_mlp",
+    "resmlp_big_24_distilled_224": "res_mlp",
+    "resnet101": "resnet",
+    "resnet152": "resnet",
+    "resnet18": "resnet",
+    "resnet34": "resnet",
+    "resnet50": "resnet",
+    "resnext101_32x8d": "resnet",
+    "resnext50_32x4d": "resnet",
+    "rexnet_lite_1_0": "rexnet_lite",
+    "rexnet_lite_1_3": "rexnet_lite",
+    "rexnet_lite_1_5": "rexnet_lite",
+    "rexnet_lite_2_0": "rexnet_lite",
+    "rexnetv1_1_0": "rexnet",
+    "rexnetv1_1_3": "rexnet",
+    "rexnetv1_1_5": "rexnet",
+    "rexnetv1_2_0": "rexnet",
+    "rexnetv1_3_0": "rexnet",
+    "segmentation": "segmentation",
+    "shufflenet_v2_x0_5": "shufflenet_v2",
+    "shufflenet_v2_x1_0": "shufflenet_v2",
+    "shufflenet_v2_x1_5": "shufflenet_v2",
+    "shufflenet_v2_x2_0": "shufflenet_v2",
+    "squeezenet1_0": "squeezenet",
+    "squeezenet1_1": "squeezenet",
+    "swin_base_patch4_window12_384": "swin_transformer",
+    "swin_base_patch4_window12_384_in22k_to_1k": "swin_transformer",
+    "swin_base_patch4_window7_224": "swin_transformer",
+    "swin_base_patch4_window7_224_in22k_to_1k": "swin_transformer",
+    "swin_large_patch4_window12_384_in22k_to_1k": "swin_transformer",
+    "swin_large_patch4_window7_224_in22k_to_1k": "swin_transformer",
+    "swin_small_patch4_window7_224": "swin_transformer",
+    "swin_tiny_patch4_window7_224": "swin_transformer",
+    "to_2tuple": "swin_transformer",
+    "vgg11": "vgg",
+    "vgg11_bn": "vgg",
+    "vgg13": "vgg",
+    "vgg13_bn": "vgg",
+    "vgg16": "vgg",
+    "vgg16_bn": "vgg",
+    "vgg19": "vgg",
+    "vgg19_bn": "vgg",
+    "vit_base_patch16_224": "vision_transformer",
+    "vit_base_patch16_224_in21k": "vision_transformer",
+    "vit_base_patch16_224_miil": "vision_transformer",
+    "vit_base_patch16_224_miil_in21k": "vision_transformer",
+    "vit_base_patch16_224_sam": "vision_transformer",
+    "vit_base_patch16_384": "vision_transformer",
+    "vit_base_patch32_224": "vision_transformer",
+    "vit_base_patch32_224_in21k": "vision_transformer",
+    "vit_base_patch32_224_sam": "vision_transformer",
+    "vit_base_patch32_384": "vision_transformer",
+    "vit_base_patch8_224": "vision_transformer",
+    "vit_base_patch8_224_in21k": "vision_transformer",
+    "vit_giant_patch14_224": "vision_transformer",
+    "vit_gigantic_patch14_224": "vision_transformer",
+    "vit_huge_patch14_224": "vision_transformer",
+    "vit_huge_patch14_224_in21k": "vision_transformer",
+    "vit_large_patch16_224": "vision_transformer",
+    "vit_large_patch16_224_in21k": "vision_transformer",
+    "vit_large_patch16_384": "vision_transformer",
+    "vit_large_patch32_224": "vision_transformer",
+    "vit_large_patch32_224_in21k": "vision_transformer",
+    "vit_large_patch32_384": "vision_transformer",
+    "vit_small_patch16_224": "vision_transformer",
+    "vit_small_patch16_224_in21k": "vision_transformer",
+    "vit_small_patch16_384": "vision_transformer",
+    "vit_small_patch32_224": "vision_transformer",
+    "vit_small_patch32_224_in21k": "vision_transformer",
+    "vit_small_patch32_384": "vision_transformer",
+    "vit_tiny_patch16_224": "vision_transformer",
+    "vit_tiny_patch16_224_in21k": "vision_transformer",
+    "vit_tiny_patch16_384": "vision_transformer",
+    "wide_resnet101_2": "resnet",
+    "wide_resnet50_2": "resnet",
+    "window_partition": "swin_transformer",
+    "window_reverse": "swin_transformer",
+    "windows2img": "cswin",
+}
@@ -1,11 +1,64 @@
 import math
+from collections import OrderedDict
 import oneflow as flow
 from oneflow import nn, Tensor
 
-from typing import List, Optional
+from typing import Any, Dict, Hashable, List, Optional
 from .image_list import ImageList
 
 
+class GeometryCache(object):
+    """
+    Bounded LRU cache of tensors keyed by feature-map geometry.
+
+    Anchors only depend on the feature map sizes, the strides, the dtype and the
+    device, so for inputs of a fixed size they can be computed once and reused.
+    ``hits`` and ``misses`` count lookups since the last :meth:`clear`.
+
+    Args:
+        max_size (int): maximum number of entries kept, 0 disables caching.
+    """
+
+    def __init__(self, max_size: int = 8):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.max_size <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
 class AnchorGenerator(nn.Module):
     """
     Module that generates anchors for a set if feature maps and
@@ -22,9 +75,14 @@ class AnchorGenerator(nn.Module):
     and AnchorGenerator will output a set of sizes[i] * aspect_ratios[i] anchors
     per spatial location for feature map i.
 
+    The anchors of the last ``cache_size`` input geometries are kept in a
+    :class:`GeometryCache` keyed by ``(grid_sizes, strides, dtype, device)``, and
+    all images of a batch share the same anchor tensor.
+
     Args:
         sizes (Tuple[Tuple[int]]):
         aspect_ratios (Tuple[Tuple[float]]):
+        cache_size (int): number of geometries whose anchors are cached, 0 disables the cache.
     """
 
     __annotations__ = {
@@ -32,7 +90,10 @@ class AnchorGenerator(nn.Module):
     }
 
     def __init__(
-        self, sizes=((128, 256, 512),), aspect_ratios=((0.5, 1.0, 2.0),),
+        self,
+        sizes=((128, 256, 512),),
+        aspect_ratios=((0.5, 1.0, 2.0),),
+        cache_size: int = 8,
     ):
         super(AnchorGenerator, self).__init__()
 
@@ -49,6 +110,13 @@ class AnchorGenerator(nn.Module):
             self.generate_anchors(size, aspect_ratio)
             for size, aspect_ratio in zip(sizes, aspect_ratios)
         ]
+        self._cache = GeometryCache(cache_size)
+
+    def cache_info(self) -> Dict[str, int]:
+        return self._cache.info()
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
 
     # For every (aspect_ratios, scales) combination, output a zero-centered anchor with those values.
     # (scales, aspect_ratios) are usually an element of zip(self.scales, self.aspect_ratios)
@@ -127,27 +195,28 @@ class AnchorGenerator(nn.Module):
     def forward(
         self, image_list: ImageList, feature_maps: List[Tensor]
     ) -> List[Tensor]:
-        grid_sizes = [feature_map.shape[-2:] for feature_map in feature_maps]
+        grid_sizes = [tuple(feature_map.shape[-2:]) for feature_map in feature_maps]
         image_size = image_list.tensors.shape[-2:]
         dtype, device = feature_maps[0].dtype, feature_maps[0].device
-        strides = [
-            [
-                flow.tensor(image_size[0] // g[0], dtype=flow.int64, device=device),
-                flow.tensor(image_size[1] // g[1], dtype=flow.int64, device=device),
-            ]
-            for g in grid_sizes
-        ]
-        self.set_cell_anchors(dtype, device)
-        anchors_over_all_feature_maps = self.grid_anchors(grid_sizes, strides)
-        anchors: List[List[flow.Tensor]] = []
-        for _ in range(len(image_list.image_sizes)):
-            anchors_in_image = [
-                anchors_per_feature_map
-                for anchors_per_feature_map in anchors_over_all_feature_maps
+        int_strides = tuple(
+            (image_size[0] // g[0], image_size[1] // g[1]) for g in grid_sizes
+        )
+        key = (tuple(grid_sizes), int_strides, str(dtype), str(device))
+        anchors_in_image = self._cache.get(key)
+        if anchors_in_image is None:
+            strides = [
+                [
+                    flow.tensor(s[0], dtype=flow.int64, device=device),
+                    flow.tensor(s[1], dtype=flow.int64, device=device),
+                ]
+                for s in int_strides
             ]
-            anchors.append(anchors_in_image)
-        anchors = [flow.cat(anchors_per_image) for anchors_per_image in anchors]
-        return anchors
+            self.set_cell_anchors(dtype, device)
+            anchors_over_all_feature_maps = self.grid_anchors(grid_sizes, strides)
+            anchors_in_image = flow.cat(anchors_over_all_feature_maps)
+            self._cache.put(key, anchors_in_image)
+        # anchors do not depend on the image, every image shares the same tensor
+        return [anchors_in_image for _ in range(len(image_list.image_sizes))]
 
 
 class DefaultBoxGenerator(nn.Module):
@@ -166,6 +235,8 @@ class DefaultBoxGenerator(nn.Module):
             it will be estimated from the data.
         clip (bool): Whether the standardized values of default boxes should be clipped between 0 and 1. The clipping
             is applied while the boxes are encoded in format ``(cx, cy, w, h)``.
+        cache_size (int): number of ``(grid_sizes, image_size, dtype, device)`` geometries whose default boxes
+            are cached, 0 disables the cache.
     """
 
     def __init__(
@@ -176,6 +247,7 @@ class DefaultBoxGenerator(nn.Module):
         scales: Optional[List[float]] = None,
         steps: Optional[List[int]] = None,
         clip: bool = True,
+        cache_size: int = 8,
     ):
         super().__init__()
         if steps is not None:
@@ -200,6 +272,13 @@ class DefaultBoxGenerator(nn.Module):
             self.scales = scales
 
         self._wh_pairs = self._generate_wh_pairs(num_outputs)
+        self._cache = GeometryCache(cache_size)
+
+    def cache_info(self) -> Dict[str, int]:
+        return self._cache.info()
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
 
     def _generate_wh_pairs(
         self,
@@ -283,23 +362,25 @@ class DefaultBoxGenerator(nn.Module):
     def forward(
         self, image_list: ImageList, feature_maps: List[Tensor]
     ) -> List[Tensor]:
-        grid_sizes = [feature_map.shape[-2:] for feature_map in feature_maps]
+        grid_sizes = [tuple(feature_map.shape[-2:]) for feature_map in feature_maps]
         image_size = image_list.tensors.shape[-2:]
         dtype, device = feature_maps[0].dtype, feature_maps[0].device
-        default_boxes = self._grid_default_boxes(grid_sizes, image_size, dtype=dtype)
-        default_boxes = default_boxes.to(device)
-
-        dboxes = []
-        for _ in image_list.image_sizes:
-            dboxes_in_image = default_boxes
+        key = (tuple(grid_sizes), tuple(image_size), str(dtype), str(device))
+        dboxes_in_image = self._cache.get(key)
+        if dboxes_in_image is None:
+            default_boxes = self._grid_default_boxes(
+                grid_sizes, image_size, dtype=dtype
+            )
+            default_boxes = default_boxes.to(device)
             dboxes_in_image = flow.cat(
                 [
-                    dboxes_in_image[:, :2] - 0.5 * dboxes_in_image[:, 2:],
-                    dboxes_in_image[:, :2] + 0.5 * dboxes_in_image[:, 2:],
+                    default_boxes[:, :2] - 0.5 * default_boxes[:, 2:],
+                    default_boxes[:, :2] + 0.5 * default_boxes[:, 2:],
                 ],
                 -1,
             )
             dboxes_in_image[:, 0::2] *= image_size[1]
             dboxes_in_image[:, 1::2] *= image_size[0]
-            dboxes.append(dboxes_in_image)
-        return dboxes
+            self._cache.put(key, dboxes_in_image)
+        # default boxes do not depend on the image, every image shares the same tensor
+        return [dboxes_in_image for _ in image_list.image_sizes]
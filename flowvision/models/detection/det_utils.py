@@ -38,41 +38,89 @@ class BalancedPositiveNegativeSampler:
         The first list contains the positive elements that were selected,
         and the second list the negative example.
         """
-        pos_idx = []
-        neg_idx = []
-        for matched_idxs_per_image in matched_idxs:
-            positive = flow.where(matched_idxs_per_image >= 1)[0]
-            negative = flow.where(matched_idxs_per_image == 0)[0]
-
-            num_pos = int(self.batch_size_per_image * self.positive_fraction)
-            # protect against not enough positive examples
-            num_pos = min(positive.numel(), num_pos)
-            num_neg = self.batch_size_per_image - num_pos
-            # protext against not enough negative examples
-            num_neg = min(negative.numel(), num_neg)
-
-            # randomly select positive and negative examples
-            perm1 = flow.randperm(positive.numel(), device=positive.device)[:num_pos]
-            perm2 = flow.randperm(negative.numel(), device=negative.device)[:num_neg]
-
-            pos_idx_per_image = positive[perm1]
-            neg_idx_per_image = negative[perm2]
-
-            # create binary mask from indices
-            pos_idx_per_image_mask = flow.zeros_like(
-                matched_idxs_per_image, dtype=flow.uint8
-            )
-            neg_idx_per_image_mask = flow.zeros_like(
-                matched_idxs_per_image, dtype=flow.uint8
-            )
+        lengths = [m.shape[0] for m in matched_idxs]
+        pos_mask, neg_mask = self.sample_batched(pad_per_image(matched_idxs, -1)[0])
 
-            pos_idx_per_image_mask[pos_idx_per_image] = 1
-            neg_idx_per_image_mask[neg_idx_per_image] = 1
+        pos_idx = [pos_mask[i, :n].to(flow.uint8) for i, n in enumerate(lengths)]
+        neg_idx = [neg_mask[i, :n].to(flow.uint8) for i, n in enumerate(lengths)]
+        return pos_idx, neg_idx
 
-            pos_idx.append(pos_idx_per_image_mask)
-            neg_idx.append(neg_idx_per_image_mask)
+    def sample_batched(self, matched_idxs: Tensor) -> Tuple[Tensor, Tensor]:
+        """
+        Samples all the images of a batch at once, without host synchronization.
 
-        return pos_idx, neg_idx
+        Args:
+            matched_idxs (Tensor[B, N]): -1, 0 or positive values for every image,
+                padded with -1.
+
+        Returns:
+            pos_mask (Tensor[B, N]): bool mask of the positive elements that were selected
+            neg_mask (Tensor[B, N]): bool mask of the negative elements that were selected
+        """
+        positive = matched_idxs >= 1
+        negative = matched_idxs == 0
+
+        max_pos = int(self.batch_size_per_image * self.positive_fraction)
+        # protect against not enough positive examples
+        num_pos = flow.clamp(positive.to(flow.int64).sum(dim=1), max=max_pos)
+        # protect against not enough negative examples
+        num_neg = flow.minimum(
+            negative.to(flow.int64).sum(dim=1), self.batch_size_per_image - num_pos
+        )
+
+        # randomly select positive and negative examples: every element draws
+        # a random key and the elements with the largest keys are kept
+        keys = flow.rand(*matched_idxs.shape, device=matched_idxs.device)
+        pos_mask = _select_largest_keys(keys, positive, num_pos, max_pos)
+        neg_mask = _select_largest_keys(
+            keys, negative, num_neg, self.batch_size_per_image
+        )
+        return pos_mask, neg_mask
+
+
+def _select_largest_keys(
+    keys: Tensor, candidates: Tensor, counts: Tensor, max_count: int
+) -> Tensor:
+    # keeps, for every row, the counts[i] candidates with the largest keys
+    k = min(max_count, keys.shape[1])
+    if k == 0:
+        return flow.zeros_like(candidates)
+    keys = flow.where(candidates, keys, flow.zeros_like(keys) - 1)
+    top_keys, _ = keys.topk(k, dim=1)
+    kth_key = flow.gather(top_keys, 1, (counts - 1).clamp(min=0).unsqueeze(1))
+    return candidates & (keys >= kth_key) & (counts > 0).unsqueeze(1)
+
+
+def pad_per_image(
+    tensors: List[Tensor], value: float, min_length: int = 0
+) -> Tuple[Tensor, Tensor]:
+    """
+    Stacks per-image tensors of different lengths into one padded tensor.
+
+    Args:
+        tensors (list[Tensor]): one tensor of shape [N_i, ...] per image
+        value (float): value of the padding elements
+        min_length (int): minimum length of the padded dimension. Default: 0
+
+    Returns:
+        padded (Tensor[B, N, ...]): the padded tensors, with N = max(N_i, min_length)
+        mask (Tensor[B, N]): bool mask of the elements that are not padding
+    """
+    device = tensors[0].device
+    lengths = [t.shape[0] for t in tensors]
+    max_length = max(max(lengths), min_length)
+    if all(n == max_length for n in lengths):
+        padded = flow.stack(tensors)
+    else:
+        shape = (len(tensors), max_length) + tuple(tensors[0].shape[1:])
+        padded = flow.full(shape, value, dtype=tensors[0].dtype, device=device)
+        for i, t in enumerate(tensors):
+            if lengths[i] > 0:
+                padded[i, : lengths[i]] = t
+    mask = flow.arange(max_length, device=device).unsqueeze(0) < flow.tensor(
+        lengths, dtype=flow.int64, device=device
+    ).unsqueeze(1)
+    return padded, mask
 
 
 def encode_boxes(reference_boxes, proposals, weights):
@@ -315,7 +363,65 @@ class Matcher:
 
         if self.allow_low_quality_matches:
             assert all_matches is not None
-            self.set_low_quality_matches_(matches, all_mathces, match_quality_matrix)
+            self.set_low_quality_matches_(matches, all_matches, match_quality_matrix)
+
+        return matches
+
+    def match_batched(self, match_quality_matrix, gt_mask):
+        # type: (Tensor, Tensor) -> Tensor
+        """
+        Matches all the images of a batch at once.
+
+        Args:
+            match_quality_matrix (Tensor[float]): a BxMxN tensor, containing the
+            pairwise quality between M ground-truth elements and N predicted elements
+            of every image, padded along M and N.
+            gt_mask (Tensor[bool]): a BxM tensor marking the ground-truth elements
+            that are not padding. Images without ground-truth are all unmatched.
+
+        Returns:
+            matches (Tensor[int64]): a BxN tensor with the same content as
+            ``__call__`` for every image.
+        """
+        batch_size, num_gt, num_pred = match_quality_matrix.shape
+        if num_gt == 0:
+            return flow.full(
+                (batch_size, num_pred),
+                self.BELOW_LOW_THRESHOLD,
+                dtype=flow.int64,
+                device=match_quality_matrix.device,
+            )
+
+        # padded ground-truth elements never win the max
+        gt_mask = gt_mask.unsqueeze(2)
+        match_quality_matrix = flow.where(
+            gt_mask, match_quality_matrix, flow.zeros_like(match_quality_matrix) - 1
+        )
+        matched_vals, all_matches = match_quality_matrix.max(dim=1)
+
+        below_low_threshold = matched_vals < self.low_threshold
+        between_threshold = (matched_vals >= self.low_threshold) & (
+            matched_vals < self.high_threshold
+        )
+        matches = flow.where(
+            below_low_threshold,
+            flow.zeros_like(all_matches) + self.BELOW_LOW_THRESHOLD,
+            all_matches,
+        )
+        matches = flow.where(
+            between_threshold,
+            flow.zeros_like(all_matches) + self.BETWEEN_THRESHOLDS,
+            matches,
+        )
+
+        if self.allow_low_quality_matches:
+            # same as set_low_quality_matches_, done for every image
+            highest_quality_foreach_gt, _ = match_quality_matrix.max(dim=2)
+            is_highest = (
+                match_quality_matrix == highest_quality_foreach_gt.unsqueeze(2)
+            ) & gt_mask
+            to_update = is_highest.to(flow.int64).sum(dim=1) > 0
+            matches = flow.where(to_update, all_matches, matches)
 
         return matches
 
@@ -353,6 +459,28 @@ class SSDMatcher(Matcher):
 
         return matches
 
+    def match_batched(self, match_quality_matrix, gt_mask):
+        # type: (Tensor, Tensor) -> Tensor
+        matches = super().match_batched(match_quality_matrix, gt_mask)
+        num_gt, num_pred = match_quality_matrix.shape[1:]
+        if num_gt == 0:
+            return matches
+
+        # For each gt, find the prediction with which it has the highset quality
+        _, highset_quality_pred_foreach_gt = match_quality_matrix.max(dim=2)
+        is_highest = (
+            highset_quality_pred_foreach_gt.unsqueeze(2)
+            == flow.arange(num_pred, device=matches.device).view(1, 1, -1)
+        ) & gt_mask.unsqueeze(2)
+        # a prediction picked by several gts goes to the last one
+        gt_idxs = flow.arange(num_gt, dtype=flow.int64, device=matches.device)
+        forced = flow.where(
+            is_highest,
+            gt_idxs.view(1, -1, 1),
+            flow.zeros_like(gt_idxs).view(1, -1, 1) - 1,
+        ).max(dim=1)[0]
+        return flow.where(forced >= 0, forced, matches)
+
 
 def overwrite_eps(model, eps):
     """
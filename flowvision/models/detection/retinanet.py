@@ -299,66 +299,71 @@ class RetinaNet(nn.Module):
         box_regression = head_outputs["bbox_regression"]
 
         num_images = len(image_shapes)
+        device = class_logits[0].device
+        image_sizes = flow.tensor(
+            image_shapes, dtype=box_regression[0].dtype, device=device
+        ).unsqueeze(1)
+
+        # every level is processed for the whole batch at once, in padded
+        # [N, K] form where entries below the score threshold are masked out
+        all_boxes = []
+        all_scores = []
+        all_labels = []
+        all_valid = []
+
+        for level, (box_regression_per_level, logits_per_level) in enumerate(
+            zip(box_regression, class_logits)
+        ):
+            num_classes = logits_per_level.shape[-1]
+            anchors_per_level = flow.stack([a[level] for a in anchors])
+
+            # keep only topk scoring predictions
+            scores_per_level = flow.sigmoid(logits_per_level).flatten(1)
+            num_topk = min(self.topk_candidates, scores_per_level.shape[1])
+            scores_per_level, topk_idxs = scores_per_level.topk(num_topk, dim=1)
+
+            anchor_idxs = flow.floor_divide(topk_idxs, num_classes)
+            labels_per_level = topk_idxs % num_classes
+
+            gather_idxs = anchor_idxs.unsqueeze(-1).expand(num_images, num_topk, 4)
+            boxes_per_level = self.box_coder.decode_single(
+                flow.gather(box_regression_per_level, 1, gather_idxs).reshape(-1, 4),
+                flow.gather(anchors_per_level, 1, gather_idxs).reshape(-1, 4),
+            ).reshape(num_images, num_topk, 4)
+            boxes_per_level = box_ops.clip_boxes_to_image_sizes(
+                boxes_per_level, image_sizes
+            )
 
-        detections: List[Dict[str, Tensor]] = []
-
-        for index in range(num_images):
-            box_regression_per_image = [br[index] for br in box_regression]
-            logits_per_image = [cl[index] for cl in class_logits]
-            anchors_per_image, image_shape = anchors[index], image_shapes[index]
-
-            image_boxes = []
-            image_scores = []
-            image_labels = []
-
-            for box_regression_per_level, logits_per_level, anchors_per_level in zip(
-                box_regression_per_image, logits_per_image, anchors_per_image
-            ):
-                num_classes = logits_per_level.shape[-1]
-
-                # remove low scoring boxes
-                scores_per_level = flow.sigmoid(logits_per_level).flatten()
-                keep_idxs = scores_per_level > self.score_thresh
-                scores_per_level = scores_per_level[keep_idxs]
-                topk_idxs = flow.where(keep_idxs)[0]
-
-                # keep only topk scoring predictions
-                num_topk = min(self.topk_candidates, topk_idxs.size(0))
-                scores_per_level, idxs = scores_per_level.topk(num_topk)
-                topk_idxs = topk_idxs[idxs]
-
-                anchor_idxs = flow.floor_divide(topk_idxs, num_classes)
-                labels_per_level = topk_idxs % num_classes
-
-                boxes_per_level = self.box_coder.decode_single(
-                    box_regression_per_level[anchor_idxs],
-                    anchors_per_level[anchor_idxs],
-                )
-                boxes_per_level = box_ops.clip_boxes_to_image(
-                    boxes_per_level, image_shape
-                )
-
-                image_boxes.append(boxes_per_level)
-                image_scores.append(scores_per_level)
-                image_labels.append(labels_per_level)
-
-            image_boxes = flow.cat(image_boxes, dim=0)
-            image_scores = flow.cat(image_scores, dim=0)
-            image_labels = flow.cat(image_labels, dim=0)
+            all_boxes.append(boxes_per_level)
+            all_scores.append(scores_per_level)
+            all_labels.append(labels_per_level)
+            # remove low scoring boxes
+            all_valid.append(scores_per_level > self.score_thresh)
+
+        boxes = flow.cat(all_boxes, dim=1).reshape(-1, 4)
+        scores = flow.cat(all_scores, dim=1).flatten()
+        labels = flow.cat(all_labels, dim=1).flatten()
+        valid = flow.cat(all_valid, dim=1)
+        image_idxs = (
+            flow.arange(num_images, device=device).view(-1, 1).expand_as(valid)
+        ).flatten()
+
+        inds = flow.where(valid.flatten())[0]
+        boxes, scores, labels = boxes[inds], scores[inds], labels[inds]
+        image_idxs = image_idxs[inds]
+
+        # non-maximum suppression
+        keep = box_ops.batched_nms_per_image(
+            boxes, scores, labels, image_idxs, self.nms_thresh
+        )
+        keep_per_image = box_ops.split_per_image(
+            keep, image_idxs, num_images, self.detections_per_img
+        )
 
-            # non-maximum suppression
-            keep = box_ops.batched_nms(
-                image_boxes, image_scores, image_labels, self.nms_thresh
-            )
-            keep = keep[: self.detections_per_img]
-
-            detections.append(
-                {
-                    "boxes": image_boxes[keep],
-                    "scores": image_scores[keep],
-                    "labels": image_labels[keep],
-                }
-            )
+        detections: List[Dict[str, Tensor]] = [
+            {"boxes": boxes[keep], "scores": scores[keep], "labels": labels[keep]}
+            for keep in keep_per_image
+        ]
 
         return detections
 
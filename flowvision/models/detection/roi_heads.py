@@ -1,5 +1,6 @@
 from typing import Optional, List, Dict, Tuple
 
+import numpy as np
 import oneflow as flow
 import oneflow.nn.functional as F
 from oneflow import nn, Tensor
@@ -132,58 +133,50 @@ class RoIHeads(nn.Module):
 
     def assign_targets_to_proposals(self, proposals, gt_boxes, gt_labels):
         # type: (List[Tensor], List[Tensor], List[Tensor]) -> Tuple[List[Tensor], List[Tensor]]
-        matched_idxs = []
-        labels = []
-        for proposals_in_image, gt_boxes_in_image, gt_labels_in_image in zip(
-            proposals, gt_boxes, gt_labels
-        ):
-
-            if gt_boxes_in_image.numel() == 0:
-                # Background image
-                device = proposals_in_image.device
-                clamped_matched_idxs_in_image = flow.zeros(
-                    (proposals_in_image.shape[0],), dtype=flow.int64, device=device
-                )
-                labels_in_image = flow.zeros(
-                    (proposals_in_image.shape[0],), dtype=flow.int64, device=device
-                )
-            else:
-                match_quality_matrix = box_ops.box_iou(
-                    gt_boxes_in_image, proposals_in_image
-                )
-                matched_idxs_in_image = self.proposal_matcher(match_quality_matrix)
-
-                clamped_matched_idxs_in_image = matched_idxs_in_image.clamp(min=0)
+        # all the images are matched at once, proposals and ground-truth are
+        # padded and images without ground-truth are left unmatched (background)
+        lengths = [p.shape[0] for p in proposals]
+        proposals, _ = det_utils.pad_per_image(proposals, 0)
+        gt_boxes, gt_mask = det_utils.pad_per_image(gt_boxes, 0, min_length=1)
+        gt_labels, _ = det_utils.pad_per_image(gt_labels, 0, min_length=1)
+
+        match_quality_matrix = box_ops.batched_box_iou(gt_boxes, proposals)
+        matched_idxs = self.proposal_matcher.match_batched(
+            match_quality_matrix, gt_mask
+        )
 
-                labels_in_image = gt_labels_in_image[clamped_matched_idxs_in_image]
-                labels_in_image = labels_in_image.to(dtype=flow.int64)
+        clamped_matched_idxs = matched_idxs.clamp(min=0)
+        labels = flow.gather(gt_labels, 1, clamped_matched_idxs).to(dtype=flow.int64)
 
-                # Label background (below the low threshold)
-                bg_inds = (
-                    matched_idxs_in_image == self.proposal_matcher.BELOW_LOW_THRESHOLD
-                )
-                labels_in_image[bg_inds] = 0
+        # Label background (below the low threshold)
+        bg_inds = matched_idxs == self.proposal_matcher.BELOW_LOW_THRESHOLD
+        labels = flow.where(bg_inds, flow.zeros_like(labels), labels)
 
-                # Label ignore proposals (between low and high thresholds)
-                ignore_inds = (
-                    matched_idxs_in_image == self.proposal_matcher.BETWEEN_THRESHOLDS
-                )
-                labels_in_image[ignore_inds] = -1  # -1 is ignored by sampler
+        # Label ignore proposals (between low and high thresholds)
+        ignore_inds = matched_idxs == self.proposal_matcher.BETWEEN_THRESHOLDS
+        # -1 is ignored by sampler
+        labels = flow.where(ignore_inds, flow.zeros_like(labels) - 1, labels)
 
-            matched_idxs.append(clamped_matched_idxs_in_image)
-            labels.append(labels_in_image)
-        return matched_idxs, labels
+        return (
+            [clamped_matched_idxs[i, :n] for i, n in enumerate(lengths)],
+            [labels[i, :n] for i, n in enumerate(lengths)],
+        )
 
     def subsample(self, labels):
         # type: (List[Tensor]) -> List[Tensor]
-        sampled_pos_inds, sampled_neg_inds = self.fg_bg_sampler(labels)
-        sampled_inds = []
-        for img_idx, (pos_inds_img, neg_inds_img) in enumerate(
-            zip(sampled_pos_inds, sampled_neg_inds)
-        ):
-            img_sampled_inds = flow.where(pos_inds_img | neg_inds_img)[0]
-            sampled_inds.append(img_sampled_inds)
-        return sampled_inds
+        labels, _ = det_utils.pad_per_image(labels, -1)
+        sampled_pos_mask, sampled_neg_mask = self.fg_bg_sampler.sample_batched(labels)
+        sampled_mask = sampled_pos_mask | sampled_neg_mask
+
+        # one synchronization for the whole batch instead of one per image
+        _, sampled_inds = flow.where(sampled_mask)
+        counts = sampled_mask.to(flow.int64).sum(dim=1).tolist()
+        result = []
+        start = 0
+        for count in counts:
+            result.append(sampled_inds[start : start + count])
+            start += count
+        return result
 
     def add_gt_proposals(self, proposals, gt_boxes):
         # type: (List[Tensor], List[Tensor]) -> List[Tensor]
@@ -220,7 +213,7 @@ class RoIHeads(nn.Module):
         proposals = self.add_gt_proposals(proposals, gt_boxes)
 
         # get matching gt indices for each proposal
-        matched_idxs, labels = self.assign_target_to_proposals(
+        matched_idxs, labels = self.assign_targets_to_proposals(
             proposals, gt_boxes, gt_labels
         )
         # sample a fixed proportion of positive-negative proposals
@@ -252,53 +245,60 @@ class RoIHeads(nn.Module):
         device = class_logits.device
         num_classes = class_logits.shape[-1]
 
+        num_images = len(proposals)
         boxes_per_image = [boxes_in_image.shape[0] for boxes_in_image in proposals]
         pred_boxes = self.box_coder.decode(box_regression, proposals)
 
         pred_scores = F.softmax(class_logits, -1)
 
-        pred_boxes_list = pred_boxes.split(boxes_per_image, 0)
-        pred_scores_list = pred_scores.split(boxes_per_image, 0)
-
-        all_boxes = []
-        all_scores = []
-        all_labels = []
-        for boxes, scores, image_shape in zip(
-            pred_boxes_list, pred_scores_list, image_shapes
-        ):
-            boxes = box_ops.clip_boxes_to_image(boxes, image_shape)
-
-            # create labels for each prediction
-            labels = flow.arange(num_classes, device=device)
-            labels = labels.view(1, -1).expand_as(scores)
-
-            # remove predictions with the background label
-            boxes = boxes[:, 1:]
-            scores = scores[:, 1:]
-            labels = labels[:, 1:]
-
-            # batch everything, by making every class prediction be a separate instance
-            boxes = boxes.reshape(-1, 4)
-            scores = scores.reshape(-1)
-            labels = labels.reshape(-1)
-
-            # remove low scoring boxes
-            inds = flow.where(scores > self.score_thresh)[0]
-            boxes, scores, labels = boxes[inds], scores[inds], labels[inds]
-
-            # remove empty
-            keep = box_ops.remove_small_boxes(boxes, min_size=1e-2)
-            boxes, scores, labels = boxes[keep], scores[keep], labels[keep]
-
-            # non-maximum suppression, independently done per class
-            keep = box_ops.batched_nms(boxes, scores, labels, self.nms_thresh)
-            # keep only topk scoring predictions
-            keep = keep[: self.detections_per_img]
-            boxes, scores, labels = boxes[keep], scores[keep], labels[keep]
-
-            all_boxes.append(boxes)
-            all_scores.append(scores)
-            all_labels.append(labels)
+        # the whole batch is processed at once, every prediction carries the
+        # index of its image
+        image_idxs = flow.tensor(
+            np.repeat(np.arange(num_images), boxes_per_image),
+            dtype=flow.int64,
+            device=device,
+        )
+        image_sizes = flow.tensor(image_shapes, dtype=pred_boxes.dtype, device=device)
+        pred_boxes = box_ops.clip_boxes_to_image_sizes(
+            pred_boxes, image_sizes[image_idxs].unsqueeze(1)
+        )
+
+        # create labels for each prediction
+        labels = flow.arange(num_classes, device=device)
+        labels = labels.view(1, -1).expand_as(pred_scores)
+        image_idxs = image_idxs.view(-1, 1).expand_as(pred_scores)
+
+        # remove predictions with the background label
+        boxes = pred_boxes[:, 1:]
+        scores = pred_scores[:, 1:]
+        labels = labels[:, 1:]
+        image_idxs = image_idxs[:, 1:]
+
+        # batch everything, by making every class prediction be a separate instance
+        boxes = boxes.reshape(-1, 4)
+        scores = scores.reshape(-1)
+        labels = labels.reshape(-1)
+        image_idxs = image_idxs.reshape(-1)
+
+        # remove low scoring and empty boxes
+        ws, hs = boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1]
+        keep = (scores > self.score_thresh) & (ws >= 1e-2) & (hs >= 1e-2)
+        inds = flow.where(keep)[0]
+        boxes, scores, labels = boxes[inds], scores[inds], labels[inds]
+        image_idxs = image_idxs[inds]
+
+        # non-maximum suppression, independently done per image and class
+        keep = box_ops.batched_nms_per_image(
+            boxes, scores, labels, image_idxs, self.nms_thresh
+        )
+        # keep only topk scoring predictions
+        keep_per_image = box_ops.split_per_image(
+            keep, image_idxs, num_images, self.detections_per_img
+        )
+
+        all_boxes = [boxes[keep] for keep in keep_per_image]
+        all_scores = [scores[keep] for keep in keep_per_image]
+        all_labels = [labels[keep] for keep in keep_per_image]
 
         return all_boxes, all_scores, all_labels
 
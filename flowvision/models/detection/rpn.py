@@ -165,45 +165,36 @@ class RegionProposalNetwork(nn.Module):
         self, anchors: List[Tensor], targets: List[Dict[str, Tensor]]
     ) -> Tuple[List[Tensor], List[Tensor]]:
 
-        lables = []
-        matched_gt_boxes = []
-        for anchors_per_image, targets_per_image in zip(anchors, targets):
-            gt_boxes = targets_per_image["boxes"]
-
-            if gt_boxes.numel() == 0:
-                # Background image (negative example)
-                device = anchor_per_image.device
-                matched_gt_boxes_per_image = flow.zeros(
-                    anchors_per_image.shape, dtype=flow.float32, device=device
-                )
-                labels_per_image = flow.zeros(
-                    (anchors_per_image.shape[0],), dtype=flow.float32, device=device
-                )
-            else:
-                match_quality_matrix = self.box_similarity(gt_bxoes, anchors_per_image)
-                matched_idxs = self.proposal_matcher(match_quality_matrix)
-                # get the targets corresponding GT for each proposal
-                # NB: need to clamp the indices because we can have a single
-                # GT in the image, and matched_idxs can be -2, which goes
-                # out of bounds
-                matched_gt_boxes_per_image = gt_boxes[matched_idxs.clamp(min=0)]
-
-                labels_per_image = matched_idxs >= 0
-                labels_per_image = labels_per_image.to(dtype=flow.float32)
-
-                # Background (negative examples)
-                bg_indices = matched_idxs == self.proposal_matcher.BELOW_LOW_THRESHOLD
-                labels_per_image[bg_indices] = 0.0
-
-                # discard indices that are between thresholds
-                inds_to_discard = (
-                    matched_idxs == self.proposal_matcher.BETWEEN_THRESHOLDS
-                )
-                labels_per_image[inds_to_discard] = -1.0
-
-            labels.append(labels_per_image)
-            matched_gt_boxes.append(matched_gt_boxes_per_image)
-        return labels, matched_gt_boxes
+        # all the images are matched at once, ground-truth boxes are padded
+        # and images without any are left unmatched (negative examples)
+        anchors = flow.stack(anchors)
+        gt_boxes, gt_mask = det_utils.pad_per_image(
+            [t["boxes"].to(anchors.dtype) for t in targets], 0, min_length=1
+        )
+        match_quality_matrix = box_ops.batched_box_iou(gt_boxes, anchors)
+        matched_idxs = self.proposal_matcher.match_batched(
+            match_quality_matrix, gt_mask
+        )
+        # get the targets corresponding GT for each proposal
+        # NB: need to clamp the indices because we can have a single
+        # GT in the image, and matched_idxs can be -2, which goes
+        # out of bounds
+        gather_idxs = matched_idxs.clamp(min=0).unsqueeze(2).expand(*anchors.shape)
+        matched_gt_boxes = flow.gather(gt_boxes, 1, gather_idxs)
+
+        labels = (matched_idxs >= 0).to(dtype=flow.float32)
+        # Background (negative examples)
+        bg_indices = matched_idxs == self.proposal_matcher.BELOW_LOW_THRESHOLD
+        labels = flow.where(bg_indices, flow.zeros_like(labels), labels)
+        # discard indices that are between thresholds
+        inds_to_discard = matched_idxs == self.proposal_matcher.BETWEEN_THRESHOLDS
+        labels = flow.where(inds_to_discard, flow.zeros_like(labels) - 1, labels)
+
+        num_images = len(targets)
+        return (
+            [labels[i] for i in range(num_images)],
+            [matched_gt_boxes[i] for i in range(num_images)],
+        )
 
     def _get_top_n_idx(
         self, objectness: Tensor, num_anchors_per_level: List[int]
@@ -296,9 +287,11 @@ class RegionProposalNetwork(nn.Module):
             box_loss (Tensor)
         """
 
-        sampled_pos_inds, sampled_neg_inds = self.fg_bg_sampler(labels)
-        sampled_pos_inds = flow.where(flow.cat(sampled_pos_inds, dim=0))[0]
-        sampled_neg_inds = flow.where(flow.cat(sampled_neg_inds, dim=0))[0]
+        sampled_pos_inds, sampled_neg_inds = self.fg_bg_sampler.sample_batched(
+            flow.stack(labels)
+        )
+        sampled_pos_inds = flow.where(sampled_pos_inds.flatten())[0]
+        sampled_neg_inds = flow.where(sampled_neg_inds.flatten())[0]
 
         sampled_inds = flow.cat([sampled_pos_inds, sampled_neg_inds], dim=0)
 
@@ -426,35 +426,55 @@ class SSD(nn.Module):
         num_classes = pred_scores.size(-1)
         device = pred_scores.device
 
-        detections: List[Dict[str, Tensor]] = []
+        num_images, num_anchors = pred_scores.shape[:2]
+        image_sizes = flow.tensor(
+            image_shapes, dtype=bbox_regression.dtype, device=device
+        ).unsqueeze(1)
+
+        # decode and clip the boxes of the whole batch at once
+        anchors = flow.stack(image_anchors)
+        boxes = self.box_coder.decode_single(
+            bbox_regression.reshape(-1, 4), anchors.reshape(-1, 4)
+        ).reshape(num_images, num_anchors, 4)
+        boxes = box_ops.clip_boxes_to_image_sizes(boxes, image_sizes)
+
+        # keep the topk anchors of every class, in padded [N, K * (C - 1)] form
+        scores = pred_scores[:, :, 1:]
+        num_topk = min(self.topk_candidates, num_anchors)
+        scores, idxs = scores.topk(num_topk, dim=1)
+        scores = scores.reshape(num_images, -1)
+        idxs = idxs.reshape(num_images, -1)
+        boxes = flow.gather(
+            boxes, 1, idxs.unsqueeze(-1).expand(num_images, idxs.shape[1], 4)
+        )
+        labels = (
+            flow.arange(1, num_classes, device=device)
+            .view(1, 1, -1)
+            .expand(num_images, num_topk, num_classes - 1)
+            .reshape(num_images, -1)
+        )
+        image_idxs = (
+            flow.arange(num_images, device=device).view(-1, 1).expand_as(labels)
+        )
 
-        for boxes, scores, anchors, image_shape in zip(
-            bbox_regression, pred_scores, image_anchors, image_shapes
-        ):
-            boxes = self.box_coder.decode_single(boxes, anchors)
-            boxes = box_ops.clip_boxes_to_image(boxes, image_shape)
-
-            scores = scores[:, 1:]
-            image_scores, idxs = scores.topk(self.topk_candidates, dim=0)
-            keep_idxs = image_scores > self.score_thresh
-            image_scores = image_scores[keep_idxs]
-            box_idx = idxs[keep_idxs]
-            image_boxes = boxes[box_idx]
-            image_labels = flow.argwhere(keep_idxs)[:, 1] + 1
-
-            # non-maximum suppression
-            keep = box_ops.batched_nms(
-                image_boxes, image_scores, image_labels, self.nms_thresh
-            )
-            keep = keep[: self.detections_per_img]
-
-            detections.append(
-                {
-                    "boxes": image_boxes[keep],
-                    "scores": image_scores[keep],
-                    "labels": image_labels[keep],
-                }
-            )
+        inds = flow.where(scores.flatten() > self.score_thresh)[0]
+        boxes = boxes.reshape(-1, 4)[inds]
+        scores = scores.flatten()[inds]
+        labels = labels.flatten()[inds]
+        image_idxs = image_idxs.flatten()[inds]
+
+        # non-maximum suppression
+        keep = box_ops.batched_nms_per_image(
+            boxes, scores, labels, image_idxs, self.nms_thresh
+        )
+        keep_per_image = box_ops.split_per_image(
+            keep, image_idxs, num_images, self.detections_per_img
+        )
+
+        detections: List[Dict[str, Tensor]] = [
+            {"boxes": boxes[keep], "scores": scores[keep], "labels": labels[keep]}
+            for keep in keep_per_image
+        ]
         return detections
 
 
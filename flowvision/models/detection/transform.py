@@ -1,7 +1,9 @@
 import math
 import oneflow as flow
 import random
+from collections import OrderedDict, defaultdict
 
+import numpy as np
 from oneflow import nn, Tensor
 from typing import List, Tuple, Dict, Optional
 
@@ -87,6 +89,18 @@ def _resize_boxes(
     return flow.concat((xmin, ymin, xmax, ymax), dim=1)
 
 
+def _contiguous_runs(indices: List[int]) -> List[Tuple[int, int, int]]:
+    """Splits sorted indices into runs of consecutive ones, as (position of the run
+    in ``indices``, first index, end index)"""
+    runs = []
+    start = 0
+    for pos in range(1, len(indices) + 1):
+        if pos == len(indices) or indices[pos] != indices[pos - 1] + 1:
+            runs.append((start, indices[start], indices[pos - 1] + 1))
+            start = pos
+    return runs
+
+
 class GeneralizedRCNNTransform(nn.Module):
     """
     Performs input / target transformation before feeding the data to a GeneralizedRCNN
@@ -97,6 +111,14 @@ class GeneralizedRCNNTransform(nn.Module):
         - input / target resizing to match min_size / max_size
 
     It returns a ImageList for the inputs, and a List[Dict[Tensor]] for the targets
+
+    Images of the same dtype, device and number of channels are transformed in a
+    batch: the images sharing an input and output size are resized together into a
+    padded canvas filled with the mean, which is normalized at once, and the boxes
+    and keypoints of all the targets are rescaled by a single multiplication. In
+    eval mode the canvas is taken from a pool of the last ``canvas_pool_size``
+    padded shapes, so the returned ``ImageList.tensors`` is only valid until the
+    next call with the same padded shape.
     """
 
     def __init__(
@@ -107,6 +129,7 @@ class GeneralizedRCNNTransform(nn.Module):
         image_std: List[float],
         size_divisible: int = 32,
         fixed_size: Optional[Tuple[int, int]] = None,
+        canvas_pool_size: int = 2,
     ):
         super(GeneralizedRCNNTransform, self).__init__()
         if not isinstance(min_size, (list, tuple)):
@@ -117,9 +140,143 @@ class GeneralizedRCNNTransform(nn.Module):
         self.image_std = image_std
         self.size_divisible = size_divisible
         self.fixed_size = fixed_size
+        self.canvas_pool_size = canvas_pool_size
+        self._canvas_pool = OrderedDict()
 
     def forward(
         self, images: List[Tensor], targets: Optional[List[Dict[str, Tensor]]] = None
+    ) -> Tuple[ImageList, Optional[List[Dict[str, Tensor]]]]:
+        if self._can_batch(images, targets):
+            return self._forward_batched(images, targets)
+        return self._forward_per_image(images, targets)
+
+    def _can_batch(
+        self, images: List[Tensor], targets: Optional[List[Dict[str, Tensor]]]
+    ) -> bool:
+        if len(images) == 0 or any(img.dim() != 3 for img in images):
+            return False
+        first = images[0]
+        if any(
+            img.dtype != first.dtype
+            or img.device != first.device
+            or img.shape[0] != first.shape[0]
+            for img in images
+        ):
+            return False
+        # masks are resized per image
+        return targets is None or not any("masks" in t for t in targets)
+
+    def _output_size(self, h: int, w: int, min_size: float) -> Tuple[int, int]:
+        if self.fixed_size is not None:
+            return self.fixed_size[1], self.fixed_size[0]
+        # same float32 scale and flooring as _resize_image_and_masks
+        scale = min(
+            np.float32(min_size) / np.float32(min(h, w)),
+            np.float32(self.max_size) / np.float32(max(h, w)),
+        )
+        return int(math.floor(h * float(scale))), int(math.floor(w * float(scale)))
+
+    def _canvas(self, shape: Tuple[int, ...], dtype, device) -> Tensor:
+        if self.training or self.canvas_pool_size <= 0:
+            return flow.empty(shape, dtype=dtype, device=device)
+        key = (shape, dtype, str(device))
+        canvas = self._canvas_pool.pop(key, None)
+        if canvas is None:
+            canvas = flow.empty(shape, dtype=dtype, device=device)
+        self._canvas_pool[key] = canvas
+        while len(self._canvas_pool) > self.canvas_pool_size:
+            self._canvas_pool.popitem(last=False)
+        return canvas
+
+    def _forward_batched(
+        self, images: List[Tensor], targets: Optional[List[Dict[str, Tensor]]] = None
+    ) -> Tuple[ImageList, Optional[List[Dict[str, Tensor]]]]:
+        first = images[0]
+        if not first.is_floating_point():
+            raise TypeError(
+                f"Expected input images to be of floating type (in range [0, 1]), "
+                f"but found type {first.dtype} instead"
+            )
+        sizes = []
+        for img in images:
+            h, w = img.shape[-2:]
+            if self.training:
+                min_size = float(random.choice(self.min_size))
+            else:
+                # assume for now that testing uses the largest scale
+                min_size = float(self.min_size[-1])
+            sizes.append((h, w) + self._output_size(h, w, min_size))
+
+        stride = float(self.size_divisible)
+        height = int(math.ceil(max(s[2] for s in sizes) / stride) * stride)
+        width = int(math.ceil(max(s[3] for s in sizes) / stride) * stride)
+        dtype, device = first.dtype, first.device
+        channels = first.shape[0]
+        mean = flow.as_tensor(self.image_mean, dtype=dtype, device=device)
+        std = flow.as_tensor(self.image_std, dtype=dtype, device=device)
+        mean = mean.reshape(1, -1, 1, 1)
+
+        # the padding is filled with the mean, which the normalization turns to 0
+        canvas = self._canvas((len(images), channels, height, width), dtype, device)
+        canvas[:] = mean
+        groups = defaultdict(list)
+        for i, size in enumerate(sizes):
+            groups[size].append(i)
+        for (h, w, out_h, out_w), indices in groups.items():
+            batch = flow.stack([images[i] for i in indices])
+            if (out_h, out_w) != (h, w):
+                batch = flow.nn.functional.interpolate(
+                    batch, size=(out_h, out_w), mode="bilinear", align_corners=False
+                )
+            for pos, start, end in _contiguous_runs(indices):
+                canvas[start:end, :, :out_h, :out_w] = batch[pos : pos + end - start]
+        # resizing and normalizing commute, the bilinear weights sum to 1
+        canvas.sub_(mean)
+        canvas.mul_(1.0 / std.reshape(1, -1, 1, 1))
+
+        if targets is not None:
+            targets = self._resize_targets(targets, sizes)
+        image_sizes = [(out_h, out_w) for _, _, out_h, out_w in sizes]
+        return ImageList(canvas, image_sizes), targets
+
+    def _resize_targets(
+        self, targets: List[Dict[str, Tensor]], sizes: List[Tuple[int, int, int, int]]
+    ) -> List[Dict[str, Tensor]]:
+        """Rescales the boxes and keypoints of all the targets at once"""
+        targets = [dict(t) for t in targets]
+        # [N, 2] width and height ratios, in float32 like _resize_boxes
+        ratios = np.array(
+            [(out_w, out_h) for _, _, out_h, out_w in sizes], dtype=np.float32
+        ) / np.array([(w, h) for h, w, _, _ in sizes], dtype=np.float32)
+
+        counts = [t["boxes"].shape[0] for t in targets]
+        boxes = flow.cat([t["boxes"] for t in targets])
+        box_ratios = np.repeat(np.tile(ratios, 2), counts, axis=0)
+        boxes = boxes * flow.tensor(box_ratios, dtype=boxes.dtype, device=boxes.device)
+        offsets = np.cumsum([0] + counts)
+        for i, t in enumerate(targets):
+            t["boxes"] = boxes[offsets[i] : offsets[i + 1]]
+
+        with_keypoints = [i for i, t in enumerate(targets) if "keypoints" in t]
+        if with_keypoints:
+            counts = [targets[i]["keypoints"].shape[0] for i in with_keypoints]
+            keypoints = flow.cat([targets[i]["keypoints"] for i in with_keypoints])
+            # x and y are rescaled, the visibility is kept
+            kp_ratios = np.concatenate(
+                [ratios[with_keypoints], np.ones((len(with_keypoints), 1), np.float32)],
+                axis=1,
+            )
+            kp_ratios = np.repeat(kp_ratios, counts, axis=0)[:, None, :]
+            keypoints = keypoints * flow.tensor(
+                kp_ratios, dtype=keypoints.dtype, device=keypoints.device
+            )
+            offsets = np.cumsum([0] + counts)
+            for j, i in enumerate(with_keypoints):
+                targets[i]["keypoints"] = keypoints[offsets[j] : offsets[j + 1]]
+        return targets
+
+    def _forward_per_image(
+        self, images: List[Tensor], targets: Optional[List[Dict[str, Tensor]]] = None
     ) -> Tuple[ImageList, Optional[List[Dict[str, Tensor]]]]:
         images = [img for img in images]
         if targets is not None:
@@ -0,0 +1,167 @@
+"""
+Inference-time re-parameterization of the models of flowvision.
+
+:func:`fuse_for_inference` folds every batch norm applied directly to the output of
+a convolution into that convolution, then lets the modules defining a
+``merge_branches`` method merge their parallel branches, e.g. the independent
+splits of the first Res2Net block of each stage.
+"""
+from collections import defaultdict
+from copy import deepcopy
+
+import numpy as np
+import oneflow as flow
+import oneflow.nn as nn
+
+from flowvision.layers import FrozenBatchNorm2d
+from .graph import _flatten
+
+
+def fold_conv_bn(conv: nn.Conv2d, bn: nn.Module) -> None:
+    """Folds ``bn`` applied to the output of ``conv`` into the weight and bias of
+    ``conv``, in place"""
+    with flow.no_grad():
+        scale = (bn.running_var + bn.eps).rsqrt()
+        if bn.weight is not None:
+            scale = scale * bn.weight
+        bias = -bn.running_mean * scale
+        if bn.bias is not None:
+            bias = bias + bn.bias
+        if conv.bias is not None:
+            bias = bias + conv.bias * scale
+        weight = conv.weight * scale.reshape(-1, 1, 1, 1)
+    conv.weight = nn.Parameter(weight.detach())
+    conv.bias = nn.Parameter(bias.detach())
+
+
+def _foldable(module):
+    if isinstance(module, nn.BatchNorm2d):
+        return module.track_running_stats and module.running_mean is not None
+    return isinstance(module, FrozenBatchNorm2d)
+
+
+def _find_conv_bn_pairs(model, example_inputs):
+    """Runs the model once, returns its outputs and the (conv, bn) pairs where the
+    bn is only ever applied to the output of the conv"""
+    calls = []
+
+    def record(module, inputs, output):
+        calls.append((module, inputs, output))
+
+    leaves = [m for m in model.modules() if not list(m.children())]
+    handles = [(m, m.register_forward_hook(record)) for m in leaves]
+    try:
+        with flow.no_grad():
+            outputs = model(*example_inputs)
+    finally:
+        for module, handle in handles:
+            if handle is not None:
+                handle.remove()
+                continue
+            # older OneFlow versions return no handle
+            for key, hook in list(module._forward_hooks.items()):
+                if hook is record:
+                    del module._forward_hooks[key]
+
+    num_calls = defaultdict(int)
+    for module, _, _ in calls:
+        num_calls[module] += 1
+    # last module that returned each tensor, the calls keep the tensors alive so
+    # their ids are not reused; in-place modules such as ReLU(inplace=True) take
+    # over the tensor they modify
+    producers = {}
+    consumers = defaultdict(int)
+    candidates = []
+    for module, inputs, output in calls:
+        for tensor in inputs:
+            if isinstance(tensor, flow.Tensor):
+                consumers[id(tensor)] += 1
+        if _foldable(module) and len(inputs) == 1:
+            conv = producers.get(id(inputs[0]))
+            if (
+                isinstance(conv, nn.Conv2d)
+                and num_calls[conv] == 1
+                and num_calls[module] == 1
+            ):
+                candidates.append((conv, module, id(inputs[0])))
+        if isinstance(output, flow.Tensor):
+            producers[id(output)] = module
+    # the output of the conv must not be used by another module
+    pairs = [(conv, bn) for conv, bn, key in candidates if consumers[key] == 1]
+    return outputs, pairs
+
+
+def _max_relative_error(reference, outputs):
+    reference, _ = _flatten(reference)
+    outputs, _ = _flatten(outputs)
+    error = 0.0
+    if len(reference) != len(outputs):
+        return float("inf")
+    for a, b in zip(reference, outputs):
+        if a.shape != b.shape:
+            return float("inf")
+        a, b = a.numpy().astype(np.float64), b.numpy().astype(np.float64)
+        scale = max(np.abs(a).max(), 1e-6) if a.size else 1.0
+        error = max(error, np.abs(a - b).max() / scale if a.size else 0.0)
+    return error
+
+
+def fuse_for_inference(model, example_inputs=None, verify=True, tol=1e-4):
+    """Folds the batch norms of a model into the preceding convolutions and merges
+    parallel branches, in place.
+
+    The conv/bn pairs are found by running the model once on ``example_inputs``: a
+    ``nn.BatchNorm2d`` or :class:`~flowvision.layers.FrozenBatchNorm2d` is folded when
+    its only input is the output of a ``nn.Conv2d`` that no other module uses, and
+    both are called once per forward. It is then replaced by ``nn.Identity``.
+    Modules defining a ``merge_branches()`` method get it called afterwards.
+
+    Args:
+        model (nn.Module): the model, with its weights loaded. It is put in eval mode
+        example_inputs (Tensor or tuple, optional): arguments of the forward of the
+            model, e.g. ``([image],)`` for detection models. Default: a
+            ``[2, 3, 224, 224]`` random batch
+        verify (bool): compare the outputs of the model before and after the fusion
+            on ``example_inputs``. Default: ``True``
+        tol (float): maximum difference allowed by ``verify``, relative to the largest
+            output. Default: ``1e-4``
+
+    Returns:
+        the fused model
+
+    Raises:
+        RuntimeError: if ``verify`` is set and the outputs differ, the model is then
+            restored as it was before the fusion
+    """
+    model.eval()
+    if example_inputs is None:
+        param = next(model.parameters())
+        example_inputs = flow.randn(2, 3, 224, 224, device=param.device)
+    if not isinstance(example_inputs, tuple):
+        example_inputs = (example_inputs,)
+
+    reference, pairs = _find_conv_bn_pairs(model, example_inputs)
+    # the fusion changes the model in place, keep a copy to undo it
+    original = deepcopy(model) if verify else None
+    folded = set(bn for _, bn in pairs)
+    for conv, bn in pairs:
+        fold_conv_bn(conv, bn)
+    for module in list(model.modules()):
+        for name, child in list(module.named_children()):
+            if child in folded:
+                setattr(module, name, nn.Identity())
+    for module in list(model.modules()):
+        if hasattr(module, "merge_branches"):
+            module.merge_branches()
+
+    if verify:
+        with flow.no_grad():
+            error = _max_relative_error(reference, model(*example_inputs))
+        if error > tol:
+            # swap the original submodules, parameters and buffers back in
+            model.__dict__.update(original.__dict__)
+            raise RuntimeError(
+                "the fused model differs from the original one (relative error "
+                "{:.3g} > {:.3g})".format(error, tol)
+            )
+    return model
@@ -0,0 +1,208 @@
+"""
+Static graph inference for the models of flowvision.
+
+:func:`to_graph` runs a model, or the dense parts of a detection model, through
+``oneflow.nn.Graph``. A graph is compiled and cached per input shape bucket, with
+the batch padded up to the nearest of a few batch sizes so that odd batch sizes do
+not each trigger a compilation.
+"""
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import oneflow as flow
+import oneflow.nn as nn
+
+DEFAULT_BATCH_SIZES = (1, 2, 4, 8, 16, 32, 64)
+
+
+def _flatten(obj) -> Tuple[List[flow.Tensor], Any]:
+    """Splits nested lists, tuples and dicts of tensors into a list of tensors and
+    the spec rebuilding them with :func:`_unflatten`"""
+    if isinstance(obj, flow.Tensor):
+        return [obj], None
+    if isinstance(obj, (list, tuple)):
+        tensors, specs = [], []
+        for item in obj:
+            item_tensors, spec = _flatten(item)
+            tensors += item_tensors
+            specs.append((len(item_tensors), spec))
+        return tensors, (type(obj), specs)
+    if isinstance(obj, dict):
+        tensors, spec = _flatten(list(obj.values()))
+        return tensors, (type(obj), list(obj.keys()), spec)
+    raise TypeError("unsupported graph input or output: {}".format(type(obj)))
+
+
+def _unflatten(tensors: Sequence[flow.Tensor], spec):
+    if spec is None:
+        return tensors[0]
+    if len(spec) == 3:
+        cls, keys, values_spec = spec
+        return cls(zip(keys, _unflatten(tensors, values_spec)))
+    cls, specs = spec
+    items, start = [], 0
+    for num_tensors, item_spec in specs:
+        items.append(_unflatten(tensors[start : start + num_tensors], item_spec))
+        start += num_tensors
+    return cls(items)
+
+
+class _InferenceGraph(nn.Graph):
+    def __init__(self, module: nn.Module, input_spec):
+        super().__init__()
+        self.module = module
+        self.input_spec = input_spec
+        # spec of the outputs, known once the graph is built
+        self.output_spec = None
+
+    def build(self, *inputs):
+        outputs, self.output_spec = _flatten(
+            self.module(_unflatten(list(inputs), self.input_spec))
+        )
+        return tuple(outputs)
+
+
+class GraphModule(nn.Module):
+    """Runs ``module`` in eval mode through static graphs.
+
+    The inputs are a tensor or nested lists, tuples and dicts of tensors, all with
+    the batch as first dimension, and so are the outputs. A graph is compiled on the
+    first call with each ``(batch, shapes, dtype, device)`` bucket, where the batch
+    is padded with zeros to the nearest of ``batch_sizes`` and larger batches are
+    split. In training mode the module runs eagerly.
+
+    The module is kept as ``self.module``, like in ``DistributedDataParallel``, so
+    its weights should be loaded before it is wrapped.
+
+    Args:
+        module (nn.Module): the module to run
+        batch_sizes (sequence of int): batch sizes graphs are compiled for.
+            Default: powers of 2 up to 64
+    """
+
+    def __init__(
+        self, module: nn.Module, batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES
+    ):
+        super().__init__()
+        self.module = module
+        self.batch_sizes = sorted(batch_sizes)
+        self._graphs: Dict[tuple, _InferenceGraph] = {}
+        # seconds spent in the first call of each graph, which compiles it
+        self.compile_times: Dict[tuple, float] = {}
+        self.eval()
+
+    def _bucket(self, batch_size: int) -> int:
+        for size in self.batch_sizes:
+            if size >= batch_size:
+                return size
+        return self.batch_sizes[-1]
+
+    def _run(self, tensors: List[flow.Tensor], spec, batch_size: int):
+        bucket = self._bucket(batch_size)
+        if bucket > batch_size:
+            tensors = [
+                flow.cat(
+                    [
+                        t,
+                        flow.zeros(
+                            (bucket - batch_size,) + tuple(t.shape[1:]),
+                            dtype=t.dtype,
+                            device=t.device,
+                        ),
+                    ]
+                )
+                for t in tensors
+            ]
+        key = (
+            bucket,
+            tuple(tuple(t.shape[1:]) for t in tensors),
+            tuple(str(t.dtype) for t in tensors),
+            str(tensors[0].device),
+        )
+        graph = self._graphs.get(key)
+        if graph is None:
+            graph = _InferenceGraph(self.module, spec)
+            tic = time.perf_counter()
+            outputs = graph(*tensors)
+            self.compile_times[key] = time.perf_counter() - tic
+            self._graphs[key] = graph
+        else:
+            outputs = graph(*tensors)
+        outputs = [o[:batch_size] if bucket > batch_size else o for o in outputs]
+        return outputs, graph.output_spec
+
+    def forward(self, inputs):
+        if self.training:
+            return self.module(inputs)
+        tensors, spec = _flatten(inputs)
+        batch_size = tensors[0].shape[0]
+        max_batch_size = self.batch_sizes[-1]
+        if batch_size <= max_batch_size:
+            outputs, output_spec = self._run(tensors, spec, batch_size)
+            return _unflatten(outputs, output_spec)
+
+        chunks = []
+        for start in range(0, batch_size, max_batch_size):
+            size = min(max_batch_size, batch_size - start)
+            chunk, output_spec = self._run(
+                [t[start : start + size] for t in tensors], spec, size
+            )
+            chunks.append(chunk)
+        outputs = [flow.cat(list(parts)) for parts in zip(*chunks)]
+        return _unflatten(outputs, output_spec)
+
+    def clear(self):
+        """Drops the compiled graphs, needed after the weights or device change"""
+        self._graphs.clear()
+        self.compile_times.clear()
+
+    def extra_repr(self) -> str:
+        return "batch_sizes={}, graphs={}".format(self.batch_sizes, len(self._graphs))
+
+
+def to_graph(
+    model: nn.Module,
+    batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES,
+    size_divisible: Optional[int] = None,
+) -> nn.Module:
+    """Prepares a model for static graph inference.
+
+    Classification models are wrapped in a :class:`GraphModule`. The detection
+    models of :mod:`flowvision.models.detection` keep their eager pre and post
+    processing, whose shapes depend on the data: their backbone and dense heads
+    (the RPN head of Faster R-CNN, the heads of RetinaNet and SSD) are replaced by
+    :class:`GraphModule` in place.
+
+    Args:
+        model (nn.Module): the model, with its weights loaded
+        batch_sizes (sequence of int): batch sizes graphs are compiled for.
+            Default: powers of 2 up to 64
+        size_divisible (int, optional): for detection models, the multiple the
+            batched images are padded to (32 by default). A larger one shares the
+            graphs between more image sizes, at the cost of more padding
+
+    Returns:
+        the model to run
+    """
+    model.eval()
+    if not (hasattr(model, "backbone") and hasattr(model, "transform")):
+        return GraphModule(model, batch_sizes)
+
+    if size_divisible is not None:
+        model.transform.size_divisible = size_divisible
+    model.backbone = GraphModule(model.backbone, batch_sizes)
+    if hasattr(model, "head"):
+        model.head = GraphModule(model.head, batch_sizes)
+    if hasattr(model, "rpn"):
+        model.rpn.head = GraphModule(model.rpn.head, batch_sizes)
+    return model
+
+
+def graph_compile_times(model: nn.Module) -> Dict[str, Dict[tuple, float]]:
+    """Compile time of each graph of a model prepared by :func:`to_graph`, per
+    :class:`GraphModule`"""
+    return {
+        name: dict(module.compile_times)
+        for name, module in model.named_modules()
+        if isinstance(module, GraphModule)
+    }
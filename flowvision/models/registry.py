@@ -4,17 +4,27 @@ Modified from https://github.com/rwightman/pytorch-image-models/blob/master/timm
 import sys
 import re
 import fnmatch
+import importlib
 from collections import defaultdict
 from copy import deepcopy
 from tabulate import tabulate
 
 import oneflow as flow
 
+from .graph import DEFAULT_BATCH_SIZES, to_graph as _to_graph
+
 
 def _natural_key(string_):
     return [int(s) if s.isdigit() else s for s in re.split(r"(\d+)", string_.lower())]
 
 
+def _manifest():
+    # imported lazily, flowvision.models imports this module first
+    from ._manifest import MODEL_MANIFEST
+
+    return MODEL_MANIFEST
+
+
 class ModelCreator(object):
     _model_list = defaultdict(
         set
@@ -42,10 +52,43 @@ class ModelCreator(object):
 
         return fn
 
+    @staticmethod
+    def _all_models():
+        return set(_manifest()).union(ModelCreator._model_entrypoints)
+
+    @staticmethod
+    def _has_pretrained(model_name):
+        if model_name in ModelCreator._model_entrypoints:
+            return ModelCreator._model_list[model_name]
+        return _manifest()[model_name][1]
+
     @staticmethod
     def create_model(
-        model_name: str, pretrained: bool = False, checkpoint: str = None, **kwargs
+        model_name: str,
+        pretrained: bool = False,
+        checkpoint: str = None,
+        to_graph: bool = False,
+        graph_batch_sizes=DEFAULT_BATCH_SIZES,
+        **kwargs
     ):
+        """Creates a registered model.
+
+        Args:
+            model_name (str): name of the model, see :meth:`model_list`
+            pretrained (bool): load the pretrained weights. Default: ``False``
+            checkpoint (str, optional): path of a state dict to load
+            to_graph (bool): prepare the model for static graph inference with
+                :func:`flowvision.models.to_graph`, which compiles a graph per input
+                shape bucket on first use. Default: ``False``
+            graph_batch_sizes (sequence of int): batch sizes the graphs are compiled
+                for, the batches are padded to the nearest one. Default: powers of 2
+                up to 64
+            **kwargs: arguments of the model function
+        """
+        manifest = _manifest()
+        if model_name not in ModelCreator._model_entrypoints and model_name in manifest:
+            # the models of a module are registered when it is imported
+            importlib.import_module("flowvision.models." + manifest[model_name][0])
         if model_name in ModelCreator._model_entrypoints:
             create_fn = ModelCreator._model_entrypoints[model_name]
         else:
@@ -55,11 +98,13 @@ class ModelCreator(object):
         if checkpoint is not None:
             state_dict = flow.load(checkpoint)
             model.load_state_dict(state_dict)
+        if to_graph:
+            model = _to_graph(model, batch_sizes=graph_batch_sizes)
         return model
 
     @staticmethod
     def model_table(filter="", pretrained=False, **kwargs):
-        all_models = ModelCreator._model_entrypoints.keys()
+        all_models = ModelCreator._all_models()
         if filter:
             models = []
             include_filters = filter if isinstance(filter, (tuple, list)) else [filter]
@@ -72,13 +117,10 @@ class ModelCreator(object):
 
         show_dict = {}
         sorted_model = list(sorted(models))
-        if pretrained:
-            for model in sorted_model:
-                if ModelCreator._model_list[model]:
-                    show_dict[model] = ModelCreator._model_list[model]
-        else:
-            for model in sorted_model:
-                show_dict[model] = ModelCreator._model_list[model]
+        for model in sorted_model:
+            has_pretrained = ModelCreator._has_pretrained(model)
+            if has_pretrained or not pretrained:
+                show_dict[model] = has_pretrained
 
         table_headers = ["Supported Models", "Pretrained"]
         table_items = [
@@ -91,7 +133,7 @@ class ModelCreator(object):
 
     @staticmethod
     def model_list(filter="", pretrained=False, **kwargs):
-        all_models = ModelCreator._model_entrypoints.keys()
+        all_models = ModelCreator._all_models()
         if filter:
             models = []
             include_filters = filter if isinstance(filter, (tuple, list)) else [filter]
@@ -104,9 +146,9 @@ class ModelCreator(object):
 
         sorted_model = list(sorted(models))
         if pretrained:
-            for model in sorted_model:
-                if not ModelCreator._model_list[model]:
-                    sorted_model.remove(model)
+            sorted_model = [
+                model for model in sorted_model if ModelCreator._has_pretrained(model)
+            ]
 
         return sorted_model
 
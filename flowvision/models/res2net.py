@@ -78,6 +78,36 @@ class Bottle2neck(nn.Module):
         self.stype = stype
         self.scale = scale
         self.width = width
+        # grouped conv replacing convs/bns, see merge_branches
+        self.merged_convs = None
+
+    def merge_branches(self):
+        """Merges the convs of the independent splits of a 'stage' block into one
+        grouped conv, once their batch norms are folded by
+        :func:`flowvision.models.fuse_for_inference`"""
+        if self.stype != "stage" or self.merged_convs is not None:
+            return
+        if not all(isinstance(bn, nn.Identity) for bn in self.bns):
+            return
+        conv = self.convs[0]
+        merged = nn.Conv2d(
+            self.width * self.nums,
+            self.width * self.nums,
+            kernel_size=3,
+            stride=conv.stride,
+            padding=1,
+            groups=self.nums,
+            bias=True,
+        )
+        with flow.no_grad():
+            weight = flow.cat([c.weight for c in self.convs])
+            # the convs got a bias when their batch norm was folded
+            bias = flow.cat([c.bias for c in self.convs])
+        merged.weight = nn.Parameter(weight.detach())
+        merged.bias = nn.Parameter(bias.detach())
+        self.merged_convs = merged
+        self.convs = nn.ModuleList()
+        self.bns = nn.ModuleList()
 
     def forward(self, x):
         residual = x
@@ -87,7 +117,9 @@ class Bottle2neck(nn.Module):
         out = self.relu(out)
 
         spx = flow.split(out, self.width, 1)
-        for i in range(self.nums):
+        if self.merged_convs is not None:
+            out = self.relu(self.merged_convs(out[:, : self.width * self.nums]))
+        for i in range(len(self.convs)):
             if i == 0 or self.stype == "stage":
                 sp = spx[i]
             else:
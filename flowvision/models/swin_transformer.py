@@ -5,7 +5,8 @@ Modified from https://github.com/microsoft/Swin-Transformer/blob/main/models/swi
 import oneflow as flow
 import oneflow.nn as nn
 
-from flowvision.layers import trunc_normal_
+# DropPath and drop_path used to be defined here, flowvision.models still exports them
+from flowvision.layers import trunc_normal_, DropPath, drop_path
 from .registry import ModelCreator
 from .utils import load_state_dict_from_url
 
@@ -28,38 +29,6 @@ def to_2tuple(x):
     return (x, x)
 
 
-def drop_path(x, drop_prob: float = 0.5, training: bool = False):
-    """Drop paths (Stochastic Depth) per sample (when applied in main path of residual blocks).
-    This is the same as the DropConnect impl I created for EfficientNet, etc networks, however,
-    the original name is misleading as 'Drop Connect' is a different form of dropout in a separate paper...
-    See discussion: https://github.com/tensorflow/tpu/issues/494#issuecomment-532968956 ... I've opted for
-    changing the layer and argument names to 'drop path' rather than mix DropConnect as a layer name and use
-    'survival rate' as the argument.
-    """
-    if drop_prob == 0.0 or not training:
-        return x
-    keep_prob = 1 - drop_prob
-    shape = (x.shape[0],) + (1,) * (
-        x.ndim - 1
-    )  # work with diff dim tensors, not just 2D ConvNets
-    random_tensor = keep_prob + flow.rand(*shape, dtype=x.dtype, device=x.device)
-    random_tensor = random_tensor.floor()  # binarize
-    output = x.div(keep_prob) * random_tensor
-    return output
-
-
-class DropPath(nn.Module):
-    """Drop paths (Stochastic Depth) per sample  (when applied in main path of residual blocks).
-    """
-
-    def __init__(self, drop_prob=None):
-        super(DropPath, self).__init__()
-        self.drop_prob = drop_prob
-
-    def forward(self, x):
-        return drop_path(x)
-
-
 def window_partition(x, window_size):
     B, H, W, C = x.shape
     x = x.view(B, H // window_size, window_size, W // window_size, window_size, C)
@@ -78,6 +47,48 @@ def window_reverse(windows, window_size, H, W):
     return x
 
 
+def _pad_hw(x, pad_b, pad_r):
+    # zero pads a B H W C tensor at the bottom and on the right
+    B, H, W, C = x.shape
+    if pad_r > 0:
+        x = flow.cat([x, flow.zeros(B, H, pad_r, C, dtype=x.dtype, device=x.device)], 2)
+    if pad_b > 0:
+        x = flow.cat(
+            [x, flow.zeros(B, pad_b, W + pad_r, C, dtype=x.dtype, device=x.device)], 1
+        )
+    return x
+
+
+def _shifted_window_attn_mask(H, W, window_size, shift_size, device=None):
+    # calculate attention mask for SW-MSA
+    img_mask = flow.zeros((1, H, W, 1), device=device)  # 1 H W 1
+    h_slices = (
+        slice(0, -window_size),
+        slice(-window_size, -shift_size),
+        slice(-shift_size, None),
+    )
+    w_slices = (
+        slice(0, -window_size),
+        slice(-window_size, -shift_size),
+        slice(-shift_size, None),
+    )
+    cnt = 0
+    for h in h_slices:
+        for w in w_slices:
+            img_mask[:, h, w, :] = cnt
+            cnt += 1
+
+    mask_windows = window_partition(
+        img_mask, window_size
+    )  # nW, window_size, window_size, 1
+    mask_windows = mask_windows.view(-1, window_size * window_size)
+    attn_mask = mask_windows.unsqueeze(1) - mask_windows.unsqueeze(2)
+    attn_mask = attn_mask.masked_fill(attn_mask != 0, float(-100.0)).masked_fill(
+        attn_mask == 0, float(0.0)
+    )
+    return attn_mask
+
+
 class Mlp(nn.Module):
     def __init__(
         self,
@@ -115,6 +126,10 @@ class WindowAttention(nn.Module):
         qk_scale (float | None, optional): Override default qk scale of head_dim ** -0.5 if set
         attn_drop (float, optional): Dropout ratio of attention weight. Default: ``0.0``
         proj_drop (float, optional): Dropout ratio of output. Default: ``0.0``
+        cache_bias (bool, optional): If True, the relative position bias is gathered once
+            in eval mode and reused until the module is trained, moved or loaded again.
+            Call ``clear_bias_cache`` after changing the bias table in place, as the EMA
+            updates of ``ModelEmaV2`` and ``ModelEmaV3`` do. Default: ``False``
     """
 
     def __init__(
@@ -126,6 +141,7 @@ class WindowAttention(nn.Module):
         qk_scale=None,
         attn_drop=0.0,
         proj_drop=0.0,
+        cache_bias=False,
     ):
 
         super().__init__()
@@ -163,6 +179,48 @@ class WindowAttention(nn.Module):
         trunc_normal_(self.relative_position_bias_table, std=0.02)
         self.softmax = nn.Softmax(dim=-1)
 
+        self.cache_bias = cache_bias
+        self._bias_cache = None
+
+    def clear_bias_cache(self):
+        self._bias_cache = None
+
+    def get_relative_position_bias(self):
+        """Returns the relative position bias with shape of (1, nH, Wh*Ww, Wh*Ww)"""
+        table = self.relative_position_bias_table
+        use_cache = self.cache_bias and not self.training
+        if use_cache:
+            key = (id(table), table.dtype, str(table.device))
+            if self._bias_cache is not None and self._bias_cache[0] == key:
+                return self._bias_cache[1]
+
+        relative_position_bias = table[self.relative_position_index.view(-1)].view(
+            self.window_size[0] * self.window_size[1],
+            self.window_size[0] * self.window_size[1],
+            -1,
+        )  # Wh*Ww,Wh*Ww,nH
+        relative_position_bias = relative_position_bias.permute(
+            2, 0, 1
+        )  # nH, Wh*Ww, Wh*Ww
+        relative_position_bias = relative_position_bias.unsqueeze(0)
+
+        if use_cache:
+            relative_position_bias = relative_position_bias.detach().contiguous()
+            self._bias_cache = (key, relative_position_bias)
+        return relative_position_bias
+
+    def train(self, mode=True):
+        self.clear_bias_cache()
+        return super().train(mode)
+
+    def _apply(self, *args, **kwargs):
+        self.clear_bias_cache()
+        return super()._apply(*args, **kwargs)
+
+    def _load_from_state_dict(self, *args, **kwargs):
+        self.clear_bias_cache()
+        return super()._load_from_state_dict(*args, **kwargs)
+
     def forward(self, x, mask=None):
         """
         Args:
@@ -180,17 +238,7 @@ class WindowAttention(nn.Module):
         q = q * self.scale
         attn = flow.matmul(q, k.transpose(-2, -1))
 
-        relative_position_bias = self.relative_position_bias_table[
-            self.relative_position_index.view(-1)
-        ].view(
-            self.window_size[0] * self.window_size[1],
-            self.window_size[0] * self.window_size[1],
-            -1,
-        )  # Wh*Ww,Wh*Ww,nH
-        relative_position_bias = relative_position_bias.permute(
-            2, 0, 1
-        )  # nH, Wh*Ww, Wh*Ww
-        attn = attn + relative_position_bias.unsqueeze(0)
+        attn = attn + self.get_relative_position_bias()
 
         if mask is not None:
             nW = mask.shape[0]
@@ -226,6 +274,11 @@ class SwinTransformerBlock(nn.Module):
         drop_path (float, optional): Stochastic depth rate. Default: ``0.0``
         act_layer (nn.Module, optional): Activation layer. Default: ``nn.GELU``
         norm_layer (nn.Module, optional): Normalization layer.  Default: ``nn.LayerNorm``
+        cache_bias (bool, optional): If True, cache the relative position bias in eval mode. Default: ``False``
+
+    The block accepts any input resolution. Inputs are padded to a multiple of the
+    window size and the shifted window masks of new resolutions are built lazily
+    and cached.
     """
 
     def __init__(
@@ -243,6 +296,7 @@ class SwinTransformerBlock(nn.Module):
         drop_path=0.0,
         act_layer=nn.GELU,
         norm_layer=nn.LayerNorm,
+        cache_bias=False,
     ):
         super().__init__()
         self.dim = dim
@@ -268,6 +322,7 @@ class SwinTransformerBlock(nn.Module):
             qk_scale=qk_scale,
             attn_drop=attn_drop,
             proj_drop=drop,
+            cache_bias=cache_bias,
         )
 
         self.drop_path = DropPath(drop_path) if drop_path > 0.0 else nn.Identity()
@@ -281,52 +336,57 @@ class SwinTransformerBlock(nn.Module):
         )
 
         if self.shift_size > 0:
-            # calculate attention mask for SW-MSA
             H, W = self.input_resolution
-            img_mask = flow.zeros((1, H, W, 1))  # 1 H W 1
-            h_slices = (
-                slice(0, -self.window_size),
-                slice(-self.window_size, -self.shift_size),
-                slice(-self.shift_size, None),
-            )
-            w_slices = (
-                slice(0, -self.window_size),
-                slice(-self.window_size, -self.shift_size),
-                slice(-self.shift_size, None),
+            attn_mask = _shifted_window_attn_mask(
+                H, W, self.window_size, self.shift_size
             )
-            cnt = 0
-            for h in h_slices:
-                for w in w_slices:
-                    img_mask[:, h, w, :] = cnt
-                    cnt += 1
-
-            mask_windows = window_partition(
-                img_mask, self.window_size
-            )  # nW, window_size, window_size, 1
-            mask_windows = mask_windows.view(-1, self.window_size * self.window_size)
-            attn_mask = mask_windows.unsqueeze(1) - mask_windows.unsqueeze(2)
-            attn_mask = attn_mask.masked_fill(
-                attn_mask != 0, float(-100.0)
-            ).masked_fill(attn_mask == 0, float(0.0))
         else:
             attn_mask = None
 
         self.register_buffer("attn_mask", attn_mask)
+        self._attn_masks = {}
+
+    def get_attn_mask(self, H, W, shift_size, device):
+        """Returns the SW-MSA mask of a (padded) H x W input, built once per resolution"""
+        if shift_size == 0:
+            return None
+        if (
+            self.attn_mask is not None
+            and (H, W) == tuple(self.input_resolution)
+            and shift_size == self.shift_size
+        ):
+            return self.attn_mask
+        key = (H, W, shift_size, str(device))
+        if key not in self._attn_masks:
+            self._attn_masks[key] = _shifted_window_attn_mask(
+                H, W, self.window_size, shift_size, device
+            )
+        return self._attn_masks[key]
 
-    def forward(self, x):
-        H, W = self.input_resolution
+    def _apply(self, *args, **kwargs):
+        self._attn_masks = {}
+        return super()._apply(*args, **kwargs)
+
+    def forward(self, x, input_resolution=None):
+        H, W = input_resolution or self.input_resolution
         B, L, C = x.shape
         assert L == H * W, "input feature has wrong size"
+        # windows are not shifted when the whole input fits in one window
+        shift_size = self.shift_size if min(H, W) > self.window_size else 0
 
         shortcut = x
         x = self.norm1(x)
         x = x.view(B, H, W, C)
 
+        # pad feature maps to multiples of window size
+        pad_b = (self.window_size - H % self.window_size) % self.window_size
+        pad_r = (self.window_size - W % self.window_size) % self.window_size
+        x = _pad_hw(x, pad_b, pad_r)
+        Hp, Wp = H + pad_b, W + pad_r
+
         # cyclic shift
-        if self.shift_size > 0:
-            shifted_x = flow.roll(
-                x, shifts=(-self.shift_size, -self.shift_size), dims=(1, 2)
-            )
+        if shift_size > 0:
+            shifted_x = flow.roll(x, shifts=(-shift_size, -shift_size), dims=(1, 2))
         else:
             shifted_x = x
 
@@ -340,20 +400,20 @@ class SwinTransformerBlock(nn.Module):
 
         # W-MSA/SW-MSA
         attn_windows = self.attn(
-            x_windows, mask=self.attn_mask
+            x_windows, mask=self.get_attn_mask(Hp, Wp, shift_size, x.device)
         )  # nW*B, window_size*window_size, C
 
         # merge windows
         attn_windows = attn_windows.view(-1, self.window_size, self.window_size, C)
-        shifted_x = window_reverse(attn_windows, self.window_size, H, W)  # B H' W' C
+        shifted_x = window_reverse(attn_windows, self.window_size, Hp, Wp)  # B H' W' C
 
         # reverse cyclic shift
-        if self.shift_size > 0:
-            x = flow.roll(
-                shifted_x, shifts=(self.shift_size, self.shift_size), dims=(1, 2)
-            )
+        if shift_size > 0:
+            x = flow.roll(shifted_x, shifts=(shift_size, shift_size), dims=(1, 2))
         else:
             x = shifted_x
+        if pad_b > 0 or pad_r > 0:
+            x = x[:, :H, :W, :].contiguous()
         x = x.view(B, H * W, C)
 
         # FFN
@@ -378,16 +438,17 @@ class PatchMerging(nn.Module):
         self.reduction = nn.Linear(4 * dim, 2 * dim, bias=False)
         self.norm = norm_layer(4 * dim)
 
-    def forward(self, x):
+    def forward(self, x, input_resolution=None):
         """
         x: B, H*W, C
         """
-        H, W = self.input_resolution
+        H, W = input_resolution or self.input_resolution
         B, L, C = x.shape
         assert L == H * W, "input feature has wrong size"
-        assert H % 2 == 0 and W % 2 == 0, f"x size ({H}*{W}) are not even."
 
         x = x.view(B, H, W, C)
+        # odd sizes are padded, the output has ceil(H/2) x ceil(W/2) tokens
+        x = _pad_hw(x, H % 2, W % 2)
 
         x0 = x[:, 0::2, 0::2, :]  # B H/2 W/2 C
         x1 = x[:, 1::2, 0::2, :]  # B H/2 W/2 C
@@ -410,10 +471,18 @@ class PatchEmbed(nn.Module):
         in_chans (int): Number of input image channels. Default: ``3``
         embed_dim (int): Number of linear projection output channels. Default: ``96``
         norm_layer (nn.Module, optional): Normalization layer. Default: ``None``
+        strict_img_size (bool, optional): If False, accept inputs of any size and zero pad
+            them to a multiple of the patch size. Default: ``True``
     """
 
     def __init__(
-        self, img_size=224, patch_size=4, in_chans=3, embed_dim=96, norm_layer=None
+        self,
+        img_size=224,
+        patch_size=4,
+        in_chans=3,
+        embed_dim=96,
+        norm_layer=None,
+        strict_img_size=True,
     ):
         super().__init__()
         img_size = to_2tuple(img_size)
@@ -429,6 +498,7 @@ class PatchEmbed(nn.Module):
 
         self.in_chans = in_chans
         self.embed_dim = embed_dim
+        self.strict_img_size = strict_img_size
 
         self.proj = nn.Conv2d(
             in_chans, embed_dim, kernel_size=patch_size, stride=patch_size
@@ -440,10 +510,15 @@ class PatchEmbed(nn.Module):
 
     def forward(self, x):
         B, C, H, W = x.shape
-        # FIXME look at relaxing size constraints
-        assert (
-            H == self.img_size[0] and W == self.img_size[1]
-        ), f"Input image size ({H}*{W}) doesn't match model ({self.img_size[0]}*{self.img_size[1]})."
+        if self.strict_img_size:
+            assert (
+                H == self.img_size[0] and W == self.img_size[1]
+            ), f"Input image size ({H}*{W}) doesn't match model ({self.img_size[0]}*{self.img_size[1]})."
+        else:
+            pad_b = (self.patch_size[0] - H % self.patch_size[0]) % self.patch_size[0]
+            pad_r = (self.patch_size[1] - W % self.patch_size[1]) % self.patch_size[1]
+            if pad_b > 0 or pad_r > 0:
+                x = nn.functional.pad(x, (0, pad_r, 0, pad_b))
         x = self.proj(x).flatten(2).transpose(1, 2)  # B Ph*Pw C
         if self.norm is not None:
             x = self.norm(x)
@@ -467,6 +542,7 @@ class BasicLayer(nn.Module):
         norm_layer (nn.Module, optional): Normalization layer. Default: ``nn.LayerNorm``
         downsample (nn.Module | None, optional): Downsample layer at the end of the layer. Default: ``None``
         use_checkpoint (bool): Whether to use checkpointing to save memory. Default: ``False``
+        cache_bias (bool): If True, cache the relative position bias in eval mode. Default: ``False``
     """
 
     def __init__(
@@ -485,6 +561,7 @@ class BasicLayer(nn.Module):
         norm_layer=nn.LayerNorm,
         downsample=None,
         use_checkpoint=False,
+        cache_bias=False,
     ):
 
         super().__init__()
@@ -511,6 +588,7 @@ class BasicLayer(nn.Module):
                     if isinstance(drop_path, list)
                     else drop_path,
                     norm_layer=norm_layer,
+                    cache_bias=cache_bias,
                 )
                 for i in range(depth)
             ]
@@ -524,15 +602,16 @@ class BasicLayer(nn.Module):
         else:
             self.downsample = None
 
-    def forward(self, x):
+    def forward(self, x, input_resolution=None):
+        input_resolution = input_resolution or self.input_resolution
         for blk in self.blocks:
             if self.use_checkpoint:
                 raise Exception("Torch use Checkpoint!")
                 # x = checkpoint.checkpoint(blk, x)
             else:
-                x = blk(x)
+                x = blk(x, input_resolution)
         if self.downsample is not None:
-            x = self.downsample(x)
+            x = self.downsample(x, input_resolution)
         return x
 
 
@@ -559,6 +638,10 @@ class SwinTransformer(nn.Module):
         ape (bool): If True, add absolute position embedding to the patch embedding. Default: ``False``
         patch_norm (bool): If True, add normalization after patch embedding. Default: ``True``
         use_checkpoint (bool): Whether to use checkpointing to save memory. Default: ``False``
+        cache_bias (bool): If True, cache the relative position bias of every block in eval mode. Default: ``False``
+
+    Without absolute position embedding the model accepts images of any size, so one
+    model can serve several resolutions.
     """
 
     def __init__(
@@ -581,6 +664,7 @@ class SwinTransformer(nn.Module):
         ape=False,
         patch_norm=True,
         use_checkpoint=False,
+        cache_bias=False,
         **kwargs,
     ):
         super().__init__()
@@ -600,6 +684,8 @@ class SwinTransformer(nn.Module):
             in_chans=in_chans,
             embed_dim=embed_dim,
             norm_layer=norm_layer if self.patch_norm else None,
+            # the absolute position embedding is tied to the training size
+            strict_img_size=self.ape,
         )
         num_patches = self.patch_embed.num_patches
         patches_resolution = self.patch_embed.patches_resolution
@@ -640,6 +726,7 @@ class SwinTransformer(nn.Module):
                 norm_layer=norm_layer,
                 downsample=PatchMerging if (i_layer < self.num_layers - 1) else None,
                 use_checkpoint=use_checkpoint,
+                cache_bias=cache_bias,
             )
             self.layers.append(layer)
 
@@ -663,13 +750,18 @@ class SwinTransformer(nn.Module):
             nn.init.constant_(m.weight, 1.0)
 
     def forward_features(self, x):
+        patch_size = self.patch_embed.patch_size
+        H = -(-x.shape[2] // patch_size[0])
+        W = -(-x.shape[3] // patch_size[1])
         x = self.patch_embed(x)
         if self.ape:
             x = x + self.absolute_pos_embed
         x = self.pos_drop(x)
 
         for layer in self.layers:
-            x = layer(x)
+            x = layer(x, (H, W))
+            if layer.downsample is not None:
+                H, W = (H + 1) // 2, (W + 1) // 2
 
         x = self.norm(x)  # B L C
         x = self.avgpool(x.transpose(1, 2))  # B C 1
@@ -1,23 +1,36 @@
 import errno
 import hashlib
+import json
 import os
 import re
-import shutil
 import sys
 import tempfile
 import zipfile
 import tarfile
 import warnings
 import logging
+from collections import OrderedDict
 from urllib.parse import urlparse
-from urllib.request import Request, urlopen
-from tqdm import tqdm
 from typing import Optional
 
+import numpy as np
 import oneflow as flow
 
+from flowvision.utils.download import download_file
+
 HASH_REGEX = re.compile(r"([a-f0-9]*)_")
 
+# Flat weight store: the tensors of a state dict are laid out back to back in
+# ``<name>.flat.bin`` and described by ``<name>.flat.json``. Loading memory-maps
+# the file copy-on-write, so the page cache is shared by all the processes loading
+# the same weights and nothing is read until load_state_dict copies the tensors.
+FLAT_STORE_VERSION = 1
+_FLAT_ALIGNMENT = 64
+
+# state dicts already loaded by this process, keyed by URL and content hash
+STATE_DICT_CACHE_SIZE = int(os.getenv("FLOWVISION_STATE_DICT_CACHE_SIZE", "8"))
+_state_dict_cache = OrderedDict()
+
 
 def get_cache_dir(cache_dir: Optional[str] = None) -> str:
     """
@@ -81,6 +94,113 @@ def _legacy_zip_load(filename, model_dir, map_location, delete_zip_file=True):
     return flow.load(extracted_file, map_location)
 
 
+def _flat_store_paths(model_dir, filename):
+    prefix = os.path.join(model_dir, filename.split(".")[0] + ".flat")
+    return prefix + ".bin", prefix + ".json"
+
+
+def _read_flat_index(data_file, index_file):
+    try:
+        with open(index_file, "r") as f:
+            index = json.load(f)
+        size = os.path.getsize(data_file)
+    except (OSError, ValueError):
+        return None
+    if index.get("version") != FLAT_STORE_VERSION or index.get("size") != size:
+        return None
+    return index
+
+
+def _write_flat_store(state_dict, data_file, index_file, url):
+    """Writes a state dict of tensors to the flat store, returns its index or None
+    when the state dict cannot be stored flat (e.g. non tensor values)"""
+    arrays = OrderedDict()
+    for name, value in state_dict.items():
+        if not isinstance(value, flow.Tensor):
+            return None
+        try:
+            arrays[name] = value.detach().cpu().numpy()
+        except (RuntimeError, TypeError):
+            # dtypes without a numpy equivalent
+            return None
+
+    tensors = OrderedDict()
+    sha256 = hashlib.sha256()
+    # written to a temporary file and moved, concurrent writers race harmlessly
+    f = tempfile.NamedTemporaryFile(delete=False, dir=os.path.dirname(data_file))
+    try:
+        offset = 0
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            padding = b"\0" * (-offset % _FLAT_ALIGNMENT)
+            for buffer in (padding, array.reshape(-1).view(np.uint8)):
+                f.write(buffer)
+                sha256.update(buffer)
+            offset += len(padding)
+            tensors[name] = {
+                "dtype": array.dtype.str,
+                "shape": list(array.shape),
+                "offset": offset,
+            }
+            offset += array.nbytes
+        f.close()
+        os.replace(f.name, data_file)
+    finally:
+        f.close()
+        if os.path.exists(f.name):
+            os.remove(f.name)
+
+    index = {
+        "version": FLAT_STORE_VERSION,
+        "url": url,
+        "size": offset,
+        "sha256": sha256.hexdigest(),
+        "tensors": tensors,
+    }
+    f = tempfile.NamedTemporaryFile("w", delete=False, dir=os.path.dirname(index_file))
+    with f:
+        json.dump(index, f)
+    os.replace(f.name, index_file)
+    return index
+
+
+def _load_flat_store(data_file, index):
+    state_dict = OrderedDict()
+    if index["size"] == 0:
+        # empty files cannot be memory-mapped
+        buffer = np.zeros(0, dtype=np.uint8)
+    else:
+        # the file is opened read-only, copy-on-write keeps the arrays writable for
+        # flow.from_numpy while the pages stay shared as long as nobody writes them
+        buffer = np.memmap(data_file, dtype=np.uint8, mode="c")
+    for name, meta in index["tensors"].items():
+        dtype = np.dtype(meta["dtype"])
+        shape = tuple(meta["shape"])
+        nbytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+        array = buffer[meta["offset"] : meta["offset"] + nbytes]
+        state_dict[name] = flow.from_numpy(np.asarray(array).view(dtype).reshape(shape))
+    return state_dict
+
+
+def _map_state_dict(state_dict, map_location):
+    # a new dict each call, callers are free to add or remove keys
+    if isinstance(map_location, (str, flow.device)):
+        return OrderedDict((k, v.to(map_location)) for k, v in state_dict.items())
+    return OrderedDict(state_dict)
+
+
+def _cache_state_dict(key, state_dict):
+    _state_dict_cache[key] = state_dict
+    _state_dict_cache.move_to_end(key)
+    while len(_state_dict_cache) > STATE_DICT_CACHE_SIZE:
+        _state_dict_cache.popitem(last=False)
+
+
+def clear_state_dict_cache():
+    """Drops the state dicts kept in memory by :func:`load_state_dict_from_url`"""
+    _state_dict_cache.clear()
+
+
 def load_state_dict_from_url(
     url,
     model_dir=None,
@@ -89,6 +209,7 @@ def load_state_dict_from_url(
     check_hash=False,
     file_name=None,
     delete_file=True,
+    mmap=True,
 ):
     r"""Loads the OneFlow serialized object at the given URL.
 
@@ -98,6 +219,12 @@ def load_state_dict_from_url(
     If the object is already present in `model_dir`, it's deserialized and
     returned.
 
+    With ``mmap=True``, the state dict is also stored in a flat file the first time
+    it is loaded, which is then memory-mapped read-only by the following loads,
+    sharing its pages between processes. The state dicts loaded by the process are
+    kept in an LRU cache of ``FLOWVISION_STATE_DICT_CACHE_SIZE`` entries, keyed by URL
+    and content hash.
+
     Args:
         url (string): URL of the object to download
         model_dir (string, optional): directory in which to save the object
@@ -111,6 +238,8 @@ def load_state_dict_from_url(
             Default: ``False``
         file_name (string, optional): name for the downloaded file. Filename from `url` will be used if not set
         delete_file (bool, optional): delete downloaded `.zip` file or `.tar.gz` file after unzipping them.
+        mmap (bool, optional): whether or not to load the weights from the memory-mapped flat store.
+            Default: ``True``
     """
 
     try:
@@ -127,6 +256,34 @@ def load_state_dict_from_url(
     filename = os.path.basename(parts.path)
     if file_name is not None:
         filename = file_name
+    if not mmap:
+        return _load_state_dict(
+            url, model_dir, filename, map_location, progress, check_hash, delete_file
+        )
+
+    data_file, index_file = _flat_store_paths(model_dir, filename)
+    index = _read_flat_index(data_file, index_file)
+    if index is None:
+        state_dict = _load_state_dict(
+            url, model_dir, filename, map_location, progress, check_hash, delete_file
+        )
+        index = _write_flat_store(state_dict, data_file, index_file, url)
+        if index is None:
+            return state_dict
+        # the fully materialized copy is dropped in favor of the mapped one
+        del state_dict
+
+    key = (url, index["sha256"])
+    state_dict = _state_dict_cache.get(key)
+    if state_dict is None:
+        state_dict = _load_flat_store(data_file, index)
+    _cache_state_dict(key, state_dict)
+    return _map_state_dict(state_dict, map_location)
+
+
+def _load_state_dict(
+    url, model_dir, filename, map_location, progress, check_hash, delete_file
+):
     # if already download the weight, directly return loaded state_dict
     pretrained_weight_dir = os.path.join(model_dir, filename.split(".")[0])
     if os.path.exists(pretrained_weight_dir):
@@ -154,6 +311,10 @@ def load_state_dict_from_url(
 def download_url_to_file(url, dst, hash_prefix=None, progress=True):
     r"""Download object at the given URL to a local path.
 
+    The file is fetched with parallel range requests when the server allows it, and
+    an interrupted download resumes from the partial file, see
+    :func:`flowvision.utils.download.download_file`.
+
     Args:
         url (string): URL of the object to download
         dst (string): Full path where object will be saved, e.g. `/tmp/temporary_file`
@@ -162,57 +323,4 @@ def download_url_to_file(url, dst, hash_prefix=None, progress=True):
         progress (bool, optional): whether or not to display a progress bar to stderr
             Default: ``True``
     """
-    file_size = None
-    # We use a different API for python2 since urllib(2) doesn't recognize the CA
-    # certificates in older Python
-    # TODO: if there is a backend requirements, we should add headers in Request module
-    req = Request(url)
-    u = urlopen(req)
-    meta = u.info()
-    if hasattr(meta, "getheaders"):
-        content_length = meta.getheaders("Content-Length")
-    else:
-        content_length = meta.get_all("Content-Length")
-    if content_length is not None and len(content_length) > 0:
-        file_size = int(content_length[0])
-
-    # We deliberately save it in a temp file and move it after
-    # download is complete. This prevents a local working checkpoint
-    # being overridden by a broken download.
-    dst = os.path.expanduser(dst)
-    dst_dir = os.path.dirname(dst)
-    f = tempfile.NamedTemporaryFile(delete=False, dir=dst_dir)
-
-    try:
-        if hash_prefix is not None:
-            sha256 = hashlib.sha256()
-        with tqdm(
-            total=file_size,
-            disable=not progress,
-            unit="B",
-            unit_scale=True,
-            unit_divisor=1024,
-        ) as pbar:
-            while True:
-                buffer = u.read(8192)
-                if len(buffer) == 0:
-                    break
-                f.write(buffer)
-                if hash_prefix is not None:
-                    sha256.update(buffer)
-                pbar.update(len(buffer))
-
-        f.close()
-        if hash_prefix is not None:
-            digest = sha256.hexdigest()
-            if digest[: len(hash_prefix)] != hash_prefix:
-                raise RuntimeError(
-                    'invalid hash value (expected "{}", got "{}")'.format(
-                        hash_prefix, digest
-                    )
-                )
-        shutil.move(f.name, dst)
-    finally:
-        f.close()
-        if os.path.exists(f.name):
-            os.remove(f.name)
+    download_file(url, dst, hash_prefix=hash_prefix, progress=progress)
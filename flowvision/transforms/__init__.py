@@ -27,6 +27,12 @@ from .transforms import (
     ToNumpy,
     ColorJitter,
 )
+from .batch_transforms import (
+    BatchColorJitter,
+    BatchNormalize,
+    BatchRandomHorizontalFlip,
+    BatchRandomResizedCrop,
+)
 
 
 __all__ = [
@@ -55,4 +61,8 @@ __all__ = [
     "InterpolationMode",
     "ToNumpy",
     "ColorJitter",
+    "BatchColorJitter",
+    "BatchNormalize",
+    "BatchRandomHorizontalFlip",
+    "BatchRandomResizedCrop",
 ]
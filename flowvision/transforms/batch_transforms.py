@@ -0,0 +1,325 @@
+"""
+Batch-aware versions of the common training transforms.
+
+These transforms take a whole ``[N, C, H, W]`` batch, usually right after the
+host-to-device copy, draw one set of random parameters per sample on the
+batch's device and apply them in a few vectorized calls. They let the
+DataLoader workers ship plain uint8 images and move augmentation off the CPU.
+"""
+import math
+import numbers
+import warnings
+from collections.abc import Sequence
+from typing import Dict, List, Optional, Tuple
+
+import oneflow as flow
+from oneflow.nn import Module
+from oneflow.framework.tensor import Tensor
+
+from . import functional_tensor as F_t
+from .functional import InterpolationMode
+from .transforms import ColorJitter, _setup_size
+
+
+def _assert_batch(img: Tensor) -> None:
+    if not isinstance(img, flow.Tensor) or img.ndim != 4:
+        raise TypeError("Input should be a batch Tensor of shape [N, C, H, W]")
+
+
+def _uniform(n: int, low: float, high: float, device) -> Tensor:
+    return flow.rand(n, device=device) * (high - low) + low
+
+
+class BatchRandomHorizontalFlip(Module):
+    """Horizontally flip every sample of an [N, C, H, W] batch independently with
+    probability ``p``.
+
+    Args:
+        p (float): probability of a sample being flipped. Default value is 0.5
+    """
+
+    def __init__(self, p=0.5):
+        super().__init__()
+        self.p = p
+
+    @staticmethod
+    def get_params(batch_size: int, p: float, device=None) -> Tensor:
+        """Returns a bool mask of shape [N] selecting the samples to flip."""
+        return flow.rand(batch_size, device=device) < p
+
+    def forward(self, img):
+        _assert_batch(img)
+        flip_mask = self.get_params(img.shape[0], self.p, img.device)
+        return F_t.hflip_batch(img, flip_mask)
+
+    def __repr__(self):
+        return self.__class__.__name__ + "(p={})".format(self.p)
+
+
+class BatchRandomResizedCrop(Module):
+    """Crop a random portion of every sample of an [N, C, H, W] batch and resize
+    all crops to ``size`` in one ``grid_sample`` call.
+
+    Crop sizes are sampled like :class:`~flowvision.transforms.RandomResizedCrop`:
+    up to ``num_attempts`` area / aspect ratio draws per sample are evaluated at
+    once and the first valid one is kept, with the same central crop fallback.
+
+    Args:
+        size (int or sequence): expected output size of the crop, for each edge.
+        scale (tuple of float): lower and upper bounds for the random area of the crop,
+            before resizing, relative to the area of the original image.
+        ratio (tuple of float): lower and upper bounds for the random aspect ratio of the crop.
+        interpolation (InterpolationMode): ``InterpolationMode.BILINEAR`` or
+            ``InterpolationMode.NEAREST``. Default is ``InterpolationMode.BILINEAR``.
+        num_attempts (int): number of candidate crops drawn per sample. Default: 10
+
+    .. note::
+        The crops are resampled with an affine grid, which matches crop + resize
+        for upsampling but does not antialias large downscales.
+    """
+
+    def __init__(
+        self,
+        size,
+        scale=(0.08, 1.0),
+        ratio=(3.0 / 4.0, 4.0 / 3.0),
+        interpolation=InterpolationMode.BILINEAR,
+        num_attempts=10,
+    ):
+        super().__init__()
+        self.size = _setup_size(
+            size, error_msg="Please provide only two dimensions (h, w) for size."
+        )
+
+        if not isinstance(scale, Sequence):
+            raise TypeError("Scale should be a sequence")
+        if not isinstance(ratio, Sequence):
+            raise TypeError("Ratio should be a sequence")
+        if (scale[0] > scale[1]) or (ratio[0] > ratio[1]):
+            warnings.warn("Scale and ratio should be of kind (min, max)")
+        if interpolation not in (InterpolationMode.BILINEAR, InterpolationMode.NEAREST):
+            raise ValueError(
+                "Only InterpolationMode.BILINEAR and InterpolationMode.NEAREST are "
+                "supported for batched input"
+            )
+
+        self.interpolation = interpolation
+        self.scale = scale
+        self.ratio = ratio
+        self.num_attempts = num_attempts
+
+    @staticmethod
+    def get_params(
+        batch_size: int,
+        height: int,
+        width: int,
+        scale: List[float],
+        ratio: List[float],
+        num_attempts: int = 10,
+        device=None,
+    ) -> Tensor:
+        """Get parameters for ``resized_crop_batch`` for a batch of random sized crops.
+
+        Returns:
+            Tensor: float tensor of shape [N, 4] holding ``(top, left, height, width)``
+            of the crop of every sample.
+        """
+        area = height * width
+        shape = (batch_size, num_attempts)
+        target_area = area * (
+            flow.rand(*shape, device=device) * (scale[1] - scale[0]) + scale[0]
+        )
+        log_ratio = (math.log(ratio[0]), math.log(ratio[1]))
+        aspect_ratio = flow.exp(
+            flow.rand(*shape, device=device) * (log_ratio[1] - log_ratio[0])
+            + log_ratio[0]
+        )
+
+        w = flow.round(flow.sqrt(target_area * aspect_ratio))
+        h = flow.round(flow.sqrt(target_area / aspect_ratio))
+        valid = (w > 0) & (w <= width) & (h > 0) & (h <= height)
+
+        # pick the first valid attempt of every sample
+        first = flow.argmax(valid.to(flow.int32), dim=1, keepdim=True)
+        found = valid.to(flow.int32).sum(dim=1) > 0
+        w = flow.gather(w, 1, first).squeeze(1)
+        h = flow.gather(h, 1, first).squeeze(1)
+
+        # Fallback to central crop
+        in_ratio = float(width) / float(height)
+        if in_ratio < min(ratio):
+            fallback_w = width
+            fallback_h = int(round(fallback_w / min(ratio)))
+        elif in_ratio > max(ratio):
+            fallback_h = height
+            fallback_w = int(round(fallback_h * max(ratio)))
+        else:  # whole image
+            fallback_w = width
+            fallback_h = height
+        w = flow.where(found, w, flow.ones_like(w) * fallback_w)
+        h = flow.where(found, h, flow.ones_like(h) * fallback_h)
+
+        top = flow.floor(flow.rand(batch_size, device=device) * (height - h + 1))
+        left = flow.floor(flow.rand(batch_size, device=device) * (width - w + 1))
+        top = flow.where(found, top, flow.floor((height - h) / 2))
+        left = flow.where(found, left, flow.floor((width - w) / 2))
+        return flow.stack((top, left, h, w), dim=1)
+
+    def forward(self, img):
+        _assert_batch(img)
+        n, _, height, width = img.shape
+        boxes = self.get_params(
+            n, height, width, self.scale, self.ratio, self.num_attempts, img.device
+        )
+        return F_t.resized_crop_batch(
+            img, boxes, list(self.size), self.interpolation.value
+        )
+
+    def __repr__(self):
+        interpolate_str = self.interpolation.value
+        format_string = self.__class__.__name__ + "(size={0}".format(self.size)
+        format_string += ", scale={0}".format(tuple(round(s, 4) for s in self.scale))
+        format_string += ", ratio={0}".format(tuple(round(r, 4) for r in self.ratio))
+        format_string += ", interpolation={0})".format(interpolate_str)
+        return format_string
+
+
+class BatchColorJitter(ColorJitter):
+    """Randomly change the brightness, contrast, saturation and hue of every sample
+    of an [N, 3, H, W] batch.
+
+    Every sample gets its own factors, drawn on the batch's device, while the order
+    in which the four adjustments are applied is drawn once per batch.
+    Arguments are the same as :class:`~flowvision.transforms.ColorJitter`.
+    """
+
+    @staticmethod
+    def get_params(
+        batch_size: int,
+        brightness: Optional[List[float]],
+        contrast: Optional[List[float]],
+        saturation: Optional[List[float]],
+        hue: Optional[List[float]],
+        device=None,
+    ) -> Tuple[
+        List[int],
+        Optional[Tensor],
+        Optional[Tensor],
+        Optional[Tensor],
+        Optional[Tensor],
+    ]:
+        """Get the per-sample parameters of the randomized transform.
+
+        Returns:
+            tuple: The order of the adjustments followed by one factor tensor of
+            shape [N] per adjustment, or None when it is turned off.
+        """
+        fn_idx = flow.randperm(4).tolist()
+
+        b = (
+            None
+            if brightness is None
+            else _uniform(batch_size, brightness[0], brightness[1], device)
+        )
+        c = (
+            None
+            if contrast is None
+            else _uniform(batch_size, contrast[0], contrast[1], device)
+        )
+        s = (
+            None
+            if saturation is None
+            else _uniform(batch_size, saturation[0], saturation[1], device)
+        )
+        h = None if hue is None else _uniform(batch_size, hue[0], hue[1], device)
+
+        return fn_idx, b, c, s, h
+
+    def forward(self, img):
+        """
+        Args:
+            img (Tensor): Batch of images of shape [N, 3, H, W].
+
+        Returns:
+            Tensor: Color jittered batch.
+        """
+        _assert_batch(img)
+        (
+            fn_idx,
+            brightness_factor,
+            contrast_factor,
+            saturation_factor,
+            hue_factor,
+        ) = self.get_params(
+            img.shape[0],
+            self.brightness,
+            self.contrast,
+            self.saturation,
+            self.hue,
+            img.device,
+        )
+
+        for fn_id in fn_idx:
+            if fn_id == 0 and brightness_factor is not None:
+                img = F_t.adjust_brightness_batch(img, brightness_factor)
+            elif fn_id == 1 and contrast_factor is not None:
+                img = F_t.adjust_contrast_batch(img, contrast_factor)
+            elif fn_id == 2 and saturation_factor is not None:
+                img = F_t.adjust_saturation_batch(img, saturation_factor)
+            elif fn_id == 3 and hue_factor is not None:
+                img = F_t.adjust_hue_batch(img, hue_factor)
+
+        return img
+
+
+class BatchNormalize(Module):
+    r"""Convert an [N, C, H, W] batch to float and normalize it with mean and standard
+    deviation in one pass.
+
+    Integer batches (e.g. uint8 straight from the DataLoader) are scaled to [0, 1]
+    as part of the same affine op, so ``mean`` and ``std`` are given in the
+    [0, 1] range for both float and integer input.
+
+    Args:
+        mean (sequence): Sequence of means for each channel.
+        std (sequence): Sequence of standard deviations for each channel.
+        max_value (float): Value that maps to 1.0 for integer input. Default: 255
+    """
+
+    def __init__(self, mean, std, max_value=255.0):
+        super().__init__()
+        if isinstance(mean, numbers.Number):
+            mean = [mean]
+        if isinstance(std, numbers.Number):
+            std = [std]
+        if any(s == 0 for s in std):
+            raise ValueError(
+                "std evaluated to zero after conversion, leading to division by zero."
+            )
+        self.mean = list(mean)
+        self.std = list(std)
+        self.max_value = max_value
+        self._cache: Dict[Tuple[str, bool], Tuple[Tensor, Tensor]] = {}
+
+    def _get_scale_shift(self, device, is_float: bool) -> Tuple[Tensor, Tensor]:
+        key = (str(device), is_float)
+        if key not in self._cache:
+            in_scale = 1.0 if is_float else 1.0 / self.max_value
+            # (x * in_scale - mean) / std == x * scale + shift
+            scale = [in_scale / s for s in self.std]
+            shift = [-m / s for m, s in zip(self.mean, self.std)]
+            self._cache[key] = (
+                flow.tensor(scale, dtype=flow.float32, device=device).view(1, -1, 1, 1),
+                flow.tensor(shift, dtype=flow.float32, device=device).view(1, -1, 1, 1),
+            )
+        return self._cache[key]
+
+    def forward(self, img):
+        _assert_batch(img)
+        scale, shift = self._get_scale_shift(img.device, img.is_floating_point())
+        return img.to(flow.float32) * scale + shift
+
+    def __repr__(self):
+        return self.__class__.__name__ + "(mean={0}, std={1})".format(
+            self.mean, self.std
+        )
@@ -329,7 +329,8 @@ def _hsv2rgb(img: Tensor) -> Tensor:
     a3 = flow.stack((p, p, t, v, v, q), dim=-3)
     a4 = flow.stack((a1, a2, a3), dim=-4)
 
-    return flow.sum(mask.to(dtype=img.dtype).unsqueeze(0) * a4, dim=1)
+    # a4 is [..., 3, 6, H, W], select one of the 6 cases per pixel, also for batches
+    return flow.sum(mask.to(dtype=img.dtype).unsqueeze(dim=-4) * a4, dim=-3)
 
 
 def _pad_symmetric(img: Tensor, padding: List[int]) -> Tensor:
@@ -539,3 +540,333 @@ def _assert_grid_transform_inputs(
                 interpolation
             )
         )
+
+
+def _batch_factor(factor: Tensor, img: Tensor) -> Tensor:
+    # per-sample factors of shape [N] broadcast over [N, C, H, W]
+    return factor.to(device=img.device, dtype=flow.float32).view(-1, 1, 1, 1)
+
+
+def _assert_batch_factor(img: Tensor, factor: Tensor, name: str) -> None:
+    if img.ndim != 4:
+        raise ValueError(
+            "Expected a batch of images of shape [N, C, H, W]. Got {}".format(img.shape)
+        )
+    if factor.ndim != 1 or factor.shape[0] != img.shape[0]:
+        raise ValueError(
+            "{} should have shape [{}], got {}".format(name, img.shape[0], factor.shape)
+        )
+
+
+def _blend_batch(img1: Tensor, img2: Tensor, ratio: Tensor) -> Tensor:
+    bound = 1.0 if img1.is_floating_point() else 255.0
+    ratio = _batch_factor(ratio, img1)
+    out = ratio * img1.to(flow.float32) + (1.0 - ratio) * img2.to(flow.float32)
+    return out.clamp(0, bound).to(img1.dtype)
+
+
+def adjust_brightness_batch(img: Tensor, brightness_factor: Tensor) -> Tensor:
+    _assert_batch_factor(img, brightness_factor, "brightness_factor")
+    _assert_channels(img, [1, 3])
+
+    bound = 1.0 if img.is_floating_point() else 255.0
+    out = img.to(flow.float32) * _batch_factor(brightness_factor, img)
+    return out.clamp(0, bound).to(img.dtype)
+
+
+def adjust_contrast_batch(img: Tensor, contrast_factor: Tensor) -> Tensor:
+    _assert_batch_factor(img, contrast_factor, "contrast_factor")
+    _assert_channels(img, [3])
+
+    mean = flow.mean(
+        rgb_to_grayscale(img).to(flow.float32), dim=(-3, -2, -1), keepdim=True
+    )
+    return _blend_batch(img, mean, contrast_factor)
+
+
+def adjust_saturation_batch(img: Tensor, saturation_factor: Tensor) -> Tensor:
+    _assert_batch_factor(img, saturation_factor, "saturation_factor")
+    _assert_channels(img, [3])
+
+    return _blend_batch(img, rgb_to_grayscale(img), saturation_factor)
+
+
+def adjust_hue_batch(img: Tensor, hue_factor: Tensor) -> Tensor:
+    _assert_batch_factor(img, hue_factor, "hue_factor")
+    _assert_channels(img, [1, 3])
+    if _get_image_num_channels(img) == 1:  # Match PIL behaviour
+        return img
+
+    orig_dtype = img.dtype
+    if img.dtype == flow.uint8:
+        img = img.to(dtype=flow.float32) / 255.0
+
+    img = _rgb2hsv(img)
+    h, s, v = img.unbind(dim=-3)
+    h = (h + hue_factor.to(device=h.device, dtype=h.dtype).view(-1, 1, 1)) % 1.0
+    img = flow.stack((h, s, v), dim=-3)
+    img_hue_adj = _hsv2rgb(img)
+
+    if orig_dtype == flow.uint8:
+        img_hue_adj = (img_hue_adj * 255.0).to(dtype=orig_dtype)
+
+    return img_hue_adj
+
+
+def hflip_batch(img: Tensor, flip_mask: Tensor) -> Tensor:
+    """Flips the samples of an [N, C, H, W] batch where ``flip_mask`` is True."""
+    _assert_batch_factor(img, flip_mask, "flip_mask")
+
+    mask = flip_mask.to(device=img.device, dtype=flow.bool).view(-1, 1, 1, 1)
+    return flow.where(mask, img.flip(-1), img)
+
+
+def resized_crop_batch(
+    img: Tensor, boxes: Tensor, size: List[int], interpolation: str = "bilinear"
+) -> Tensor:
+    """Crops one box per sample of an [N, C, H, W] batch and resizes all crops to
+    ``size`` with a single ``grid_sample`` call.
+
+    Args:
+        img (Tensor): Batch of images of shape [N, C, H, W].
+        boxes (Tensor): Float tensor of shape [N, 4] holding ``(top, left, height, width)``
+            of the crop of every sample, in pixels.
+        size (list): Output size ``(h, w)``.
+        interpolation (str): ``"bilinear"`` or ``"nearest"``.
+    """
+    if img.ndim != 4:
+        raise ValueError(
+            "Expected a batch of images of shape [N, C, H, W]. Got {}".format(img.shape)
+        )
+    if interpolation not in ["nearest", "bilinear"]:
+        raise ValueError(
+            "Interpolation mode '{}' is unsupported with batched input".format(
+                interpolation
+            )
+        )
+    n, c, height, width = img.shape
+    boxes = boxes.to(device=img.device, dtype=flow.float32)
+    top, left, h, w = boxes.unbind(dim=1)
+
+    # an affine grid with align_corners=False maps output pixel centers onto the
+    # pixel centers of the crop, the same sampling positions as crop + resize
+    zeros = flow.zeros_like(w)
+    theta = flow.stack(
+        (
+            flow.stack((w / width, zeros, (2 * left + w) / width - 1), dim=1),
+            flow.stack((zeros, h / height, (2 * top + h) / height - 1), dim=1),
+        ),
+        dim=1,
+    )
+    grid = flow.nn.functional.affine_grid(
+        theta, [n, c, size[0], size[1]], align_corners=False
+    )
+
+    img, need_cast, _, out_dtype = _cast_squeeze_in(img, [flow.float32, flow.float64])
+    img = flow.nn.functional.grid_sample(
+        img, grid.to(img.dtype), mode=interpolation, align_corners=False
+    )
+    return _cast_squeeze_out(
+        img, need_cast=need_cast, need_squeeze=False, out_dtype=out_dtype
+    )
+
+
+def affine_batch(
+    img: Tensor,
+    matrix: Tensor,
+    interpolation: str = "bilinear",
+    fill: Optional[List[float]] = None,
+) -> Tensor:
+    """Applies one affine transform per sample of an [N, C, H, W] batch with a single
+    ``grid_sample`` call.
+
+    Args:
+        img (Tensor): Batch of images of shape [N, C, H, W].
+        matrix (Tensor): Float tensor of shape [N, 2, 3] holding, like the ``AFFINE`` data
+            of ``PIL.Image.transform``, the inverse transform of every sample: the input
+            position ``(x, y)`` sampled for the output position ``(x', y', 1)``, in pixels.
+        interpolation (str): ``"bilinear"`` or ``"nearest"``.
+        fill (sequence, optional): Per channel value of the output pixels mapped outside
+            of the input. Default: 0.
+    """
+    if img.ndim != 4:
+        raise ValueError(
+            "Expected a batch of images of shape [N, C, H, W]. Got {}".format(img.shape)
+        )
+    if interpolation not in ["nearest", "bilinear"]:
+        raise ValueError(
+            "Interpolation mode '{}' is unsupported with batched input".format(
+                interpolation
+            )
+        )
+    n, c, height, width = img.shape
+    matrix = matrix.to(device=img.device, dtype=flow.float32)
+    a, b, tx = matrix[:, 0].unbind(dim=1)
+    d, e, ty = matrix[:, 1].unbind(dim=1)
+
+    # the same transform on the [-1, 1] coordinates of affine_grid, whose pixel
+    # centers match the ones of PIL with align_corners=False
+    ratio = height / width
+    theta = flow.stack(
+        (
+            flow.stack((a, b * ratio, a + b * ratio + 2 * tx / width - 1), dim=1),
+            flow.stack((d / ratio, e, d / ratio + e + 2 * ty / height - 1), dim=1),
+        ),
+        dim=1,
+    )
+    grid = flow.nn.functional.affine_grid(
+        theta, [n, c, height, width], align_corners=False
+    )
+
+    img, need_cast, _, out_dtype = _cast_squeeze_in(img, [flow.float32, flow.float64])
+    if fill is not None:
+        # a channel of ones tells how much of every output pixel lies inside the input
+        img = flow.cat((img, flow.ones_like(img[:, :1])), dim=1)
+    img = flow.nn.functional.grid_sample(
+        img, grid.to(img.dtype), mode=interpolation, align_corners=False
+    )
+    if fill is not None:
+        img, mask = img[:, :-1], img[:, -1:]
+        fill = flow.tensor(fill, dtype=img.dtype, device=img.device).view(1, -1, 1, 1)
+        img = img * mask + (1.0 - mask) * fill
+    return _cast_squeeze_out(
+        img, need_cast=need_cast, need_squeeze=False, out_dtype=out_dtype
+    )
+
+
+def invert_batch(img: Tensor) -> Tensor:
+    if img.ndim != 4:
+        raise ValueError(
+            "Expected a batch of images of shape [N, C, H, W]. Got {}".format(img.shape)
+        )
+
+    bound = 1.0 if img.is_floating_point() else 255.0
+    return (bound - img.to(flow.float32)).to(img.dtype)
+
+
+def posterize_batch(img: Tensor, bits: Tensor) -> Tensor:
+    """Keeps the ``bits[i]`` most significant bits of the channels of sample ``i`` of
+    a uint8 [N, C, H, W] batch."""
+    _assert_batch_factor(img, bits, "bits")
+    if img.dtype != flow.uint8:
+        raise TypeError(
+            "Only uint8 batches are supported by posterize, got {}".format(img.dtype)
+        )
+
+    step = flow.pow(2.0, 8.0 - _batch_factor(bits, img).clamp(0, 8))
+    return (flow.floor(img.to(flow.float32) / step) * step).to(img.dtype)
+
+
+def solarize_batch(img: Tensor, threshold: Tensor) -> Tensor:
+    """Inverts the pixels of sample ``i`` of an [N, C, H, W] batch that are above or
+    equal to ``threshold[i]``."""
+    _assert_batch_factor(img, threshold, "threshold")
+
+    bound = 1.0 if img.is_floating_point() else 255.0
+    x = img.to(flow.float32)
+    return flow.where(x >= _batch_factor(threshold, img), bound - x, x).to(img.dtype)
+
+
+def solarize_add_batch(img: Tensor, addition: Tensor, threshold: float = 128) -> Tensor:
+    """Adds ``addition[i]`` to the pixels of sample ``i`` of an [N, C, H, W] batch that
+    are below ``threshold``."""
+    _assert_batch_factor(img, addition, "addition")
+
+    bound = 1.0 if img.is_floating_point() else 255.0
+    x = img.to(flow.float32)
+    added = (x + _batch_factor(addition, img)).clamp(0, bound)
+    return flow.where(x < threshold, added, x).to(img.dtype)
+
+
+def autocontrast_batch(img: Tensor) -> Tensor:
+    """Stretches every channel of every sample of an [N, C, H, W] batch to the full
+    range, as ``PIL.ImageOps.autocontrast`` without cutoff."""
+    if img.ndim != 4:
+        raise ValueError(
+            "Expected a batch of images of shape [N, C, H, W]. Got {}".format(img.shape)
+        )
+
+    n, c, height, width = img.shape
+    if img.is_floating_point():
+        x = img.to(flow.float32)
+        low = x.flatten(2).min(dim=2)[0].view(n, c, 1, 1)
+        high = x.flatten(2).max(dim=2)[0].view(n, c, 1, 1)
+        # constant channels are left unchanged
+        valid = high > low
+        scale = 1.0 / flow.where(valid, high - low, flow.ones_like(low))
+        out = ((x - low) * scale).clamp(0, 1.0)
+        return flow.where(valid, out, x).to(img.dtype)
+
+    # lookup tables in double precision, which round exactly as the ones of PIL
+    pixels = img.reshape(n * c, height * width).to(flow.int64)
+    low = pixels.min(dim=1, keepdim=True)[0].to(flow.float64)
+    high = pixels.max(dim=1, keepdim=True)[0].to(flow.float64)
+    valid = high > low
+    scale = 255.0 / flow.where(valid, high - low, flow.ones_like(low))
+    bins = flow.arange(256, dtype=flow.float64, device=img.device).expand(n * c, 256)
+    lut = flow.floor(bins * scale - low * scale).clamp(0, 255)
+    lut = flow.where(valid, lut, bins)
+    return flow.gather(lut, 1, pixels).reshape(n, c, height, width).to(img.dtype)
+
+
+def equalize_batch(img: Tensor) -> Tensor:
+    """Equalizes the histogram of every channel of every sample of a uint8 [N, C, H, W]
+    batch, with the lookup tables of ``PIL.ImageOps.equalize``."""
+    if img.ndim != 4:
+        raise ValueError(
+            "Expected a batch of images of shape [N, C, H, W]. Got {}".format(img.shape)
+        )
+    if img.dtype != flow.uint8:
+        raise TypeError(
+            "Only uint8 batches are supported by equalize, got {}".format(img.dtype)
+        )
+
+    n, c, height, width = img.shape
+    pixels = img.reshape(n * c, height * width).to(flow.int64)
+    # counts are exact in float32 up to 2 ** 24 pixels per channel
+    hist = flow.scatter_add(
+        flow.zeros(n * c, 256, dtype=flow.float32, device=img.device),
+        1,
+        pixels,
+        flow.ones(n * c, height * width, dtype=flow.float32, device=img.device),
+    )
+    bins = flow.arange(256, dtype=flow.float32, device=img.device).expand(n * c, 256)
+    last = (bins * (hist > 0).to(flow.float32)).max(dim=1, keepdim=True)[0]
+    last_count = flow.gather(hist, 1, last.to(flow.int64))
+    step = flow.floor((hist.sum(dim=1, keepdim=True) - last_count) / 256)
+    # the lookup table maps a value to the pixel count below it, in units of step
+    below = flow.cumsum(hist, dim=1) - hist
+    lut = flow.floor((flow.floor(step / 2) + below) / step.clamp(min=1)).clamp(0, 255)
+    # channels of a single value are left unchanged
+    lut = flow.where(step > 0, lut, bins)
+    return flow.gather(lut, 1, pixels).reshape(n, c, height, width).to(img.dtype)
+
+
+def _smooth_batch(img: Tensor) -> Tensor:
+    # the SMOOTH filter of PIL, which keeps the border pixels
+    c = img.shape[1]
+    x = img.to(flow.float32)
+    kernel = flow.tensor(
+        [[1.0, 1.0, 1.0], [1.0, 5.0, 1.0], [1.0, 1.0, 1.0]], device=img.device
+    )
+    kernel = (kernel / 13.0).expand(c, 1, 3, 3)
+    smooth = flow.nn.functional.conv2d(x, kernel, groups=c)
+    if not img.is_floating_point():
+        smooth = flow.round(smooth)
+    return flow.cat(
+        (
+            x[:, :, :1],
+            flow.cat((x[:, :, 1:-1, :1], smooth, x[:, :, 1:-1, -1:]), dim=3),
+            x[:, :, -1:],
+        ),
+        dim=2,
+    )
+
+
+def adjust_sharpness_batch(img: Tensor, sharpness_factor: Tensor) -> Tensor:
+    _assert_batch_factor(img, sharpness_factor, "sharpness_factor")
+    _assert_channels(img, [1, 3])
+    if img.shape[-1] <= 2 or img.shape[-2] <= 2:
+        return img
+
+    return _blend_batch(img, _smooth_batch(img), sharpness_factor)
@@ -1,5 +1,15 @@
 from .agc import adaptive_clip_grad
 from .clip_grad import dispatch_clip_grad
 from .vision_helpers import make_grid, save_image
-from .metrics import AverageMeter, accuracy
-from .model_ema import ModelEmaV2
+from .metrics import (
+    AverageMeter,
+    ConfusionMatrix,
+    MetricLogger,
+    SmoothedValue,
+    accuracy,
+    all_reduce_metrics,
+    topk_correct,
+)
+from .model_ema import ModelEmaV2, ModelEmaV3
+from .download import download_file
+from .coco_eval import COCOEvaluator
@@ -0,0 +1,418 @@
+"""Native COCO-style bounding box evaluation
+
+Computes the same AP/AR as pycocotools' COCOeval with ``iouType="bbox"``, on NumPy
+arrays: the greedy matching of the detections is vectorized over the images,
+categories, area ranges and IoU thresholds of a batch, and only the per detection
+match results are kept, which makes the evaluator cheap to update per batch and to
+merge across processes.
+"""
+
+import pickle
+
+import numpy as np
+import oneflow as flow
+
+# number of (image, category) pairs matched at once, bounds the memory of update()
+_PAIRS_PER_CHUNK = 512
+
+
+def _to_numpy(x, dtype):
+    if isinstance(x, flow.Tensor):
+        x = x.numpy()
+    return np.asarray(x, dtype=dtype)
+
+
+def _xyxy_to_xywh(boxes):
+    boxes = _to_numpy(boxes, np.float64).reshape(-1, 4)
+    return np.concatenate([boxes[:, :2], boxes[:, 2:] - boxes[:, :2]], axis=1)
+
+
+def _box_iou_xywh(dt, gt, iscrowd):
+    """IoU of [..., D, 4] and [..., G, 4] boxes as computed by pycocotools, where
+    the union of a crowd box is the area of the detection"""
+    dt = dt[..., :, None, :]
+    gt = gt[..., None, :, :]
+    w = np.minimum(dt[..., 0] + dt[..., 2], gt[..., 0] + gt[..., 2]) - np.maximum(
+        dt[..., 0], gt[..., 0]
+    )
+    h = np.minimum(dt[..., 1] + dt[..., 3], gt[..., 1] + gt[..., 3]) - np.maximum(
+        dt[..., 1], gt[..., 1]
+    )
+    inter = np.clip(w, 0, None) * np.clip(h, 0, None)
+    dt_area = dt[..., 2] * dt[..., 3]
+    union = np.where(
+        iscrowd[..., None, :], dt_area, dt_area + gt[..., 2] * gt[..., 3] - inter
+    )
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def _last_argmax(x):
+    # pycocotools keeps the last of equally good matches
+    return x.shape[-1] - 1 - np.argmax(x[..., ::-1], axis=-1)
+
+
+def _all_gather_object(data):
+    world_size = flow.env.get_world_size()
+    if world_size == 1:
+        return [data]
+    buffer = np.frombuffer(pickle.dumps(data), dtype=np.int8)
+    tensor = flow.tensor(buffer).to("cuda")
+    local_size = flow.tensor([tensor.numel()], device="cuda")
+    size_list = [flow.tensor([0], device="cuda") for _ in range(world_size)]
+    flow.comm.all_gather(size_list, local_size)
+    size_list = [int(size.item()) for size in size_list]
+    max_size = max(size_list)
+    # all_gather needs tensors of the same shape
+    if tensor.numel() != max_size:
+        padding = flow.zeros(max_size - tensor.numel(), dtype=flow.int8, device="cuda")
+        tensor = flow.cat([tensor, padding])
+    tensor_list = [
+        flow.zeros(max_size, dtype=flow.int8, device="cuda") for _ in size_list
+    ]
+    flow.comm.all_gather(tensor_list, tensor)
+    return [
+        pickle.loads(t.numpy().tobytes()[:size])
+        for t, size in zip(tensor_list, size_list)
+    ]
+
+
+class COCOEvaluator:
+    """Vectorized COCO bounding box evaluator.
+
+    The ground truth is registered with :meth:`add_ground_truth` (or taken from a
+    pycocotools ``COCO`` object with :meth:`from_coco`), the detections of each batch
+    are matched by :meth:`update`. :meth:`accumulate` then computes the precision
+    and recall of each category, area range and number of detections, and
+    :meth:`summarize` reports the 12 standard COCO metrics, matching COCOeval.
+
+    Args:
+        cat_ids (sequence): category ids to evaluate
+        max_dets (sequence): numbers of detections per image. Default: ``(1, 10, 100)``
+
+    Example:
+
+    .. code-block:: python
+
+        evaluator = COCOEvaluator.from_coco(coco_gt)
+        for images, targets in data_loader:
+            outputs = model(images)
+            evaluator.update({t["image_id"].item(): o for t, o in zip(targets, outputs)})
+        evaluator.synchronize_between_processes()
+        evaluator.accumulate()
+        stats = evaluator.summarize()
+    """
+
+    area_labels = ["all", "small", "medium", "large"]
+
+    def __init__(self, cat_ids, max_dets=(1, 10, 100)):
+        self.cat_ids = sorted(cat_ids)
+        self._cat_index = {c: i for i, c in enumerate(self.cat_ids)}
+        self.max_dets = list(max_dets)
+        self.iou_thrs = np.linspace(
+            0.5, 0.95, int(np.round((0.95 - 0.5) / 0.05)) + 1, endpoint=True
+        )
+        self.rec_thrs = np.linspace(
+            0.0, 1.00, int(np.round((1.00 - 0.0) / 0.01)) + 1, endpoint=True
+        )
+        self.area_rngs = np.array(
+            [[0, 1e5 ** 2], [0, 32 ** 2], [32 ** 2, 96 ** 2], [96 ** 2, 1e5 ** 2]]
+        )
+        self._gts = {}
+        # image id -> match results of its detections
+        self._results = {}
+        self.precision = None
+        self.recall = None
+        self.stats = None
+
+    @classmethod
+    def from_coco(cls, coco_gt, **kwargs):
+        """Builds the evaluator from the annotations of a pycocotools ``COCO`` object"""
+        evaluator = cls(coco_gt.getCatIds(), **kwargs)
+        anns_per_image = {img_id: [] for img_id in coco_gt.getImgIds()}
+        for ann in coco_gt.dataset["annotations"]:
+            anns_per_image.setdefault(ann["image_id"], []).append(ann)
+        for img_id, anns in anns_per_image.items():
+            boxes = np.array([ann["bbox"] for ann in anns], dtype=np.float64)
+            boxes = boxes.reshape(-1, 4)
+            evaluator._gts[img_id] = (
+                boxes,
+                np.array([ann["category_id"] for ann in anns], dtype=np.int64),
+                np.array([ann.get("iscrowd", 0) for ann in anns], dtype=bool),
+                np.array([ann["area"] for ann in anns], dtype=np.float64),
+            )
+        return evaluator
+
+    def add_ground_truth(self, image_id, boxes, labels, iscrowd=None, areas=None):
+        """Registers the ground truth of an image.
+
+        Args:
+            image_id (int): id of the image
+            boxes (Tensor or ndarray): ``[G, 4]`` boxes in ``(x1, y1, x2, y2)`` format
+            labels (Tensor or ndarray): ``[G]`` category ids
+            iscrowd (Tensor or ndarray, optional): ``[G]`` crowd flags, crowd boxes are ignored
+            areas (Tensor or ndarray, optional): ``[G]`` areas used for the area ranges,
+                the box areas by default
+        """
+        boxes = _xyxy_to_xywh(boxes)
+        labels = _to_numpy(labels, np.int64).reshape(-1)
+        iscrowd = (
+            np.zeros(len(labels), dtype=bool)
+            if iscrowd is None
+            else _to_numpy(iscrowd, bool).reshape(-1)
+        )
+        areas = (
+            boxes[:, 2] * boxes[:, 3]
+            if areas is None
+            else _to_numpy(areas, np.float64).reshape(-1)
+        )
+        self._gts[image_id] = (boxes, labels, iscrowd, areas)
+
+    def update(self, predictions):
+        """Matches the detections of a batch to the ground truth.
+
+        Args:
+            predictions (dict): image id -> dict with the ``boxes`` (in ``(x1, y1, x2, y2)``
+                format), ``scores`` and ``labels`` of its detections
+        """
+        pairs = []
+        for image_id, prediction in predictions.items():
+            pairs.extend(self._pairs(image_id, prediction))
+        for start in range(0, len(pairs), _PAIRS_PER_CHUNK):
+            self._match(pairs[start : start + _PAIRS_PER_CHUNK])
+
+        grouped = {image_id: [] for image_id in predictions}
+        for pair in pairs:
+            grouped[pair["image_id"]].append(pair)
+        for image_id, image_pairs in grouped.items():
+            self._results[image_id] = self._collect(image_pairs)
+
+    def _collect(self, pairs):
+        """Match results of an image, detections sorted by category then score"""
+        num_areas, num_thrs = len(self.area_rngs), len(self.iou_thrs)
+        no_match = np.zeros((num_areas, num_thrs, 0), dtype=bool)
+        return {
+            "cats": np.concatenate(
+                [np.zeros(0, dtype=np.int32)]
+                + [np.full(len(p["scores"]), p["cat"], dtype=np.int32) for p in pairs]
+            ),
+            "scores": np.concatenate([np.zeros(0)] + [p["scores"] for p in pairs]),
+            # position of the detections among those of their category
+            "ranks": np.concatenate(
+                [np.zeros(0, dtype=np.int32)]
+                + [np.arange(len(p["scores"]), dtype=np.int32) for p in pairs]
+            ),
+            "matched": np.concatenate([no_match] + [p["matched"] for p in pairs], 2),
+            "ignored": np.concatenate([no_match] + [p["ignored"] for p in pairs], 2),
+            "gt_cats": np.array([p["cat"] for p in pairs], dtype=np.int64),
+            "num_gt": np.array([p["num_gt"] for p in pairs], dtype=np.int64).reshape(
+                -1, num_areas
+            ),
+        }
+
+    def _pairs(self, image_id, prediction):
+        """Splits the ground truth and detections of an image per category"""
+        empty = (
+            np.zeros((0, 4)),
+            np.zeros(0, np.int64),
+            np.zeros(0, bool),
+            np.zeros(0),
+        )
+        gt_boxes, gt_labels, gt_crowd, gt_areas = self._gts.get(image_id, empty)
+        dt_boxes = _xyxy_to_xywh(prediction["boxes"])
+        dt_scores = _to_numpy(prediction["scores"], np.float64).reshape(-1)
+        dt_labels = _to_numpy(prediction["labels"], np.int64).reshape(-1)
+
+        pairs = []
+        for cat in np.unique(np.concatenate([gt_labels, dt_labels])):
+            if cat not in self._cat_index:
+                continue
+            gt = gt_labels == cat
+            dt = np.nonzero(dt_labels == cat)[0]
+            order = np.argsort(-dt_scores[dt], kind="mergesort")
+            dt = dt[order[: self.max_dets[-1]]]
+            areas = gt_areas[gt]
+            # crowd boxes and boxes outside of the area range are ignored
+            gt_ignore = gt_crowd[gt][None] | (
+                (areas[None] < self.area_rngs[:, :1])
+                | (areas[None] > self.area_rngs[:, 1:])
+            )
+            pairs.append(
+                {
+                    "image_id": image_id,
+                    "cat": self._cat_index[cat],
+                    "gt_boxes": gt_boxes[gt],
+                    "gt_crowd": gt_crowd[gt],
+                    "gt_ignore": gt_ignore,
+                    "dt_boxes": dt_boxes[dt],
+                    "scores": dt_scores[dt],
+                    "num_gt": (~gt_ignore).sum(1),
+                }
+            )
+        return pairs
+
+    def _match(self, pairs):
+        """Greedy matching of COCOeval.evaluateImg, for a chunk of pairs at once"""
+        if not pairs:
+            return
+        num_pairs = len(pairs)
+        num_areas, num_thrs = len(self.area_rngs), len(self.iou_thrs)
+        num_dt = max(max(len(p["scores"]) for p in pairs), 1)
+        num_gt = max(max(len(p["gt_crowd"]) for p in pairs), 1)
+
+        # padded ground truth get a -1 IoU and are never matched
+        dt_boxes = np.zeros((num_pairs, num_dt, 4))
+        gt_boxes = np.zeros((num_pairs, num_gt, 4))
+        gt_crowd = np.zeros((num_pairs, num_gt), dtype=bool)
+        gt_ignore = np.zeros((num_pairs, num_areas, num_gt), dtype=bool)
+        gt_valid = np.zeros((num_pairs, num_gt), dtype=bool)
+        for i, p in enumerate(pairs):
+            d, g = len(p["scores"]), len(p["gt_crowd"])
+            dt_boxes[i, :d] = p["dt_boxes"]
+            gt_boxes[i, :g] = p["gt_boxes"]
+            gt_crowd[i, :g] = p["gt_crowd"]
+            gt_ignore[i, :, :g] = p["gt_ignore"]
+            gt_valid[i, :g] = True
+        ious = _box_iou_xywh(dt_boxes, gt_boxes, gt_crowd)
+        ious = np.where(gt_valid[:, None, :], ious, -1.0)
+
+        thrs = self.iou_thrs[None, None, :, None]
+        ignore = gt_ignore[:, :, None, :]
+        gt_matched = np.zeros((num_pairs, num_areas, num_thrs, num_gt), dtype=bool)
+        matched = np.zeros((num_pairs, num_areas, num_thrs, num_dt), dtype=bool)
+        ignored = np.zeros((num_pairs, num_areas, num_thrs, num_dt), dtype=bool)
+        for d in range(num_dt):
+            iou = ious[:, None, None, d, :]
+            # crowd ground truth can be matched several times
+            candidates = (~gt_matched | gt_crowd[:, None, None, :]) & (iou >= thrs)
+            # the best non ignored ground truth wins over the ignored ones
+            non_ignored = candidates & ~ignore
+            ignored_only = candidates & ignore
+            has_non_ignored = non_ignored.any(-1)
+            has_match = has_non_ignored | ignored_only.any(-1)
+            best = np.where(
+                has_non_ignored,
+                _last_argmax(np.where(non_ignored, iou, -1.0)),
+                _last_argmax(np.where(ignored_only, iou, -1.0)),
+            )
+            m = np.where(has_match, best, 0)
+            matched[..., d] = has_match
+            ignored[..., d] = has_match & np.take_along_axis(
+                np.broadcast_to(ignore, gt_matched.shape), m[..., None], -1
+            ).squeeze(-1)
+            p, a, t = np.nonzero(has_match)
+            gt_matched[p, a, t, m[p, a, t]] = True
+
+        for i, p in enumerate(pairs):
+            d = len(p["scores"])
+            boxes = p["dt_boxes"]
+            areas = boxes[:, 2] * boxes[:, 3]
+            # unmatched detections outside of the area range are ignored
+            outside = (areas[None] < self.area_rngs[:, :1]) | (
+                areas[None] > self.area_rngs[:, 1:]
+            )
+            p["matched"] = matched[i, :, :, :d]
+            p["ignored"] = ignored[i, :, :, :d] | (
+                ~matched[i, :, :, :d] & outside[:, None, :]
+            )
+
+    def synchronize_between_processes(self):
+        """Gathers the match results of all the processes"""
+        merged = {}
+        for results in _all_gather_object(self._results):
+            # images evaluated on several processes (padded samplers) have the same results
+            merged.update(results)
+        self._results = merged
+
+    def accumulate(self):
+        """Computes the precision ``[T, R, K, A, M]`` and recall ``[T, K, A, M]`` arrays
+        of COCOeval, for the T IoU thresholds, R recall thresholds, K categories,
+        A area ranges and M numbers of detections"""
+        num_thrs, num_recs = len(self.iou_thrs), len(self.rec_thrs)
+        num_cats, num_areas = len(self.cat_ids), len(self.area_rngs)
+        num_max_dets = len(self.max_dets)
+        precision = -np.ones((num_thrs, num_recs, num_cats, num_areas, num_max_dets))
+        recall = -np.ones((num_thrs, num_cats, num_areas, num_max_dets))
+
+        # detections of all the images, ordered by image id like COCOeval
+        results = [self._results[img_id] for img_id in sorted(self._results)]
+        cats = np.concatenate([r["cats"] for r in results])
+        scores = np.concatenate([r["scores"] for r in results])
+        ranks = np.concatenate([r["ranks"] for r in results])
+        matched = np.concatenate([r["matched"] for r in results], axis=2)
+        ignored = np.concatenate([r["ignored"] for r in results], axis=2)
+        num_gt = np.zeros((num_cats, num_areas), dtype=np.int64)
+        for r in results:
+            np.add.at(num_gt, r["gt_cats"], r["num_gt"])
+
+        for k in range(num_cats):
+            in_cat = np.nonzero(cats == k)[0]
+            for m, max_det in enumerate(self.max_dets):
+                index = in_cat[ranks[in_cat] < max_det]
+                index = index[np.argsort(-scores[index], kind="mergesort")]
+                for a in range(num_areas):
+                    npig = num_gt[k, a]
+                    if npig == 0:
+                        continue
+                    dt_matched = matched[a][:, index]
+                    dt_ignored = ignored[a][:, index]
+                    tp = np.cumsum(dt_matched & ~dt_ignored, axis=1, dtype=np.float64)
+                    fp = np.cumsum(~dt_matched & ~dt_ignored, axis=1, dtype=np.float64)
+                    nd = len(index)
+                    rc = tp / npig
+                    pr = tp / (fp + tp + np.spacing(1))
+                    recall[:, k, a, m] = rc[:, -1] if nd else 0
+                    # interpolated precision: the best one at any higher recall
+                    pr = np.maximum.accumulate(pr[:, ::-1], axis=1)[:, ::-1]
+                    for t in range(num_thrs):
+                        inds = np.searchsorted(rc[t], self.rec_thrs, side="left")
+                        q = np.zeros(num_recs)
+                        valid = inds < nd
+                        q[valid] = pr[t, inds[valid]]
+                        precision[t, :, k, a, m] = q
+        self.precision = precision
+        self.recall = recall
+
+    def _summarize(self, ap=True, iou_thr=None, area="all", max_dets=100):
+        a = self.area_labels.index(area)
+        m = self.max_dets.index(max_dets)
+        if ap:
+            s = self.precision[:, :, :, a, m]
+        else:
+            s = self.recall[:, :, a, m]
+        if iou_thr is not None:
+            s = s[np.nonzero(np.isclose(self.iou_thrs, iou_thr))[0]]
+        mean_s = -1.0 if not (s > -1).any() else float(np.mean(s[s > -1]))
+        print(
+            " {:<18} {} @[ IoU={:<9} | area={:>6s} | maxDets={:>3d} ] = {:0.3f}".format(
+                "Average Precision" if ap else "Average Recall",
+                "(AP)" if ap else "(AR)",
+                "{:0.2f}:{:0.2f}".format(self.iou_thrs[0], self.iou_thrs[-1])
+                if iou_thr is None
+                else "{:0.2f}".format(iou_thr),
+                area,
+                max_dets,
+                mean_s,
+            )
+        )
+        return mean_s
+
+    def summarize(self):
+        """Prints and returns the 12 metrics of COCOeval.summarize"""
+        if self.precision is None:
+            self.accumulate()
+        max_dets = self.max_dets[-1]
+        stats = [
+            self._summarize(True, max_dets=max_dets),
+            self._summarize(True, iou_thr=0.5, max_dets=max_dets),
+            self._summarize(True, iou_thr=0.75, max_dets=max_dets),
+            self._summarize(True, area="small", max_dets=max_dets),
+            self._summarize(True, area="medium", max_dets=max_dets),
+            self._summarize(True, area="large", max_dets=max_dets),
+        ]
+        stats += [self._summarize(False, max_dets=m) for m in self.max_dets]
+        stats += [
+            self._summarize(False, area=area, max_dets=max_dets)
+            for area in ["small", "medium", "large"]
+        ]
+        self.stats = np.array(stats)
+        return self.stats
@@ -0,0 +1,264 @@
+"""Parallel, resumable and hash-verified file downloads
+
+Shared by the pretrained weights (flowvision.models.utils) and the datasets
+(flowvision.datasets.utils). When the server supports range requests, the file is
+fetched in chunks by a thread pool and written in place to ``<dst>.part``. The
+finished chunks are recorded in ``<dst>.part.json``, so an interrupted download
+resumes where it stopped. The chunks are hashed in order as they arrive, and a file
+lock on ``<dst>.lock`` makes concurrent processes (e.g. the ranks of a distributed
+job) download the file once and share the result.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.request import Request, urlopen
+
+from tqdm import tqdm
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+USER_AGENT = "oneflow/vision"
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+class FileLock:
+    """Inter-process lock held on ``path`` while in the context"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, "a+")
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+
+
+def _open(url, start=None, end=None, timeout=60):
+    headers = {"User-Agent": USER_AGENT}
+    if start is not None:
+        headers["Range"] = "bytes={}-{}".format(start, end - 1)
+    return urlopen(Request(url, headers=headers), timeout=timeout)
+
+
+def _probe(url, timeout):
+    """Returns the size of the file, or None when unknown, and whether the server
+    answers range requests"""
+    with _open(url, 0, 1, timeout) as response:
+        content_range = response.headers.get("Content-Range")
+        if getattr(response, "status", None) == 206 and content_range:
+            # e.g. "bytes 0-0/1234"
+            total = content_range.rsplit("/", 1)[-1]
+            if total.isdigit():
+                return int(total), True
+        length = response.headers.get("Content-Length")
+        return (int(length) if length else None), False
+
+
+def _retry(fn, max_retries):
+    for attempt in range(max_retries + 1):
+        try:
+            return fn()
+        except (OSError, ValueError):
+            if attempt == max_retries:
+                raise
+            time.sleep(min(2 ** attempt, 10))
+
+
+class _PartState:
+    """Chunks of ``<dst>.part`` already written, persisted next to it"""
+
+    def __init__(self, path, url, size, chunk_size):
+        self.path = path
+        self.meta = {"url": url, "size": size, "chunk_size": chunk_size}
+        self.done = set()
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r") as f:
+                state = json.load(f)
+            if all(state.get(k) == v for k, v in self.meta.items()):
+                self.done = set(state["done"])
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def add(self, index):
+        with self._lock:
+            self.done.add(index)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(dict(self.meta, done=sorted(self.done)), f)
+            os.replace(tmp, self.path)
+
+
+def _download_ranges(
+    url, part, size, hasher, pbar, num_threads, chunk_size, max_retries, timeout
+):
+    state = _PartState(part + ".json", url, size, chunk_size)
+    if not state.done or not os.path.exists(part):
+        state.done = set()
+        with open(part, "wb") as f:
+            f.truncate(size)
+    num_chunks = (size + chunk_size - 1) // chunk_size
+
+    def fetch(index):
+        start = index * chunk_size
+        end = min(start + chunk_size, size)
+
+        def attempt():
+            with _open(url, start, end, timeout) as response:
+                data = response.read()
+            if len(data) != end - start:
+                raise ValueError("short read of bytes {}-{}".format(start, end))
+            return data
+
+        data = _retry(attempt, max_retries)
+        with open(part, "r+b") as f:
+            f.seek(start)
+            f.write(data)
+        state.add(index)
+        return data
+
+    def read(index):
+        with open(part, "rb") as f:
+            f.seek(index * chunk_size)
+            return f.read(min(chunk_size, size - index * chunk_size))
+
+    # the chunks are hashed in order: at most 2 * num_threads of them are in flight
+    # or waiting for the previous ones
+    with ThreadPoolExecutor(num_threads) as pool:
+        pending = deque()
+        indices = iter(range(num_chunks))
+
+        def submit():
+            index = next(indices, None)
+            if index is None:
+                return
+            if index in state.done:
+                pending.append((index, None))
+            else:
+                pending.append((index, pool.submit(fetch, index)))
+
+        for _ in range(2 * num_threads):
+            submit()
+        while pending:
+            index, future = pending.popleft()
+            data = read(index) if future is None else future.result()
+            hasher.update(data)
+            pbar.update(len(data))
+            submit()
+
+
+def _download_stream(url, part, hasher, pbar, chunk_size, timeout):
+    with _open(url, timeout=timeout) as response, open(part, "wb") as f:
+        while True:
+            buffer = response.read(chunk_size)
+            if not buffer:
+                break
+            f.write(buffer)
+            hasher.update(buffer)
+            pbar.update(len(buffer))
+
+
+def download_file(
+    url,
+    dst,
+    hash_prefix=None,
+    hash_type="sha256",
+    progress=True,
+    num_threads=4,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    max_retries=3,
+    timeout=60,
+):
+    r"""Downloads the file at ``url`` to ``dst``.
+
+    Args:
+        url (string): URL of the file to download
+        dst (string): path where the file is saved
+        hash_prefix (string, optional): If not None, the hex digest of the file should start with
+            ``hash_prefix``, a full digest checks the whole hash. Default: ``None``
+        hash_type (string, optional): ``"sha256"`` or ``"md5"``. Default: ``"sha256"``
+        progress (bool, optional): whether or not to display a progress bar to stderr.
+            Default: ``True``
+        num_threads (int, optional): number of concurrent range requests. Default: ``4``
+        chunk_size (int, optional): size in bytes of each range request. Default: 4 MiB
+        max_retries (int, optional): number of retries of a failed range request, the
+            download can also be resumed by calling the function again. Default: ``3``
+        timeout (float, optional): socket timeout in seconds. Default: ``60``
+
+    Returns:
+        the hex digest of the downloaded file, or None when another process already
+        downloaded it
+    """
+    dst = os.path.expanduser(dst)
+    dst_dir = os.path.dirname(dst)
+    if dst_dir:
+        os.makedirs(dst_dir, exist_ok=True)
+    part = dst + ".part"
+
+    existed = os.path.exists(dst)
+    with FileLock(dst + ".lock"):
+        if not existed and os.path.exists(dst):
+            # downloaded and verified by another process while waiting for the lock
+            return None
+
+        size, ranges = _retry(lambda: _probe(url, timeout), max_retries)
+        hasher = hashlib.new(hash_type)
+        with tqdm(
+            total=size,
+            disable=not progress,
+            unit="B",
+            unit_scale=True,
+            unit_divisor=1024,
+        ) as pbar:
+            if ranges and size > 0:
+                _download_ranges(
+                    url,
+                    part,
+                    size,
+                    hasher,
+                    pbar,
+                    num_threads,
+                    chunk_size,
+                    max_retries,
+                    timeout,
+                )
+            else:
+                _download_stream(url, part, hasher, pbar, chunk_size, timeout)
+
+        digest = hasher.hexdigest()
+        if hash_prefix is not None and not digest.startswith(hash_prefix):
+            os.remove(part)
+            if os.path.exists(part + ".json"):
+                os.remove(part + ".json")
+            raise RuntimeError(
+                'invalid hash value (expected "{}", got "{}")'.format(
+                    hash_prefix, digest
+                )
+            )
+        os.replace(part, dst)
+        if os.path.exists(part + ".json"):
+            os.remove(part + ".json")
+    return digest
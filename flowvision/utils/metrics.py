@@ -2,6 +2,11 @@
 Modified from https://github.com/rwightman/pytorch-image-models/blob/master/timm/utils/metrics.py
 """
 
+from collections import defaultdict, deque
+
+import numpy as np
+import oneflow as flow
+
 
 class AverageMeter:
     """Computes and stores the average and current value"""
@@ -22,15 +27,219 @@ class AverageMeter:
         self.avg = self.sum / self.count
 
 
+def topk_correct(output, target, topk=(1,)):
+    """Counts the samples whose target is in the k top predictions, for each k.
+
+    Returns a device tensor of shape ``[len(topk)]``, computed from a single ``topk``
+    and without any host synchronization.
+    """
+    maxk = min(max(topk), output.shape[1])
+    _, pred = output.topk(maxk, 1, True, True)
+    # at most one hit per row, the cumulative sum is the top-k hit for every k
+    correct = (pred == target.reshape(-1, 1)).to(flow.float32).cumsum(1)
+    columns = flow.tensor([min(k, maxk) - 1 for k in topk], device=correct.device)
+    return correct.index_select(1, columns).sum(0)
+
+
 def accuracy(output, target, topk=(1,)):
     """Computes the accuracy over the k top predictions for the specified values of k"""
-    maxk = min(max(topk), output.size()[1])
     batch_size = target.size(0)
-    _, pred = output.topk(maxk, 1, True, True)
-    # TODO: add tensor.t() method
-    pred = pred.transpose(-1, -2)
-    correct = pred.eq(target.reshape(1, -1).expand_as(pred))
-    return [
-        correct[: min(k, maxk)].reshape(-1).float().sum(0) * 100.0 / batch_size
-        for k in topk
-    ]
+    correct = topk_correct(output, target, topk) * (100.0 / batch_size)
+    return [correct[i] for i in range(len(topk))]
+
+
+def all_reduce_metrics(*metrics):
+    """Sums the state of the given metrics (e.g. :class:`SmoothedValue`,
+    :class:`ConfusionMatrix`) over all the processes, with a single all-reduce."""
+    if flow.env.get_world_size() == 1:
+        return
+    states = [metric._state() for metric in metrics]
+    tensors = [t for state in states for t in state]
+    if not tensors:
+        return
+    device = next((t.device for t in tensors if t.device.type != "cpu"), "cuda")
+    buffer = flow.cat(
+        [t.to(device=device, dtype=flow.float64).reshape(-1) for t in tensors]
+    )
+    flow.comm.all_reduce(buffer)
+    offset = 0
+    for metric, state in zip(metrics, states):
+        reduced = []
+        for t in state:
+            numel = t.numel()
+            chunk = buffer[offset : offset + numel].reshape(t.shape)
+            reduced.append(chunk.to(device=t.device, dtype=t.dtype))
+            offset += numel
+        metric._load_state(reduced)
+
+
+class SmoothedValue:
+    """Track a series of values and provide access to smoothed values over a
+    window or the global series average.
+
+    The values can be device tensors, e.g. a loss, which are accumulated on the
+    device: nothing is copied to the host until a statistic is read, typically when
+    printing.
+    """
+
+    def __init__(self, window_size=20, fmt=None):
+        if fmt is None:
+            fmt = "{median:.4f} ({global_avg:.4f})"
+        self.deque = deque(maxlen=window_size)
+        self.total = 0.0
+        self.count = 0
+        self.fmt = fmt
+        self._window = None
+
+    def update(self, value, n=1):
+        if isinstance(value, flow.Tensor):
+            value = value.detach().reshape(()).to(flow.float32)
+        self.deque.append(value)
+        self.count += n
+        self.total = self.total + value * n
+        self._window = None
+
+    def _state(self):
+        total = self.total
+        if not isinstance(total, flow.Tensor):
+            total = flow.tensor(total, dtype=flow.float64)
+        return [total.reshape(1), flow.tensor([self.count], dtype=flow.float64)]
+
+    def _load_state(self, state):
+        self.total = state[0].reshape(())
+        self.count = int(state[1].item())
+
+    def synchronize_between_processes(self):
+        """Warning: does not synchronize the deque!"""
+        all_reduce_metrics(self)
+
+    def _values(self):
+        # one host copy of the whole window
+        if self._window is None:
+            tensors = [v for v in self.deque if isinstance(v, flow.Tensor)]
+            host = iter(flow.stack(tensors).numpy().tolist() if tensors else [])
+            self._window = np.array(
+                [next(host) if isinstance(v, flow.Tensor) else v for v in self.deque],
+                dtype=np.float64,
+            )
+        return self._window
+
+    @property
+    def median(self):
+        return float(np.median(self._values()))
+
+    @property
+    def avg(self):
+        return float(self._values().mean())
+
+    @property
+    def global_avg(self):
+        total = self.total
+        if isinstance(total, flow.Tensor):
+            total = total.item()
+        return total / self.count
+
+    @property
+    def max(self):
+        return float(self._values().max())
+
+    @property
+    def value(self):
+        return float(self._values()[-1])
+
+    def __str__(self):
+        return self.fmt.format(
+            median=self.median,
+            avg=self.avg,
+            global_avg=self.global_avg,
+            max=self.max,
+            value=self.value,
+        )
+
+
+class ConfusionMatrix:
+    """Accumulates a confusion matrix on the device, rows are targets and columns
+    predictions. Targets outside of ``[0, num_classes)`` (e.g. an ignore index) are
+    skipped."""
+
+    def __init__(self, num_classes):
+        self.num_classes = num_classes
+        self.mat = None
+
+    def update(self, target, pred):
+        n = self.num_classes
+        target = target.reshape(-1).to(flow.int64)
+        pred = pred.reshape(-1).to(flow.int64)
+        if self.mat is None:
+            self.mat = flow.zeros(n * n, dtype=flow.int64, device=target.device)
+        valid = ((target >= 0) & (target < n)).to(flow.int64)
+        # invalid samples are counted in the first cell with a zero weight
+        index = (target * n + pred) * valid
+        self.mat = self.mat.scatter_add(0, index, valid)
+
+    def reset(self):
+        if self.mat is not None:
+            self.mat.zero_()
+
+    def _state(self):
+        return [] if self.mat is None else [self.mat]
+
+    def _load_state(self, state):
+        if state:
+            self.mat = state[0]
+
+    def reduce_from_all_processes(self):
+        all_reduce_metrics(self)
+
+    def compute(self):
+        """Returns the global accuracy, the per class accuracy and the per class IoU"""
+        h = self.mat.reshape(self.num_classes, self.num_classes).to(flow.float32)
+        diag = flow.diag(h)
+        acc_global = diag.sum() / h.sum()
+        acc = diag / h.sum(1)
+        iu = diag / (h.sum(1) + h.sum(0) - diag)
+        return acc_global, acc, iu
+
+    def __str__(self):
+        acc_global, acc, iu = self.compute()
+        return (
+            "global correct: {:.1f}\naverage row correct: {}\nIoU: {}\nmean IoU: {:.1f}"
+        ).format(
+            acc_global.item() * 100,
+            ["{:.1f}".format(i) for i in (acc * 100).tolist()],
+            ["{:.1f}".format(i) for i in (iu * 100).tolist()],
+            iu.mean().item() * 100,
+        )
+
+
+class MetricLogger:
+    """A dict of :class:`SmoothedValue` whose values stay on the device until printed,
+    all synchronized across processes with one all-reduce."""
+
+    def __init__(self, delimiter="\t"):
+        self.meters = defaultdict(SmoothedValue)
+        self.delimiter = delimiter
+
+    def update(self, n=1, **kwargs):
+        for k, v in kwargs.items():
+            self.meters[k].update(v, n)
+
+    def __getattr__(self, attr):
+        if attr in self.meters:
+            return self.meters[attr]
+        if attr in self.__dict__:
+            return self.__dict__[attr]
+        raise AttributeError(
+            "'{}' object has no attribute '{}'".format(type(self).__name__, attr)
+        )
+
+    def __str__(self):
+        return self.delimiter.join(
+            "{}: {}".format(name, str(meter)) for name, meter in self.meters.items()
+        )
+
+    def synchronize_between_processes(self):
+        all_reduce_metrics(*self.meters.values())
+
+    def add_meter(self, name, meter):
+        self.meters[name] = meter
@@ -12,6 +12,15 @@ import oneflow.nn as nn
 _logger = logging.getLogger(__name__)
 
 
+def _clear_caches(module):
+    # modules caching values computed from their weights, like the relative position
+    # bias of WindowAttention with cache_bias=True, are updated in place in eval mode
+    for m in module.modules():
+        clear_bias_cache = getattr(m, "clear_bias_cache", None)
+        if clear_bias_cache is not None:
+            clear_bias_cache()
+
+
 class ModelEmaV2(nn.Module):
     """ Model Exponential Moving Average V2
 
@@ -47,6 +56,7 @@ class ModelEmaV2(nn.Module):
             self.module.to(device=device)
 
     def _update(self, model, update_fn):
+        _clear_caches(self.module)
         with flow.no_grad():
             for ema_v, model_v in zip(
                 self.module.state_dict().values(), model.state_dict().values()
@@ -62,3 +72,184 @@ class ModelEmaV2(nn.Module):
 
     def set(self, model):
         self._update(model, update_fn=lambda e, m: m)
+
+
+def _views_share_storage():
+    # whether a parameter built from a narrowed tensor aliases its storage, which
+    # is required to keep the EMA weights in flat buffers
+    base = flow.zeros(2)
+    param = nn.Parameter(base.narrow(0, 1, 1), requires_grad=False)
+    base.fill_(1.0)
+    return param.numpy()[0] == 1.0
+
+
+class ModelEmaV3(nn.Module):
+    """ Model Exponential Moving Average V3
+
+    Same moving average as :class:`ModelEmaV2`, with a faster update:
+
+    * The floating point parameters and buffers of the EMA model live in one flat
+      buffer per dtype, the EMA model tensors being views into it. An update then
+      gathers the model tensors with one concatenation and runs one fused in-place
+      lerp per dtype, instead of building two state dicts and two temporaries per
+      tensor.
+    * ``update_every`` updates the EMA every N steps only, with the decay raised to the
+      power N to compensate for the skipped steps.
+    * With ``use_warmup``, the decay follows ``1 - (1 + step / warmup_gamma) ** -warmup_power``
+      until it reaches ``decay``, which lets the average follow the fast moving early
+      weights. The EMA is a plain copy of the model for the first ``update_after_step``
+      steps.
+    * With ``device='cpu'``, each update moves a single flat tensor per dtype to the host,
+      the copy and the lerp are enqueued on the OneFlow virtual machine without
+      blocking the training loop.
+
+    Args:
+        model (nn.Module): model to average, its parameters and buffers are matched by order
+        decay (float): decay of the moving average. Default: ``0.9999``
+        min_decay (float): lower bound of the warmup decay. Default: ``0.0``
+        update_after_step (int): number of steps copying the model before averaging. Default: ``0``
+        update_every (int): number of steps between two updates. Default: ``1``
+        use_warmup (bool): whether or not to warm up the decay. Default: ``False``
+        warmup_gamma (float): warmup speed, 1 for long runs. Default: ``1.0``
+        warmup_power (float): warmup power, 2/3 for long runs, 3/4 for short ones. Default: ``2/3``
+        device (str): device of the EMA model, the device of ``model`` when None. Default: ``None``
+    """
+
+    def __init__(
+        self,
+        model,
+        decay=0.9999,
+        min_decay=0.0,
+        update_after_step=0,
+        update_every=1,
+        use_warmup=False,
+        warmup_gamma=1.0,
+        warmup_power=2 / 3,
+        device=None,
+    ):
+        super(ModelEmaV3, self).__init__()
+        assert update_every >= 1, "update_every should be a positive integer"
+        self.module = deepcopy(model)
+        self.module.eval()
+        self.decay = decay
+        self.min_decay = min_decay
+        self.update_after_step = update_after_step
+        self.update_every = update_every
+        self.use_warmup = use_warmup
+        self.warmup_gamma = warmup_gamma
+        self.warmup_power = warmup_power
+        self.device = device
+        self.num_updates = 0
+        if self.device is not None:
+            self.module.to(device=device)
+        self._build_flat_buffers()
+
+    def _ema_tensors(self):
+        return list(self.module.parameters()) + list(self.module.buffers())
+
+    def _build_flat_buffers(self):
+        """Moves the floating point tensors of the EMA model into flat buffers"""
+        tensors = self._ema_tensors()
+        self._float_indices = [
+            i for i, t in enumerate(tensors) if t.is_floating_point()
+        ]
+        self._other_indices = [
+            i for i, t in enumerate(tensors) if not t.is_floating_point()
+        ]
+        self._flat_groups = []
+        if not _views_share_storage():
+            _logger.info("EMA falls back to per tensor updates, views are not shared")
+            return
+
+        groups = {}
+        for i in self._float_indices:
+            groups.setdefault(tensors[i].dtype, []).append(i)
+        views = {}
+        for dtype, indices in groups.items():
+            flat = flow.cat([tensors[i].detach().reshape(-1) for i in indices])
+            offset = 0
+            for i in indices:
+                numel = tensors[i].numel()
+                views[i] = flat.narrow(0, offset, numel).view(tensors[i].shape)
+                offset += numel
+            self._flat_groups.append((flat, indices))
+
+        # rebinds the EMA model tensors to the views, walking the modules like
+        # parameters() and buffers() do, shared tensors being rebound once
+        i, rebound = 0, {}
+        for attr in ["_parameters", "_buffers"]:
+            for module in self.module.modules():
+                tensors = getattr(module, attr)
+                for name, tensor in tensors.items():
+                    if tensor is None:
+                        continue
+                    if id(tensor) not in rebound:
+                        if i in views and attr == "_parameters":
+                            rebound[id(tensor)] = nn.Parameter(
+                                views[i], requires_grad=tensor.requires_grad
+                            )
+                        else:
+                            rebound[id(tensor)] = views.get(i, tensor)
+                        i += 1
+                    tensors[name] = rebound[id(tensor)]
+
+    def _apply(self, *args, **kwargs):
+        # moving the EMA model replaces its tensors
+        result = super(ModelEmaV3, self)._apply(*args, **kwargs)
+        self._build_flat_buffers()
+        return result
+
+    def get_decay(self, step):
+        step = step - self.update_after_step
+        if step <= 0:
+            return 0.0
+        if self.use_warmup:
+            decay = 1 - (1 + step / self.warmup_gamma) ** -self.warmup_power
+            decay = max(min(decay, self.decay), self.min_decay)
+        else:
+            decay = self.decay
+        return decay
+
+    def _model_flat(self, model_tensors, indices, device):
+        flat = flow.cat([model_tensors[i].detach().reshape(-1) for i in indices])
+        return flat.to(device=device)
+
+    def _update(self, model, decay):
+        _clear_caches(self.module)
+        with flow.no_grad():
+            model_tensors = list(model.parameters()) + list(model.buffers())
+            ema_tensors = self._ema_tensors()
+            for i in self._other_indices:
+                ema_tensors[i].copy_(model_tensors[i].to(device=ema_tensors[i].device))
+            if self._flat_groups:
+                for flat, indices in self._flat_groups:
+                    model_flat = self._model_flat(model_tensors, indices, flat.device)
+                    if decay == 0.0:
+                        flat.copy_(model_flat)
+                    else:
+                        flat.mul_(decay).add_(model_flat, alpha=1.0 - decay)
+                return
+            for i in self._float_indices:
+                ema_v = ema_tensors[i]
+                model_v = model_tensors[i].detach().to(device=ema_v.device)
+                if decay == 0.0:
+                    ema_v.copy_(model_v)
+                else:
+                    ema_v.mul_(decay).add_(model_v, alpha=1.0 - decay)
+
+    def update(self, model, step=None):
+        """Accounts for one training step, the EMA is updated every ``update_every`` steps.
+
+        Args:
+            model (nn.Module): the model being trained
+            step (int): current step, the number of calls to ``update`` when None
+        """
+        step = self.num_updates if step is None else step
+        self.num_updates = step + 1
+        if (step + 1) % self.update_every != 0:
+            return
+        decay = self.get_decay(step + 1) ** self.update_every
+        self._update(model, decay)
+
+    def set(self, model):
+        self._update(model, 0.0)
@@ -0,0 +1,149 @@
+"""Peak memory of the DropBlock and DropPath layers
+
+Measures, on a CUDA device, the memory allocated at peak by a training forward
+and backward of flowvision.layers.DropBlock and DropPath, in place or not, on
+top of the memory held by their input, next to the previous implementations:
+
+    python projects/benchmark/classification/drop_memory_benchmark.py --batch_size 64
+
+DropBlock runs on ResNet-50 stage 3 and 4 sized feature maps, DropPath on ViT-B
+tokens. The results are written as JSON to ``--output``.
+"""
+
+import argparse
+import json
+import os
+import time
+
+import oneflow as flow
+import oneflow.nn.functional as F
+
+from flowvision.layers import drop_block, drop_path
+from speed_benchmark import _cuda_fn, _reset_peak_memory
+
+SHAPES = {
+    "drop_block": [(1024, 14, 14), (2048, 7, 7)],
+    "drop_path": [(197, 768)],
+}
+
+
+def legacy_drop_block(x, drop_prob, block_size):
+    # DropBlock.forward before the seeds were sampled at reduced resolution
+    gamma = (
+        drop_prob
+        * x.shape[-1] ** 2
+        / (block_size ** 2 * (x.shape[-1] - block_size + 1) ** 2)
+    )
+    mask = flow.bernoulli(flow.ones_like(x) * gamma)
+    mask_block = 1 - F.max_pool2d(
+        mask,
+        kernel_size=(block_size, block_size),
+        stride=(1, 1),
+        padding=(block_size // 2, block_size // 2),
+    )
+    return mask_block * x * (mask_block.numel() / mask_block.sum())
+
+
+def legacy_drop_path(x, drop_prob):
+    keep_prob = 1 - drop_prob
+    shape = (x.shape[0],) + (1,) * (x.ndim - 1)
+    random_tensor = flow.rand(*shape, dtype=x.dtype, device=x.device) + keep_prob
+    return x.div(keep_prob) * random_tensor.floor()
+
+
+def _variants(layer, args):
+    if layer == "drop_block":
+        return {
+            "legacy": lambda x: legacy_drop_block(x, args.drop_prob, args.block_size),
+            "fused": lambda x: drop_block(x, args.drop_prob, args.block_size, True),
+            "fused_inplace": lambda x: drop_block(
+                x, args.drop_prob, args.block_size, True, inplace=True
+            ),
+        }
+    return {
+        "legacy": lambda x: legacy_drop_path(x, args.drop_prob),
+        "fused": lambda x: drop_path(x, args.drop_prob, True),
+        "fused_inplace": lambda x: drop_path(x, args.drop_prob, True, inplace=True),
+    }
+
+
+def measure(fn, shape, args):
+    allocated = _cuda_fn("memory_allocated")
+    max_allocated = _cuda_fn("max_memory_allocated")
+    if allocated is None or max_allocated is None:
+        raise RuntimeError("this OneFlow build reports no CUDA memory statistics")
+    weight = flow.randn(*shape, device="cuda", requires_grad=True)
+    latencies = []
+    for i in range(args.warmup + args.iters):
+        # the input is the output of a layer whose backward does not need it
+        x = weight * 1.0
+        flow.cuda.synchronize()
+        base = allocated()
+        _reset_peak_memory("cuda")
+        tic = time.perf_counter()
+        fn(x).sum().backward()
+        flow.cuda.synchronize()
+        if i >= args.warmup:
+            latencies.append(time.perf_counter() - tic)
+        peak = max_allocated() - base
+        weight.grad = None
+    latencies.sort()
+    return {
+        "peak_mb": peak / 2 ** 20,
+        "input_mb": weight.numel() * weight.element_size() / 2 ** 20,
+        "latency_p50_ms": 1000 * latencies[len(latencies) // 2],
+    }
+
+
+def main(args):
+    rows = []
+    for layer in args.layers:
+        for shape in SHAPES[layer]:
+            shape = (args.batch_size,) + shape
+            for variant, fn in _variants(layer, args).items():
+                row = dict(layer=layer, shape=list(shape), variant=variant)
+                row.update(measure(fn, shape, args))
+                print(
+                    "{layer} {shape} {variant}: peak {peak_mb:.1f} MB over a "
+                    "{input_mb:.1f} MB input, p50 {latency_p50_ms:.2f} ms".format(
+                        **row
+                    ),
+                    flush=True,
+                )
+                rows.append(row)
+
+    out_dir = os.path.dirname(args.output)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(rows, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser("flags for drop layers memory benchmark")
+    parser.add_argument(
+        "--layers",
+        type=str,
+        nargs="+",
+        default=list(SHAPES),
+        choices=list(SHAPES),
+        help="layers to measure",
+    )
+    parser.add_argument("--batch_size", type=int, default=64, help="batch size")
+    parser.add_argument("--drop_prob", type=float, default=0.1, help="drop rate")
+    parser.add_argument("--block_size", type=int, default=7, help="DropBlock size")
+    parser.add_argument("--warmup", type=int, default=3, help="warmup iterations")
+    parser.add_argument("--iters", type=int, default=10, help="timed iterations")
+    parser.add_argument(
+        "--output",
+        type=str,
+        default="results/drop_memory_benchmark.json",
+        help="path of the JSON results",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    main(args)
@@ -0,0 +1,109 @@
+"""Latency saved by fuse_for_inference
+
+For every model matching ``--models``, measures the latency before and after
+folding its batch norms and merging its branches with
+``flowvision.models.fuse_for_inference``, which also checks that the outputs are
+unchanged:
+
+    python projects/benchmark/classification/fuse_benchmark.py \
+        --models "resnet*" "mobilenet*" "res2net*" --batch_size 1
+
+The results are written as JSON to ``--output``.
+"""
+
+import argparse
+import json
+import os
+
+import oneflow as flow
+import oneflow.nn as nn
+
+from flowvision.layers import FrozenBatchNorm2d
+from flowvision.models import ModelCreator, fuse_for_inference
+from speed_benchmark import default_img_size, measure, synthetic_batch
+
+
+def count_norms(model):
+    return sum(
+        isinstance(m, (nn.BatchNorm2d, FrozenBatchNorm2d)) for m in model.modules()
+    )
+
+
+def benchmark_model(model_name, args):
+    img_size = args.img_size or default_img_size(model_name)
+    images = synthetic_batch(args.batch_size, img_size, args.device)
+    model = ModelCreator.create_model(model_name, pretrained=False)
+    model.to(args.device)
+    norms = count_norms(model)
+    before = measure(model, images, args.warmup, args.iters, args.device)
+    fuse_for_inference(model, images)
+    after = measure(model, images, args.warmup, args.iters, args.device)
+    return {
+        "model": model_name,
+        "batch_size": args.batch_size,
+        "img_size": img_size,
+        "folded_norms": norms - count_norms(model),
+        "norms": norms,
+        "latency_p50_ms": before["latency_p50_ms"],
+        "fused_latency_p50_ms": after["latency_p50_ms"],
+        "saved_ms": before["latency_p50_ms"] - after["latency_p50_ms"],
+        "saved_pct": 100 * (1 - after["latency_p50_ms"] / before["latency_p50_ms"]),
+    }
+
+
+def main(args):
+    rows = []
+    for model_name in ModelCreator.model_list(args.models):
+        try:
+            row = benchmark_model(model_name, args)
+        except Exception as e:
+            row = {"model": model_name, "error": str(e).splitlines()[0]}
+            print("{}: failed ({})".format(model_name, row["error"]), flush=True)
+        else:
+            print(
+                "{model}: folded {folded_norms}/{norms} norms, p50 "
+                "{latency_p50_ms:.2f} ms -> {fused_latency_p50_ms:.2f} ms, "
+                "saved {saved_ms:.2f} ms ({saved_pct:.1f}%)".format(**row),
+                flush=True,
+            )
+        rows.append(row)
+
+    out_dir = os.path.dirname(args.output)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(rows, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser("flags for fuse benchmark")
+    parser.add_argument(
+        "--models",
+        type=str,
+        nargs="+",
+        default=["resnet*", "mobilenet*", "res2net*", "shufflenet*"],
+        help="wildcard filters of the models to benchmark",
+    )
+    parser.add_argument("--batch_size", type=int, default=1, help="batch size")
+    parser.add_argument(
+        "--img_size",
+        type=int,
+        default=None,
+        help="input resolution, by default the resolution of each model",
+    )
+    parser.add_argument("--warmup", type=int, default=10, help="warmup iterations")
+    parser.add_argument("--iters", type=int, default=50, help="timed iterations")
+    parser.add_argument("--device", type=str, default="cuda", help="device to run on")
+    parser.add_argument(
+        "--output",
+        type=str,
+        default="results/fuse_benchmark.json",
+        help="path of the JSON results",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    main(args)
@@ -0,0 +1,12 @@
+export PYTHONPATH=$PWD:$PYTHONPATH
+set -aux
+
+BATCH_SIZES="1 32 128"
+OUTPUT="results/speed_benchmark"
+BASELINE=$2
+DEVICE=$1
+
+CUDA_VISIBLE_DEVICES=$DEVICE python ./projects/benchmark/classification/speed_benchmark.py --models "resnet*" "swin_tiny*" \
+                    --batch_sizes $BATCH_SIZES \
+                    --output $OUTPUT \
+                    ${BASELINE:+--baseline $BASELINE}
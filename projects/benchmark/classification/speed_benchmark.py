@@ -0,0 +1,322 @@
+"""Speed benchmark over the ModelCreator registry
+
+Measures model construction time, images/sec, p50/p99 latency and peak memory
+for every model matching ``--models``, sweeping batch sizes and input resolutions
+on synthetic input from FakeData. Results are written as JSON and CSV, by default
+next to results/results_imagenet.md:
+
+    python projects/benchmark/classification/speed_benchmark.py \
+        --models "resnet*" "swin_tiny*" --batch_sizes 1 32 --output results/speed_benchmark
+
+With --to_graph the models run as static graphs (flowvision.models.to_graph),
+first_call_s then reports the compilation of the graph of each batch size and
+the other columns the steady-state performance.
+
+On CUDA, peak_memory_mb is the peak device memory of each configuration. On CPU it
+is left empty and process_peak_rss_mb holds the peak resident set size of the
+benchmark process so far: a high-water mark that is never reset, so it only grows
+from one configuration to the next.
+
+A previous JSON result can be given with --baseline, every configuration whose
+throughput or p99 latency is worse than the baseline by more than --tolerance is
+reported and the script exits with a non-zero status.
+"""
+
+import argparse
+import csv
+import datetime
+import json
+import os
+import re
+import resource
+import sys
+import time
+
+import numpy as np
+import oneflow as flow
+from oneflow.utils.data import DataLoader
+
+from flowvision import transforms
+from flowvision.datasets import FakeData
+from flowvision.models import ModelCreator, to_graph
+
+FIELDS = [
+    "model",
+    "batch_size",
+    "img_size",
+    "params_m",
+    "build_time_s",
+    "first_call_s",
+    "images_per_sec",
+    "latency_p50_ms",
+    "latency_p99_ms",
+    "peak_memory_mb",
+    "process_peak_rss_mb",
+    "error",
+]
+
+
+def param_count(model):
+    return sum([m.numel() for m in model.parameters()]) / 1000000
+
+
+# the registry keeps no per-model config, so the resolution is read from names like
+# vit_base_patch16_384 or convnext_base_384_22k_to_1k, only among the known input
+# resolutions so that widths such as the 768 of convmixer_768_32_relu are ignored
+_IMG_SIZE_PATTERN = re.compile(r"_(224|256|288|299|320|336|384|448|480|512)(?=_|$)")
+
+
+def default_img_size(model_name):
+    """Input resolution a model was trained at, read from its name when possible"""
+    if model_name.startswith("inception_v3"):
+        return 299
+    sizes = _IMG_SIZE_PATTERN.findall(model_name)
+    return int(sizes[-1]) if sizes else 224
+
+
+def synthetic_batch(batch_size, img_size, device):
+    dataset = FakeData(
+        size=batch_size,
+        image_size=(3, img_size, img_size),
+        num_classes=1000,
+        transform=transforms.ToTensor(),
+    )
+    images, _ = next(iter(DataLoader(dataset, batch_size=batch_size)))
+    return images.to(device)
+
+
+def _cuda_fn(name):
+    return getattr(getattr(flow, "cuda", None), name, None)
+
+
+def _synchronize(output):
+    # waits for the device to finish, through a host copy of the (small) logits
+    # when the runtime has no explicit synchronize
+    sync = _cuda_fn("synchronize")
+    if sync is not None:
+        sync()
+        return
+    while isinstance(output, (tuple, list)):
+        output = output[0]
+    output.numpy()
+
+
+def _reset_peak_memory(device):
+    reset = _cuda_fn("reset_peak_memory_stats")
+    if device.startswith("cuda") and reset is not None:
+        reset()
+
+
+def _peak_memory_mb(device):
+    if device.startswith("cuda"):
+        max_allocated = _cuda_fn("max_memory_allocated")
+        return max_allocated() / 2 ** 20 if max_allocated is not None else None
+    return None
+
+
+def _process_peak_rss_mb():
+    # high-water mark of the resident set size over the life of the process, in
+    # KiB on Linux, it cannot be reset between configurations
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@flow.no_grad()
+def measure(model, images, warmup, iters, device):
+    model.eval()
+    tic = time.perf_counter()
+    _synchronize(model(images))
+    first_call_s = time.perf_counter() - tic
+    for _ in range(warmup):
+        _synchronize(model(images))
+
+    _reset_peak_memory(device)
+    latencies = []
+    for _ in range(iters):
+        tic = time.perf_counter()
+        _synchronize(model(images))
+        latencies.append(time.perf_counter() - tic)
+
+    latencies = np.array(latencies) * 1000
+    return {
+        "first_call_s": first_call_s,
+        "images_per_sec": images.shape[0] * iters / (latencies.sum() / 1000),
+        "latency_p50_ms": float(np.percentile(latencies, 50)),
+        "latency_p99_ms": float(np.percentile(latencies, 99)),
+        "peak_memory_mb": _peak_memory_mb(device),
+        "process_peak_rss_mb": None
+        if device.startswith("cuda")
+        else _process_peak_rss_mb(),
+    }
+
+
+def benchmark_model(model_name, batch_sizes, img_sizes, args):
+    rows = []
+    base = {"model": model_name}
+    try:
+        tic = time.perf_counter()
+        model = ModelCreator.create_model(model_name, pretrained=False)
+        model.to(args.device)
+        if args.to_graph:
+            model = to_graph(model, batch_sizes=batch_sizes)
+        base["build_time_s"] = time.perf_counter() - tic
+        base["params_m"] = param_count(model)
+    except Exception as e:
+        row = dict(base, error="build: {}".format(e))
+        print(_format_row(row), flush=True)
+        return [row]
+
+    for img_size in img_sizes or [default_img_size(model_name)]:
+        for batch_size in batch_sizes:
+            row = dict(base, batch_size=batch_size, img_size=img_size)
+            try:
+                images = synthetic_batch(batch_size, img_size, args.device)
+                row.update(measure(model, images, args.warmup, args.iters, args.device))
+            except Exception as e:
+                row["error"] = str(e).splitlines()[0] if str(e) else repr(e)
+            rows.append(row)
+            print(_format_row(row), flush=True)
+    del model
+    return rows
+
+
+def _format_row(row):
+    if row.get("error"):
+        return "{model} bs={batch_size} img={img_size}: failed ({error})".format(
+            **dict({"batch_size": "-", "img_size": "-"}, **row)
+        )
+    return (
+        "{model} bs={batch_size} img={img_size}: {images_per_sec:.1f} img/s, "
+        "p50 {latency_p50_ms:.2f} ms, p99 {latency_p99_ms:.2f} ms".format(**row)
+    )
+
+
+def write_results(rows, output, meta):
+    out_dir = os.path.dirname(output)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    with open(output + ".json", "w") as f:
+        json.dump({"meta": meta, "results": rows}, f, indent=2)
+    with open(output + ".csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+
+
+def compare_with_baseline(rows, baseline_rows, tolerance):
+    """Returns one message per configuration that regressed against the baseline"""
+
+    def key(row):
+        return (row["model"], row.get("batch_size"), row.get("img_size"))
+
+    baseline = {key(row): row for row in baseline_rows if not row.get("error")}
+    regressions = []
+    for row in rows:
+        ref = baseline.get(key(row))
+        if ref is None:
+            continue
+        name = "{} bs={} img={}".format(*key(row))
+        if row.get("error"):
+            regressions.append("{}: failed ({})".format(name, row["error"]))
+            continue
+        if row["images_per_sec"] < ref["images_per_sec"] * (1 - tolerance):
+            regressions.append(
+                "{}: throughput {:.1f} img/s vs {:.1f} img/s".format(
+                    name, row["images_per_sec"], ref["images_per_sec"]
+                )
+            )
+        if row["latency_p99_ms"] > ref["latency_p99_ms"] * (1 + tolerance):
+            regressions.append(
+                "{}: p99 latency {:.2f} ms vs {:.2f} ms".format(
+                    name, row["latency_p99_ms"], ref["latency_p99_ms"]
+                )
+            )
+    return regressions
+
+
+def main(args):
+    models = ModelCreator.model_list(args.models)
+    if args.exclude:
+        excluded = set(ModelCreator.model_list(args.exclude))
+        models = [m for m in models if m not in excluded]
+    print(f"Benchmarking {len(models)} models on {args.device}")
+
+    rows = []
+    for model_name in models:
+        rows.extend(benchmark_model(model_name, args.batch_sizes, args.img_sizes, args))
+
+    meta = {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "oneflow": getattr(flow, "__version__", "unknown"),
+        "device": args.device,
+        "warmup": args.warmup,
+        "iters": args.iters,
+        "to_graph": args.to_graph,
+    }
+    write_results(rows, args.output, meta)
+    print(f"Results written to {args.output}.json and {args.output}.csv")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline_rows = json.load(f)["results"]
+        regressions = compare_with_baseline(rows, baseline_rows, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regressions against {args.baseline}:")
+            for message in regressions:
+                print("  " + message)
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser("flags for speed benchmark")
+    parser.add_argument(
+        "--models",
+        type=str,
+        nargs="+",
+        default=None,
+        help="wildcard filters of the models to benchmark, all models by default",
+    )
+    parser.add_argument(
+        "--exclude", type=str, nargs="+", default=None, help="models to skip"
+    )
+    parser.add_argument(
+        "--batch_sizes", type=int, nargs="+", default=[1, 32], help="batch sizes"
+    )
+    parser.add_argument(
+        "--img_sizes",
+        type=int,
+        nargs="+",
+        default=None,
+        help="input resolutions, by default the resolution of each model",
+    )
+    parser.add_argument("--warmup", type=int, default=10, help="warmup iterations")
+    parser.add_argument("--iters", type=int, default=50, help="timed iterations")
+    parser.add_argument("--device", type=str, default="cuda", help="device to run on")
+    parser.add_argument(
+        "--to_graph",
+        default=False,
+        action="store_true",
+        help="run the models as static graphs compiled per batch size",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default="results/speed_benchmark",
+        help="output path without extension, .json and .csv are written",
+    )
+    parser.add_argument(
+        "--baseline", type=str, default=None, help="previous JSON result to compare"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.05,
+        help="relative slowdown allowed before flagging a regression",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    main(args)
@@ -0,0 +1,205 @@
+"""Multi-level RoIAlign benchmark
+
+Compares the pooling of MultiScaleRoIAlign (flowvision.layers.blocks.poolers),
+which sorts the RoIs by level once and writes each level in place, with the
+previous per level where/gather/scatter loop, on the FPN levels of a Faster R-CNN
+batch of 800x1216 images:
+
+    python projects/benchmark/detection/roi_align_benchmark.py --batch_sizes 1 2 4 8
+
+The training mode pools 512 RoIs per image and runs the backward pass, the
+inference mode pools 1000 RoIs per image. The results are written as JSON to
+``--output``.
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import oneflow as flow
+
+from flowvision.layers.blocks.poolers import (
+    LevelMapper,
+    _convert_to_roi_format,
+    multilevel_roi_align,
+)
+from flowvision.layers.blocks.roi_align import roi_align
+
+STRIDES = (4, 8, 16, 32)
+MODES = {"train": 512, "inference": 1000}
+
+
+def legacy_roi_align(features, rois, levels, output_size, scales, sampling_ratio):
+    # the per level loop MultiScaleRoIAlign used before
+    result = flow.zeros(
+        (rois.shape[0], features[0].shape[1]) + tuple(output_size),
+        dtype=features[0].dtype,
+        device=features[0].device,
+    )
+    for level, (feature, scale) in enumerate(zip(features, scales)):
+        idx_in_level = flow.where(levels == level)[0]
+        pooled = roi_align(
+            feature,
+            rois[idx_in_level],
+            output_size=output_size,
+            spatial_scale=scale,
+            sampling_ratio=sampling_ratio,
+        )
+        result = flow.tensor_scatter_nd_update(result, idx_in_level[:, None], pooled)
+    return result
+
+
+def synthetic_inputs(batch_size, rois_per_image, args):
+    height, width = args.image_size
+    features = [
+        flow.randn(
+            batch_size,
+            args.channels,
+            height // stride,
+            width // stride,
+            device=args.device,
+            requires_grad=True,
+        )
+        for stride in STRIDES
+    ]
+    rng = np.random.RandomState(0)
+    boxes = []
+    for _ in range(batch_size):
+        # log-uniform sizes, so that every level gets RoIs
+        sizes = np.exp(rng.uniform(np.log(16), np.log(512), (rois_per_image, 2)))
+        x1 = rng.uniform(0, width - sizes[:, 0])
+        y1 = rng.uniform(0, height - sizes[:, 1])
+        xyxy = np.stack([x1, y1, x1 + sizes[:, 0], y1 + sizes[:, 1]], axis=1)
+        boxes.append(flow.tensor(xyxy, dtype=flow.float32, device=args.device))
+    return features, boxes
+
+
+def _synchronize(output):
+    sync = getattr(getattr(flow, "cuda", None), "synchronize", None)
+    if sync is not None:
+        sync()
+    else:
+        output.numpy()
+
+
+def measure(fn, features, backward, warmup, iters):
+    latencies = []
+    for i in range(warmup + iters):
+        tic = time.perf_counter()
+        if backward:
+            output = fn()
+            output.sum().backward()
+            _synchronize(features[0].grad)
+            for feature in features:
+                feature.grad = None
+        else:
+            with flow.no_grad():
+                output = fn()
+            _synchronize(output)
+        if i >= warmup:
+            latencies.append(time.perf_counter() - tic)
+    return float(np.percentile(np.array(latencies) * 1000, 50))
+
+
+def benchmark(mode, batch_size, args):
+    features, boxes = synthetic_inputs(batch_size, MODES[mode], args)
+    scales = [1.0 / stride for stride in STRIDES]
+    mapper = LevelMapper(2, 5)
+    output_size = (args.output_size, args.output_size)
+
+    def legacy():
+        rois = _convert_to_roi_format(boxes)
+        levels = mapper(boxes)
+        return legacy_roi_align(
+            features, rois, levels, output_size, scales, args.sampling_ratio
+        )
+
+    def fused():
+        rois = _convert_to_roi_format(boxes)
+        levels = mapper(rois[:, 1:])
+        return multilevel_roi_align(
+            features,
+            rois,
+            levels,
+            output_size,
+            spatial_scales=scales,
+            sampling_ratio=args.sampling_ratio,
+        )
+
+    with flow.no_grad():
+        max_error = float(np.abs(legacy().numpy() - fused().numpy()).max())
+    backward = mode == "train"
+    legacy_ms = measure(legacy, features, backward, args.warmup, args.iters)
+    fused_ms = measure(fused, features, backward, args.warmup, args.iters)
+    return {
+        "mode": mode,
+        "batch_size": batch_size,
+        "num_rois": batch_size * MODES[mode],
+        "legacy_p50_ms": legacy_ms,
+        "fused_p50_ms": fused_ms,
+        "speedup": legacy_ms / fused_ms,
+        "max_abs_error": max_error,
+    }
+
+
+def main(args):
+    rows = []
+    for mode in args.modes:
+        for batch_size in args.batch_sizes:
+            row = benchmark(mode, batch_size, args)
+            print(
+                "{mode} bs={batch_size} rois={num_rois}: p50 {legacy_p50_ms:.2f} ms "
+                "-> {fused_p50_ms:.2f} ms ({speedup:.2f}x), max abs error "
+                "{max_abs_error:.2g}".format(**row),
+                flush=True,
+            )
+            rows.append(row)
+
+    out_dir = os.path.dirname(args.output)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(rows, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser("flags for multi-level RoIAlign benchmark")
+    parser.add_argument(
+        "--modes",
+        type=str,
+        nargs="+",
+        default=list(MODES),
+        choices=list(MODES),
+        help="train (512 RoIs per image, with backward) and/or inference (1000)",
+    )
+    parser.add_argument(
+        "--batch_sizes", type=int, nargs="+", default=[1, 2, 4], help="batch sizes"
+    )
+    parser.add_argument(
+        "--image_size",
+        type=int,
+        nargs=2,
+        default=[800, 1216],
+        help="height and width of the batched images",
+    )
+    parser.add_argument("--channels", type=int, default=256, help="FPN channels")
+    parser.add_argument("--output_size", type=int, default=7, help="pooled size")
+    parser.add_argument("--sampling_ratio", type=int, default=2, help="sampling ratio")
+    parser.add_argument("--warmup", type=int, default=10, help="warmup iterations")
+    parser.add_argument("--iters", type=int, default=50, help="timed iterations")
+    parser.add_argument("--device", type=str, default="cuda", help="device to run on")
+    parser.add_argument(
+        "--output",
+        type=str,
+        default="results/roi_align_benchmark.json",
+        help="path of the JSON results",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    main(args)
@@ -0,0 +1,71 @@
+"""Import time benchmark
+
+Measures, each in a fresh interpreter, the cold ``import oneflow``, the cold
+``import flowvision`` on top of it and the first ``ModelCreator.create_model``
+call, which imports the module of the model:
+
+    python projects/benchmark/import_time.py --model resnet50 --runs 10
+
+``python -X importtime -c "import flowvision"`` gives the per module breakdown.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+SNIPPET = """
+import json, time
+tic = time.perf_counter()
+import oneflow
+oneflow_s = time.perf_counter() - tic
+tic = time.perf_counter()
+import flowvision
+flowvision_s = time.perf_counter() - tic
+from flowvision.models import ModelCreator
+tic = time.perf_counter()
+ModelCreator.create_model({model!r}, pretrained=False)
+create_model_s = time.perf_counter() - tic
+print(json.dumps({{
+    "import_oneflow_s": oneflow_s,
+    "import_flowvision_s": flowvision_s,
+    "create_model_s": create_model_s,
+}}))
+"""
+
+
+def run_once(model):
+    output = subprocess.check_output(
+        [sys.executable, "-c", SNIPPET.format(model=model)], universal_newlines=True
+    )
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(args):
+    runs = [run_once(args.model) for _ in range(args.runs)]
+    print(f"median over {args.runs} fresh interpreters:")
+    for key in ["import_oneflow_s", "import_flowvision_s", "create_model_s"]:
+        values = [run[key] for run in runs]
+        print(
+            "  {:<22}{:8.1f} ms  (min {:.1f} ms, max {:.1f} ms)".format(
+                key.replace("_s", ""),
+                statistics.median(values) * 1000,
+                min(values) * 1000,
+                max(values) * 1000,
+            )
+        )
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser("flags for import time benchmark")
+    parser.add_argument(
+        "--model", type=str, default="resnet50", help="model created after import"
+    )
+    parser.add_argument("--runs", type=int, default=10, help="number of runs")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    main(args)
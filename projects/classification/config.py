@@ -28,6 +28,15 @@ _C.DATA.INTERPOLATION = "bicubic"
 # Use zipped dataset instead of folder dataset
 # could be overwritten by command line argument
 _C.DATA.ZIP_MODE = False
+# Use packed shards written by data/pack.py instead of folder dataset
+# could be overwritten by command line argument
+_C.DATA.PACKED_MODE = False
+# Use the LMDB databases written by data/pack.py --format lmdb instead of folder dataset
+# could be overwritten by command line argument
+_C.DATA.LMDB_MODE = False
+# Ship uint8 images from the workers and convert, normalize and erase them on the
+# device with flowvision.data.PrefetchLoader, could be overwritten by command line argument
+_C.DATA.PREFETCHER = False
 # Cache Data in Memory, could be overwritten by command line argument
 _C.DATA.CACHE_MODE = "part"
 # Pin CPU memory in DataLoader for more efficient (sometimes) transfer to GPU.
@@ -106,6 +115,8 @@ _C.AUG = CN()
 _C.AUG.COLOR_JITTER = 0.4
 # Use AutoAugment policy. "v0" or "original"
 _C.AUG.AUTO_AUGMENT = "rand-m9-mstd0.5-inc1"
+# Run AutoAugment on the device after collation, only with the prefetcher
+_C.AUG.BATCHED_AUTO_AUGMENT = False
 # Random erase prob
 _C.AUG.REPROB = 0.25
 # Random erase mode
@@ -190,6 +201,14 @@ def update_config(config, args):
         config.DATA.DATA_PATH = args.data_path
     if args.zip:
         config.DATA.ZIP_MODE = True
+    if args.packed:
+        config.DATA.PACKED_MODE = True
+    if args.lmdb:
+        config.DATA.LMDB_MODE = True
+    if args.prefetcher:
+        config.DATA.PREFETCHER = True
+    if args.batched_aa:
+        config.AUG.BATCHED_AUTO_AUGMENT = True
     if args.cache_mode:
         config.DATA.CACHE_MODE = args.cache_mode
     if args.resume:
@@ -10,9 +10,9 @@ from oneflow.utils.data import DataLoader
 
 from flowvision import datasets, transforms
 from flowvision.data.constants import IMAGENET_DEFAULT_MEAN, IMAGENET_DEFAULT_STD
-from flowvision.data import create_transform
+from flowvision.data import create_auto_augment, create_transform
 from flowvision.transforms.functional import str_to_interp_mode
-from flowvision.data import Mixup
+from flowvision.data import Mixup, PrefetchLoader, fast_collate
 
 from .cached_image_folder import CachedImageFolder
 from .samplers import SubsetRandomSampler
@@ -48,12 +48,14 @@ def build_loader(config):
         flow.env.get_rank(), len(dataset_val), flow.env.get_world_size()
     )
     sampler_val = SubsetRandomSampler(indices)
+    collate_fn = fast_collate if config.DATA.PREFETCHER else None
     data_loader_train = DataLoader(
         dataset_train,
         sampler=sampler_train,
         batch_size=config.DATA.BATCH_SIZE,
         num_workers=config.DATA.NUM_WORKERS,
         drop_last=True,
+        collate_fn=collate_fn,
     )
 
     data_loader_val = DataLoader(
@@ -63,8 +65,28 @@ def build_loader(config):
         shuffle=False,
         num_workers=config.DATA.NUM_WORKERS,
         drop_last=False,
+        collate_fn=collate_fn,
     )
 
+    if config.DATA.PREFETCHER:
+        # random erasing, and AutoAugment if batched, move from the transforms to the loader
+        augment = None
+        if _batched_auto_augment(config):
+            augment = create_auto_augment(
+                config.AUG.AUTO_AUGMENT,
+                config.DATA.IMG_SIZE,
+                config.DATA.INTERPOLATION,
+                batched=True,
+            )
+        data_loader_train = PrefetchLoader(
+            data_loader_train,
+            re_prob=config.AUG.REPROB,
+            re_mode=config.AUG.REMODE,
+            re_count=config.AUG.RECOUNT,
+            augment=augment,
+        )
+        data_loader_val = PrefetchLoader(data_loader_val)
+
     # setup mixup / cutmix
     mixup_fn = None
     mixup_active = (
@@ -91,7 +113,15 @@ def build_dataset(is_train, config):
     transform = build_transform(is_train, config)
     if config.DATA.DATASET == "imagenet":
         prefix = "train" if is_train else "val"
-        if config.DATA.ZIP_MODE:
+        if config.DATA.PACKED_MODE:
+            dataset = datasets.PackedImageDataset(
+                config.DATA.DATA_PATH, prefix, transform=transform
+            )
+        elif config.DATA.LMDB_MODE:
+            dataset = datasets.LMDBImageDataset(
+                os.path.join(config.DATA.DATA_PATH, prefix), transform=transform
+            )
+        elif config.DATA.ZIP_MODE:
             ann_file = prefix + "_map.txt"
             prefix = prefix + ".zip@/"
             dataset = CachedImageFolder(
@@ -119,19 +149,29 @@ def build_dataset(is_train, config):
     return dataset, nb_classes
 
 
+def _batched_auto_augment(config):
+    return (
+        config.DATA.PREFETCHER
+        and config.AUG.BATCHED_AUTO_AUGMENT
+        and config.AUG.AUTO_AUGMENT != "none"
+    )
+
+
 def build_transform(is_train, config):
     resize_im = config.DATA.IMG_SIZE > 32
     if is_train:
+        auto_augment = config.AUG.AUTO_AUGMENT
+        color_jitter = config.AUG.COLOR_JITTER if config.AUG.COLOR_JITTER > 0 else None
+        if _batched_auto_augment(config):
+            # the prefetch loader augments the batches, color jitter stays disabled as with AA
+            auto_augment, color_jitter = "none", None
         # this should always dispatch to transforms_imagenet_train
         transform = create_transform(
             input_size=config.DATA.IMG_SIZE,
             is_training=True,
-            color_jitter=config.AUG.COLOR_JITTER
-            if config.AUG.COLOR_JITTER > 0
-            else None,
-            auto_augment=config.AUG.AUTO_AUGMENT
-            if config.AUG.AUTO_AUGMENT != "none"
-            else None,
+            use_prefetcher=config.DATA.PREFETCHER,
+            color_jitter=color_jitter,
+            auto_augment=auto_augment if auto_augment != "none" else None,
             re_prob=config.AUG.REPROB,
             re_mode=config.AUG.REMODE,
             re_count=config.AUG.RECOUNT,
@@ -164,6 +204,10 @@ def build_transform(is_train, config):
                 )
             )
 
-    t.append(transforms.ToTensor())
-    t.append(transforms.Normalize(IMAGENET_DEFAULT_MEAN, IMAGENET_DEFAULT_STD))
+    if config.DATA.PREFETCHER:
+        # the prefetch loader handles tensor conversion and norm
+        t.append(transforms.ToNumpy())
+    else:
+        t.append(transforms.ToTensor())
+        t.append(transforms.Normalize(IMAGENET_DEFAULT_MEAN, IMAGENET_DEFAULT_STD))
     return transforms.Compose(t)
@@ -0,0 +1,110 @@
+"""
+Convert ImageNet (folder or zip mode) into the flowvision packed shard format, or
+with ``--format lmdb`` into one LMDB database per split.
+
+Run from ``projects/classification``:
+
+    python -m data.pack --data-path data/ImageNet-Zip --zip --split train --output data/ImageNet-Packed
+    python -m data.pack --data-path data/imagenet --split val --output data/ImageNet-Packed
+    python -m data.pack --data-path data/imagenet --split train --format lmdb --output data/ImageNet-LMDB
+"""
+
+import argparse
+import os
+
+from flowvision.datasets.lmdb_dataset import image_folder_to_lmdb, write_lmdb_dataset
+from flowvision.datasets.packed import pack_image_folder, write_packed_dataset
+
+from .cached_image_folder import IMG_EXTENSIONS, make_dataset_with_ann
+from .zipreader import ZipReader
+
+
+def _zip_reader(path):
+    def read():
+        return ZipReader.read(path)
+
+    return read
+
+
+def pack_zip_dataset(data_path, split, output, shard_size=1 << 30):
+    """Packs ``<split>.zip@/`` listed by ``<split>_map.txt`` into shards named ``<split>``"""
+    samples = make_dataset_with_ann(
+        os.path.join(data_path, split + "_map.txt"),
+        os.path.join(data_path, split + ".zip@/"),
+        IMG_EXTENSIONS,
+    )
+    return write_packed_dataset(
+        ((_zip_reader(path), target) for path, target in samples),
+        output,
+        split,
+        shard_size,
+    )
+
+
+def zip_dataset_to_lmdb(data_path, split, output, map_size=1 << 40):
+    """Writes ``<split>.zip@/`` listed by ``<split>_map.txt`` into the LMDB database
+    ``<output>/<split>``, keyed by the paths inside the zip file"""
+    samples = make_dataset_with_ann(
+        os.path.join(data_path, split + "_map.txt"),
+        os.path.join(data_path, split + ".zip@/"),
+        IMG_EXTENSIONS,
+    )
+    return write_lmdb_dataset(
+        [
+            (path.split("@/")[-1].encode("utf-8"), _zip_reader(path), target)
+            for path, target in samples
+        ],
+        os.path.join(output, split),
+        map_size=map_size,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser("Pack ImageNet into flowvision packed shards")
+    parser.add_argument("--data-path", type=str, required=True, help="path to dataset")
+    parser.add_argument(
+        "--zip",
+        action="store_true",
+        help="read <split>.zip and <split>_map.txt instead of a folder dataset",
+    )
+    parser.add_argument("--split", type=str, default="train", help="train or val")
+    parser.add_argument(
+        "--format",
+        type=str,
+        default="packed",
+        choices=["packed", "lmdb"],
+        help="packed shards, or an LMDB database per split",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        required=True,
+        help="output folder of packed shards or LMDB databases",
+    )
+    parser.add_argument(
+        "--shard-size", type=int, default=1 << 30, help="max bytes of one shard"
+    )
+    args = parser.parse_args()
+
+    if args.format == "lmdb":
+        if args.zip:
+            num = zip_dataset_to_lmdb(args.data_path, args.split, args.output)
+        else:
+            num = image_folder_to_lmdb(
+                os.path.join(args.data_path, args.split),
+                os.path.join(args.output, args.split),
+            )
+    elif args.zip:
+        num = pack_zip_dataset(args.data_path, args.split, args.output, args.shard_size)
+    else:
+        num = pack_image_folder(
+            os.path.join(args.data_path, args.split),
+            args.output,
+            args.split,
+            args.shard_size,
+        )
+    print(f"packed {num} samples of {args.split} into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
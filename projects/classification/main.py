@@ -14,7 +14,12 @@ from flowvision.loss.cross_entropy import (
     LabelSmoothingCrossEntropy,
     SoftTargetCrossEntropy,
 )
-from flowvision.utils.metrics import accuracy, AverageMeter
+from flowvision.utils.metrics import (
+    accuracy,
+    all_reduce_metrics,
+    AverageMeter,
+    SmoothedValue,
+)
 
 from config import get_config
 from models import build_model
@@ -27,7 +32,6 @@ from utils import (
     save_checkpoint,
     get_grad_norm,
     auto_resume_helper,
-    reduce_tensor,
 )
 
 
@@ -62,6 +66,26 @@ def parse_option():
         action="store_true",
         help="use zipped dataset instead of folder dataset",
     )
+    parser.add_argument(
+        "--packed",
+        action="store_true",
+        help="use packed shards (see data/pack.py) instead of folder dataset",
+    )
+    parser.add_argument(
+        "--lmdb",
+        action="store_true",
+        help="use LMDB databases (see data/pack.py) instead of folder dataset",
+    )
+    parser.add_argument(
+        "--prefetcher",
+        action="store_true",
+        help="load uint8 images and normalize them on the device with a prefetch loader",
+    )
+    parser.add_argument(
+        "--batched-aa",
+        action="store_true",
+        help="with --prefetcher, run AutoAugment on the device on whole batches",
+    )
     parser.add_argument(
         "--cache-mode",
         type=str,
@@ -223,9 +247,10 @@ def train_one_epoch(
     optimizer.zero_grad()
 
     num_steps = len(data_loader)
+    # loss and grad norm stay on the device until printed
     batch_time = AverageMeter()
-    loss_meter = AverageMeter()
-    norm_meter = AverageMeter()
+    loss_meter = SmoothedValue()
+    norm_meter = SmoothedValue()
 
     start = time.time()
     end = time.time()
@@ -265,7 +290,7 @@ def train_one_epoch(
             optimizer.step()
             lr_scheduler.step_update(epoch * num_steps + idx)
 
-        loss_meter.update(loss.item(), targets.size(0))
+        loss_meter.update(loss, targets.size(0))
         norm_meter.update(grad_norm)
         batch_time.update(time.time() - end)
         end = time.time()
@@ -277,8 +302,8 @@ def train_one_epoch(
                 f"Train: [{epoch}/{config.TRAIN.EPOCHS}][{idx}/{num_steps}]\t"
                 f"eta {datetime.timedelta(seconds=int(etas))} lr {lr:.6f}\t"
                 f"time {batch_time.val:.4f} ({batch_time.avg:.4f})\t"
-                f"loss {loss_meter.val:.4f} ({loss_meter.avg:.4f})\t"
-                f"grad_norm {norm_meter.val:.4f} ({norm_meter.avg:.4f})\t"
+                f"loss {loss_meter.value:.4f} ({loss_meter.global_avg:.4f})\t"
+                f"grad_norm {norm_meter.value:.4f} ({norm_meter.global_avg:.4f})\t"
             )
     epoch_time = time.time() - start
     logger.info(
@@ -292,9 +317,9 @@ def validate(config, data_loader, model):
     model.eval()
 
     batch_time = AverageMeter()
-    loss_meter = AverageMeter()
-    acc1_meter = AverageMeter()
-    acc5_meter = AverageMeter()
+    loss_meter = SmoothedValue()
+    acc1_meter = SmoothedValue()
+    acc5_meter = SmoothedValue()
 
     end = time.time()
     for idx, (images, target) in enumerate(data_loader):
@@ -308,13 +333,10 @@ def validate(config, data_loader, model):
         loss = criterion(output, target)
         acc1, acc5 = accuracy(output, target, topk=(1, 5))
 
-        acc1 = reduce_tensor(acc1)
-        acc5 = reduce_tensor(acc5)
-        loss = reduce_tensor(loss)
-
-        loss_meter.update(loss.item(), target.size(0))
-        acc1_meter.update(acc1.item(), target.size(0))
-        acc5_meter.update(acc5.item(), target.size(0))
+        # accumulated on the device, reduced across ranks once at the end
+        loss_meter.update(loss, target.size(0))
+        acc1_meter.update(acc1, target.size(0))
+        acc5_meter.update(acc5, target.size(0))
 
         # measure elapsed time
         batch_time.update(time.time() - end)
@@ -324,13 +346,16 @@ def validate(config, data_loader, model):
             logger.info(
                 f"Test: [{idx}/{len(data_loader)}]\t"
                 f"Time {batch_time.val:.3f} ({batch_time.avg:.3f})\t"
-                f"Loss {loss_meter.val:.4f} ({loss_meter.avg:.4f})\t"
-                f"Acc@1 {acc1_meter.val:.3f} ({acc1_meter.avg:.3f})\t"
-                f"Acc@5 {acc5_meter.val:.3f} ({acc5_meter.avg:.3f})\t"
+                f"Loss {loss_meter.value:.4f} ({loss_meter.global_avg:.4f})\t"
+                f"Acc@1 {acc1_meter.value:.3f} ({acc1_meter.global_avg:.3f})\t"
+                f"Acc@5 {acc5_meter.value:.3f} ({acc5_meter.global_avg:.3f})\t"
             )
 
-    logger.info(f" * Acc@1 {acc1_meter.avg:.3f} Acc@5 {acc5_meter.avg:.3f}")
-    return acc1_meter.avg, acc5_meter.avg, loss_meter.avg
+    all_reduce_metrics(loss_meter, acc1_meter, acc5_meter)
+    logger.info(
+        f" * Acc@1 {acc1_meter.global_avg:.3f} Acc@5 {acc5_meter.global_avg:.3f}"
+    )
+    return acc1_meter.global_avg, acc5_meter.global_avg, loss_meter.global_avg
 
 
 @flow.no_grad()
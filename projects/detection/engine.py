@@ -6,6 +6,7 @@ import oneflow as flow
 from coco_utils import get_coco_api_from_dataset
 from coco_eval import CocoEvaluator
 import utils
+from flowvision.utils import COCOEvaluator
 
 
 def train_one_epoch(model, optimizer, data_loader, device, epoch, print_freq):
@@ -61,15 +62,18 @@ def _get_iou_types(model):
 
 
 @flow.no_grad()
-def evaluate(model, data_loader, device):
+def evaluate(model, data_loader, device, backend="native"):
     cpu_device = flow.device("cpu")
     model.eval()
     metric_logger = utils.MetricLogger(delimiter="  ")
     header = "Test:"
 
     coco = get_coco_api_from_dataset(data_loader.dataset)
-    iou_types = _get_iou_types(model)
-    coco_evaluator = CocoEvaluator(coco, iou_types)
+    if backend == "native":
+        coco_evaluator = COCOEvaluator.from_coco(coco)
+    else:
+        iou_types = _get_iou_types(model)
+        coco_evaluator = CocoEvaluator(coco, iou_types)
 
     for images, targets in metric_logger.log_every(data_loader, 100, header):
         images = list(image.to(device) for image in images)
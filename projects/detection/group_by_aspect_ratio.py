@@ -4,7 +4,6 @@ import math
 import numpy as np
 from collections import defaultdict
 from itertools import repeat, chain
-from PIL import Image
 from tqdm import tqdm
 
 import oneflow as flow
@@ -146,15 +145,20 @@ def _compute_aspect_ratios_coco_dataset(dataset, indices=None):
     return aspect_ratios
 
 
-def _compute_aspect_ratios_voc_dataset(dataset, indices=None):
-    if indices is None:
-        indices = range(len(dataset))
-    aspect_ratios = []
-    for i in indices:
-        width, height = Image.open(dataset.images[i]).size
-        aspect_ratio = float(width) / float(height)
-        aspect_ratios.append(aspect_ratio)
-    return aspect_ratios
+def _compute_aspect_ratios_image_size_index(dataset, indices=None, num_workers=16):
+    # sizes read from the image headers, cached in a sidecar index of the dataset root
+    sizes = flowvision.datasets.get_image_sizes(
+        dataset, indices, num_workers=num_workers
+    )
+    return (sizes[:, 0] / sizes[:, 1]).tolist()
+
+
+def _has_image_paths(dataset):
+    return (
+        isinstance(dataset, flowvision.datasets.VisionDataset)
+        and type(dataset).get_image_path
+        is not flowvision.datasets.VisionDataset.get_image_path
+    )
 
 
 def _compute_aspect_ratios_subset_dataset(dataset, indices=None):
@@ -172,8 +176,8 @@ def compute_aspect_ratios(dataset, indices=None):
     if isinstance(dataset, flowvision.datasets.CocoDetection):
         return _compute_aspect_ratios_coco_dataset(dataset, indices)
 
-    if isinstance(dataset, flowvision.datasets.VOCDetection):
-        return _compute_aspect_ratios_voc_dataset(dataset, indices)
+    if _has_image_paths(dataset):
+        return _compute_aspect_ratios_image_size_index(dataset, indices)
 
     if isinstance(dataset, flow.utils.data.Subset):
         return _compute_aspect_ratios_subset_dataset(dataset, indices)
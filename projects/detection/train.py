@@ -129,6 +129,12 @@ def get_args_parser():
         help="Only test the model",
         action="store_true",
     )
+    parser.add_argument(
+        "--coco-eval-backend",
+        default="native",
+        choices=["native", "pycocotools"],
+        help="bbox evaluator, flowvision.utils.COCOEvaluator or pycocotools (default: native)",
+    )
     parser.add_argument(
         "--pretrained",
         dest="pretrained",
@@ -245,7 +251,7 @@ def main(args):
         args.start_epoch = checkpoint["epoch"] + 1
 
     if args.test_only:
-        evaluate(model, data_loader_test, device=device)
+        evaluate(model, data_loader_test, device=device, backend=args.coco_eval_backend)
         return
 
     print("Start training")
@@ -271,7 +277,7 @@ def main(args):
             )
 
         # evaluate after every epoch
-        evaluate(model, data_loader_test, device=device)
+        evaluate(model, data_loader_test, device=device, backend=args.coco_eval_backend)
 
     total_time = time.time() - start_time
     total_time_str = str(datetime.timedelta(seconds=int(total_time)))
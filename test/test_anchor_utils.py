@@ -0,0 +1,46 @@
+import numpy as np
+import oneflow as flow
+
+from flowvision.models.detection.anchor_utils import (
+    AnchorGenerator,
+    DefaultBoxGenerator,
+)
+from flowvision.models.detection.image_list import ImageList
+
+
+def _image_list(batch_size, size=(64, 64)):
+    images = flow.randn(batch_size, 3, *size)
+    return ImageList(images, [size] * batch_size)
+
+
+def test_anchor_generator_cache():
+    generator = AnchorGenerator(
+        sizes=((32,), (64,)), aspect_ratios=((0.5, 1.0, 2.0),) * 2
+    )
+    features = [flow.randn(2, 8, 16, 16), flow.randn(2, 8, 8, 8)]
+
+    anchors = generator(_image_list(2), features)
+    assert generator.cache_info()["misses"] == 1
+    cached = generator(_image_list(2), features)
+    assert generator.cache_info()["hits"] == 1
+    assert len(cached) == 2 and cached[0] is cached[1]
+    assert np.allclose(anchors[0].numpy(), cached[1].numpy())
+
+    uncached = AnchorGenerator(
+        sizes=((32,), (64,)), aspect_ratios=((0.5, 1.0, 2.0),) * 2, cache_size=0
+    )
+    assert np.allclose(
+        uncached(_image_list(2), features)[0].numpy(), anchors[0].numpy()
+    )
+    assert uncached.cache_info()["size"] == 0
+
+
+def test_default_box_generator_cache():
+    generator = DefaultBoxGenerator([[2], [2, 3]], cache_size=1)
+    features = [flow.randn(1, 8, 8, 8), flow.randn(1, 8, 4, 4)]
+    boxes = generator(_image_list(1), features)
+    generator(_image_list(1), features)
+    generator(_image_list(1, (32, 32)), features)
+    info = generator.cache_info()
+    assert info["hits"] == 1 and info["misses"] == 2 and info["size"] == 1
+    assert boxes[0].shape[0] == 8 * 8 * 4 + 4 * 4 * 6
@@ -45,6 +45,24 @@ def test_random_erasing():
     random_erase(x)
 
 
+def test_random_erasing_batched():
+    x = flow.ones(8, 3, 32, 32)
+    random_erase = RandomErasing(
+        probability=1.0,
+        mode="const",
+        max_count=3,
+        num_splits=2,
+        device="cpu",
+        batched=True,
+    )
+    out = random_erase(x).numpy()
+    # the clean split is untouched, every other image has an erased block
+    assert (out[:4] == 1).all()
+    assert all((out[i] == 0).any() for i in range(4, 8))
+    # erased blocks cover every channel
+    assert ((out[4:] == 0).all(axis=1) == (out[4:, 0] == 0)).all()
+
+
 def test_aa():
     img_size = (224, 224)
     IMAGENET_DEFAULT_MEAN = [0.485, 0.456, 0.406]
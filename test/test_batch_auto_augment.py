@@ -0,0 +1,93 @@
+import unittest
+
+import numpy as np
+import oneflow as flow
+from PIL import Image, ImageOps
+
+import flowvision.transforms.functional_tensor as F_t
+from flowvision.data import (
+    BatchAugMixAugment,
+    BatchRandAugment,
+    augment_and_mix_transform,
+    auto_augment_transform,
+    rand_augment_transform,
+)
+from flowvision.data.auto_augment import AugmentOp
+
+
+def _random_batch(n=4, height=20, width=24):
+    return np.random.randint(0, 256, (n, 3, height, width), dtype=np.uint8)
+
+
+def _pil_reference(images, fn):
+    return np.stack(
+        [np.asarray(fn(Image.fromarray(x.transpose(1, 2, 0)))) for x in images]
+    ).transpose(0, 3, 1, 2)
+
+
+class TestBatchAutoAugment(unittest.TestCase):
+    def test_histogram_ops_match_pil(self):
+        images = _random_batch()
+        images[1] //= 3
+        images[2, 0] = 17  # constant channel
+        batch = flow.tensor(images)
+        for batch_fn, pil_fn in [
+            (F_t.equalize_batch, ImageOps.equalize),
+            (F_t.autocontrast_batch, ImageOps.autocontrast),
+            (F_t.invert_batch, ImageOps.invert),
+        ]:
+            out = batch_fn(batch).numpy()
+            self.assertTrue(np.array_equal(out, _pil_reference(images, pil_fn)))
+
+    def test_per_sample_magnitudes(self):
+        images = _random_batch()
+        batch = flow.tensor(images)
+        bits = [1, 3, 4, 8]
+        out = F_t.posterize_batch(batch, flow.tensor(bits)).numpy()
+        for i, b in enumerate(bits):
+            expected = _pil_reference(
+                images[i : i + 1], lambda x: ImageOps.posterize(x, b)
+            )
+            self.assertTrue(np.array_equal(out[i : i + 1], expected))
+
+        thresholds = [0, 64, 128, 256]
+        out = F_t.solarize_batch(batch, flow.tensor(thresholds)).numpy()
+        for i, t in enumerate(thresholds):
+            expected = _pil_reference(
+                images[i : i + 1], lambda x: ImageOps.solarize(x, t)
+            )
+            self.assertTrue(np.array_equal(out[i : i + 1], expected))
+
+    def test_translate_matches_pil(self):
+        images = _random_batch()
+        batch = flow.tensor(images)
+        op = AugmentOp(
+            "TranslateX", hparams=dict(img_mean=(0, 0, 0), interpolation=Image.NEAREST)
+        )
+        shifts = [(-5.0,), (0.0,), (3.0,), (30.0,)]
+        out = op.apply_batch(batch, shifts).numpy()
+        for i, (pixels,) in enumerate(shifts):
+            expected = _pil_reference(
+                images[i : i + 1],
+                lambda x: x.transform(x.size, Image.AFFINE, (1, 0, pixels, 0, 1, 0)),
+            )
+            self.assertTrue(np.array_equal(out[i : i + 1], expected))
+
+    def test_transforms(self):
+        batch = flow.tensor(_random_batch(n=8))
+        transforms = [
+            auto_augment_transform("v0", {}, batched=True),
+            rand_augment_transform("rand-m9-mstd0.5-inc1", {}, batched=True),
+            augment_and_mix_transform("augmix-m5-w3", {}, batched=True),
+            augment_and_mix_transform("augmix-m5-w3-b1", {}, batched=True),
+        ]
+        self.assertIsInstance(transforms[1], BatchRandAugment)
+        self.assertIsInstance(transforms[2], BatchAugMixAugment)
+        for transform in transforms:
+            out = transform(batch)
+            self.assertEqual(out.shape, batch.shape)
+            self.assertEqual(out.dtype, flow.uint8)
+
+
+if __name__ == "__main__":
+    unittest.main()
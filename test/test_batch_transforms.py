@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+import oneflow as flow
+
+import flowvision.transforms as transforms
+import flowvision.transforms.functional_tensor as F_t
+
+
+class TestBatchTransforms(unittest.TestCase):
+    def test_hflip_batch(self):
+        x = flow.randn(4, 3, 8, 8)
+        mask = flow.tensor([True, False, True, False])
+        out = F_t.hflip_batch(x, mask)
+        for i in range(4):
+            expected = F_t.hflip(x[i]) if mask[i].item() else x[i]
+            self.assertTrue(np.allclose(out[i].numpy(), expected.numpy()))
+
+    def test_resized_crop_batch_identity(self):
+        x = flow.rand(2, 3, 16, 16)
+        boxes = flow.tensor([[0.0, 0.0, 16.0, 16.0]] * 2)
+        out = F_t.resized_crop_batch(x, boxes, [16, 16])
+        self.assertTrue(np.allclose(out.numpy(), x.numpy(), atol=1e-5))
+
+    def test_color_jitter_batch_matches_single(self):
+        x = flow.rand(3, 3, 8, 8)
+        factors = flow.tensor([0.5, 1.0, 1.5])
+        out = F_t.adjust_saturation_batch(x, factors)
+        for i in range(3):
+            expected = F_t.adjust_saturation(x[i], factors[i].item())
+            self.assertTrue(np.allclose(out[i].numpy(), expected.numpy(), atol=1e-5))
+
+    def test_hue_batch_matches_single(self):
+        for n in [1, 2, 4]:
+            x = flow.rand(n, 3, 8, 8)
+            factors = flow.tensor(np.linspace(-0.4, 0.4, n), dtype=flow.float32)
+            out = F_t.adjust_hue_batch(x, factors)
+            self.assertEqual(tuple(out.shape), (n, 3, 8, 8))
+            for i in range(n):
+                expected = F_t.adjust_hue(x[i], factors[i].item())
+                self.assertTrue(
+                    np.allclose(out[i].numpy(), expected.numpy(), atol=1e-5)
+                )
+
+    def test_pipeline(self):
+        x = flow.randint(0, 256, (4, 3, 32, 32)).to(flow.uint8)
+        pipeline = transforms.Compose(
+            [
+                transforms.BatchRandomResizedCrop(24),
+                transforms.BatchRandomHorizontalFlip(),
+                transforms.BatchColorJitter(0.4, 0.4, 0.4, 0.1),
+                transforms.BatchNormalize((0.5, 0.5, 0.5), (0.5, 0.5, 0.5)),
+            ]
+        )
+        out = pipeline(x)
+        self.assertEqual(tuple(out.shape), (4, 3, 24, 24))
+        self.assertEqual(out.dtype, flow.float32)
+
+        normalized = transforms.BatchNormalize((0.5, 0.5, 0.5), (0.5, 0.5, 0.5))(x)
+        expected = (x.numpy().astype(np.float32) / 255.0 - 0.5) / 0.5
+        self.assertTrue(np.allclose(normalized.numpy(), expected, atol=1e-5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+
+import numpy as np
+import oneflow as flow
+
+from flowvision.utils import COCOEvaluator
+
+
+def _evaluator(boxes, labels, iscrowd=None, max_dets=(1, 10, 100)):
+    evaluator = COCOEvaluator([1, 2], max_dets=max_dets)
+    evaluator.add_ground_truth(0, np.array(boxes, dtype=np.float64), labels, iscrowd)
+    return evaluator
+
+
+class TestCOCOEvaluator(unittest.TestCase):
+    def test_perfect_detections(self):
+        boxes = [[10, 10, 60, 60], [100, 100, 300, 250]]
+        evaluator = _evaluator(boxes, [1, 2])
+        evaluator.update(
+            {
+                0: {
+                    "boxes": flow.tensor(boxes, dtype=flow.float32),
+                    "scores": flow.tensor([0.9, 0.8]),
+                    "labels": flow.tensor([1, 2]),
+                }
+            }
+        )
+        stats = evaluator.summarize()
+        self.assertAlmostEqual(stats[0], 1.0)
+        self.assertAlmostEqual(stats[1], 1.0)
+        # no small boxes
+        self.assertEqual(stats[3], -1.0)
+
+    def test_false_positive_ranked_first(self):
+        evaluator = _evaluator([[0, 0, 100, 100]], [1])
+        evaluator.update(
+            {
+                0: {
+                    "boxes": np.array([[200, 200, 300, 300], [0, 0, 100, 100]]),
+                    "scores": np.array([0.9, 0.5]),
+                    "labels": np.array([1, 1]),
+                }
+            }
+        )
+        evaluator.accumulate()
+        # precision is 1/2 at every recall level
+        np.testing.assert_allclose(evaluator.precision[0, :, 0, 0, 2], 0.5)
+        # with a single detection per image, only the false positive is kept
+        self.assertEqual(evaluator.recall[0, 0, 0, 0], 0.0)
+        self.assertEqual(evaluator.recall[0, 0, 0, 2], 1.0)
+
+    def test_crowd_is_ignored(self):
+        evaluator = _evaluator([[0, 0, 100, 100], [200, 0, 400, 200]], [1, 1], [0, 1])
+        evaluator.update(
+            {
+                0: {
+                    "boxes": np.array([[210, 10, 260, 60], [0, 0, 100, 100]]),
+                    "scores": np.array([0.9, 0.8]),
+                    "labels": np.array([1, 1]),
+                }
+            }
+        )
+        stats = evaluator.summarize()
+        # the detection inside the crowd region is neither a true nor a false positive
+        self.assertAlmostEqual(stats[0], 1.0)
+
+    def test_merge_results(self):
+        boxes = [[10, 10, 60, 60]]
+        first, second = _evaluator(boxes, [1]), _evaluator(boxes, [1])
+        for evaluator in (first, second):
+            evaluator.add_ground_truth(1, np.array(boxes), [2])
+        first.update(
+            {
+                0: {
+                    "boxes": np.array(boxes),
+                    "scores": np.array([0.9]),
+                    "labels": np.array([1]),
+                }
+            }
+        )
+        empty = np.zeros((0, 4))
+        second.update({1: {"boxes": empty, "scores": [], "labels": []}})
+        # what synchronize_between_processes does with the results of two ranks
+        first._results.update(second._results)
+        first.accumulate()
+        self.assertEqual(first.recall[0, 0, 0, 2], 1.0)
+        # the box of image 1 has no detection
+        self.assertEqual(first.recall[0, 1, 0, 2], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+import numpy as np
+import oneflow as flow
+
+from flowvision.layers.blocks import boxes as box_ops
+from flowvision.models.detection import det_utils
+
+
+def _random_boxes(n):
+    boxes = flow.rand(n, 4) * 100
+    boxes[:, 2:] += boxes[:, :2] + 1
+    return boxes
+
+
+class TestDetUtils(unittest.TestCase):
+    def test_sampler_batched(self):
+        sampler = det_utils.BalancedPositiveNegativeSampler(16, 0.25)
+        matched_idxs = flow.tensor(
+            [[1] * 10 + [0] * 30 + [-1] * 10, [2] * 2 + [0] * 5 + [-1] * 43]
+        )
+        pos_mask, neg_mask = sampler.sample_batched(matched_idxs)
+        self.assertEqual(pos_mask.to(flow.int64).sum(dim=1).tolist(), [4, 2])
+        self.assertEqual(neg_mask.to(flow.int64).sum(dim=1).tolist(), [12, 5])
+        self.assertTrue((matched_idxs[pos_mask] >= 1).numpy().all())
+        self.assertTrue((matched_idxs[neg_mask] == 0).numpy().all())
+
+    def test_matcher_batched(self):
+        matcher = det_utils.Matcher(0.5, 0.3, allow_low_quality_matches=True)
+        gt_boxes = [_random_boxes(3), _random_boxes(1), flow.zeros(0, 4)]
+        preds = [_random_boxes(20) for _ in gt_boxes]
+        padded_gt, gt_mask = det_utils.pad_per_image(gt_boxes, 0, min_length=1)
+        matches = matcher.match_batched(
+            box_ops.batched_box_iou(padded_gt, flow.stack(preds)), gt_mask
+        )
+        for i in range(2):
+            expected = matcher(box_ops.box_iou(gt_boxes[i], preds[i]))
+            self.assertTrue(np.array_equal(matches[i].numpy(), expected.numpy()))
+        self.assertTrue((matches[2] == matcher.BELOW_LOW_THRESHOLD).numpy().all())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+import numpy as np
+import oneflow as flow
+
+from flowvision.models.detection.transform import GeneralizedRCNNTransform
+
+
+def _inputs(sizes):
+    images = [flow.rand(3, h, w) for h, w in sizes]
+    targets = []
+    for h, w in sizes:
+        xy = flow.rand(4, 2) * flow.tensor([w / 2, h / 2])
+        boxes = flow.cat([xy, xy + 10], dim=1)
+        keypoints = flow.cat([flow.rand(4, 5, 2) * 50, flow.ones(4, 5, 1)], dim=2)
+        targets.append({"boxes": boxes, "keypoints": keypoints})
+    return images, targets
+
+
+class TestGeneralizedRCNNTransform(unittest.TestCase):
+    def _check(self, transform, sizes):
+        images, targets = _inputs(sizes)
+        batched, batched_targets = transform._forward_batched(images, targets)
+        expected, expected_targets = transform._forward_per_image(images, targets)
+        self.assertEqual(batched.image_sizes, expected.image_sizes)
+        self.assertEqual(batched.tensors.shape, expected.tensors.shape)
+        self.assertTrue(
+            np.allclose(batched.tensors.numpy(), expected.tensors.numpy(), atol=1e-4)
+        )
+        for a, b in zip(batched_targets, expected_targets):
+            for key in ["boxes", "keypoints"]:
+                self.assertTrue(np.allclose(a[key].numpy(), b[key].numpy()))
+
+    def test_matches_per_image(self):
+        transform = GeneralizedRCNNTransform(
+            64, 100, [0.485, 0.456, 0.406], [0.229, 0.224, 0.225]
+        )
+        # two images share their input and output sizes, one is not resized
+        self._check(transform, [(48, 64), (48, 64), (64, 100), (40, 30)])
+        transform.train()
+        self._check(transform, [(48, 64), (32, 32)])
+
+    def test_fixed_size(self):
+        transform = GeneralizedRCNNTransform(
+            300, 300, [0.5] * 3, [0.5] * 3, size_divisible=1, fixed_size=(300, 300)
+        )
+        self._check(transform, [(200, 250), (301, 299)])
+
+    def test_canvas_pool(self):
+        transform = GeneralizedRCNNTransform(64, 100, [0.5] * 3, [0.25] * 3).eval()
+        images = [flow.rand(3, 48, 64), flow.rand(3, 48, 64)]
+        first, _ = transform(images)
+        second, _ = transform(images)
+        # the canvas of the first call is reused
+        self.assertIs(first.tensors, second.tensors)
+        self.assertEqual(len(transform._canvas_pool), 1)
+        expected, _ = transform._forward_per_image(images)
+        self.assertTrue(
+            np.allclose(second.tensors.numpy(), expected.tensors.numpy(), atol=1e-4)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import hashlib
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from flowvision.utils.download import download_file
+
+PAYLOAD = os.urandom(1000003)
+
+
+class _RangeHandler(BaseHTTPRequestHandler):
+    """Serves PAYLOAD and honors single range requests, like most file servers"""
+
+    requests = []
+    fail_from = None
+
+    def do_GET(self):
+        start, end = 0, len(PAYLOAD)
+        header = self.headers.get("Range")
+        if header is not None:
+            first, last = header.split("=")[1].split("-")
+            start, end = int(first), int(last) + 1
+        type(self).requests.append((start, end))
+        if self.fail_from is not None and start >= self.fail_from:
+            self.send_error(503)
+            return
+        self.send_response(206 if header is not None else 200)
+        if header is not None:
+            self.send_header(
+                "Content-Range", "bytes {}-{}/{}".format(start, end - 1, len(PAYLOAD))
+            )
+        self.send_header("Content-Length", str(end - start))
+        self.end_headers()
+        self.wfile.write(PAYLOAD[start:end])
+
+    def log_message(self, *args):
+        pass
+
+
+class TestDownload(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _RangeHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = "http://127.0.0.1:{}/payload.bin".format(cls.server.server_port)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        _RangeHandler.requests = []
+        _RangeHandler.fail_from = None
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dst = os.path.join(self.tmp_dir.name, "payload.bin")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _download(self, **kwargs):
+        kwargs = dict(dict(progress=False, chunk_size=65536, max_retries=0), **kwargs)
+        return download_file(self.url, self.dst, **kwargs)
+
+    def test_parallel(self):
+        sha256 = hashlib.sha256(PAYLOAD).hexdigest()
+        self.assertEqual(self._download(hash_prefix=sha256[:10]), sha256)
+        with open(self.dst, "rb") as f:
+            self.assertEqual(f.read(), PAYLOAD)
+        self.assertFalse(os.path.exists(self.dst + ".part"))
+
+    def test_resume(self):
+        _RangeHandler.fail_from = 512 * 1024
+        with self.assertRaises(OSError):
+            self._download()
+        self.assertTrue(os.path.exists(self.dst + ".part"))
+
+        _RangeHandler.fail_from = None
+        _RangeHandler.requests = []
+        md5 = hashlib.md5(PAYLOAD).hexdigest()
+        self.assertEqual(self._download(hash_prefix=md5, hash_type="md5"), md5)
+        # the chunks written by the first attempt are not fetched again
+        starts = [start for start, _ in _RangeHandler.requests[1:]]
+        self.assertTrue(all(start >= 512 * 1024 for start in starts))
+
+    def test_invalid_hash(self):
+        with self.assertRaises(RuntimeError):
+            self._download(hash_prefix="0123456789")
+        self.assertFalse(os.path.exists(self.dst))
+        self.assertFalse(os.path.exists(self.dst + ".part"))
+
+    def test_concurrent(self):
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self._download()))
+            for _ in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # downloaded once, the other callers waited on the lock
+        self.assertEqual(sum(digest is not None for digest in results), 1)
+        self.assertEqual(len(_RangeHandler.requests), 1 + (len(PAYLOAD) >> 16) + 1)
+        with open(self.dst, "rb") as f:
+            self.assertEqual(f.read(), PAYLOAD)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+
+import numpy as np
+import oneflow as flow
+import oneflow.nn as nn
+
+from flowvision.layers import (
+    DropBlock,
+    DropPath,
+    DropRateScheduler,
+    StochasticDepth,
+    drop_block,
+    drop_path,
+)
+
+
+class TestDropBlock(unittest.TestCase):
+    def test_drop_rate(self):
+        x = flow.ones(8, 16, 28, 28)
+        out = drop_block(x, 0.2, 5, training=True).numpy()
+        dropped = (out == 0).mean()
+        self.assertAlmostEqual(dropped, 0.2, delta=0.05)
+        # the kept features are rescaled to keep the mean
+        self.assertAlmostEqual(out.mean(), 1.0, delta=1e-3)
+        self.assertTrue(np.allclose(out[out > 0], 1 / (1 - dropped), rtol=1e-4))
+
+    def test_blocks(self):
+        x = flow.ones(1, 1, 20, 20)
+        out = drop_block(x, 0.05, 4, training=True).numpy()[0, 0]
+        rows, cols = np.nonzero(out == 0)
+        # every dropped feature lies in a whole 4x4 dropped block
+        for r, c in zip(rows, cols):
+            self.assertTrue(
+                any(
+                    (out[i : i + 4, j : j + 4] == 0).all()
+                    for i in range(max(r - 3, 0), min(r, 16) + 1)
+                    for j in range(max(c - 3, 0), min(c, 16) + 1)
+                )
+            )
+
+    def test_inplace_and_eval(self):
+        x = flow.rand(2, 4, 14, 14)
+        self.assertIs(drop_block(x, 0.1, 3, training=True, inplace=True), x)
+        layer = DropBlock(7, 0.1).eval()
+        self.assertIs(layer(x), x)
+
+
+class TestDropPath(unittest.TestCase):
+    def test_per_sample(self):
+        x = flow.ones(256, 3, 4)
+        out = DropPath(0.25)(x).numpy()
+        per_sample = out.reshape(256, -1)
+        self.assertTrue((per_sample == per_sample[:, :1]).all())
+        self.assertTrue(np.isin(per_sample, [0.0, 1 / 0.75]).all())
+        self.assertGreater((per_sample[:, 0] == 0).sum(), 0)
+        self.assertIs(drop_path(x, 0.25, training=True, inplace=True), x)
+
+    def test_stochastic_depth_rescales(self):
+        out = StochasticDepth(0.5, "row")(flow.ones(64, 2)).numpy()
+        self.assertTrue(np.isin(out, [0.0, 2.0]).all())
+
+
+class TestDropRateScheduler(unittest.TestCase):
+    def test_ramp(self):
+        model = nn.Sequential(DropPath(0.2), nn.Identity(), DropBlock(7, 0.1))
+        scheduler = DropRateScheduler(model, total_updates=10, start_update=2)
+        self.assertEqual(model[0].drop_prob, 0.0)
+        scheduler.step_update(7)
+        self.assertAlmostEqual(model[0].drop_prob, 0.1)
+        self.assertAlmostEqual(model[2].p, 0.05)
+        scheduler.step_update(100)
+        self.assertAlmostEqual(model[0].drop_prob, 0.2)
+        self.assertAlmostEqual(model[2].p, 0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
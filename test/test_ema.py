@@ -1,8 +1,87 @@
-from flowvision.utils import ModelEmaV2
+import unittest
+from copy import deepcopy
+
+import numpy as np
+import oneflow as flow
+import oneflow.nn as nn
+
+from flowvision.utils import ModelEmaV2, ModelEmaV3
 from flowvision.models.alexnet import alexnet
+from flowvision.models.swin_transformer import SwinTransformer
+
+
+def _small_model():
+    return nn.Sequential(nn.Linear(8, 4), nn.BatchNorm1d(4), nn.Linear(4, 2))
+
+
+def _perturb(model):
+    with flow.no_grad():
+        for p in model.parameters():
+            p.add_(flow.randn(*p.shape))
+    model.train()
+    model(flow.randn(16, 8))
+
+
+def _assert_close(test, a, b):
+    for x, y in zip(a.state_dict().values(), b.state_dict().values()):
+        # ModelEmaV3 copies the integer buffers instead of averaging them
+        if x.is_floating_point():
+            test.assertTrue(np.allclose(x.numpy(), y.numpy(), atol=1e-6))
+
+
+class TestModelEma(unittest.TestCase):
+    def test_ema_v2(self):
+        model = alexnet()
+        model_ema = ModelEmaV2(model, decay=0.9999, device="cuda")
+        new_model = alexnet()
+        model_ema.update(new_model)
+
+    def test_ema_v3_matches_v2(self):
+        model = _small_model()
+        ema_v2 = ModelEmaV2(model, decay=0.9)
+        ema_v3 = ModelEmaV3(model, decay=0.9)
+        for _ in range(3):
+            _perturb(model)
+            ema_v2.update(model)
+            ema_v3.update(model)
+        _assert_close(self, ema_v2.module, ema_v3.module)
+
+        # the flat buffers stay in sync with the EMA model after loading weights
+        ema_v3.module.load_state_dict(model.state_dict())
+        ema_v3.update(model)
+        _assert_close(self, model, ema_v3.module)
+
+    def test_ema_v3_update_every(self):
+        model = _small_model()
+        ema = ModelEmaV3(model, decay=0.9, update_every=2)
+        reference = ModelEmaV2(model, decay=0.81)
+        initial = deepcopy(model)
+        _perturb(model)
+        # skipped, then one update with the decay of two steps
+        ema.update(model)
+        _assert_close(self, ema.module, initial)
+        ema.update(model)
+        reference.update(model)
+        _assert_close(self, ema.module, reference.module)
+
+    def test_ema_clears_cached_bias(self):
+        kwargs = dict(
+            img_size=32, embed_dim=16, depths=[2], num_heads=[1], window_size=4
+        )
+        model = SwinTransformer(cache_bias=True, **kwargs)
+        reference = SwinTransformer(**kwargs).eval()
+        x = flow.randn(1, 3, 32, 32)
+        for ema in [ModelEmaV2(model, decay=0.5), ModelEmaV3(model, decay=0.5)]:
+            with flow.no_grad():
+                ema.module(x)  # fills the bias caches
+                for p in model.parameters():
+                    p.add_(flow.randn(*p.shape))
+                ema.update(model)
+                reference.load_state_dict(ema.module.state_dict())
+                self.assertTrue(
+                    np.allclose(ema.module(x).numpy(), reference(x).numpy(), atol=1e-5)
+                )
+
 
 if __name__ == "__main__":
-    model = alexnet()
-    model_ema = ModelEmaV2(model, decay=0.9999, device="cuda")
-    new_model = alexnet()
-    model_ema.update(new_model)
+    unittest.main()
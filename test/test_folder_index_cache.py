@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+
+from flowvision.datasets import ImageFolder
+from flowvision.datasets.folder import IMG_EXTENSIONS, index_cache_file
+
+
+def _touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"")
+
+
+class TestFolderIndexCache(unittest.TestCase):
+    def test_cache_roundtrip_and_invalidation(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = os.path.join(tmp, "root")
+            cache_dir = os.path.join(tmp, "cache")
+            for c in ("a", "b"):
+                for i in range(3):
+                    _touch(os.path.join(root, c, "{}.jpg".format(i)))
+
+            scanned = ImageFolder(root)
+            cached = ImageFolder(root, index_cache_dir=cache_dir)
+            cache_file = index_cache_file(cache_dir, root, IMG_EXTENSIONS)
+            self.assertTrue(os.path.isfile(cache_file))
+
+            loaded = ImageFolder(root, index_cache_dir=cache_dir)
+            self.assertEqual(loaded.samples, scanned.samples)
+            self.assertEqual(cached.samples, scanned.samples)
+            self.assertEqual(loaded.class_to_idx, scanned.class_to_idx)
+
+            # a new file changes the class folder mtime and the cache key
+            os.utime(os.path.join(root, "a"), ns=(0, 0))
+            _touch(os.path.join(root, "a", "3.jpg"))
+            self.assertNotEqual(
+                index_cache_file(cache_dir, root, IMG_EXTENSIONS), cache_file
+            )
+            rebuilt = ImageFolder(root, index_cache_dir=cache_dir)
+            self.assertEqual(len(rebuilt), 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+
+import numpy as np
+import oneflow as flow
+import oneflow.nn as nn
+
+from flowvision.layers import ConvBnAct, FrozenBatchNorm2d
+from flowvision.models import fuse_for_inference
+from flowvision.models.res2net import Bottle2neck
+
+
+def _randomize_norms(model):
+    with flow.no_grad():
+        for m in model.modules():
+            if isinstance(m, (nn.BatchNorm2d, FrozenBatchNorm2d)):
+                m.running_mean.copy_(flow.randn(*m.running_mean.shape))
+                m.running_var.copy_(flow.rand(*m.running_var.shape) + 0.5)
+                m.weight.copy_(flow.randn(*m.weight.shape))
+                m.bias.copy_(flow.randn(*m.bias.shape))
+    return model.eval()
+
+
+def _norms(model):
+    return [
+        m for m in model.modules() if isinstance(m, (nn.BatchNorm2d, FrozenBatchNorm2d))
+    ]
+
+
+class TestFuseForInference(unittest.TestCase):
+    def test_conv_bn_act(self):
+        model = _randomize_norms(
+            nn.Sequential(
+                ConvBnAct(3, 8, kernel_size=3, padding=1),
+                nn.Conv2d(8, 8, 3, padding=1, groups=8, bias=True),
+                FrozenBatchNorm2d(8),
+            )
+        )
+        x = flow.randn(2, 3, 16, 16)
+        expected = model(x).numpy()
+        fuse_for_inference(model, x)
+        self.assertEqual(len(_norms(model)), 0)
+        self.assertTrue(np.allclose(model(x).numpy(), expected, atol=1e-4))
+
+    def test_norm_after_activation_is_kept(self):
+        model = _randomize_norms(
+            nn.Sequential(
+                nn.Conv2d(3, 8, 3, padding=1),
+                nn.ReLU(inplace=True),
+                nn.BatchNorm2d(8),
+                nn.Conv2d(8, 8, 1),
+                nn.BatchNorm2d(8),
+            )
+        )
+        fuse_for_inference(model, flow.randn(2, 3, 16, 16))
+        self.assertEqual(len(_norms(model)), 1)
+        self.assertIsInstance(model[2], nn.BatchNorm2d)
+
+    def test_failed_verification_restores_model(self):
+        class ConvOutputReused(nn.Module):
+            def __init__(self):
+                super().__init__()
+                self.conv = nn.Conv2d(3, 8, 3, padding=1)
+                self.bn = nn.BatchNorm2d(8)
+
+            def forward(self, x):
+                # the functional use of y is invisible to the conv/bn pairing
+                y = self.conv(x)
+                return self.bn(y) + y
+
+        model = _randomize_norms(ConvOutputReused())
+        x = flow.randn(2, 3, 16, 16)
+        expected = model(x).numpy()
+        with self.assertRaises(RuntimeError):
+            fuse_for_inference(model, x)
+        self.assertIsInstance(model.bn, nn.BatchNorm2d)
+        self.assertTrue(np.allclose(model(x).numpy(), expected, atol=1e-5))
+
+    def test_res2net_stage_merge(self):
+        downsample = nn.Sequential(
+            nn.Conv2d(64, 256, 1, stride=2, bias=False), nn.BatchNorm2d(256)
+        )
+        block = _randomize_norms(
+            Bottle2neck(64, 64, stride=2, downsample=downsample, stype="stage")
+        )
+        x = flow.randn(2, 64, 16, 16)
+        expected = block(x).numpy()
+        fuse_for_inference(block, x)
+        self.assertIsNotNone(block.merged_convs)
+        self.assertEqual(len(block.convs), 0)
+        self.assertEqual(len(_norms(block)), 0)
+        self.assertTrue(np.allclose(block(x).numpy(), expected, atol=1e-4))
+
+
+if __name__ == "__main__":
+    unittest.main()
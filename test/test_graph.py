@@ -0,0 +1,58 @@
+import unittest
+from collections import OrderedDict
+
+import numpy as np
+import oneflow as flow
+import oneflow.nn as nn
+
+from flowvision.models import GraphModule
+from flowvision.models.graph import _flatten, _unflatten
+
+
+class _TwoLevels(nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.conv = nn.Conv2d(3, 4, 3, padding=1)
+        self.bn = nn.BatchNorm2d(4)
+
+    def forward(self, x):
+        y = self.bn(self.conv(x))
+        return OrderedDict([("0", y), ("pool", nn.functional.max_pool2d(y, 2))])
+
+
+class TestGraphModule(unittest.TestCase):
+    def test_flatten(self):
+        a, b, c = flow.ones(1), flow.zeros(2), flow.ones(3)
+        obj = ([a, b], OrderedDict([("x", c)]))
+        tensors, spec = _flatten(obj)
+        self.assertEqual(len(tensors), 3)
+        rebuilt = _unflatten(tensors, spec)
+        self.assertIsInstance(rebuilt, tuple)
+        self.assertIsInstance(rebuilt[1], OrderedDict)
+        self.assertIs(rebuilt[1]["x"], c)
+
+    def test_matches_eager(self):
+        model = _TwoLevels().eval()
+        graph = GraphModule(model, batch_sizes=[2, 4])
+        for batch_size in [3, 4, 9]:
+            x = flow.randn(batch_size, 3, 16, 16)
+            expected = model(x)
+            outputs = graph(x)
+            self.assertEqual(list(outputs.keys()), ["0", "pool"])
+            for key in expected:
+                self.assertEqual(outputs[key].shape, expected[key].shape)
+                self.assertTrue(
+                    np.allclose(outputs[key].numpy(), expected[key].numpy(), atol=1e-5)
+                )
+        # 3 is padded to 4, 9 is split in 4 + 4 + 1 padded to 2
+        self.assertEqual(sorted(key[0] for key in graph.compile_times), [2, 4])
+
+    def test_training_is_eager(self):
+        graph = GraphModule(_TwoLevels())
+        graph.train()
+        graph(flow.randn(3, 3, 8, 8))
+        self.assertEqual(len(graph.compile_times), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+
+from PIL import Image, features
+
+from flowvision.datasets import (
+    ImageFolder,
+    ImageSizeIndex,
+    get_image_sizes,
+    probe_image_size,
+)
+
+
+def _save(path, size, **kwargs):
+    Image.new("RGB", size, (10, 20, 30)).save(path, **kwargs)
+    return path
+
+
+class TestImageSize(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = self.tmp_dir.name
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_probe(self):
+        cases = [
+            ("a.jpg", (640, 480), {}),
+            ("b.jpg", (33, 517), {"progressive": True}),
+            ("c.jpg", (300, 200), {"exif": b"Exif\x00\x00" + bytes(60000)}),
+            ("d.png", (1, 4000), {}),
+            ("e.bmp", (17, 9), {}),
+        ]
+        if features.check("webp"):
+            cases += [
+                ("f.webp", (1000, 751), {}),
+                ("g.webp", (257, 129), {"lossless": True}),
+            ]
+        for name, size, kwargs in cases:
+            path = _save(os.path.join(self.root, name), size, **kwargs)
+            self.assertEqual(probe_image_size(path), size, name)
+
+    def test_index(self):
+        names = ["{}.jpg".format(i) for i in range(10)]
+        for i, name in enumerate(names):
+            _save(os.path.join(self.root, name), (100 + i, 50))
+        index = ImageSizeIndex(self.root, num_workers=3)
+        sizes = index.sizes(names)
+        self.assertEqual(sizes.tolist(), [[100 + i, 50] for i in range(10)])
+        self.assertIsNotNone(index.save())
+
+        # an image modified since it was indexed is probed again
+        _save(os.path.join(self.root, names[0]), (7, 8))
+        os.utime(os.path.join(self.root, names[0]), ns=(0, 0))
+        reloaded = ImageSizeIndex(self.root)
+        self.assertEqual(len(reloaded), 10)
+        self.assertEqual(reloaded.sizes(names[:2]).tolist(), [[7, 8], [101, 50]])
+        self.assertEqual(
+            ImageSizeIndex(self.root, validate=False).sizes(names[:1]).tolist(),
+            [[100, 50]],
+        )
+
+    def test_dataset_with_relative_root(self):
+        os.makedirs(os.path.join(self.root, "data", "cls"))
+        for i in range(3):
+            _save(
+                os.path.join(self.root, "data", "cls", "{}.png".format(i)), (9, i + 1)
+            )
+        cwd = os.getcwd()
+        os.chdir(self.root)
+        try:
+            dataset = ImageFolder("data")
+            self.assertEqual(
+                get_image_sizes(dataset).tolist(), [[9, 1], [9, 2], [9, 3]]
+            )
+        finally:
+            os.chdir(cwd)
+        index = ImageSizeIndex(os.path.join(self.root, "data"))
+        self.assertEqual(len(index), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
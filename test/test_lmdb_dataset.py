@@ -0,0 +1,86 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from flowvision.datasets import LMDBImageDataset, image_folder_to_lmdb
+from flowvision.datasets.lmdb_dataset import LMDB_INDEX_FILE_NAME, write_lmdb_dataset
+
+try:
+    import lmdb
+except ImportError:
+    lmdb = None
+
+
+def _make_image_folder(root, classes=("cat", "dog", "fox"), per_class=(3, 1, 2)):
+    for c, num in zip(classes, per_class):
+        os.makedirs(os.path.join(root, c))
+        for i in range(num):
+            img = np.random.randint(0, 255, (8 + i, 10, 3), dtype=np.uint8)
+            Image.fromarray(img).save(os.path.join(root, c, "{}.png".format(i)))
+
+
+@unittest.skipIf(lmdb is None, "lmdb is not installed")
+class TestLMDBImageDataset(unittest.TestCase):
+    def test_roundtrip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, "src")
+            out = os.path.join(tmp, "lmdb")
+            _make_image_folder(src)
+            self.assertEqual(image_folder_to_lmdb(src, out), 6)
+            self.assertTrue(os.path.isfile(os.path.join(out, LMDB_INDEX_FILE_NAME)))
+
+            dataset = LMDBImageDataset(out)
+            self.assertEqual(len(dataset), 6)
+            self.assertEqual(dataset.classes, ["cat", "dog", "fox"])
+            self.assertEqual(dataset.targets.tolist(), [0, 0, 0, 1, 2, 2])
+
+            img, target = dataset[4]
+            expected = Image.open(os.path.join(src, "fox", "0.png")).convert("RGB")
+            self.assertEqual(target, 2)
+            self.assertTrue(np.array_equal(np.asarray(img), np.asarray(expected)))
+
+            clone = pickle.loads(pickle.dumps(dataset))
+            self.assertIsNone(clone._txn)
+            self.assertTrue(np.array_equal(np.asarray(clone[4][0]), np.asarray(img)))
+            dataset.close()
+            clone.close()
+
+    def test_database_without_class_names(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out = os.path.join(tmp, "lmdb")
+            samples = [
+                ("{}.bin".format(i).encode(), lambda i=i: bytes([i]), target)
+                for i, target in enumerate([1, 0, 2, 1])
+            ]
+            self.assertEqual(write_lmdb_dataset(samples, out), 4)
+
+            dataset = LMDBImageDataset(out, loader=bytes)
+            self.assertEqual(dataset.classes, ["0", "1", "2"])
+            self.assertEqual(dataset.class_to_idx, {"0": 0, "1": 1, "2": 2})
+            self.assertEqual(dataset.targets.tolist(), [0, 1, 1, 2])
+            self.assertEqual(dataset[0], (b"\x01", 0))
+            dataset.close()
+
+    def test_database_without_index(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, "src")
+            out = os.path.join(tmp, "lmdb")
+            _make_image_folder(src)
+            image_folder_to_lmdb(src, out)
+            os.remove(os.path.join(out, LMDB_INDEX_FILE_NAME))
+
+            # indexed in the key order of the database, without targets
+            dataset = LMDBImageDataset(out)
+            self.assertEqual(len(dataset), 6)
+            self.assertEqual(dataset.get_key(3), b"dog/0.png")
+            self.assertIsNone(dataset[3][1])
+            self.assertTrue(os.path.isfile(os.path.join(out, LMDB_INDEX_FILE_NAME)))
+            dataset.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
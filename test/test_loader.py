@@ -0,0 +1,38 @@
+import unittest
+
+import numpy as np
+import oneflow as flow
+
+from flowvision.data import PrefetchLoader, fast_collate
+
+
+class TestPrefetchLoader(unittest.TestCase):
+    def test_fast_collate(self):
+        batch = [(np.full((3, 4, 5), i, dtype=np.uint8), i % 2) for i in range(4)]
+        images, targets = fast_collate(batch)
+        self.assertEqual(tuple(images.shape), (4, 3, 4, 5))
+        self.assertEqual(images.dtype, flow.uint8)
+        self.assertEqual(targets.tolist(), [0, 1, 0, 1])
+        self.assertEqual(images[:, 0, 0, 0].tolist(), [0, 1, 2, 3])
+
+        split_batch = [((b[0], b[0] + 10), b[1]) for b in batch]
+        images, targets = fast_collate(split_batch)
+        self.assertEqual(images[:, 0, 0, 0].tolist(), [0, 1, 2, 3, 10, 11, 12, 13])
+        self.assertEqual(targets.tolist(), [0, 1, 0, 1] * 2)
+
+    def test_prefetch_loader(self):
+        batches = [
+            fast_collate([(np.full((3, 2, 2), 255 * j, dtype=np.uint8), j)] * 2)
+            for j in range(2)
+        ]
+        loader = PrefetchLoader(batches, mean=(0.5,) * 3, std=(0.5,) * 3, device="cpu")
+        out = list(loader)
+        self.assertEqual(len(out), 2)
+        for j, (images, targets) in enumerate(out):
+            self.assertEqual(images.dtype, flow.float32)
+            self.assertTrue(np.allclose(images.numpy(), 2.0 * j - 1.0))
+            self.assertEqual(targets.tolist(), [j, j])
+
+
+if __name__ == "__main__":
+    unittest.main()
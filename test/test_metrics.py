@@ -1,16 +1,52 @@
+import unittest
+
+import numpy as np
 import oneflow as flow
-from flowvision.utils.metrics import accuracy
+
+from flowvision.utils.metrics import (
+    ConfusionMatrix,
+    SmoothedValue,
+    accuracy,
+    topk_correct,
+)
 from flowvision.models.alexnet import alexnet
 
 
-def test_acc(preds, target):
-    return accuracy(preds, target, topk=(1, 5))
+class TestMetrics(unittest.TestCase):
+    def test_accuracy(self):
+        target = flow.arange(0, 16)
+        sample = flow.randn(16, 3, 224, 224)
+        model = alexnet()
+        preds = model(sample)
+        top1, top5 = accuracy(preds, target, topk=(1, 5))
+
+        ranks = (-preds.numpy()).argsort(1).argsort(1)[np.arange(16), target.numpy()]
+        self.assertAlmostEqual(top1.item(), (ranks < 1).mean() * 100, places=4)
+        self.assertAlmostEqual(top5.item(), (ranks < 5).mean() * 100, places=4)
+
+    def test_topk_correct(self):
+        output = flow.tensor([[0.1, 0.5, 0.4], [0.7, 0.2, 0.1]])
+        target = flow.tensor([2, 0])
+        self.assertEqual(topk_correct(output, target, (1, 2, 5)).tolist(), [1, 2, 2])
+
+    def test_smoothed_value(self):
+        meter = SmoothedValue(window_size=2)
+        for value, n in [(1.0, 2), (flow.tensor(3.0), 1), (flow.tensor(5.0), 1)]:
+            meter.update(value, n)
+        self.assertEqual(meter.value, 5.0)
+        self.assertEqual(meter.median, 4.0)
+        self.assertEqual(meter.max, 5.0)
+        self.assertEqual(meter.global_avg, 2.5)
+
+    def test_confusion_matrix(self):
+        confmat = ConfusionMatrix(3)
+        confmat.update(flow.tensor([0, 1, 2, 2, 255]), flow.tensor([0, 1, 1, 2, 0]))
+        mat = confmat.mat.reshape(3, 3).numpy()
+        self.assertTrue(np.array_equal(mat, [[1, 0, 0], [0, 1, 0], [0, 1, 1]]))
+        acc_global, _, iu = confmat.compute()
+        self.assertAlmostEqual(acc_global.item(), 0.75)
+        self.assertAlmostEqual(iu[1].item(), 0.5)
 
 
 if __name__ == "__main__":
-    target = flow.arange(0, 16)
-    sample = flow.randn(16, 3, 224, 224)
-    model = alexnet()
-    preds = model(sample)
-    top1_5 = test_acc(preds, target)
-    print(top1_5)
+    unittest.main()
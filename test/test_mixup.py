@@ -1,6 +1,7 @@
+import numpy as np
 import oneflow as flow
 
-from flowvision.data import Mixup
+from flowvision.data import Mixup, cutmix_bbox_and_lam
 
 
 def test_mixup(x, target, switch_prob=0.5, mode="batch"):
@@ -15,6 +16,43 @@ def test_mixup(x, target, switch_prob=0.5, mode="batch"):
     return x, target
 
 
+def _mix_pair_loop(mixup, x):
+    # reference per-element implementation of Mixup._mix_pair
+    batch_size = len(x)
+    lam_batch, use_cutmix = mixup._params_per_elem(batch_size // 2)
+    x_orig = x.clone()
+    for i in range(batch_size // 2):
+        j = batch_size - i - 1
+        lam = lam_batch[i]
+        if lam != 1:
+            if use_cutmix[i]:
+                (yl, yh, xl, xh), lam = cutmix_bbox_and_lam(
+                    x[i].shape, lam, correct_lam=mixup.correct_lam
+                )
+                x[i][:, yl:yh, xl:xh] = x_orig[j][:, yl:yh, xl:xh]
+                x[j][:, yl:yh, xl:xh] = x_orig[i][:, yl:yh, xl:xh]
+                lam_batch[i] = lam
+            else:
+                lam = flow.tensor(lam, device=x.device, dtype=x.dtype)
+                x[i] = x[i] * lam + x_orig[j] * (1 - lam)
+                x[j] = x[j] * lam + x_orig[i] * (1 - lam)
+    return np.concatenate((lam_batch, lam_batch[::-1]))
+
+
+def test_mix_pair_matches_loop():
+    mixup = Mixup(mixup_alpha=1.0, cutmix_alpha=1.0, mode="pair", num_classes=16)
+    x = flow.randn(16, 3, 32, 32)
+    x_ref = x.clone()
+
+    np.random.seed(0)
+    lam_ref = _mix_pair_loop(mixup, x_ref)
+    np.random.seed(0)
+    lam = mixup._mix_pair(x)
+
+    assert np.allclose(lam.numpy().squeeze(1), lam_ref)
+    assert np.allclose(x.numpy(), x_ref.numpy(), atol=1e-6)
+
+
 if __name__ == "__main__":
     x = flow.randn(16, 3, 224, 224).cuda()
     target = flow.arange(0, 16).cuda()
@@ -0,0 +1,58 @@
+import importlib
+import importlib.util
+import os
+import types
+import unittest
+
+import flowvision.models as models
+from flowvision.models import ModelCreator
+from flowvision.models._manifest import MODEL_MANIFEST
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def _load_generator():
+    path = os.path.join(ROOT, "ci", "check", "generate_model_manifest.py")
+    spec = importlib.util.spec_from_file_location("generate_model_manifest", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestModelManifest(unittest.TestCase):
+    def test_manifest_up_to_date(self):
+        generator = _load_generator()
+        with open(os.path.join(ROOT, generator.MANIFEST), "r") as f:
+            self.assertEqual(
+                f.read(), generator.render(*generator.build_manifest(ROOT))
+            )
+
+    def test_manifest_matches_registry(self):
+        for module in set(module for module, _ in MODEL_MANIFEST.values()):
+            importlib.import_module("flowvision.models." + module)
+        for name, (_, has_pretrained) in MODEL_MANIFEST.items():
+            self.assertIn(name, ModelCreator._model_entrypoints)
+            self.assertEqual(bool(ModelCreator._model_list[name]), has_pretrained)
+        self.assertEqual(
+            set(ModelCreator._model_entrypoints), set(ModelCreator.model_list())
+        )
+
+    def test_lazy_exports(self):
+        model = ModelCreator.create_model("alexnet", num_classes=10)
+        self.assertEqual(model.classifier[-1].out_features, 10)
+        # the submodule imported by create_model does not shadow the model
+        self.assertNotIsInstance(models.alexnet, types.ModuleType)
+        self.assertIsInstance(models.detection, types.ModuleType)
+        self.assertIs(models.resnet50, models.resnet.resnet50)
+        with self.assertRaises(AttributeError):
+            models.not_a_model
+
+    def test_moved_exports(self):
+        import flowvision.layers as layers
+
+        self.assertIs(models.DropPath, layers.DropPath)
+        self.assertIs(models.drop_path, layers.drop_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,7 +4,8 @@ from collections import OrderedDict
 import numpy as np
 import oneflow as flow
 from test_utils import GenArgList
-from flowvision.layers.blocks import nms
+from flowvision.layers.blocks import nms, batched_nms, batched_nms_per_image
+from flowvision.layers.blocks.boxes import split_per_image
 
 
 def box_area(boxes):
@@ -70,10 +71,31 @@ def _test_nms(test_case, device):
     test_case.assertTrue(np.allclose(keep.numpy(), keep_np))
 
 
+def _test_batched_nms_per_image(test_case, device):
+    iou = 0.5
+    num_images, num_boxes, max_per_image = 4, 200, 50
+    boxes, scores = create_tensors_with_iou(num_images * num_boxes, iou)
+    boxes = flow.tensor(boxes, dtype=flow.float32, device=flow.device(device))
+    scores = flow.tensor(scores, dtype=flow.float32, device=flow.device(device))
+    labels = flow.randint(0, 5, (num_images * num_boxes,), device=flow.device(device))
+    image_idxs = flow.arange(num_images, device=flow.device(device)).repeat_interleave(
+        num_boxes
+    )
+
+    keep = batched_nms_per_image(boxes, scores, labels, image_idxs, iou)
+    keep_per_image = split_per_image(keep, image_idxs, num_images, max_per_image)
+    test_case.assertEqual(len(keep_per_image), num_images)
+    for i, keep_i in enumerate(keep_per_image):
+        start = i * num_boxes
+        sl = slice(start, start + num_boxes)
+        expected = batched_nms(boxes[sl], scores[sl], labels[sl], iou)[:max_per_image]
+        test_case.assertTrue(np.array_equal(keep_i.numpy(), expected.numpy() + start))
+
+
 class TestNMS(unittest.TestCase):
     def test_nms(test_case):
         arg_dict = OrderedDict()
-        arg_dict["test_fun"] = [_test_nms]
+        arg_dict["test_fun"] = [_test_nms, _test_batched_nms_per_image]
         arg_dict["device"] = ["cuda"]
         for arg in GenArgList(arg_dict):
             arg[0](test_case, *arg[1:])
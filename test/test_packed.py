@@ -0,0 +1,45 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from flowvision.datasets import PackedImageDataset, pack_image_folder
+
+
+def _make_image_folder(root, classes=("cat", "dog"), per_class=3):
+    for c in classes:
+        os.makedirs(os.path.join(root, c))
+        for i in range(per_class):
+            img = np.random.randint(0, 255, (8 + i, 10, 3), dtype=np.uint8)
+            Image.fromarray(img).save(os.path.join(root, c, "{}.png".format(i)))
+
+
+class TestPackedImageDataset(unittest.TestCase):
+    def test_roundtrip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, "src")
+            out = os.path.join(tmp, "packed")
+            _make_image_folder(src)
+            # small shards to force several files
+            num = pack_image_folder(src, out, "train", shard_size=256)
+            self.assertEqual(num, 6)
+
+            dataset = PackedImageDataset(out, "train")
+            self.assertEqual(len(dataset), 6)
+            self.assertEqual(dataset.classes, ["cat", "dog"])
+            self.assertGreater(len(dataset.shards), 1)
+
+            img, target = dataset[4]
+            expected = Image.open(os.path.join(src, "dog", "1.png")).convert("RGB")
+            self.assertEqual(target, 1)
+            self.assertTrue(np.array_equal(np.asarray(img), np.asarray(expected)))
+
+            clone = pickle.loads(pickle.dumps(dataset))
+            self.assertTrue(np.array_equal(np.asarray(clone[4][0]), np.asarray(img)))
+
+
+if __name__ == "__main__":
+    unittest.main()
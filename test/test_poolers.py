@@ -0,0 +1,55 @@
+import unittest
+from collections import OrderedDict
+
+import numpy as np
+import oneflow as flow
+
+from flowvision.layers import MultiScaleRoIAlign
+from flowvision.layers.blocks.roi_align import roi_align
+
+
+def _boxes(num_boxes, size):
+    xy = flow.rand(num_boxes, 2) * size / 2
+    wh = flow.rand(num_boxes, 2) * size / 2 + 1
+    return flow.cat([xy, xy + wh], dim=1)
+
+
+class TestMultiScaleRoIAlign(unittest.TestCase):
+    def test_matches_per_level(self):
+        features = OrderedDict(
+            (name, flow.rand(2, 4, 64 // 2 ** i, 64 // 2 ** i))
+            for i, name in enumerate(["p2", "p3", "p4", "p5"])
+        )
+        boxes = [_boxes(30, 256), _boxes(20, 256)]
+        pooler = MultiScaleRoIAlign(["p2", "p3", "p4", "p5"], 7, 2)
+        result = pooler(features, boxes, [(256, 256), (256, 256)])
+        self.assertEqual(result.shape, (50, 4, 7, 7))
+
+        levels = pooler.map_levels(boxes).numpy()
+        self.assertGreater(len(np.unique(levels)), 1)
+        rois = flow.cat(
+            [
+                flow.cat([flow.full((len(b), 1), i), b], dim=1)
+                for i, b in enumerate(boxes)
+            ]
+        )
+        for level, (feature, scale) in enumerate(zip(features.values(), pooler.scales)):
+            idx = np.nonzero(levels == level)[0]
+            if len(idx) == 0:
+                continue
+            expected = roi_align(feature, rois[flow.tensor(idx)], 7, scale, 2)
+            self.assertTrue(
+                np.allclose(result.numpy()[idx], expected.numpy(), atol=1e-5)
+            )
+
+    def test_no_boxes(self):
+        features = OrderedDict(
+            [("p2", flow.rand(1, 4, 16, 16)), ("p3", flow.rand(1, 4, 8, 8))]
+        )
+        pooler = MultiScaleRoIAlign(["p2", "p3"], 7, 2)
+        result = pooler(features, [flow.zeros(0, 4)], [(64, 64)])
+        self.assertEqual(result.shape, (0, 4, 7, 7))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import importlib.util
+import os
+import unittest
+
+BENCHMARK_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..",
+    "projects",
+    "benchmark",
+    "classification",
+)
+
+
+def _load_speed_benchmark():
+    spec = importlib.util.spec_from_file_location(
+        "speed_benchmark", os.path.join(BENCHMARK_DIR, "speed_benchmark.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestSpeedBenchmark(unittest.TestCase):
+    def test_default_img_size(self):
+        default_img_size = _load_speed_benchmark().default_img_size
+        for model_name, img_size in [
+            ("resnet50", 224),
+            ("inception_v3", 299),
+            ("convmixer_768_32_relu", 224),
+            ("vit_base_patch16_384", 384),
+            ("convnext_base_384_22k_to_1k", 384),
+            ("swin_base_patch4_window12_384_in22k_to_1k", 384),
+            ("mlp_mixer_b16_224_miil_in21k", 224),
+        ]:
+            self.assertEqual(default_img_size(model_name), img_size, model_name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+import numpy as np
+import oneflow as flow
+
+from flowvision.models.swin_transformer import SwinTransformer
+
+
+def _tiny_swin(**kwargs):
+    return SwinTransformer(
+        img_size=64,
+        embed_dim=16,
+        depths=[2, 2],
+        num_heads=[1, 2],
+        window_size=4,
+        num_classes=10,
+        **kwargs,
+    )
+
+
+class TestSwinTransformer(unittest.TestCase):
+    def test_cached_bias(self):
+        model = _tiny_swin(cache_bias=True).eval()
+        reference = _tiny_swin()
+        reference.load_state_dict(model.state_dict())
+        reference.eval()
+
+        x = flow.randn(2, 3, 64, 64)
+        with flow.no_grad():
+            out = model(x)
+            self.assertTrue(np.allclose(out.numpy(), reference(x).numpy(), atol=1e-5))
+
+            attn = model.layers[0].blocks[0].attn
+            self.assertIs(
+                attn.get_relative_position_bias(), attn.get_relative_position_bias()
+            )
+            attn.relative_position_bias_table.zero_()
+            attn.clear_bias_cache()
+            self.assertEqual(attn.get_relative_position_bias().abs().sum().item(), 0)
+
+    def test_dynamic_resolution(self):
+        model = _tiny_swin().eval()
+        with flow.no_grad():
+            for size in [(64, 64), (96, 80), (50, 70)]:
+                out = model(flow.randn(1, 3, *size))
+                self.assertEqual(tuple(out.shape), (1, 10))
+            self.assertEqual(len(model.layers[0].blocks[1]._attn_masks), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
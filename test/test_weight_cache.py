@@ -0,0 +1,52 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import oneflow as flow
+
+from flowvision.models import utils
+
+
+class TestWeightCache(unittest.TestCase):
+    def test_flat_store(self):
+        state_dict = {
+            "weight": flow.randn(3, 5),
+            "bias": flow.randn(3),
+            "num_batches_tracked": flow.tensor(7, dtype=flow.int64),
+        }
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            flow.save(state_dict, os.path.join(tmp_dir, "weights"))
+            # pretrained weights are published as zipped checkpoint directories
+            archive = shutil.make_archive(
+                os.path.join(tmp_dir, "weights"), "zip", tmp_dir, "weights"
+            )
+            url = "file://" + archive
+            model_dir = os.path.join(tmp_dir, "cache")
+            utils.clear_state_dict_cache()
+
+            first = utils.load_state_dict_from_url(url, model_dir, progress=False)
+            self.assertTrue(
+                os.path.exists(os.path.join(model_dir, "weights.flat.json"))
+            )
+            self.assertEqual(len(utils._state_dict_cache), 1)
+            for name, value in state_dict.items():
+                self.assertTrue(np.array_equal(first[name].numpy(), value.numpy()))
+
+            # served from the in-process cache, as a new dict of the same tensors
+            second = utils.load_state_dict_from_url(url, model_dir, progress=False)
+            self.assertIsNot(first, second)
+            self.assertIs(first["weight"], second["weight"])
+
+            # mapped again from the flat store
+            utils.clear_state_dict_cache()
+            third = utils.load_state_dict_from_url(url, model_dir, progress=False)
+            self.assertEqual(list(third.keys()), list(state_dict.keys()))
+            self.assertTrue(
+                np.array_equal(third["bias"].numpy(), first["bias"].numpy())
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()